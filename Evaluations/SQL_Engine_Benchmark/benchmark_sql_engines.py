@@ -0,0 +1,174 @@
+"""
+Benchmark SQLite vs DuckDB execution of the SQL queries logged by the agent.
+
+Reads every query stored in analysis_results.jsonl (written by save_node),
+executes each one on both engines used by the sqlite_query tool and reports
+per-query median latency, speedup, DuckDB dialect fallbacks and result
+mismatches. Latency is measured with the tool's row cap; results are compared
+on the complete, sorted result sets of both engines.
+
+Usage:
+    python Evaluations/SQL_Engine_Benchmark/benchmark_sql_engines.py [--repeats 5] [--output report.json]
+
+Requirements:
+    - data/czsu_data.db
+    - duckdb installed (pip install .[duckdb]); the columnar copy is (re)built
+      if DUCKDB_DATABASE_PATH is missing or was built from another czsu_data.db
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from decimal import Decimal
+from pathlib import Path
+
+# Handle base directory path
+try:
+    BASE_DIR = Path(__file__).resolve().parents[2]
+except NameError:
+    BASE_DIR = Path(os.getcwd()).parents[0]
+
+if str(BASE_DIR) not in sys.path:
+    sys.path.insert(0, str(BASE_DIR))
+
+from my_agent.utils import duckdb_engine
+from my_agent.utils.sql_guard import execute_guarded_query
+from my_agent.utils.sqlite_pool import get_sqlite_pool
+
+ANALYSIS_RESULTS_PATH = BASE_DIR / "analysis_results.jsonl"
+
+
+def load_logged_queries(path: Path):
+    """Return unique SQL queries from analysis_results.jsonl in first-seen order."""
+    queries = []
+    seen = set()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            for item in record.get("queries_and_results", []):
+                query = item.get("query") if isinstance(item, dict) else item[0]
+                if query and query.strip() not in seen:
+                    seen.add(query.strip())
+                    queries.append(query.strip())
+    return queries
+
+
+# Row cap for the result comparison, high enough to never truncate
+COMPARE_MAX_ROWS = sys.maxsize
+
+
+def _normalize_value(value):
+    # SQLite returns 2 where DuckDB returns 2.0 or Decimal("2")
+    if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+        return round(float(value), 6)
+    return value
+
+
+def _normalize_rows(rows):
+    normalized = [tuple(_normalize_value(v) for v in row) for row in rows]
+    return sorted(normalized, key=repr)
+
+
+def run_sqlite(query, max_rows=None):
+    with get_sqlite_pool().connection() as conn:
+        return execute_guarded_query(conn, query, max_rows=max_rows)
+
+
+def results_match(query):
+    """Compare the complete, sorted results of both engines (not the capped ones)."""
+    sqlite_result = run_sqlite(query, max_rows=COMPARE_MAX_ROWS)
+    duck_result = duckdb_engine.execute_duckdb_query(query, max_rows=COMPARE_MAX_ROWS)
+    if sqlite_result["status"] != "ok" or duck_result["status"] != "ok":
+        return None
+    return _normalize_rows(sqlite_result["rows"]) == _normalize_rows(
+        duck_result["rows"]
+    )
+
+
+def time_engine(func, query, repeats):
+    timings = []
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func(query)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--input", type=Path, default=ANALYSIS_RESULTS_PATH)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    if duckdb_engine.duckdb is None:
+        sys.exit("duckdb is not installed (pip install .[duckdb])")
+    if not duckdb_engine.is_columnar_copy_current():
+        print("Building DuckDB columnar copy...")
+        duckdb_engine.build_columnar_copy()
+
+    queries = load_logged_queries(args.input)
+    print(f"Loaded {len(queries)} unique queries from {args.input}")
+
+    rows = []
+    for index, query in enumerate(queries, 1):
+        entry = {"query": query}
+        try:
+            entry["sqlite_ms"], sqlite_result = time_engine(run_sqlite, query, args.repeats)
+            entry["sqlite_status"] = sqlite_result["status"]
+        except Exception as e:
+            entry["sqlite_error"] = str(e)
+            sqlite_result = None
+        try:
+            entry["duckdb_ms"], duck_result = time_engine(
+                duckdb_engine.execute_duckdb_query, query, args.repeats
+            )
+            entry["duckdb_status"] = duck_result["status"]
+            if sqlite_result is not None:
+                entry["results_match"] = results_match(query)
+        except duckdb_engine.DuckDBFallback as e:
+            entry["duckdb_fallback"] = str(e).splitlines()[0]
+        if "sqlite_ms" in entry and "duckdb_ms" in entry and entry["duckdb_ms"] > 0:
+            entry["speedup"] = round(entry["sqlite_ms"] / entry["duckdb_ms"], 2)
+        rows.append(entry)
+        print(
+            f"[{index}/{len(queries)}] sqlite={entry.get('sqlite_ms', float('nan')):.2f}ms "
+            f"duckdb={entry.get('duckdb_ms', float('nan')):.2f}ms "
+            f"speedup={entry.get('speedup', '-')}"
+            + (" FALLBACK" if "duckdb_fallback" in entry else "")
+            + (" MISMATCH" if entry.get("results_match") is False else "")
+        )
+
+    compared = [r for r in rows if "speedup" in r]
+    summary = {
+        "queries": len(rows),
+        "compared": len(compared),
+        "duckdb_fallbacks": sum(1 for r in rows if "duckdb_fallback" in r),
+        "sqlite_errors": sum(1 for r in rows if "sqlite_error" in r),
+        "result_mismatches": sum(1 for r in rows if r.get("results_match") is False),
+        "median_speedup": (
+            statistics.median(r["speedup"] for r in compared) if compared else None
+        ),
+        "sqlite_total_ms": round(sum(r["sqlite_ms"] for r in compared), 2),
+        "duckdb_total_ms": round(sum(r["duckdb_ms"] for r in compared), 2),
+    }
+    print(json.dumps(summary, indent=2))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"summary": summary, "queries": rows}, f, ensure_ascii=False, indent=2)
+        print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Byte-bounded LRU cache of serialized bulk chat payloads.
+
+/chat/all-messages-for-all-threads used to keep every user's full payload dict
+in a plain dict for BULK_CACHE_TIMEOUT seconds, cleaned only under memory
+pressure, with one never-pruned asyncio.Lock per user. This cache instead:
+
+- stores one entry per user: the serialized JSON body (served as-is on a hit)
+  and the ETag of the state it was built from; a lookup with another ETag is
+  a miss,
+- accounts entries by their byte size and evicts least recently used entries
+  beyond BULK_CACHE_MAX_MB; a payload larger than the budget is not cached,
+- is invalidated explicitly by analysis, deletion and sentiment writes,
+- hands out per-user locks that are dropped as soon as nobody holds or waits
+  for them.
+
+Configuration (environment variables):
+    - BULK_CACHE_MAX_MB: Size budget of all cached payloads (default 64)
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional, Tuple
+
+
+class BulkLoadingCache:
+    def __init__(self, max_bytes: int, ttl_seconds: float):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        # user_email -> (etag, body, created)
+        self._entries: "OrderedDict[str, Tuple[str, bytes, float]]" = OrderedDict()
+        self._bytes = 0
+        self._guard = threading.Lock()
+        # user_email -> [lock, holders and waiters]
+        self.locks: Dict[str, list] = {}
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0,
+            "oversized": 0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove_locked(self, user_email: str) -> None:
+        _, body, _ = self._entries.pop(user_email)
+        self._bytes -= len(body)
+
+    def get(self, user_email: str, etag: str) -> Optional[Tuple[bytes, float]]:
+        """Return (body, age in seconds) of the user's payload for this ETag."""
+        now = time.time()
+        with self._guard:
+            entry = self._entries.get(user_email)
+            if entry is not None and now - entry[2] > self.ttl_seconds:
+                self._remove_locked(user_email)
+                self._stats["expirations"] += 1
+                entry = None
+            if entry is None or entry[0] != etag:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(user_email)
+            self._stats["hits"] += 1
+            return entry[1], now - entry[2]
+
+    def put(self, user_email: str, etag: str, body: bytes) -> bool:
+        """Store the user's payload, replacing any older one; False if it does not fit."""
+        with self._guard:
+            if user_email in self._entries:
+                self._remove_locked(user_email)
+            if len(body) > self.max_bytes:
+                self._stats["oversized"] += 1
+                return False
+            while self._entries and self._bytes + len(body) > self.max_bytes:
+                self._remove_locked(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+            self._entries[user_email] = (etag, body, time.time())
+            self._bytes += len(body)
+            self._stats["stores"] += 1
+            return True
+
+    def invalidate_user(self, user_email: str) -> bool:
+        with self._guard:
+            if user_email not in self._entries:
+                return False
+            self._remove_locked(user_email)
+            self._stats["invalidations"] += 1
+            return True
+
+    def cleanup_expired(self) -> int:
+        now = time.time()
+        with self._guard:
+            expired = [
+                user_email
+                for user_email, (_, _, created) in self._entries.items()
+                if now - created > self.ttl_seconds
+            ]
+            for user_email in expired:
+                self._remove_locked(user_email)
+            self._stats["expirations"] += len(expired)
+            return len(expired)
+
+    def clear(self) -> int:
+        with self._guard:
+            cleared = len(self._entries)
+            self._entries.clear()
+            self._bytes = 0
+            return cleared
+
+    @asynccontextmanager
+    async def user_lock(self, user_email: str):
+        """Serialize bulk loads of one user; the lock is dropped once unused."""
+        entry = self.locks.setdefault(user_email, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0 and self.locks.get(user_email) is entry:
+                del self.locks[user_email]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._guard:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": round(self._stats["hits"] / lookups, 3) if lookups else 0.0,
+                "entries": len(self._entries),
+                "size_bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "active_locks": len(self.locks),
+                "ttl_seconds": self.ttl_seconds,
+            }
@@ -27,6 +27,8 @@ import asyncio
 import time
 from collections import defaultdict
 
+from api.config.bulk_cache import BulkLoadingCache
+
 # ============================================================
 # CONFIGURATION AND CONSTANTS
 # ============================================================
@@ -55,6 +57,35 @@ MAX_CONCURRENT_ANALYSES = int(
     os.environ.get("MAX_CONCURRENT_ANALYSES", "3")
 )  # Read from .env with fallback to 3
 analysis_semaphore = asyncio.Semaphore(MAX_CONCURRENT_ANALYSES)
+ANALYSIS_TIMEOUT_SECONDS = 480  # 8 minutes timeout for platform stability
+
+# Cluster-wide cap on concurrent analyses across all processes (0 = per-process limit only)
+ANALYSIS_GLOBAL_MAX_CONCURRENT = int(
+    os.environ.get("ANALYSIS_GLOBAL_MAX_CONCURRENT", str(MAX_CONCURRENT_ANALYSES))
+)
+ANALYSIS_LEASE_TTL_SECONDS = int(
+    os.environ.get("ANALYSIS_LEASE_TTL_SECONDS", "60")
+)  # Leases of a process that stopped heartbeating expire after this
+ANALYSIS_ADMISSION_MAX_WAIT_SECONDS = int(
+    os.environ.get("ANALYSIS_ADMISSION_MAX_WAIT_SECONDS", "120")
+)  # Longest wait for a free analysis slot before answering 503
+
+# Asynchronous analysis jobs (POST /analyze/jobs)
+ANALYSIS_JOB_WORKERS = int(
+    os.environ.get("ANALYSIS_JOB_WORKERS", str(MAX_CONCURRENT_ANALYSES))
+)  # Workers per process (they share the analysis slots of /analyze)
+ANALYSIS_JOB_QUEUE_SIZE = int(
+    os.environ.get("ANALYSIS_JOB_QUEUE_SIZE", "20")
+)  # Queued jobs per process before submissions get 503
+ANALYSIS_JOB_MAX_PER_USER = int(
+    os.environ.get("ANALYSIS_JOB_MAX_PER_USER", "3")
+)  # Queued or running jobs per user before submissions get 429
+ANALYSIS_JOB_HEARTBEAT_SECONDS = int(
+    os.environ.get("ANALYSIS_JOB_HEARTBEAT_SECONDS", "30")
+)  # How often a process marks its unfinished jobs as alive
+ANALYSIS_JOB_STALE_SECONDS = int(
+    os.environ.get("ANALYSIS_JOB_STALE_SECONDS", "120")
+)  # Unfinished jobs without a heartbeat this long are reported as failed
 
 # RATE LIMITING: Global rate limiting storage
 rate_limit_storage = defaultdict(list)
@@ -69,9 +100,14 @@ throttle_semaphores = defaultdict(
 )  # Max 8 concurrent requests per IP
 
 # Global cache for bulk loading to prevent repeated calls
-_bulk_loading_cache = {}
-_bulk_loading_locks = defaultdict(asyncio.Lock)
 BULK_CACHE_TIMEOUT = 30  # Cache timeout in seconds
+BULK_CACHE_MAX_MB = int(
+    os.environ.get("BULK_CACHE_MAX_MB", "64")
+)  # Size budget of all cached bulk payloads
+_bulk_loading_cache = BulkLoadingCache(
+    BULK_CACHE_MAX_MB * 1024 * 1024, BULK_CACHE_TIMEOUT
+)
+_bulk_loading_locks = _bulk_loading_cache.locks  # Per-user locks, dropped once unused
 
 GOOGLE_JWK_URL = "https://www.googleapis.com/oauth2/v3/certs"
 
@@ -70,6 +70,7 @@ from api.utils.rate_limiting import (
 # Import database functions
 sys.path.insert(0, str(BASE_DIR))
 from api.routes.analysis import router as analysis_router
+from api.routes.analysis import run_analysis_job
 from api.routes.bulk import router as bulk_router
 from api.routes.catalog import router as catalog_router
 from api.routes.chat import router as chat_router
@@ -80,10 +81,19 @@ from api.routes.feedback import router as feedback_router
 from api.routes.health import router as health_router
 from api.routes.messages import router as messages_router
 from api.routes.misc import router as misc_router
+from api.utils.analysis_admission import (
+    start_analysis_admission,
+    stop_analysis_admission,
+)
+from api.utils.analysis_jobs import (
+    start_analysis_job_workers,
+    stop_analysis_job_workers,
+)
 from my_agent.utils.postgres_checkpointer import (
     cleanup_checkpointer,
     initialize_checkpointer,
 )
+from my_agent.utils.value_index import start_value_index_refresh
 
 
 # Lifespan management function
@@ -111,6 +121,10 @@ async def lifespan(app: FastAPI):
     setup_graceful_shutdown()
 
     await initialize_checkpointer()
+    await start_analysis_admission()
+    await start_analysis_job_workers(run_analysis_job)
+    # Dimension value lookups stay unavailable until this background build is done
+    start_value_index_refresh()
 
     # Set memory baseline after initialization
     if _memory_baseline is None:
@@ -153,6 +167,9 @@ async def lifespan(app: FastAPI):
         except:
             pass
 
+    # Fail still-queued jobs while the database is reachable
+    await stop_analysis_job_workers()
+    await stop_analysis_admission()
     await cleanup_checkpointer()
 
 
@@ -306,7 +323,12 @@ async def http_exception_handler(request: Request, exc: StarletteHTTPException):
             f"🚨 HTTP {exc.status_code} TRACE: Full traceback:\n{traceback.format_exc()}"
         )
 
-    return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
+    # Keep headers such as Retry-After set by the raising code
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": exc.detail},
+        headers=getattr(exc, "headers", None),
+    )
 
 
 @app.exception_handler(ValueError)
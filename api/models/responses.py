@@ -42,10 +42,11 @@ class ChatThreadResponse(BaseModel):
 
 class PaginatedChatThreadsResponse(BaseModel):
     threads: List[ChatThreadResponse]
-    total_count: int
+    total_count: Optional[int]  # None on cursor pages, which skip the count
     page: int
     limit: int
     has_more: bool
+    next_cursor: Optional[str] = None  # Pass as ?cursor= to get the next page
 
 
 class ChatMessage(BaseModel):
@@ -56,6 +57,7 @@ class ChatMessage(BaseModel):
     prompt: Optional[str] = None
     final_answer: Optional[str] = None
     queries_and_results: Optional[List[List[str]]] = None
+    structured_query_results: Optional[List[dict]] = None
     datasets_used: Optional[List[str]] = None
     top_chunks: Optional[List[dict]] = None
     sql_query: Optional[str] = None
@@ -1,6 +1,7 @@
 # CRITICAL: Set Windows event loop policy FIRST, before any other imports
 # This must be the very first thing that happens to fix psycopg compatibility
 import asyncio
+import json
 import os
 import sys
 import traceback
@@ -23,13 +24,14 @@ except NameError:
     BASE_DIR = Path(os.getcwd()).parents[0]
 
 from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 
 # Import configuration and globals
 from api.config.settings import (
+    ANALYSIS_TIMEOUT_SECONDS,
     INMEMORY_FALLBACK_ENABLED,
     MAX_CONCURRENT_ANALYSES,
-    analysis_semaphore,
+    _bulk_loading_cache,
 )
 
 # Import authentication dependencies
@@ -45,15 +47,30 @@ from api.utils.debug import (
     print__feedback_flow,
 )
 
+# Import cluster-wide analysis admission and the analysis job queue
+from api.utils.analysis_admission import analysis_slot
+from api.utils.analysis_jobs import (
+    FINISHED_JOB_STATUSES,
+    admit_analysis_job,
+    create_analysis_job,
+    discard_analysis_job,
+    get_analysis_job,
+    release_analysis_job,
+    submit_analysis_job,
+    wait_for_analysis_job,
+)
+
 # Import memory utilities
 from api.utils.memory import log_memory_usage
 
 # Import database connection functions
 sys.path.insert(0, str(BASE_DIR))
-# NEW: Import for calling the single-thread endpoint
-import httpx
-
 from api.helpers import traceback_json_response
+from api.routes.chat import (
+    format_chunk_for_chat,
+    save_failed_interaction,
+    save_interaction_from_result,
+)
 from main import main as analysis_main
 from my_agent.utils.postgres_checkpointer import (
     create_thread_run_entry,
@@ -66,116 +83,50 @@ load_dotenv()
 # Create router for analysis endpoints
 router = APIRouter()
 
+ANALYSIS_JOB_EVENTS_POLL_SECONDS = 2  # Status checks of /analyze/jobs/{run_id}/events
 
-async def get_thread_metadata_from_single_thread_endpoint(
-    thread_id: str, user_email: str
-) -> dict:
-    """Call the single-thread endpoint to get metadata for a specific thread."""
-    try:
-        print__analyze_debug(
-            f"🔍 Calling single-thread endpoint for thread: {thread_id}"
-        )
-        print__analysis_tracing_debug(
-            f"METADATA EXTRACTION: Calling /chat/all-messages-for-one-thread/{thread_id}"
-        )
-
-        # Import the single-thread function directly to avoid HTTP overhead
-        from unittest.mock import Mock
-
-        from fastapi import Request
-
-        from api.routes.chat import get_all_chat_messages_for_one_thread
-
-        # Create a mock user object
-        mock_user = {"email": user_email}
-
-        # Call the function directly instead of making HTTP request
-        print__analyze_debug(f"🔍 Calling single-thread function directly")
-        result = await get_all_chat_messages_for_one_thread(thread_id, mock_user)
-
-        if isinstance(result, dict):
-            # If it's a direct dict response (from cache hit or direct return)
-            response_data = result
-        else:
-            # If it's a JSONResponse object, extract the content
-            if hasattr(result, "body"):
-                import json
-
-                response_data = json.loads(result.body.decode())
-            else:
-                print__analyze_debug(
-                    f"⚠️ Unexpected response type from single-thread endpoint: {type(result)}"
-                )
-                return {}
-
-        print__analyze_debug(
-            f"🔍 Single-thread endpoint returned {len(response_data.get('messages', []))} messages"
-        )
-
-        # Extract metadata from the latest AI message
-        messages = response_data.get("messages", [])
-        run_ids = response_data.get("runIds", [])
-        sentiments = response_data.get("sentiments", {})
-
-        # Find the latest completed message that has final_answer and metadata
-        latest_ai_message = None
-        for message in reversed(messages):
-            # With unified structure, look for messages that have final_answer
-            if message.get("final_answer") and message.get("datasets_used"):
-                latest_ai_message = message
-                break
-
-        metadata = {}
-        if latest_ai_message:
-            # Extract metadata directly from the unified message structure
-            metadata.update(
-                {
-                    "top_selection_codes": latest_ai_message.get("datasets_used", []),
-                    "datasets_used": latest_ai_message.get("datasets_used", []),
-                    "queries_and_results": latest_ai_message.get(
-                        "queries_and_results", []
-                    ),
-                    "sql": latest_ai_message.get("sql_query"),
-                    "dataset_url": None,  # Not used in current structure
-                    "top_chunks": latest_ai_message.get("top_chunks", []),
-                }
-            )
-            print__analyze_debug(
-                f"🔍 Extracted metadata: top_selection_codes={len(metadata.get('top_selection_codes', []))}"
-            )
-        else:
-            print__analyze_debug(
-                f"⚠️ No AI message with metadata found in single-thread response"
-            )
-            # Return empty metadata if no AI message found
-            metadata = {
-                "top_selection_codes": [],
-                "datasets_used": [],
-                "queries_and_results": [],
-                "sql": None,
-                "dataset_url": None,
-                "top_chunks": [],
-            }
-
-        return metadata
-
-    except Exception as e:
-        print__analyze_debug(f"🚨 Error calling single-thread endpoint: {e}")
-        print__analysis_tracing_debug(f"METADATA EXTRACTION ERROR: {e}")
 
-        resp = traceback_json_response(e)
-        if resp:
-            return resp
-
-        # Return empty metadata on error
-        return {
-            "top_selection_codes": [],
-            "datasets_used": [],
-            "queries_and_results": [],
-            "sql": None,
-            "dataset_url": None,
-            "top_chunks": [],
-        }
+def build_analysis_response(
+    prompt: str, thread_id: str, run_id: str, result: dict
+) -> dict:
+    """Shape main()'s result into the /analyze response (no thread reload)."""
+    top_selection_codes = result.get("top_selection_codes", [])
+    return {
+        "prompt": prompt,
+        "result": result.get("result", ""),
+        "queries_and_results": result.get("queries_and_results", []),
+        "thread_id": thread_id,
+        "top_selection_codes": top_selection_codes,
+        "datasets_used": top_selection_codes,
+        "iteration": result.get("iteration", 0),
+        "max_iterations": result.get("max_iterations", 2),
+        "sql": result.get("sql"),
+        "datasetUrl": result.get("datasetUrl"),
+        "run_id": run_id,
+        # Same chunk format as the chat history endpoints
+        "top_chunks": [
+            format_chunk_for_chat(chunk) for chunk in result.get("top_chunks") or []
+        ],
+    }
+
+
+async def run_analysis_job(job: dict) -> dict:
+    """Run one queued analysis job; the job workers apply the timeout."""
+    checkpointer = await get_healthy_checkpointer()
+    result = await analysis_main(
+        job["prompt"],
+        thread_id=job["thread_id"],
+        checkpointer=checkpointer,
+        run_id=job["run_id"],
+    )
+    # Materialize the interaction for the chat history endpoints
+    await save_interaction_from_result(
+        job["email"], job["thread_id"], job["run_id"], result
+    )
+    _bulk_loading_cache.invalidate_user(job["email"])
+    return build_analysis_response(
+        job["prompt"], job["thread_id"], job["run_id"], result
+    )
 
 
 @router.post("/analyze")
@@ -187,6 +138,12 @@ async def analyze(request: AnalyzeRequest, user=Depends(get_current_user)):
     print__analyze_debug(f"🔍 Request received: thread_id={request.thread_id}")
     print__analyze_debug(f"🔍 Request prompt length: {len(request.prompt)}")
 
+    user_email = None
+    run_id = None
+    interaction_saved = False
+    interaction_error = (
+        "Sorry, there was an error processing your request. Please try again."
+    )
     try:
         print__analysis_tracing_debug(
             "02 - USER EXTRACTION: Getting user email from token"
@@ -212,14 +169,13 @@ async def analyze(request: AnalyzeRequest, user=Depends(get_current_user)):
         # Simple memory check
         print__analyze_debug("🔍 Starting memory logging")
         log_memory_usage("analysis_start")
-        run_id = None
 
         print__analysis_tracing_debug(
             "06 - SEMAPHORE ACQUISITION: Attempting to acquire analysis semaphore"
         )
         print__analyze_debug("🔍 About to acquire analysis semaphore")
-        # Limit concurrent analyses to prevent resource exhaustion
-        async with analysis_semaphore:
+        # Limit concurrent analyses (per process and cluster-wide) to prevent resource exhaustion
+        async with analysis_slot(request.thread_id):
             print__analysis_tracing_debug(
                 "07 - SEMAPHORE ACQUIRED: Analysis semaphore acquired"
             )
@@ -269,7 +225,7 @@ async def analyze(request: AnalyzeRequest, user=Depends(get_current_user)):
                         checkpointer=checkpointer,
                         run_id=run_id,
                     ),
-                    timeout=480,  # 8 minutes timeout
+                    timeout=ANALYSIS_TIMEOUT_SECONDS,
                 )
 
                 print__analysis_tracing_debug(
@@ -282,6 +238,8 @@ async def analyze(request: AnalyzeRequest, user=Depends(get_current_user)):
                 print__analysis_tracing_debug(
                     f"14 - ANALYSIS ERROR: Exception in analysis block - {type(analysis_error).__name__}"
                 )
+                if isinstance(analysis_error, asyncio.TimeoutError):
+                    interaction_error = f"Analysis timed out after {ANALYSIS_TIMEOUT_SECONDS // 60} minutes"
                 print__analyze_debug(
                     f"🚨 Exception in analysis block: {type(analysis_error).__name__}: {str(analysis_error)}"
                 )
@@ -402,7 +360,7 @@ async def analyze(request: AnalyzeRequest, user=Depends(get_current_user)):
                                 checkpointer=fallback_checkpointer,
                                 run_id=run_id,
                             ),
-                            timeout=480,  # 8 minutes timeout
+                            timeout=ANALYSIS_TIMEOUT_SECONDS,
                         )
 
                         print__analysis_tracing_debug(
@@ -452,55 +410,29 @@ async def analyze(request: AnalyzeRequest, user=Depends(get_current_user)):
                         detail="Sorry, there was an error processing your request. Please try again.",
                     )
 
+            # Materialize the interaction for the chat history endpoints
+            await save_interaction_from_result(
+                user_email, request.thread_id, run_id, result
+            )
+            interaction_saved = True
+            _bulk_loading_cache.invalidate_user(user_email)
+
             print__analysis_tracing_debug(
                 "24 - RESPONSE PREPARATION: Preparing response data"
             )
             print__analyze_debug(f"🔍 About to prepare response data")
 
-            # NEW: Get metadata from single-thread endpoint instead of analysis result
-            print__analysis_tracing_debug(
-                "24a - METADATA EXTRACTION: Getting metadata from single-thread endpoint"
-            )
-            print__analyze_debug(
-                f"🔍 Getting metadata from single-thread endpoint for thread: {request.thread_id}"
-            )
-            thread_metadata = await get_thread_metadata_from_single_thread_endpoint(
-                request.thread_id, user_email
-            )
-            print__analyze_debug(
-                f"🔍 Retrieved metadata from single-thread endpoint: {list(thread_metadata.keys())}"
+            # Response metadata comes straight from main()'s result (no thread reload)
+            response_data = build_analysis_response(
+                request.prompt, request.thread_id, run_id, result
             )
 
-            # Simple response preparation with metadata from single-thread endpoint
-            response_data = {
-                "prompt": request.prompt,
-                "result": (
-                    result["result"]
-                    if isinstance(result, dict) and "result" in result
-                    else str(result)
-                ),
-                "queries_and_results": thread_metadata.get("queries_and_results", []),
-                "thread_id": request.thread_id,
-                "top_selection_codes": thread_metadata.get("top_selection_codes", []),
-                "datasets_used": thread_metadata.get("datasets_used", []),
-                "iteration": (
-                    result.get("iteration", 0) if isinstance(result, dict) else 0
-                ),
-                "max_iterations": (
-                    result.get("max_iterations", 2) if isinstance(result, dict) else 2
-                ),
-                "sql": thread_metadata.get("sql", None),
-                "datasetUrl": thread_metadata.get("dataset_url", None),
-                "run_id": run_id,
-                "top_chunks": thread_metadata.get("top_chunks", []),
-            }
-
-            # DEBUG: Log what was extracted for metadata from single-thread endpoint
+            # DEBUG: Log the response metadata
             print__analyze_debug(
-                f"🔍 DEBUG RESPONSE: datasets_used extracted from single-thread: {response_data['datasets_used']}"
+                f"🔍 DEBUG RESPONSE: datasets_used: {response_data['datasets_used']}"
             )
             print__analyze_debug(
-                f"🔍 DEBUG RESPONSE: top_selection_codes extracted from single-thread: {response_data['top_selection_codes']}"
+                f"🔍 DEBUG RESPONSE: top_selection_codes: {response_data['top_selection_codes']}"
             )
             print__analyze_debug(
                 f"🔍 DEBUG RESPONSE: queries_and_results count: {len(response_data['queries_and_results'])}"
@@ -566,3 +498,109 @@ async def analyze(request: AnalyzeRequest, user=Depends(get_current_user)):
             status_code=500,
             detail="Sorry, there was an error processing your request. Please try again.",
         )
+
+    finally:
+        # Failed, timed-out and cancelled runs are stored too, so reading the
+        # thread never falls back to scanning its checkpoints for them
+        if run_id is not None and not interaction_saved:
+            if await save_failed_interaction(
+                user_email, request.thread_id, run_id, request.prompt, interaction_error
+            ):
+                _bulk_loading_cache.invalidate_user(user_email)
+
+
+@router.post("/analyze/jobs", status_code=202)
+async def submit_analysis(request: AnalyzeRequest, user=Depends(get_current_user)):
+    """Queue an analysis and return its run_id without waiting for the result.
+
+    Poll GET /analyze/jobs/{run_id} or subscribe to /analyze/jobs/{run_id}/events.
+    """
+    user_email = user.get("email")
+    if not user_email:
+        raise HTTPException(status_code=401, detail="User email not found in token")
+    print__analyze_debug(
+        f"🔍 ANALYSIS JOB SUBMIT: thread_id={request.thread_id}, user={user_email}"
+    )
+
+    try:
+        # A retried submission gets the job that is already working on it
+        job, created = await create_analysis_job(
+            user_email, request.thread_id, request.prompt
+        )
+        if not created:
+            print__analyze_debug(f"🔍 Resubmission of unfinished job {job['run_id']}")
+            return {**job, "deduplicated": True}
+
+        try:
+            admit_analysis_job()
+            try:
+                await create_thread_run_entry(
+                    user_email, request.thread_id, request.prompt, job["run_id"]
+                )
+            except Exception:
+                release_analysis_job()
+                raise
+        except Exception:
+            await discard_analysis_job(job["run_id"])
+            raise
+        log_memory_usage("analysis_job_submitted")
+        submit_analysis_job(job, user_email, request.prompt)
+        return {**job, "deduplicated": False}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print__analyze_debug(f"🚨 ANALYSIS JOB SUBMIT FAILED: {type(e).__name__}: {e}")
+        resp = traceback_json_response(e)
+        if resp:
+            return resp
+        raise HTTPException(
+            status_code=500,
+            detail="Sorry, there was an error processing your request. Please try again.",
+        )
+
+
+@router.get("/analyze/jobs/{run_id}")
+async def get_analysis_job_status(run_id: str, user=Depends(get_current_user)):
+    """Status of an analysis job; includes the /analyze response once completed."""
+    user_email = user.get("email")
+    if not user_email:
+        raise HTTPException(status_code=401, detail="User email not found in token")
+
+    job = await get_analysis_job(user_email, run_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Analysis job not found")
+    return job
+
+
+@router.get("/analyze/jobs/{run_id}/events")
+async def stream_analysis_job_events(run_id: str, user=Depends(get_current_user)):
+    """Server-sent events with the job's status changes, ending when it finishes."""
+    user_email = user.get("email")
+    if not user_email:
+        raise HTTPException(status_code=401, detail="User email not found in token")
+
+    job = await get_analysis_job(user_email, run_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Analysis job not found")
+
+    async def events():
+        current, last_status = job, None
+        while True:
+            if current["status"] != last_status:
+                last_status = current["status"]
+                yield f"event: status\ndata: {json.dumps(current, default=str)}\n\n"
+            else:
+                yield ": keep-alive\n\n"
+            if last_status in FINISHED_JOB_STATUSES:
+                return
+            await wait_for_analysis_job(run_id, ANALYSIS_JOB_EVENTS_POLL_SECONDS)
+            current = await get_analysis_job(user_email, run_id)
+            if current is None:
+                return
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,20 +1,21 @@
 # CRITICAL: Set Windows event loop policy FIRST, before any other imports
 # This must be the very first thing that happens to fix psycopg compatibility
+import asyncio
+import hashlib
 import os
 import sys
-import time
 import traceback
 import uuid
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 
+import orjson
 from dotenv import load_dotenv
-from fastapi import APIRouter, Depends
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 
 if sys.platform == "win32":
-    import asyncio
-
     asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
 
 # Constants
@@ -25,9 +26,7 @@ except NameError:
 
 # Import configuration and globals
 from api.config.settings import (
-    BULK_CACHE_TIMEOUT,
     _bulk_loading_cache,
-    _bulk_loading_locks,
 )
 
 # Import authentication dependencies
@@ -50,8 +49,11 @@ from api.utils.memory import log_memory_usage
 
 # Import database connection functions
 from my_agent.utils.postgres_checkpointer import (
+    THREAD_TOMBSTONE_RETENTION_DAYS,
     get_direct_connection,
     get_healthy_checkpointer,
+    get_user_sync_state,
+    get_user_thread_changes,
 )
 
 # Load environment variables
@@ -64,11 +66,241 @@ router = APIRouter()
 MAX_CONCURRENT_BULK_THREADS = int(
     os.environ.get("MAX_CONCURRENT_BULK_THREADS", "3")
 )  # Read from .env with fallback to 3
+BULK_SYNC_OVERLAP_SECONDS = int(os.environ.get("BULK_SYNC_OVERLAP_SECONDS", "5"))
+BULK_CACHE_CONTROL = "private, no-cache"  # Per-user data, revalidated with the ETag
+
+
+async def load_runs_and_sentiments(
+    user_email: str, thread_ids: Optional[List[str]] = None
+) -> Tuple[List[str], Dict[str, List[Dict]], Dict[str, Dict[str, bool]]]:
+    """Load thread ids, run-ids and sentiments of the user (or of some threads) in ONE query."""
+    print__chat_all_messages_debug(
+        "🔍 BULK QUERY: Getting all user threads, run-ids, and sentiments"
+    )
+    user_thread_ids = []
+    all_run_ids = {}
+    all_sentiments = {}
+
+    thread_filter = "AND thread_id = ANY(%s)" if thread_ids is not None else ""
+    params = (user_email, thread_ids) if thread_ids is not None else (user_email,)
+
+    async with get_direct_connection() as conn:
+        print__chat_all_messages_debug(f"🔍 Connection obtained: {type(conn).__name__}")
+        async with conn.cursor() as cur:
+            print__chat_all_messages_debug("🔍 Cursor created, executing bulk query")
+            # Single query for all threads, run-ids, and sentiments
+            await cur.execute(
+                f"""
+                SELECT 
+                    thread_id, 
+                    run_id, 
+                    prompt, 
+                    timestamp,
+                    sentiment
+                FROM users_threads_runs 
+                WHERE email = %s {thread_filter}
+                ORDER BY thread_id, timestamp ASC
+            """,
+                params,
+            )
+
+            print__chat_all_messages_debug("🔍 Bulk query executed, fetching results")
+            rows = await cur.fetchall()
+            print__chat_all_messages_debug(
+                f"🔍 Retrieved {len(rows)} rows from database"
+            )
+
+    for i, row in enumerate(rows):
+        print__chat_all_messages_debug(f"🔍 Processing row {i+1}/{len(rows)}")
+        # FIXED: Use index-based access instead of dict-based for psycopg
+        thread_id = row[0]  # thread_id
+        run_id = row[1]  # run_id
+        prompt = row[2]  # prompt
+        timestamp = row[3]  # timestamp
+        sentiment = row[4]  # sentiment
+
+        print__chat_all_messages_debug(
+            f"🔍 Row data: thread_id={thread_id}, run_id={run_id}, prompt_length={len(prompt) if prompt else 0}"
+        )
+
+        # Track unique thread IDs
+        if thread_id not in all_run_ids:
+            user_thread_ids.append(thread_id)
+            all_run_ids[thread_id] = []
+            print__chat_all_messages_debug(f"🔍 New thread discovered: {thread_id}")
+
+        # Build run-ids dictionary
+        all_run_ids[thread_id].append(
+            {
+                "run_id": run_id,
+                "prompt": prompt,
+                "timestamp": timestamp.isoformat(),
+            }
+        )
+
+        # Build sentiments dictionary
+        if sentiment is not None:
+            all_sentiments.setdefault(thread_id, {})[run_id] = sentiment
+            print__chat_all_messages_debug(
+                f"🔍 Added sentiment for run_id {run_id}: {sentiment}"
+            )
+
+    return user_thread_ids, all_run_ids, all_sentiments
+
+
+async def load_threads_messages(
+    checkpointer, user_email: str, thread_ids: List[str]
+) -> Dict[str, List[Dict]]:
+    """Load the chat messages of the given threads as dicts, with limited concurrency."""
+    print__chat_all_messages_debug(
+        f"🔄 Processing {len(thread_ids)} threads with max {MAX_CONCURRENT_BULK_THREADS} concurrent operations"
+    )
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_BULK_THREADS)
+
+    async def process_single_thread(thread_id: str):
+        """Process a single thread with concurrency limiting."""
+        async with semaphore:
+            try:
+                print__chat_all_messages_debug(f"🔄 Processing thread {thread_id}")
+                chat_messages = await get_thread_messages_with_metadata(
+                    checkpointer, thread_id, user_email, "cached_bulk_processing"
+                )
+                print__chat_all_messages_debug(
+                    f"✅ Processed {len(chat_messages)} messages for thread {thread_id}"
+                )
+                return thread_id, chat_messages
+            except Exception as e:
+                print__chat_all_messages_debug(
+                    f"❌ Error processing thread {thread_id}: {e}"
+                )
+                print__chat_all_messages_debug(
+                    f"🔍 Thread processing error traceback: {traceback.format_exc()}"
+                )
+                return thread_id, []
+
+    thread_results = await asyncio.gather(
+        *[process_single_thread(thread_id) for thread_id in thread_ids],
+        return_exceptions=True,
+    )
+
+    all_messages = {}
+    for result in thread_results:
+        if isinstance(result, Exception):
+            print__chat_all_messages_debug(
+                f"⚠ Exception in thread processing: {type(result).__name__}: {result}"
+            )
+            continue
+        thread_id, chat_messages = result
+        # Convert ChatMessage objects to dicts for JSON serialization
+        all_messages[thread_id] = [
+            msg.model_dump() if hasattr(msg, "model_dump") else msg.dict()
+            for msg in chat_messages
+        ]
+    return all_messages
+
+
+def bulk_etag(user_email: str, sync_state: Dict) -> str:
+    """ETag of the user's bulk payload; changes with any run, answer, sentiment or deletion."""
+    state = "|".join(
+        str(part)
+        for part in (
+            user_email,
+            sync_state["watermark"].isoformat(),
+            sync_state["thread_count"],
+            sync_state["run_count"],
+            sync_state["deletion_count"],
+        )
+    )
+    return f'W/"bulk-{hashlib.sha1(state.encode()).hexdigest()[:20]}"'
+
+
+def bulk_json_response(body: bytes, etag: str) -> Response:
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": BULK_CACHE_CONTROL},
+    )
+
+
+def parse_watermark(since: str) -> datetime:
+    try:
+        since_time = datetime.fromisoformat(since)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail="Invalid since watermark") from e
+    if since_time.tzinfo is not None:
+        # Watermarks are issued as naive database timestamps
+        raise HTTPException(status_code=400, detail="Invalid since watermark")
+    return since_time
+
+
+def delta_since(since: Optional[str], sync_state: Dict) -> Optional[datetime]:
+    """Parse the client's watermark; None when a full payload must be sent."""
+    if not since:
+        return None
+    since_time = parse_watermark(since)
+    tombstone_horizon = sync_state["now"] - timedelta(
+        days=THREAD_TOMBSTONE_RETENTION_DAYS
+    )
+    # Deletions older than the tombstone retention are unknown: send everything
+    return since_time if since_time >= tombstone_horizon else None
+
+
+async def get_thread_changes_since(
+    user_email: str, since: datetime
+) -> Tuple[List[str], List[str]]:
+    # Re-send a short window so changes committed late with an earlier timestamp are not missed
+    changed, deleted = await get_user_thread_changes(
+        user_email, since - timedelta(seconds=BULK_SYNC_OVERLAP_SECONDS)
+    )
+    print__chat_all_messages_debug(
+        f"🔄 DELTA: {len(changed)} changed and {len(deleted)} deleted threads since {since.isoformat()}"
+    )
+    return changed, deleted
+
+
+async def get_chat_messages_delta(
+    user_email: str, since: datetime, watermark: str, etag: str
+) -> Response:
+    """Return only the threads changed after ``since`` plus tombstones of deleted ones."""
+    changed, deleted = await get_thread_changes_since(user_email, since)
+    if not changed and not deleted:
+        return Response(
+            status_code=304, headers={"ETag": etag, "Cache-Control": BULK_CACHE_CONTROL}
+        )
+
+    _, all_run_ids, all_sentiments = await load_runs_and_sentiments(user_email, changed)
+    checkpointer = await get_healthy_checkpointer()
+    all_messages = await load_threads_messages(checkpointer, user_email, changed)
+    response = JSONResponse(
+        content={
+            "messages": all_messages,
+            "runIds": all_run_ids,
+            "sentiments": all_sentiments,
+            "deletedThreadIds": deleted,
+            "watermark": watermark,
+            "delta": True,
+        }
+    )
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = BULK_CACHE_CONTROL
+    return response
 
 
 @router.get("/chat/all-messages-for-all-threads")
-async def get_all_chat_messages(user=Depends(get_current_user)) -> Dict:
-    """Get all chat messages for the authenticated user using bulk loading with improved caching."""
+async def get_all_chat_messages(
+    request: Request,
+    since: Optional[str] = Query(
+        None, description="watermark of the previous response; returns only changes"
+    ),
+    user=Depends(get_current_user),
+) -> Dict:
+    """Get all chat messages for the authenticated user using bulk loading with improved caching.
+
+    Clients that keep the previous payload can sync incrementally: with
+    ``If-None-Match`` (the previous ETag) an unchanged history returns 304, and
+    with ``since`` (the previous ``watermark``) only threads with new runs,
+    answers or sentiments are returned, plus ``deletedThreadIds``.
+    """
 
     print__chat_all_messages_debug("🔍 CHAT_ALL_MESSAGES ENDPOINT - ENTRY POINT")
 
@@ -78,70 +310,52 @@ async def get_all_chat_messages(user=Depends(get_current_user)) -> Dict:
         f"📥 BULK REQUEST: Loading ALL chat messages for user: {user_email}"
     )
 
-    # Check if we have a recent cached result
-    cache_key = f"bulk_messages_{user_email}"
-    current_time = time.time()
-    print__chat_all_messages_debug(f"🔍 Cache key: {cache_key}")
-    print__chat_all_messages_debug(f"🔍 Current time: {current_time}")
-
-    if cache_key in _bulk_loading_cache:
-        print__chat_all_messages_debug("🔍 Cache entry found for user")
-        cached_data, cache_time = _bulk_loading_cache[cache_key]
-        cache_age = current_time - cache_time
-        print__chat_all_messages_debug(
-            f"🔍 Cache age: {cache_age:.1f}s (timeout: {BULK_CACHE_TIMEOUT}s)"
+    try:
+        sync_state = await get_user_sync_state(user_email)
+    except Exception as e:
+        print__chat_all_messages_debug(f"❌ Failed to read sync state: {e}")
+        resp = traceback_json_response(e)
+        if resp:
+            return resp
+        raise HTTPException(status_code=500, detail=f"Failed to load messages: {e}")
+    etag = bulk_etag(user_email, sync_state)
+    watermark = sync_state["watermark"].isoformat()
+
+    if request.headers.get("if-none-match") == etag:
+        print__chat_all_messages_debug(f"✅ NOT MODIFIED: {etag}")
+        return Response(
+            status_code=304, headers={"ETag": etag, "Cache-Control": BULK_CACHE_CONTROL}
         )
 
-        if cache_age < BULK_CACHE_TIMEOUT:
-            print__chat_all_messages_debug(
-                f"✅ CACHE HIT: Returning cached bulk data for {user_email} (age: {cache_age:.1f}s)"
-            )
+    since_time = delta_since(since, sync_state)
+    if since_time is not None:
+        return await get_chat_messages_delta(user_email, since_time, watermark, etag)
 
-            # Return cached data with appropriate headers
-            response = JSONResponse(content=cached_data)
-            response.headers["Cache-Control"] = (
-                f"public, max-age={int(BULK_CACHE_TIMEOUT - cache_age)}"
-            )
-            response.headers["ETag"] = f"bulk-{user_email}-{int(cache_time)}"
-            print__chat_all_messages_debug(
-                "🔍 CHAT_ALL_MESSAGES ENDPOINT - CACHE HIT EXIT"
-            )
-            return response
-        else:
-            print__chat_all_messages_debug(
-                f"⏰ CACHE EXPIRED: Cached data too old ({cache_age:.1f}s), will refresh"
-            )
-            del _bulk_loading_cache[cache_key]
-            print__chat_all_messages_debug("🔍 Expired cache entry deleted")
-    else:
-        print__chat_all_messages_debug("🔍 No cache entry found for user")
+    # Check if we have a recent cached result of the current state
+    cached = _bulk_loading_cache.get(user_email, etag)
+    if cached is not None:
+        body, cache_age = cached
+        print__chat_all_messages_debug(
+            f"✅ CACHE HIT: Returning cached bulk data for {user_email} (age: {cache_age:.1f}s, {len(body)} bytes)"
+        )
+        return bulk_json_response(body, etag)
+    print__chat_all_messages_debug("🔍 No cache entry found for user")
 
     # Use a lock to prevent multiple simultaneous requests from the same user
     print__chat_all_messages_debug(
         f"🔍 Attempting to acquire lock for user: {user_email}"
     )
-    async with _bulk_loading_locks[user_email]:
+    async with _bulk_loading_cache.user_lock(user_email):
         print__chat_all_messages_debug(f"🔒 Lock acquired for user: {user_email}")
 
         # Double-check cache after acquiring lock (another request might have completed)
-        if cache_key in _bulk_loading_cache:
+        cached = _bulk_loading_cache.get(user_email, etag)
+        if cached is not None:
+            body, cache_age = cached
             print__chat_all_messages_debug(
-                "🔍 Double-checking cache after lock acquisition"
+                f"✅ CACHE HIT (after lock): Returning cached bulk data for {user_email}"
             )
-            cached_data, cache_time = _bulk_loading_cache[cache_key]
-            cache_age = current_time - cache_time
-            if cache_age < BULK_CACHE_TIMEOUT:
-                print__chat_all_messages_debug(
-                    f"✅ CACHE HIT (after lock): Returning cached bulk data for {user_email}"
-                )
-                print__chat_all_messages_debug(
-                    "🔍 CHAT_ALL_MESSAGES ENDPOINT - CACHE HIT AFTER LOCK EXIT"
-                )
-                return cached_data
-            else:
-                print__chat_all_messages_debug(
-                    "🔍 Cache still expired after lock, proceeding with fresh request"
-                )
+            return bulk_json_response(body, etag)
 
         print__chat_all_messages_debug(
             f"🔄 CACHE MISS: Processing fresh bulk request for {user_email}"
@@ -160,99 +374,9 @@ async def get_all_chat_messages(user=Depends(get_current_user)) -> Dict:
             )
 
             # STEP 1: Get all user threads, run-ids, and sentiments in ONE query
-            print__chat_all_messages_debug(
-                "🔍 BULK QUERY: Getting all user threads, run-ids, and sentiments"
+            user_thread_ids, all_run_ids, all_sentiments = (
+                await load_runs_and_sentiments(user_email)
             )
-            user_thread_ids = []
-            all_run_ids = {}
-            all_sentiments = {}
-
-            # FIXED: Use our working get_direct_connection() function instead of checkpointer.conn
-            print__chat_all_messages_debug("🔍 Importing get_direct_connection")
-            print__chat_all_messages_debug("🔍 Getting direct connection")
-
-            # FIXED: Use get_direct_connection() as async context manager
-            print__chat_all_messages_debug("🔍 Using direct connection context manager")
-            async with get_direct_connection() as conn:
-                print__chat_all_messages_debug(
-                    f"🔍 Connection obtained: {type(conn).__name__}"
-                )
-                async with conn.cursor() as cur:
-                    print__chat_all_messages_debug(
-                        "🔍 Cursor created, executing bulk query"
-                    )
-                    # Single query for all threads, run-ids, and sentiments
-                    # FIXED: Use psycopg format (%s) instead of asyncpg format ($1)
-                    await cur.execute(
-                        """
-                        SELECT 
-                            thread_id, 
-                            run_id, 
-                            prompt, 
-                            timestamp,
-                            sentiment
-                        FROM users_threads_runs 
-                        WHERE email = %s
-                        ORDER BY thread_id, timestamp ASC
-                    """,
-                        (user_email,),
-                    )
-
-                    print__chat_all_messages_debug(
-                        "🔍 Bulk query executed, fetching results"
-                    )
-                    rows = await cur.fetchall()
-                    print__chat_all_messages_debug(
-                        f"🔍 Retrieved {len(rows)} rows from database"
-                    )
-
-                for i, row in enumerate(rows):
-                    print__chat_all_messages_debug(
-                        f"🔍 Processing row {i+1}/{len(rows)}"
-                    )
-                    # FIXED: Use index-based access instead of dict-based for psycopg
-                    thread_id = row[0]  # thread_id
-                    run_id = row[1]  # run_id
-                    prompt = row[2]  # prompt
-                    timestamp = row[3]  # timestamp
-                    sentiment = row[4]  # sentiment
-
-                    print__chat_all_messages_debug(
-                        f"🔍 Row data: thread_id={thread_id}, run_id={run_id}, prompt_length={len(prompt) if prompt else 0}"
-                    )
-
-                    # Track unique thread IDs
-                    if thread_id not in user_thread_ids:
-                        user_thread_ids.append(thread_id)
-                        print__chat_all_messages_debug(
-                            f"🔍 New thread discovered: {thread_id}"
-                        )
-
-                    # Build run-ids dictionary
-                    if thread_id not in all_run_ids:
-                        all_run_ids[thread_id] = []
-                        print__chat_all_messages_debug(
-                            f"🔍 Initializing run_ids list for thread: {thread_id}"
-                        )
-                    all_run_ids[thread_id].append(
-                        {
-                            "run_id": run_id,
-                            "prompt": prompt,
-                            "timestamp": timestamp.isoformat(),
-                        }
-                    )
-
-                    # Build sentiments dictionary
-                    if sentiment is not None:
-                        if thread_id not in all_sentiments:
-                            all_sentiments[thread_id] = {}
-                            print__chat_all_messages_debug(
-                                f"🔍 Initializing sentiments dict for thread: {thread_id}"
-                            )
-                        all_sentiments[thread_id][run_id] = sentiment
-                        print__chat_all_messages_debug(
-                            f"🔍 Added sentiment for run_id {run_id}: {sentiment}"
-                        )
 
             print__chat_all_messages_debug(
                 f"📊 BULK: Found {len(user_thread_ids)} threads"
@@ -268,111 +392,26 @@ async def get_all_chat_messages(user=Depends(get_current_user)) -> Dict:
                 print__chat_all_messages_debug(
                     "⚠ No threads found for user - returning empty dictionary"
                 )
-                empty_result = {"messages": {}, "runIds": {}, "sentiments": {}}
-                _bulk_loading_cache[cache_key] = (empty_result, current_time)
+                empty_result = {
+                    "messages": {},
+                    "runIds": {},
+                    "sentiments": {},
+                    "deletedThreadIds": [],
+                    "watermark": watermark,
+                    "delta": False,
+                }
+                body = orjson.dumps(empty_result)
+                _bulk_loading_cache.put(user_email, etag, body)
                 print__chat_all_messages_debug(
                     "🔍 CHAT_ALL_MESSAGES ENDPOINT - EMPTY RESULT EXIT"
                 )
-                return empty_result
-
-            # STEP 2: Process threads with limited concurrency (max 3 concurrent)
-            print__chat_all_messages_debug(
-                f"🔄 Processing {len(user_thread_ids)} threads with limited concurrency"
-            )
-
-            async def process_single_thread(thread_id: str):
-                """Process a single thread using the proven working functions."""
-                try:
-                    print__chat_all_messages_debug(f"🔄 Processing thread {thread_id}")
-
-                    # Use the new reusable function from chat.py
-                    chat_messages = await get_thread_messages_with_metadata(
-                        checkpointer, thread_id, user_email, "cached_bulk_processing"
-                    )
-
-                    print__chat_all_messages_debug(
-                        f"✅ Processed {len(chat_messages)} messages for thread {thread_id}"
-                    )
-                    return thread_id, chat_messages
-
-                except Exception as e:
-                    print__chat_all_messages_debug(
-                        f"❌ Error processing thread {thread_id}: {e}"
-                    )
-                    print__chat_all_messages_debug(
-                        f"🔍 Thread processing error type: {type(e).__name__}"
-                    )
-                    print__chat_all_messages_debug(
-                        f"🔍 Thread processing error traceback: {traceback.format_exc()}"
-                    )
-                    return thread_id, []
-
-            MAX_CONCURRENT_BULK_THREADS = 3
-            semaphore = asyncio.Semaphore(MAX_CONCURRENT_BULK_THREADS)
-            print__chat_all_messages_debug(
-                f"🔍 Semaphore created with {MAX_CONCURRENT_BULK_THREADS} slots"
-            )
-
-            async def process_single_thread_with_limit(thread_id: str):
-                """Process a single thread with concurrency limiting."""
-                print__chat_all_messages_debug(
-                    f"🔍 Waiting for semaphore slot for thread: {thread_id}"
-                )
-                async with semaphore:
-                    print__chat_all_messages_debug(
-                        f"🔍 Semaphore acquired for thread: {thread_id}"
-                    )
-                    result = await process_single_thread(thread_id)
-                    print__chat_all_messages_debug(
-                        f"🔍 Semaphore released for thread: {thread_id}"
-                    )
-                    return result
+                return bulk_json_response(body, etag)
 
-            print__chat_all_messages_debug(
-                f"🔒 Processing with max {MAX_CONCURRENT_BULK_THREADS} concurrent operations"
+            # STEP 2: Process threads with limited concurrency
+            all_messages = await load_threads_messages(
+                checkpointer, user_email, user_thread_ids
             )
-
-            # Use asyncio.gather with limited concurrency
-            print__chat_all_messages_debug(
-                f"🔍 Starting asyncio.gather for {len(user_thread_ids)} threads"
-            )
-            thread_results = await asyncio.gather(
-                *[
-                    process_single_thread_with_limit(thread_id)
-                    for thread_id in user_thread_ids
-                ],
-                return_exceptions=True,
-            )
-            print__chat_all_messages_debug(
-                "🔍 asyncio.gather completed, processing results"
-            )
-
-            # Collect results
-            all_messages = {}
-            total_messages = 0
-
-            for i, result in enumerate(thread_results):
-                print__chat_all_messages_debug(
-                    f"🔍 Processing thread result {i+1}/{len(thread_results)}"
-                )
-                if isinstance(result, Exception):
-                    print__chat_all_messages_debug(
-                        f"⚠ Exception in thread processing: {result}"
-                    )
-                    print__chat_all_messages_debug(
-                        f"🔍 Exception type: {type(result).__name__}"
-                    )
-                    print__chat_all_messages_debug(
-                        f"🔍 Exception traceback: {traceback.format_exc()}"
-                    )
-                    continue
-
-                thread_id, chat_messages = result
-                all_messages[thread_id] = chat_messages
-                total_messages += len(chat_messages)
-                print__chat_all_messages_debug(
-                    f"🔍 Added {len(chat_messages)} messages for thread {thread_id}"
-                )
+            total_messages = sum(len(msgs) for msgs in all_messages.values())
 
             print__chat_all_messages_debug(
                 f"✅ BULK LOADING COMPLETE: {len(all_messages)} threads, {total_messages} total messages"
@@ -383,37 +422,28 @@ async def get_all_chat_messages(user=Depends(get_current_user)) -> Dict:
             log_memory_usage("bulk_complete")
             print__chat_all_messages_debug("🔍 Post-completion memory check completed")
 
-            # Convert all ChatMessage objects to dicts for JSON serialization
-            for thread_id in all_messages:
-                all_messages[thread_id] = [
-                    msg.model_dump() if hasattr(msg, "model_dump") else msg.dict()
-                    for msg in all_messages[thread_id]
-                ]
-
             result = {
                 "messages": all_messages,
                 "runIds": all_run_ids,
                 "sentiments": all_sentiments,
+                "deletedThreadIds": [],
+                "watermark": watermark,
+                "delta": False,
             }
             print__chat_all_messages_debug(
                 f"🔍 Result dictionary created with {len(result)} keys"
             )
 
-            # Cache the result
-            _bulk_loading_cache[cache_key] = (result, current_time)
+            # Cache the serialized result (served as-is on hits)
+            body = orjson.dumps(result, default=str)
+            cached = _bulk_loading_cache.put(user_email, etag, body)
             print__chat_all_messages_debug(
-                f"💾 CACHED: Bulk result for {user_email} (expires in {BULK_CACHE_TIMEOUT}s)"
+                f"💾 {'CACHED' if cached else 'NOT CACHED (over size budget)'}: Bulk result for {user_email} ({len(body)} bytes)"
             )
-
-            # Return with cache headers
-            response = JSONResponse(content=result)
-            response.headers["Cache-Control"] = f"public, max-age={BULK_CACHE_TIMEOUT}"
-            response.headers["ETag"] = f"bulk-{user_email}-{int(current_time)}"
-            print__chat_all_messages_debug("🔍 JSONResponse created with cache headers")
             print__chat_all_messages_debug(
                 "🔍 CHAT_ALL_MESSAGES ENDPOINT - SUCCESSFUL EXIT"
             )
-            return response
+            return bulk_json_response(body, etag)
 
         except Exception as e:
             print__chat_all_messages_debug(
@@ -426,10 +456,8 @@ async def get_all_chat_messages(user=Depends(get_current_user)) -> Dict:
                 f"Full error traceback: {traceback.format_exc()}"
             )
 
-            # Return empty result but cache it briefly to prevent error loops
+            # Return empty result; not cached, it would be served under the current ETag
             empty_result = {"messages": {}, "runIds": {}, "sentiments": {}}
-            _bulk_loading_cache[cache_key] = (empty_result, current_time)
-            print__chat_all_messages_debug("🔍 Cached empty result due to error")
 
             resp = traceback_json_response(e)
             if resp:
@@ -441,3 +469,161 @@ async def get_all_chat_messages(user=Depends(get_current_user)) -> Dict:
             )
             print__chat_all_messages_debug("🔍 CHAT_ALL_MESSAGES ENDPOINT - ERROR EXIT")
             return response
+
+
+def _ndjson_line(payload: Dict) -> bytes:
+    return orjson.dumps(payload, default=str) + b"\n"
+
+
+async def stream_threads_ndjson(
+    checkpointer,
+    user_email: str,
+    thread_ids: List[str],
+    all_run_ids: Dict[str, List[Dict]],
+    all_sentiments: Dict[str, Dict[str, bool]],
+    deleted_thread_ids: List[str],
+    watermark: str,
+    delta: bool,
+) -> AsyncIterator[bytes]:
+    """Yield one NDJSON line per thread as soon as it is loaded.
+
+    MAX_CONCURRENT_BULK_THREADS workers load threads and hand serialized lines
+    over a queue of the same size, so at most that many threads are held in
+    memory and a slow client slows the workers down instead of buffering.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=MAX_CONCURRENT_BULK_THREADS)
+    remaining = iter(thread_ids)
+
+    async def worker():
+        for thread_id in remaining:
+            try:
+                chat_messages = await get_thread_messages_with_metadata(
+                    checkpointer, thread_id, user_email, "streaming_bulk_processing"
+                )
+            except Exception as e:
+                print__chat_all_messages_debug(
+                    f"❌ Error streaming thread {thread_id}: {e}"
+                )
+                chat_messages = []
+            line = _ndjson_line(
+                {
+                    "type": "thread",
+                    "thread_id": thread_id,
+                    "messages": [msg.model_dump() for msg in chat_messages],
+                    "runIds": all_run_ids.get(thread_id, []),
+                    "sentiments": all_sentiments.get(thread_id, {}),
+                }
+            )
+            del chat_messages
+            await queue.put(line)
+
+    async def finish():
+        await asyncio.gather(
+            *[
+                worker()
+                for _ in range(min(MAX_CONCURRENT_BULK_THREADS, len(thread_ids)))
+            ],
+            return_exceptions=True,
+        )
+        await queue.put(None)
+
+    producer = asyncio.create_task(finish())
+    streamed = 0
+    try:
+        while (line := await queue.get()) is not None:
+            streamed += 1
+            yield line
+        for thread_id in deleted_thread_ids:
+            yield _ndjson_line({"type": "deleted", "thread_id": thread_id})
+        yield _ndjson_line(
+            {
+                "type": "end",
+                "threads": streamed,
+                "deleted": len(deleted_thread_ids),
+                "watermark": watermark,
+                "delta": delta,
+            }
+        )
+        print__chat_all_messages_debug(
+            f"✅ STREAM COMPLETE: {streamed} threads for {user_email}"
+        )
+    finally:
+        # Client went away (or the stream finished): stop loading threads
+        producer.cancel()
+
+
+@router.get("/chat/all-messages-for-all-threads/stream")
+async def stream_all_chat_messages(
+    request: Request,
+    since: Optional[str] = Query(
+        None, description="watermark of the previous response; streams only changes"
+    ),
+    user=Depends(get_current_user),
+):
+    """Stream the user's chat history as NDJSON, one line per thread.
+
+    Lines are ``{"type": "thread", "thread_id", "messages", "runIds", "sentiments"}``,
+    then ``{"type": "deleted", "thread_id"}`` for tombstones (with ``since``) and a
+    final ``{"type": "end", "watermark", ...}``. ETag / ``since`` behave as in
+    /chat/all-messages-for-all-threads. Nothing is cached: memory stays
+    proportional to the threads in flight, not to the whole history.
+    """
+    user_email = user["email"]
+    print__chat_all_messages_debug(
+        f"📥 BULK STREAM REQUEST: Streaming chat messages for user: {user_email}"
+    )
+
+    try:
+        sync_state = await get_user_sync_state(user_email)
+        etag = bulk_etag(user_email, sync_state)
+        watermark = sync_state["watermark"].isoformat()
+
+        if request.headers.get("if-none-match") == etag:
+            print__chat_all_messages_debug(f"✅ NOT MODIFIED: {etag}")
+            return Response(
+                status_code=304,
+                headers={"ETag": etag, "Cache-Control": BULK_CACHE_CONTROL},
+            )
+
+        deleted = []
+        thread_ids = None
+        since_time = delta_since(since, sync_state)
+        if since_time is not None:
+            thread_ids, deleted = await get_thread_changes_since(user_email, since_time)
+            if not thread_ids and not deleted:
+                return Response(
+                    status_code=304,
+                    headers={"ETag": etag, "Cache-Control": BULK_CACHE_CONTROL},
+                )
+
+        thread_ids, all_run_ids, all_sentiments = await load_runs_and_sentiments(
+            user_email, thread_ids
+        )
+        checkpointer = await get_healthy_checkpointer()
+    except HTTPException:
+        raise
+    except Exception as e:
+        print__chat_all_messages_debug(
+            f"❌ BULK STREAM ERROR: Failed to start stream for {user_email}: {e}"
+        )
+        resp = traceback_json_response(e)
+        if resp:
+            return resp
+        raise HTTPException(
+            status_code=500, detail=f"Failed to stream messages: {e}"
+        ) from e
+
+    return StreamingResponse(
+        stream_threads_ndjson(
+            checkpointer,
+            user_email,
+            thread_ids,
+            all_run_ids,
+            all_sentiments,
+            deleted,
+            watermark,
+            since_time is not None,
+        ),
+        media_type="application/x-ndjson",
+        headers={"ETag": etag, "Cache-Control": BULK_CACHE_CONTROL},
+    )
@@ -7,9 +7,10 @@ import sys
 import time
 
 # Standard imports
+import base64
 import traceback
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 
 from dotenv import load_dotenv
 from fastapi import APIRouter, Depends, HTTPException, Query
@@ -56,6 +57,8 @@ from api.utils.memory import log_memory_usage, perform_deletion_operations
 sys.path.insert(0, str(BASE_DIR))
 # Import global variables from api.config.settings
 from api.config.settings import (
+    ANALYSIS_ADMISSION_MAX_WAIT_SECONDS,
+    ANALYSIS_TIMEOUT_SECONDS,
     BULK_CACHE_TIMEOUT,
     MAX_CONCURRENT_ANALYSES,
     _bulk_loading_cache,
@@ -66,10 +69,14 @@ from api.utils.debug import print__chat_all_messages_debug
 from my_agent.utils.postgres_checkpointer import (
     get_direct_connection,
     get_healthy_checkpointer,
+    get_thread_messages,
     get_thread_run_sentiments,
+    get_thread_runs,
     get_user_chat_threads,
     get_user_chat_threads_count,
+    save_thread_message,
 )
+from my_agent.utils.thread_ownership import user_owns_thread
 
 # Load environment variables
 load_dotenv()
@@ -77,6 +84,353 @@ load_dotenv()
 # Create router for chat endpoints
 router = APIRouter()
 
+# A run older than this is no longer waiting for a slot or running (one queued
+# for longer that still finishes replaces its "did not finish" row on save)
+RUN_SETTLE_SECONDS = ANALYSIS_TIMEOUT_SECONDS + ANALYSIS_ADMISSION_MAX_WAIT_SECONDS
+UNFINISHED_RUN_ERROR = "The analysis did not finish, please resubmit"
+
+
+def format_chunk_for_chat(chunk) -> Dict:
+    """Convert a PDF chunk (Document, checkpoint dict or main() result dict) for the frontend."""
+    # Extract page_content and metadata
+    if hasattr(chunk, "page_content"):
+        chunk_data = {"page_content": chunk.page_content}
+    else:
+        chunk_data = {
+            "page_content": chunk.get("page_content", chunk.get("content", ""))
+        }
+
+    # Extract metadata (source_file, page_number, etc.)
+    metadata = (
+        chunk.metadata if hasattr(chunk, "metadata") else chunk.get("metadata", {})
+    )
+
+    if metadata:
+        if "source_file" in metadata:
+            chunk_data["source_file"] = metadata["source_file"]
+        if "page_number" in metadata:
+            chunk_data["page_number"] = metadata["page_number"]
+        # Add any other metadata fields that might be useful
+        chunk_data["metadata"] = metadata
+
+    return chunk_data
+
+
+def get_first_sql_query(queries_and_results) -> str:
+    """SQL query shown for a message (the first one of its interaction)."""
+    try:
+        return queries_and_results[0][0] if queries_and_results[0] else None
+    except (IndexError, TypeError):
+        return None
+
+
+async def save_interaction_from_result(
+    user_email: str, thread_id: str, run_id: str, result: Dict
+) -> bool:
+    """Materialize a finished analysis (main() result) as a thread_messages row."""
+    return await save_thread_message(
+        user_email,
+        thread_id,
+        run_id,
+        prompt=result.get("prompt"),
+        final_answer=result.get("result"),
+        queries_and_results=result.get("queries_and_results"),
+        structured_query_results=result.get("structured_query_results"),
+        datasets_used=result.get("top_selection_codes"),
+        top_chunks=[format_chunk_for_chat(c) for c in result.get("top_chunks") or []],
+    )
+
+
+async def save_failed_interaction(
+    user_email: str, thread_id: str, run_id: str, prompt: str, error: str
+) -> bool:
+    """Store a run that ended without an answer, so the history never rescans it."""
+    return await save_thread_message(
+        user_email, thread_id, run_id, prompt=prompt, error=error, overwrite=False
+    )
+
+
+def chat_messages_from_stored(
+    rows: List[Dict], thread_id: str, user_email: str
+) -> List[ChatMessage]:
+    """Build ChatMessage objects (prompt and answer together) from thread_messages rows."""
+    chat_messages = []
+    for index, row in enumerate(rows, 1):
+        queries_and_results = row["queries_and_results"] or None
+        chat_messages.append(
+            ChatMessage(
+                id=f"msg_{index}",
+                threadId=thread_id,
+                user=user_email,
+                createdAt=int(row["created_at"].timestamp() * 1000),
+                prompt=row["prompt"],
+                final_answer=row["final_answer"],
+                queries_and_results=queries_and_results,
+                structured_query_results=row["structured_query_results"] or None,
+                datasets_used=row["datasets_used"] or None,
+                top_chunks=row["top_chunks"] or None,
+                sql_query=(
+                    get_first_sql_query(queries_and_results)
+                    if queries_and_results
+                    else None
+                ),
+                error=row.get("error"),
+                isLoading=False,
+                startedAt=None,
+                isError=bool(row.get("error")),
+            )
+        )
+    return chat_messages
+
+
+async def load_checkpoint_interactions(checkpointer, thread_id: str) -> List[Dict]:
+    """Extract the interactions of a thread from its checkpoint metadata.
+
+    Prompts come from ``metadata.writes.__start__`` and answers with their
+    metadata from ``metadata.writes.submit_final_answer``, one interaction per
+    checkpoint. Used for threads and runs without rows in thread_messages and
+    by the backfill job.
+    """
+    config = {"configurable": {"thread_id": thread_id}}
+
+    # Get checkpoint tuples using alist() with fallback to aget_tuple()
+    checkpoint_tuples = []
+    try:
+        print__chat_all_messages_debug(
+            "🔍 ALIST METHOD: Using official AsyncPostgresSaver.alist() method"
+        )
+
+        # Get all checkpoints to capture complete conversation and metadata
+        async for checkpoint_tuple in checkpointer.alist(config, limit=200):
+            checkpoint_tuples.append(checkpoint_tuple)
+
+    except Exception as alist_error:
+        print__chat_all_messages_debug(
+            f"🔍 ALIST ERROR: Error using alist(): {alist_error}"
+        )
+
+        # Fallback: use aget_tuple() to get the latest checkpoint only
+        if not checkpoint_tuples:
+            print__chat_all_messages_debug(
+                "🔍 FALLBACK METHOD: Trying fallback method using aget_tuple()"
+            )
+            try:
+                state_snapshot = await checkpointer.aget_tuple(config)
+                if state_snapshot:
+                    checkpoint_tuples = [state_snapshot]
+                    print__chat_all_messages_debug(
+                        "🔍 FALLBACK SUCCESS: Using fallback method - got latest checkpoint only"
+                    )
+            except Exception as fallback_error:
+                print__chat_all_messages_debug(
+                    f"🔍 FALLBACK ERROR: Fallback method also failed: {fallback_error}"
+                )
+                return []
+
+    if not checkpoint_tuples:
+        print__chat_all_messages_debug(
+            f"🔍 NO CHECKPOINTS: No checkpoints found for thread: {thread_id}"
+        )
+        return []
+
+    print__chat_all_messages_debug(
+        f"🔍 CHECKPOINTS FOUND: Found {len(checkpoint_tuples)} checkpoints for verified thread"
+    )
+
+    # Sort checkpoints by step number (chronological order)
+    checkpoint_tuples.sort(key=lambda x: x.metadata.get("step", 0) if x.metadata else 0)
+
+    # Extract all interactions in one pass through the checkpoints
+    interactions = []
+
+    print__chat_all_messages_debug(
+        f"🔍 INTERACTION EXTRACTION: Extracting complete interactions from {len(checkpoint_tuples)} checkpoints"
+    )
+
+    for checkpoint_index, checkpoint_tuple in enumerate(checkpoint_tuples):
+        metadata = checkpoint_tuple.metadata or {}
+        step = metadata.get("step", 0)
+        writes = metadata.get("writes", {})
+
+        interaction = {
+            "step": step,
+            "checkpoint_index": checkpoint_index,
+        }
+
+        # Extract user prompt from metadata.writes.__start__.prompt
+        if isinstance(writes, dict) and "__start__" in writes:
+            start_data = writes["__start__"]
+            if isinstance(start_data, dict) and "prompt" in start_data:
+                prompt = start_data["prompt"]
+                if prompt and prompt.strip():
+                    interaction["prompt"] = prompt.strip()
+                    print__chat_all_messages_debug(
+                        f"🔍 USER PROMPT FOUND: Step {step}: {prompt[:50]}..."
+                    )
+
+        # Extract AI answer and all metadata from metadata.writes.submit_final_answer
+        if isinstance(writes, dict) and "submit_final_answer" in writes:
+            submit_data = writes["submit_final_answer"]
+            if isinstance(submit_data, dict):
+                # Extract final answer
+                if "final_answer" in submit_data:
+                    final_answer = submit_data["final_answer"]
+                    if final_answer and final_answer.strip():
+                        interaction["final_answer"] = final_answer.strip()
+                        print__chat_all_messages_debug(
+                            f"🔍 AI ANSWER FOUND: Step {step}: {final_answer[:50]}..."
+                        )
+
+                # Extract queries and results (only for this interaction)
+                if "queries_and_results" in submit_data:
+                    queries_and_results = submit_data["queries_and_results"]
+                    if queries_and_results:
+                        interaction["queries_and_results"] = queries_and_results
+                        print__chat_all_messages_debug(
+                            f"🔍 QUERIES FOUND: Step {step}: Found queries and results for this interaction"
+                        )
+
+                # Extract structured query results (columns/rows) for this interaction
+                if submit_data.get("structured_query_results"):
+                    interaction["structured_query_results"] = submit_data[
+                        "structured_query_results"
+                    ]
+
+                # Extract datasets used from top_selection_codes (only for this interaction)
+                if "top_selection_codes" in submit_data:
+                    top_selection_codes = submit_data["top_selection_codes"]
+                    if top_selection_codes:
+                        interaction["datasets_used"] = top_selection_codes
+                        print__chat_all_messages_debug(
+                            f"🔍 DATASETS FOUND: Step {step}: Found {len(top_selection_codes)} datasets for this interaction"
+                        )
+
+                # Extract top chunks (only for this interaction)
+                if "top_chunks" in submit_data:
+                    top_chunks_raw = submit_data["top_chunks"]
+                    if top_chunks_raw:
+                        chunks_processed = []
+                        for chunk in top_chunks_raw:
+                            try:
+                                chunks_processed.append(format_chunk_for_chat(chunk))
+                            except Exception as chunk_error:
+                                print__chat_all_messages_debug(
+                                    f"🔍 Error processing chunk: {chunk_error}"
+                                )
+
+                        if chunks_processed:
+                            interaction["top_chunks"] = chunks_processed
+                            print__chat_all_messages_debug(
+                                f"🔍 CHUNKS FOUND: Step {step}: Found {len(chunks_processed)} chunks for this interaction"
+                            )
+
+                # Extract other metadata that might be in submit_final_answer
+                # (This is where we could extract other per-interaction metadata)
+
+        # Only add interaction if it has either prompt or final_answer
+        if "prompt" in interaction or "final_answer" in interaction:
+            interactions.append(interaction)
+
+    return interactions
+
+
+def merge_interactions(interactions: List[Dict]) -> List[Dict]:
+    """Join each prompt-only interaction with the answer-only interaction that follows it."""
+    merged = []
+    current = None
+    for interaction in sorted(interactions, key=lambda x: x["step"]):
+        if "prompt" in interaction:
+            if current is not None:
+                merged.append(current)
+            current = {"prompt": interaction["prompt"]}
+        if "final_answer" in interaction:
+            if current is None:
+                current = {}
+            current.update(
+                {k: v for k, v in interaction.items() if k not in ("prompt", "step")}
+            )
+            merged.append(current)
+            current = None
+    if current is not None:
+        merged.append(current)
+    return merged
+
+
+def match_runs(merged: List[Dict], runs: List[tuple]) -> List[tuple]:
+    """Pair interactions with (run_id, prompt, timestamp) rows by prompt, in order."""
+    pairs = []
+    next_run = 0
+    for interaction in merged:
+        prompt = (interaction.get("prompt") or "").strip()
+        for index in range(next_run, len(runs)):
+            if (runs[index][1] or "").strip() == prompt:
+                pairs.append((runs[index], interaction))
+                next_run = index + 1
+                break
+    return pairs
+
+
+async def add_missing_interactions(
+    checkpointer,
+    user_email: str,
+    thread_id: str,
+    stored_rows: List[Dict],
+    runs: List[tuple],
+) -> List[Dict]:
+    """Store settled runs without a thread_messages row and merge them into stored_rows.
+
+    Runs whose save failed, that finished before the table existed or whose
+    process died are only in the checkpoints (if at all). Their interactions are
+    matched to runs by prompt, in order. Each settled run gets a row, with an
+    error when it has no answer, so the next read needs no checkpoints. Runs
+    that may still be in flight are left out.
+    """
+    stored_run_ids = {row["run_id"] for row in stored_rows}
+    missing_runs = [run for run in runs if run[3] and run[0] not in stored_run_ids]
+    interactions = merge_interactions(
+        await load_checkpoint_interactions(checkpointer, thread_id)
+    )
+    answered = {
+        run[0]: interaction
+        for run, interaction in match_runs(interactions, runs)
+        if interaction.get("final_answer")
+    }
+    rows = list(stored_rows)
+    for run_id, run_prompt, timestamp, _ in missing_runs:
+        interaction = answered.get(run_id, {})
+        row = {
+            "run_id": run_id,
+            "prompt": interaction.get("prompt") or run_prompt,
+            "final_answer": interaction.get("final_answer"),
+            "queries_and_results": interaction.get("queries_and_results"),
+            "structured_query_results": interaction.get("structured_query_results"),
+            "datasets_used": interaction.get("datasets_used"),
+            "top_chunks": interaction.get("top_chunks"),
+            "error": None if interaction else UNFINISHED_RUN_ERROR,
+            "created_at": timestamp,
+        }
+        rows.append(row)
+        await save_thread_message(
+            user_email,
+            thread_id,
+            run_id,
+            prompt=row["prompt"],
+            final_answer=row["final_answer"],
+            queries_and_results=row["queries_and_results"],
+            structured_query_results=row["structured_query_results"],
+            datasets_used=row["datasets_used"],
+            top_chunks=row["top_chunks"],
+            error=row["error"],
+            created_at=timestamp,
+            overwrite=False,
+        )
+    unanswered = sum(1 for row in rows[len(stored_rows) :] if row["error"])
+    rows.sort(key=lambda row: row["created_at"])
+    print__chat_all_messages_debug(
+        f"🔍 Stored {len(missing_runs)} settled runs missing from thread_messages for thread {thread_id} ({unanswered} without an answer)"
+    )
+    return rows
+
 
 async def get_thread_messages_with_metadata(
     checkpointer, thread_id: str, user_email: str, source_context: str = "general"
@@ -106,6 +460,22 @@ async def get_thread_messages_with_metadata(
     )
 
     try:
+        # Materialized interactions (rows are filtered by owner, no separate security check)
+        if user_email:
+            stored_rows = await get_thread_messages(user_email, thread_id)
+            if stored_rows:
+                print__chat_all_messages_debug(
+                    f"✅ Loaded {len(stored_rows)} stored interactions for thread {thread_id}"
+                )
+                # Settled runs whose row was never written are still in the checkpoints
+                runs = await get_thread_runs(user_email, thread_id, RUN_SETTLE_SECONDS)
+                stored_run_ids = {row["run_id"] for row in stored_rows}
+                if any(run[3] and run[0] not in stored_run_ids for run in runs):
+                    stored_rows = await add_missing_interactions(
+                        checkpointer, user_email, thread_id, stored_rows, runs
+                    )
+                return chat_messages_from_stored(stored_rows, thread_id, user_email)
+
         # Security check: Verify user owns this thread before loading checkpoint data
         if user_email:
             print__chat_all_messages_debug(
@@ -113,199 +483,22 @@ async def get_thread_messages_with_metadata(
             )
 
             try:
-                async with get_direct_connection() as conn:
-                    async with conn.cursor() as cur:
-                        await cur.execute(
-                            """
-                            SELECT COUNT(*) FROM users_threads_runs 
-                            WHERE email = %s AND thread_id = %s
-                        """,
-                            (user_email, thread_id),
-                        )
-                        result = await cur.fetchone()
-                        thread_entries_count = result[0] if result else 0
-
-                    if thread_entries_count == 0:
-                        print__chat_all_messages_debug(
-                            f"🔍 SECURITY DENIED: User {user_email} does not own thread {thread_id} - access denied"
-                        )
-                        return []
-
+                if not await user_owns_thread(user_email, thread_id):
                     print__chat_all_messages_debug(
-                        f"🔍 SECURITY GRANTED: User {user_email} owns thread {thread_id} ({thread_entries_count} entries) - access granted"
+                        f"🔍 SECURITY DENIED: User {user_email} does not own thread {thread_id} - access denied"
                     )
+                    return []
+
+                print__chat_all_messages_debug(
+                    f"🔍 SECURITY GRANTED: User {user_email} owns thread {thread_id} - access granted"
+                )
             except Exception as e:
                 print__chat_all_messages_debug(
                     f"🔍 SECURITY ERROR: Could not verify thread ownership: {e}"
                 )
                 return []
 
-        config = {"configurable": {"thread_id": thread_id}}
-
-        # Get checkpoint tuples using alist() with fallback to aget_tuple()
-        checkpoint_tuples = []
-        try:
-            print__chat_all_messages_debug(
-                "🔍 ALIST METHOD: Using official AsyncPostgresSaver.alist() method"
-            )
-
-            # Get all checkpoints to capture complete conversation and metadata
-            async for checkpoint_tuple in checkpointer.alist(config, limit=200):
-                checkpoint_tuples.append(checkpoint_tuple)
-
-        except Exception as alist_error:
-            print__chat_all_messages_debug(
-                f"🔍 ALIST ERROR: Error using alist(): {alist_error}"
-            )
-
-            # Fallback: use aget_tuple() to get the latest checkpoint only
-            if not checkpoint_tuples:
-                print__chat_all_messages_debug(
-                    "🔍 FALLBACK METHOD: Trying fallback method using aget_tuple()"
-                )
-                try:
-                    state_snapshot = await checkpointer.aget_tuple(config)
-                    if state_snapshot:
-                        checkpoint_tuples = [state_snapshot]
-                        print__chat_all_messages_debug(
-                            "🔍 FALLBACK SUCCESS: Using fallback method - got latest checkpoint only"
-                        )
-                except Exception as fallback_error:
-                    print__chat_all_messages_debug(
-                        f"🔍 FALLBACK ERROR: Fallback method also failed: {fallback_error}"
-                    )
-                    return []
-
-        if not checkpoint_tuples:
-            print__chat_all_messages_debug(
-                f"🔍 NO CHECKPOINTS: No checkpoints found for thread: {thread_id}"
-            )
-            return []
-
-        print__chat_all_messages_debug(
-            f"🔍 CHECKPOINTS FOUND: Found {len(checkpoint_tuples)} checkpoints for verified thread"
-        )
-
-        # Sort checkpoints by step number (chronological order)
-        checkpoint_tuples.sort(
-            key=lambda x: x.metadata.get("step", 0) if x.metadata else 0
-        )
-
-        # Extract all interactions in one pass through the checkpoints
-        interactions = []
-
-        print__chat_all_messages_debug(
-            f"🔍 INTERACTION EXTRACTION: Extracting complete interactions from {len(checkpoint_tuples)} checkpoints"
-        )
-
-        for checkpoint_index, checkpoint_tuple in enumerate(checkpoint_tuples):
-            metadata = checkpoint_tuple.metadata or {}
-            step = metadata.get("step", 0)
-            writes = metadata.get("writes", {})
-
-            interaction = {
-                "step": step,
-                "checkpoint_index": checkpoint_index,
-            }
-
-            # Extract user prompt from metadata.writes.__start__.prompt
-            if isinstance(writes, dict) and "__start__" in writes:
-                start_data = writes["__start__"]
-                if isinstance(start_data, dict) and "prompt" in start_data:
-                    prompt = start_data["prompt"]
-                    if prompt and prompt.strip():
-                        interaction["prompt"] = prompt.strip()
-                        print__chat_all_messages_debug(
-                            f"🔍 USER PROMPT FOUND: Step {step}: {prompt[:50]}..."
-                        )
-
-            # Extract AI answer and all metadata from metadata.writes.submit_final_answer
-            if isinstance(writes, dict) and "submit_final_answer" in writes:
-                submit_data = writes["submit_final_answer"]
-                if isinstance(submit_data, dict):
-                    # Extract final answer
-                    if "final_answer" in submit_data:
-                        final_answer = submit_data["final_answer"]
-                        if final_answer and final_answer.strip():
-                            interaction["final_answer"] = final_answer.strip()
-                            print__chat_all_messages_debug(
-                                f"🔍 AI ANSWER FOUND: Step {step}: {final_answer[:50]}..."
-                            )
-
-                    # Extract queries and results (only for this interaction)
-                    if "queries_and_results" in submit_data:
-                        queries_and_results = submit_data["queries_and_results"]
-                        if queries_and_results:
-                            interaction["queries_and_results"] = queries_and_results
-                            print__chat_all_messages_debug(
-                                f"🔍 QUERIES FOUND: Step {step}: Found queries and results for this interaction"
-                            )
-
-                    # Extract datasets used from top_selection_codes (only for this interaction)
-                    if "top_selection_codes" in submit_data:
-                        top_selection_codes = submit_data["top_selection_codes"]
-                        if top_selection_codes:
-                            interaction["datasets_used"] = top_selection_codes
-                            print__chat_all_messages_debug(
-                                f"🔍 DATASETS FOUND: Step {step}: Found {len(top_selection_codes)} datasets for this interaction"
-                            )
-
-                    # Extract top chunks (only for this interaction)
-                    if "top_chunks" in submit_data:
-                        top_chunks_raw = submit_data["top_chunks"]
-                        if top_chunks_raw:
-                            chunks_processed = []
-                            for chunk in top_chunks_raw:
-                                try:
-                                    # Extract page_content and metadata
-                                    chunk_data = {
-                                        "page_content": (
-                                            chunk.page_content
-                                            if hasattr(chunk, "page_content")
-                                            else chunk.get("page_content", "")
-                                        )
-                                    }
-
-                                    # Extract metadata (source_file, page_number, etc.)
-                                    metadata = (
-                                        chunk.metadata
-                                        if hasattr(chunk, "metadata")
-                                        else chunk.get("metadata", {})
-                                    )
-
-                                    if metadata:
-                                        if "source_file" in metadata:
-                                            chunk_data["source_file"] = metadata[
-                                                "source_file"
-                                            ]
-                                        if "page_number" in metadata:
-                                            chunk_data["page_number"] = metadata[
-                                                "page_number"
-                                            ]
-                                        # Add any other metadata fields that might be useful
-                                        chunk_data["metadata"] = metadata
-
-                                    chunks_processed.append(chunk_data)
-
-                                except Exception as chunk_error:
-                                    print__chat_all_messages_debug(
-                                        f"🔍 Error processing chunk: {chunk_error}"
-                                    )
-                                    continue
-
-                            if chunks_processed:
-                                interaction["top_chunks"] = chunks_processed
-                                print__chat_all_messages_debug(
-                                    f"🔍 CHUNKS FOUND: Step {step}: Found {len(chunks_processed)} chunks for this interaction"
-                                )
-
-                    # Extract other metadata that might be in submit_final_answer
-                    # (This is where we could extract other per-interaction metadata)
-
-            # Only add interaction if it has either prompt or final_answer
-            if "prompt" in interaction or "final_answer" in interaction:
-                interactions.append(interaction)
-
+        interactions = await load_checkpoint_interactions(checkpointer, thread_id)
         # Sort interactions by step number (chronological order)
         interactions.sort(key=lambda x: x["step"])
 
@@ -347,6 +540,7 @@ async def get_thread_messages_with_metadata(
                 prompt=interaction.get("prompt"),
                 final_answer=interaction.get("final_answer"),
                 queries_and_results=interaction.get("queries_and_results"),
+                structured_query_results=interaction.get("structured_query_results"),
                 datasets_used=interaction.get("datasets_used"),
                 top_chunks=interaction.get("top_chunks"),
                 sql_query=None,
@@ -361,14 +555,9 @@ async def get_thread_messages_with_metadata(
                 chat_message.queries_and_results
                 and len(chat_message.queries_and_results) > 0
             ):
-                try:
-                    chat_message.sql_query = (
-                        chat_message.queries_and_results[0][0]
-                        if chat_message.queries_and_results[0]
-                        else None
-                    )
-                except (IndexError, TypeError):
-                    chat_message.sql_query = None
+                chat_message.sql_query = get_first_sql_query(
+                    chat_message.queries_and_results
+                )
 
             chat_messages.append(chat_message)
             print__chat_all_messages_debug(
@@ -437,16 +626,39 @@ async def get_thread_sentiments(thread_id: str, user=Depends(get_current_user)):
         ) from e
 
 
+def encode_threads_cursor(thread: Dict) -> str:
+    """Encode the keyset position (latest_timestamp, thread_id) of a thread list page."""
+    position = f"{thread['latest_timestamp'].isoformat()}|{thread['thread_id']}"
+    return base64.urlsafe_b64encode(position.encode()).decode()
+
+
+def decode_threads_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        timestamp, thread_id = (
+            base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        )
+        return datetime.fromisoformat(timestamp), thread_id
+    except Exception as e:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from e
+
+
 @router.get("/chat-threads")
 async def get_chat_threads(
     page: int = Query(1, ge=1, description="Page number (1-indexed)"),
     limit: int = Query(10, ge=1, le=50, description="Number of threads per page"),
+    cursor: Optional[str] = Query(
+        None,
+        description="next_cursor of the previous page (takes precedence over page)",
+    ),
     user=Depends(get_current_user),
 ) -> PaginatedChatThreadsResponse:
     """Get paginated chat threads for the authenticated user."""
 
     print__chat_threads_debug("🔍 CHAT_THREADS ENDPOINT - ENTRY POINT")
-    print__chat_threads_debug(f"🔍 Request parameters: page={page}, limit={limit}")
+    print__chat_threads_debug(
+        f"🔍 Request parameters: page={page}, limit={limit}, cursor={cursor}"
+    )
+    before = decode_threads_cursor(cursor) if cursor else None
 
     try:
         user_email = user["email"]
@@ -458,17 +670,21 @@ async def get_chat_threads(
         print__chat_threads_debug("🔍 Starting simplified approach")
         print__chat_threads_debug("Getting chat threads with simplified approach")
 
-        # Get total count first
-        print__chat_threads_debug("🔍 Getting total threads count")
-        print__chat_threads_debug(f"Getting chat threads count for user: {user_email}")
-        total_count = await get_user_chat_threads_count(user_email)
-        print__chat_threads_debug(f"🔍 Total count retrieved: {total_count}")
-        print__chat_threads_debug(
-            f"Total threads count for user {user_email}: {total_count}"
-        )
+        # Get total count first; cursor pages skip it, the client keeps the first page's count
+        total_count = None
+        if not before:
+            print__chat_threads_debug("🔍 Getting total threads count")
+            print__chat_threads_debug(
+                f"Getting chat threads count for user: {user_email}"
+            )
+            total_count = await get_user_chat_threads_count(user_email)
+            print__chat_threads_debug(f"🔍 Total count retrieved: {total_count}")
+            print__chat_threads_debug(
+                f"Total threads count for user {user_email}: {total_count}"
+            )
 
-        # Calculate offset for pagination
-        offset = (page - 1) * limit
+        # Calculate offset for page-number pagination (unused with a cursor)
+        offset = 0 if before else (page - 1) * limit
         print__chat_threads_debug(f"🔍 Calculated offset: {offset}")
 
         # Get threads for this page
@@ -478,13 +694,18 @@ async def get_chat_threads(
         print__chat_threads_debug(
             f"Getting chat threads for user: {user_email} (limit: {limit}, offset: {offset})"
         )
-        threads = await get_user_chat_threads(user_email, limit=limit, offset=offset)
+        # One extra row tells whether another page exists
+        threads = await get_user_chat_threads(
+            user_email, limit=limit + 1, offset=offset, before=before
+        )
         print__chat_threads_debug(f"🔍 Retrieved threads: {threads}")
         if threads is None:
             print__chat_threads_debug(
                 "get_user_chat_threads returned None! Setting to empty list."
             )
             threads = []
+        has_more = len(threads) > limit
+        threads = threads[:limit]
         print__chat_threads_debug(f"🔍 Retrieved {len(threads)} threads from database")
         print__chat_threads_debug(
             f"Retrieved {len(threads)} threads for user {user_email}"
@@ -525,14 +746,16 @@ async def get_chat_threads(
             chat_thread_responses.append(chat_thread_response)
 
         # Calculate pagination info
-        has_more = (offset + len(chat_thread_responses)) < total_count
-        print__chat_threads_debug(f"🔍 Pagination calculated: has_more={has_more}")
+        next_cursor = encode_threads_cursor(threads[-1]) if has_more else None
+        print__chat_threads_debug(
+            f"🔍 Pagination calculated: has_more={has_more}, next_cursor={next_cursor}"
+        )
 
         print__chat_threads_debug(
             f"Retrieved {len(threads)} threads for user {user_email} (total: {total_count})"
         )
         print__chat_threads_debug(
-            f"Returning {len(chat_thread_responses)} threads to frontend (page {page}/{(total_count + limit - 1) // limit})"
+            f"Returning {len(chat_thread_responses)} threads to frontend (cursor: {cursor is not None})"
         )
 
         result = PaginatedChatThreadsResponse(
@@ -541,6 +764,7 @@ async def get_chat_threads(
             page=page,
             limit=limit,
             has_more=has_more,
+            next_cursor=next_cursor,
         )
         print__chat_threads_debug("🔍 CHAT_THREADS ENDPOINT - SUCCESSFUL EXIT")
         return result
@@ -30,6 +30,9 @@ from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException
 from langsmith import Client
 
+# Import global variables from api.config.settings
+from api.config.settings import _bulk_loading_cache
+
 # Import authentication dependencies
 from api.dependencies.auth import get_current_user
 
@@ -48,10 +51,8 @@ from api.utils.debug import (
 sys.path.insert(0, str(BASE_DIR))
 # Import helpers
 from api.helpers import traceback_json_response
-from my_agent.utils.postgres_checkpointer import (
-    get_direct_connection,
-    update_thread_run_sentiment,
-)
+from my_agent.utils.postgres_checkpointer import update_thread_run_sentiment
+from my_agent.utils.thread_ownership import user_owns_run
 
 # Create router for feedback endpoints
 router = APIRouter()
@@ -136,49 +137,22 @@ async def submit_feedback(request: FeedbackRequest, user=Depends(get_current_use
         print__feedback_flow(f"🔒 Verifying run_id ownership for user: {user_email}")
 
         try:
-            # Get a healthy pool to check ownership
-            print__feedback_debug(f"🔍 Importing get_direct_connection")
-
-            print__feedback_debug(f"🔍 Getting healthy pool")
-            pool = await get_direct_connection()
-            print__feedback_debug(f"🔍 Pool obtained: {type(pool).__name__}")
-
-            print__feedback_debug(f"🔍 Getting connection from pool")
-            async with pool.connection() as conn:
-                print__feedback_debug(f"🔍 Connection obtained: {type(conn).__name__}")
-                async with conn.cursor() as cur:
-                    print__feedback_debug(f"🔍 Executing ownership query")
-                    await cur.execute(
-                        """
-                        SELECT COUNT(*) FROM users_threads_runs 
-                        WHERE run_id = %s AND email = %s
-                    """,
-                        (run_uuid, user_email),
-                    )
-
-                    print__feedback_debug(
-                        f"🔍 Ownership query executed, fetching result"
-                    )
-                    ownership_row = await cur.fetchone()
-                    ownership_count = ownership_row[0] if ownership_row else 0
-                    print__feedback_debug(f"🔍 Ownership count: {ownership_count}")
-
-                    if ownership_count == 0:
-                        print__feedback_debug(
-                            f"🚨 User does not own run_id - access denied"
-                        )
-                        print__feedback_flow(
-                            f"🚫 SECURITY: User {user_email} does not own run_id {run_uuid} - feedback denied"
-                        )
-                        raise HTTPException(
-                            status_code=404, detail="Run ID not found or access denied"
-                        )
+            owns_run = await user_owns_run(user_email, run_uuid)
+            print__feedback_debug(f"🔍 Ownership check result: {owns_run}")
 
-                    print__feedback_debug(f"🔍 Ownership verification successful")
-                    print__feedback_flow(
-                        f"✅ SECURITY: User {user_email} owns run_id {run_uuid} - feedback authorized"
-                    )
+            if not owns_run:
+                print__feedback_debug(f"🚨 User does not own run_id - access denied")
+                print__feedback_flow(
+                    f"🚫 SECURITY: User {user_email} does not own run_id {run_uuid} - feedback denied"
+                )
+                raise HTTPException(
+                    status_code=404, detail="Run ID not found or access denied"
+                )
 
+            print__feedback_debug(f"🔍 Ownership verification successful")
+            print__feedback_flow(
+                f"✅ SECURITY: User {user_email} owns run_id {run_uuid} - feedback authorized"
+            )
         except HTTPException:
             raise
         except Exception as ownership_error:
@@ -296,10 +270,18 @@ async def update_sentiment(request: SentimentRequest, user=Depends(get_current_u
             "🔍 Starting sentiment update with ownership verification"
         )
         print__sentiment_flow("🔒 Verifying ownership before sentiment update")
+        if not await user_owns_run(user_email, run_uuid):
+            print__sentiment_flow(
+                f"🚫 SECURITY: User {user_email} does not own run_id {run_uuid} - sentiment update denied"
+            )
+            raise HTTPException(
+                status_code=404, detail=f"Run ID not found or access denied: {run_uuid}"
+            )
         success = await update_thread_run_sentiment(run_uuid, request.sentiment)
         print__sentiment_debug(f"🔍 Sentiment update result: {success}")
 
         if success:
+            _bulk_loading_cache.invalidate_user(user_email)
             print__sentiment_debug("🔍 Sentiment update successful")
             print__sentiment_flow("✅ Sentiment successfully updated")
             result = {
@@ -43,7 +43,16 @@ from api.config.settings import (
     start_time,
 )
 from api.helpers import traceback_json_response
+from api.utils.analysis_admission import (
+    get_analysis_admission_counts,
+    get_analysis_admission_stats,
+)
+from api.utils.analysis_jobs import (
+    get_analysis_job_counts,
+    get_analysis_job_stats,
+)
 from api.utils.memory import cleanup_bulk_cache
+from my_agent.utils.thread_ownership import get_thread_ownership_stats
 
 # Create router for health endpoints
 router = APIRouter()
@@ -128,12 +137,24 @@ async def health_check():
 async def database_health_check():
     """Detailed database health check."""
     try:
+        from my_agent.utils.checkpoint_durability import (
+            get_checkpoint_durability_stats,
+        )
+        from my_agent.utils.checkpoint_serde import get_checkpoint_serde_stats
+        from my_agent.utils.postgres_checkpointer import get_app_pool_stats
+
         health_status = {
             "timestamp": datetime.now().isoformat(),
             "checkpointer_available": GLOBAL_CHECKPOINTER is not None,
             "checkpointer_type": (
                 type(GLOBAL_CHECKPOINTER).__name__ if GLOBAL_CHECKPOINTER else None
             ),
+            # Bytes written per checkpoint and compression ratio of the serializer
+            "checkpoint_serde": get_checkpoint_serde_stats(),
+            # Checkpoints persisted vs deferred by CHECKPOINT_DURABILITY
+            "checkpoint_durability": get_checkpoint_durability_stats(),
+            # Wait time and saturation of the application query pool
+            "app_pool": get_app_pool_stats(),
         }
 
         if GLOBAL_CHECKPOINTER and "AsyncPostgresSaver" in str(
@@ -209,6 +230,7 @@ async def memory_health_check():
             "active_cache_entries": len(_bulk_loading_cache),
             "cleaned_expired_entries": cleaned_entries,
             "cache_timeout_seconds": BULK_CACHE_TIMEOUT,
+            "bulk_cache": _bulk_loading_cache.stats(),
         }
 
         # Calculate estimated memory per thread for scaling guidance
@@ -228,6 +250,7 @@ async def memory_health_check():
             "over_threshold": rss_mb > GC_MEMORY_THRESHOLD,
             "total_requests_processed": _request_count,
             "cache_info": cache_info,
+            "thread_ownership_cache": get_thread_ownership_stats(),
             "scaling_info": {
                 "estimated_memory_per_thread_mb": round(memory_per_thread, 1),
                 "estimated_max_threads_at_threshold": estimated_max_threads,
@@ -353,3 +376,72 @@ async def prepared_statements_health_check():
             "error": str(e),
             "timestamp": datetime.now().isoformat(),
         }
+
+
+@router.get("/health/agent-caches")
+async def agent_caches_health_check():
+    """Hit-rate, size and utilization statistics for the agent's caches, SQLite pool and SQL loop."""
+    try:
+        from my_agent.utils.duckdb_engine import get_duckdb_engine_stats
+        from my_agent.utils.llm_cache import get_llm_cache_stats
+        from my_agent.utils.run_store import get_run_store_stats
+        from my_agent.utils.speculative_sql import get_speculative_sql_stats
+        from my_agent.utils.sql_result_cache import get_sql_result_cache_stats
+        from my_agent.utils.sqlite_pool import get_sqlite_pool_stats
+
+        return {
+            "status": "healthy",
+            "llm_cache": get_llm_cache_stats(),
+            "sqlite_pool": get_sqlite_pool_stats(),
+            "sql_result_cache": get_sql_result_cache_stats(),
+            "sql_engine": get_duckdb_engine_stats(),
+            "speculative_sql": get_speculative_sql_stats(),
+            "run_store": get_run_store_stats(),
+            "timestamp": datetime.now().isoformat(),
+        }
+    except Exception as e:
+        resp = traceback_json_response(e)
+        if resp:
+            return resp
+        return {
+            "status": "error",
+            "error": str(e),
+            "timestamp": datetime.now().isoformat(),
+        }
+
+
+@router.get("/health/analysis-jobs")
+async def analysis_jobs_health_check():
+    """Queue depth of the analysis job workers and cluster-wide analysis admission."""
+    try:
+        stats = get_analysis_job_stats()
+        if not stats["enabled"]:
+            status = "disabled"
+        elif stats["queue_depth"] >= stats["queue_size"]:
+            status = "saturated"
+        else:
+            status = "healthy"
+        try:
+            unfinished_jobs = await get_analysis_job_counts()
+            admitted_analyses = await get_analysis_admission_counts()
+        except Exception as db_error:
+            unfinished_jobs = admitted_analyses = {"error": str(db_error)}
+        return {
+            "status": status,
+            "local": stats,
+            "unfinished_jobs": unfinished_jobs,
+            "admission": {
+                **get_analysis_admission_stats(),
+                "cluster": admitted_analyses,
+            },
+            "timestamp": datetime.now().isoformat(),
+        }
+    except Exception as e:
+        resp = traceback_json_response(e)
+        if resp:
+            return resp
+        return {
+            "status": "error",
+            "error": str(e),
+            "timestamp": datetime.now().isoformat(),
+        }
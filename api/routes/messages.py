@@ -46,7 +46,10 @@ from api.utils.debug import (
 sys.path.insert(0, str(BASE_DIR))
 from api.helpers import traceback_json_response
 from api.routes.chat import get_thread_messages_with_metadata
-from my_agent.utils.postgres_checkpointer import get_healthy_checkpointer
+from my_agent.utils.postgres_checkpointer import (
+    get_direct_connection,
+    get_healthy_checkpointer,
+)
 
 # Create router for message endpoints
 router = APIRouter()
@@ -157,14 +160,7 @@ async def get_message_run_ids(thread_id: str, user=Depends(get_current_user)):
     print__feedback_flow(f"🔍 Fetching run_ids for thread {thread_id}")
 
     try:
-        pool = await get_healthy_checkpointer()
-        pool = pool.conn if hasattr(pool, "conn") else None
-
-        if not pool:
-            print__feedback_flow("⚠ No pool available for run_id lookup")
-            return {"run_ids": []}
-
-        async with pool.connection() as conn:
+        async with get_direct_connection() as conn:
             print__feedback_flow(f"📊 Executing SQL query for thread {thread_id}")
             async with conn.cursor() as cur:
                 await cur.execute(
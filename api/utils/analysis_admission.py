@@ -0,0 +1,365 @@
+"""Cluster-wide admission control for analyses.
+
+analysis_semaphore limits concurrent analyses per process only, so several
+uvicorn workers or instances multiply the load on Azure OpenAI, Cohere and
+the checkpointer pool. analysis_slot() additionally takes a ticket in the
+analysis_admission table and runs the analysis only while the ticket is among
+the first ANALYSIS_GLOBAL_MAX_CONCURRENT live tickets:
+
+- FIFO: tickets are numbered by a sequence and inserted under a transaction
+  advisory lock, so they become visible in ticket order and a waiting ticket
+  is never overtaken by a later one.
+- Leases: every process refreshes heartbeat_at of its tickets (waiting and
+  admitted) each ANALYSIS_LEASE_TTL_SECONDS / 4. Tickets of a crashed process
+  expire after ANALYSIS_LEASE_TTL_SECONDS and are deleted by the next waiter.
+- Failing open: if the table cannot be reached the analysis runs under the
+  per-process semaphore only, as before.
+- Bounded wait: waiting for the semaphore and the ticket together takes at
+  most ANALYSIS_ADMISSION_MAX_WAIT_SECONDS (the analysis timeout only starts
+  once admitted); after that the ticket is dropped and 503 with Retry-After
+  is raised.
+
+The per-process semaphore is taken first, so a process never queues more
+tickets than it can run.
+
+Configuration (environment variables):
+    - ANALYSIS_GLOBAL_MAX_CONCURRENT: Cluster-wide cap (default MAX_CONCURRENT_ANALYSES, 0 disables)
+    - ANALYSIS_LEASE_TTL_SECONDS: Lifetime of a ticket without heartbeat (default 60)
+    - ANALYSIS_ADMISSION_MAX_WAIT_SECONDS: Longest wait for admission (default 120)
+"""
+
+import asyncio
+import os
+import socket
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+from fastapi import HTTPException
+
+from api.config.settings import (
+    ANALYSIS_ADMISSION_MAX_WAIT_SECONDS,
+    ANALYSIS_GLOBAL_MAX_CONCURRENT,
+    ANALYSIS_LEASE_TTL_SECONDS,
+    MAX_CONCURRENT_ANALYSES,
+    analysis_semaphore,
+)
+from api.utils.debug import print__analyze_debug
+from my_agent.utils.postgres_checkpointer import get_direct_connection
+
+ANALYSIS_ADMISSION_LOCK_KEY = 0x435A5355  # Advisory lock serializing ticket inserts
+ANALYSIS_ADMISSION_POLL_SECONDS = 1.0  # How often a waiting ticket checks its position
+ANALYSIS_ADMISSION_ID = 36  # Static ID for analysis admission debug messages
+ANALYSIS_ADMISSION_RETRY_AFTER_SECONDS = 30  # Minimum Retry-After when no slot was free
+
+# Identifies this process in analysis_admission and analysis_jobs
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+_HEARTBEAT_TASK: Optional[asyncio.Task] = None
+_TICKETS: Dict[int, bool] = {}  # ticket -> admitted, for tickets of this process
+_STATS = {
+    "admitted": 0,
+    "admitted_after_wait": 0,
+    "expired_leases": 0,
+    "lost_tickets": 0,
+    "fail_open": 0,
+    "wait_timeouts": 0,
+    "total_wait_seconds": 0.0,
+}
+
+
+async def setup_analysis_admission_table() -> None:
+    """Create the analysis_admission table holding one row per waiting or running analysis."""
+    async with get_direct_connection() as conn:
+        await conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS analysis_admission (
+                ticket BIGSERIAL PRIMARY KEY,
+                holder VARCHAR(255) NOT NULL,
+                thread_id VARCHAR(255),
+                created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                admitted_at TIMESTAMP,
+                heartbeat_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+            );
+        """
+        )
+    print__analyze_debug(f"{ANALYSIS_ADMISSION_ID}: analysis_admission table ready")
+
+
+async def take_ticket(thread_id: Optional[str] = None) -> int:
+    """Append a ticket to the cluster-wide queue."""
+    async with get_direct_connection() as conn:
+        async with conn.cursor() as cur:
+            # Held until commit: tickets commit in sequence order
+            await cur.execute(
+                "SELECT pg_advisory_xact_lock(%s)", (ANALYSIS_ADMISSION_LOCK_KEY,)
+            )
+            await cur.execute(
+                """
+                INSERT INTO analysis_admission (holder, thread_id)
+                VALUES (%s, %s)
+                RETURNING ticket
+            """,
+                (WORKER_ID, thread_id),
+            )
+            ticket = (await cur.fetchone())[0]
+    _TICKETS[ticket] = False
+    return ticket
+
+
+async def try_admit(ticket: int, max_concurrent: int) -> Optional[bool]:
+    """Admit the ticket if fewer than max_concurrent live tickets are ahead of it.
+
+    Returns None if the ticket no longer exists (it expired).
+    """
+    async with get_direct_connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                """
+                DELETE FROM analysis_admission
+                WHERE heartbeat_at < CURRENT_TIMESTAMP - make_interval(secs => %s)
+            """,
+                (ANALYSIS_LEASE_TTL_SECONDS,),
+            )
+            if cur.rowcount:
+                _STATS["expired_leases"] += cur.rowcount
+                print__analyze_debug(
+                    f"⚠️ {ANALYSIS_ADMISSION_ID}: Expired {cur.rowcount} analysis leases without heartbeat"
+                )
+            await cur.execute(
+                """
+                UPDATE analysis_admission SET heartbeat_at = CURRENT_TIMESTAMP
+                WHERE ticket = %s
+            """,
+                (ticket,),
+            )
+            if cur.rowcount == 0:
+                return None
+            await cur.execute(
+                "SELECT COUNT(*) FROM analysis_admission WHERE ticket < %s",
+                (ticket,),
+            )
+            if (await cur.fetchone())[0] >= max_concurrent:
+                return False
+            await cur.execute(
+                """
+                UPDATE analysis_admission SET admitted_at = CURRENT_TIMESTAMP
+                WHERE ticket = %s
+            """,
+                (ticket,),
+            )
+    _TICKETS[ticket] = True
+    return True
+
+
+async def release_ticket(ticket: int) -> None:
+    """Remove the ticket; failures are logged, the lease then expires on its own."""
+    _TICKETS.pop(ticket, None)
+    try:
+        async with get_direct_connection() as conn:
+            await conn.execute(
+                "DELETE FROM analysis_admission WHERE ticket = %s", (ticket,)
+            )
+    except Exception as e:
+        print__analyze_debug(
+            f"❌ {ANALYSIS_ADMISSION_ID}: Could not release analysis ticket {ticket}: {e}"
+        )
+
+
+def _admission_timeout() -> HTTPException:
+    """503 for a request that waited ANALYSIS_ADMISSION_MAX_WAIT_SECONDS without a slot."""
+    _STATS["wait_timeouts"] += 1
+    print__analyze_debug(
+        f"⚠️ {ANALYSIS_ADMISSION_ID}: No analysis slot within {ANALYSIS_ADMISSION_MAX_WAIT_SECONDS}s"
+    )
+    average_wait = (
+        _STATS["total_wait_seconds"] / _STATS["admitted"] if _STATS["admitted"] else 0
+    )
+    return HTTPException(
+        status_code=503,
+        detail="The server is busy with other analyses. Please try again later.",
+        headers={
+            "Retry-After": str(
+                max(ANALYSIS_ADMISSION_RETRY_AFTER_SECONDS, int(average_wait))
+            )
+        },
+    )
+
+
+async def acquire_global_slot(
+    thread_id: Optional[str] = None,
+    max_concurrent: Optional[int] = None,
+    deadline: Optional[float] = None,
+) -> Optional[int]:
+    """Wait for a cluster-wide analysis slot; returns its ticket (None when not enforced).
+
+    Raises 503 if the slot is not free by deadline (a time.monotonic() value).
+    """
+    max_concurrent = max_concurrent or ANALYSIS_GLOBAL_MAX_CONCURRENT
+    if max_concurrent <= 0 or _HEARTBEAT_TASK is None:
+        return None
+
+    started = time.monotonic()
+    ticket = None
+    timed_out = False
+    try:
+        ticket = await take_ticket(thread_id)
+        while True:
+            admitted = await try_admit(ticket, max_concurrent)
+            if admitted:
+                break
+            if admitted is None:
+                # Expired while waiting (heartbeats failed): queue again at the end
+                _STATS["lost_tickets"] += 1
+                _TICKETS.pop(ticket, None)
+                ticket = await take_ticket(thread_id)
+                continue
+            if deadline is not None and time.monotonic() >= deadline:
+                timed_out = True
+                break
+            await asyncio.sleep(ANALYSIS_ADMISSION_POLL_SECONDS)
+    except asyncio.CancelledError:
+        if ticket is not None:
+            await release_ticket(ticket)
+        raise
+    except Exception as e:
+        _STATS["fail_open"] += 1
+        print__analyze_debug(
+            f"❌ {ANALYSIS_ADMISSION_ID}: Analysis admission unavailable, using the per-process limit only: {e}"
+        )
+        if ticket is not None:
+            await release_ticket(ticket)
+        return None
+
+    if timed_out:
+        await release_ticket(ticket)
+        raise _admission_timeout()
+
+    waited = time.monotonic() - started
+    _STATS["admitted"] += 1
+    _STATS["total_wait_seconds"] += waited
+    if waited >= ANALYSIS_ADMISSION_POLL_SECONDS:
+        _STATS["admitted_after_wait"] += 1
+        print__analyze_debug(
+            f"{ANALYSIS_ADMISSION_ID}: Analysis ticket {ticket} admitted after {waited:.1f}s"
+        )
+    return ticket
+
+
+@asynccontextmanager
+async def analysis_slot(thread_id: Optional[str] = None):
+    """Run an analysis within both the per-process and the cluster-wide limit.
+
+    Raises 503 if both limits are not passed within ANALYSIS_ADMISSION_MAX_WAIT_SECONDS.
+    """
+    deadline = time.monotonic() + ANALYSIS_ADMISSION_MAX_WAIT_SECONDS
+    try:
+        await asyncio.wait_for(
+            analysis_semaphore.acquire(), timeout=ANALYSIS_ADMISSION_MAX_WAIT_SECONDS
+        )
+    except asyncio.TimeoutError:
+        raise _admission_timeout() from None
+    try:
+        ticket = await acquire_global_slot(thread_id, deadline=deadline)
+        try:
+            yield
+        finally:
+            if ticket is not None:
+                await release_ticket(ticket)
+    finally:
+        analysis_semaphore.release()
+
+
+async def _heartbeat() -> None:
+    interval = max(ANALYSIS_LEASE_TTL_SECONDS / 4, 1)
+    while True:
+        await asyncio.sleep(interval)
+        if not _TICKETS:
+            continue
+        try:
+            async with get_direct_connection() as conn:
+                await conn.execute(
+                    """
+                    UPDATE analysis_admission SET heartbeat_at = CURRENT_TIMESTAMP
+                    WHERE ticket = ANY(%s)
+                """,
+                    (list(_TICKETS),),
+                )
+        except Exception as e:
+            print__analyze_debug(
+                f"❌ {ANALYSIS_ADMISSION_ID}: Analysis lease heartbeat failed: {e}"
+            )
+
+
+async def start_analysis_admission() -> None:
+    """Create the admission table and start the lease heartbeat of this process."""
+    global _HEARTBEAT_TASK
+    if _HEARTBEAT_TASK is not None or ANALYSIS_GLOBAL_MAX_CONCURRENT <= 0:
+        return
+    try:
+        await setup_analysis_admission_table()
+    except Exception as e:
+        print__analyze_debug(
+            f"❌ {ANALYSIS_ADMISSION_ID}: Cluster-wide analysis limit disabled, table setup failed: {e}"
+        )
+        return
+    _HEARTBEAT_TASK = asyncio.create_task(_heartbeat())
+    print__analyze_debug(
+        f"{ANALYSIS_ADMISSION_ID}: Cluster-wide analysis limit {ANALYSIS_GLOBAL_MAX_CONCURRENT} (worker {WORKER_ID})"
+    )
+
+
+async def stop_analysis_admission() -> None:
+    """Stop the heartbeat and drop the remaining tickets of this process."""
+    global _HEARTBEAT_TASK
+    if _HEARTBEAT_TASK is None:
+        return
+    _HEARTBEAT_TASK.cancel()
+    await asyncio.gather(_HEARTBEAT_TASK, return_exceptions=True)
+    _HEARTBEAT_TASK = None
+    _TICKETS.clear()
+    try:
+        async with get_direct_connection() as conn:
+            await conn.execute(
+                "DELETE FROM analysis_admission WHERE holder = %s", (WORKER_ID,)
+            )
+    except Exception as e:
+        print__analyze_debug(
+            f"❌ {ANALYSIS_ADMISSION_ID}: Could not drop analysis tickets on shutdown: {e}"
+        )
+
+
+async def get_analysis_admission_counts() -> Dict[str, int]:
+    """Admitted and waiting tickets across all processes."""
+    async with get_direct_connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                """
+                SELECT COUNT(admitted_at), COUNT(*) - COUNT(admitted_at)
+                FROM analysis_admission
+                WHERE heartbeat_at >= CURRENT_TIMESTAMP - make_interval(secs => %s)
+            """,
+                (ANALYSIS_LEASE_TTL_SECONDS,),
+            )
+            running, waiting = await cur.fetchone()
+    return {"running": running, "waiting": waiting}
+
+
+def get_analysis_admission_stats() -> Dict[str, Any]:
+    admitted = sum(_TICKETS.values())
+    return {
+        "enabled": _HEARTBEAT_TASK is not None,
+        "worker_id": WORKER_ID,
+        "global_max_concurrent": ANALYSIS_GLOBAL_MAX_CONCURRENT,
+        "max_wait_seconds": ANALYSIS_ADMISSION_MAX_WAIT_SECONDS,
+        "local_max_concurrent": MAX_CONCURRENT_ANALYSES,
+        "local_running": admitted,
+        "local_waiting": len(_TICKETS) - admitted,
+        **{key: value for key, value in _STATS.items() if not key.startswith("total_")},
+        "avg_wait_seconds": (
+            round(_STATS["total_wait_seconds"] / _STATS["admitted"], 2)
+            if _STATS["admitted"]
+            else 0.0
+        ),
+    }
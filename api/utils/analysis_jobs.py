@@ -0,0 +1,555 @@
+"""Asynchronous analysis jobs with submit/poll semantics.
+
+POST /analyze holds the HTTP connection and an analysis slot for the whole
+run (up to 8 minutes); a client that disconnects or retries wastes or
+duplicates the work. POST /analyze/jobs instead records the run, puts a job on
+a bounded per-process queue and returns its run_id immediately. A pool of
+ANALYSIS_JOB_WORKERS workers runs the queued jobs (sharing analysis_slot with
+/analyze) and stores status and result in the analysis_jobs table, so any
+worker can answer GET /analyze/jobs/{run_id}.
+
+- Admission: a full queue is rejected with 503 and a user who already has
+  ANALYSIS_JOB_MAX_PER_USER unfinished jobs with 429, both with Retry-After.
+  Unfinished jobs are counted in analysis_jobs, so the limit holds across
+  workers; a per-user advisory lock makes count and insert atomic.
+- Retries: resubmitting the same prompt to a thread whose job is still
+  unfinished returns that job instead of starting a second run. A partial
+  unique index on unfinished (email, thread_id, prompt) lets the insert
+  return the existing job (INSERT ... ON CONFLICT), so concurrent retries on
+  different workers cannot both start a run.
+- Lost jobs: every process refreshes heartbeat_at of its unfinished jobs each
+  ANALYSIS_JOB_HEARTBEAT_SECONDS. A job whose process died is reported as
+  failed once its heartbeat is older than ANALYSIS_JOB_STALE_SECONDS.
+- Finished jobs are pruned after ANALYSIS_JOB_RETENTION_HOURS; the interaction
+  itself stays in thread_messages. Failed jobs store their error there too, so
+  the chat history never has to look for them in the checkpoints.
+"""
+
+import asyncio
+import functools
+import json
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from psycopg.types.json import Jsonb
+
+from api.config.settings import (
+    ANALYSIS_JOB_HEARTBEAT_SECONDS,
+    ANALYSIS_JOB_MAX_PER_USER,
+    ANALYSIS_JOB_QUEUE_SIZE,
+    ANALYSIS_JOB_STALE_SECONDS,
+    ANALYSIS_JOB_WORKERS,
+    ANALYSIS_TIMEOUT_SECONDS,
+    _bulk_loading_cache,
+)
+from api.utils.analysis_admission import WORKER_ID, analysis_slot
+from api.utils.debug import print__analyze_debug
+from my_agent.utils.postgres_checkpointer import (
+    get_direct_connection,
+    save_thread_message,
+)
+
+ANALYSIS_JOB_RETENTION_HOURS = 24  # Finished jobs kept for polling clients
+ANALYSIS_JOB_PRUNE_INTERVAL = 3600  # Seconds between prunes of finished jobs
+ANALYSIS_JOBS_ID = 35  # Static ID for analysis job debug messages
+ANALYSIS_JOBS_LOCK_KEY = 0x4A4F4253  # Advisory lock class for a user's submissions
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+FINISHED_JOB_STATUSES = (JOB_COMPLETED, JOB_FAILED)
+
+_JOB_COLUMNS = """run_id, thread_id, status, result, error,
+                  created_at, started_at, finished_at"""
+_dumps_jsonb = functools.partial(json.dumps, ensure_ascii=False, default=str)
+
+_QUEUE: Optional[asyncio.Queue] = None
+_TASKS: List[asyncio.Task] = []
+_RESERVED = 0  # Admitted submissions not yet on the queue
+_RUNNING = 0
+_DONE_EVENTS: Dict[str, asyncio.Event] = {}  # run_id -> set when the job finishes
+_STATS = {
+    "submitted": 0,
+    "deduplicated": 0,
+    "rejected_queue_full": 0,
+    "rejected_user_limit": 0,
+    "completed": 0,
+    "failed": 0,
+    "total_wait_seconds": 0.0,
+    "total_run_seconds": 0.0,
+}
+
+
+async def setup_analysis_jobs_table() -> None:
+    """Create the analysis_jobs table holding status and result of every job."""
+    async with get_direct_connection() as conn:
+        await conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS analysis_jobs (
+                run_id VARCHAR(255) PRIMARY KEY,
+                email VARCHAR(255) NOT NULL,
+                thread_id VARCHAR(255) NOT NULL,
+                prompt TEXT,
+                status VARCHAR(20) NOT NULL,
+                result JSONB,
+                error TEXT,
+                worker_id VARCHAR(255),
+                created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                started_at TIMESTAMP,
+                finished_at TIMESTAMP,
+                heartbeat_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+            );
+        """
+        )
+        await conn.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_analysis_jobs_email_thread
+            ON analysis_jobs(email, thread_id, created_at DESC);
+        """
+        )
+        await conn.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_analysis_jobs_unfinished
+            ON analysis_jobs(worker_id) WHERE status IN ('queued', 'running');
+        """
+        )
+        # Tables created before the unique index below may hold duplicate unfinished jobs
+        await conn.execute(
+            """
+            UPDATE analysis_jobs
+            SET status = %s, error = %s, finished_at = CURRENT_TIMESTAMP
+            WHERE status IN ('queued', 'running')
+              AND run_id NOT IN (
+                  SELECT DISTINCT ON (email, thread_id, md5(prompt)) run_id
+                  FROM analysis_jobs
+                  WHERE status IN ('queued', 'running')
+                  ORDER BY email, thread_id, md5(prompt), created_at DESC
+              )
+        """,
+            (JOB_FAILED, "Superseded by a resubmission of the same prompt"),
+        )
+        # md5: prompts can exceed the btree entry size limit
+        await conn.execute(
+            """
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_analysis_jobs_unfinished_prompt
+            ON analysis_jobs(email, thread_id, md5(prompt))
+            WHERE status IN ('queued', 'running');
+        """
+        )
+        await conn.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_analysis_jobs_finished
+            ON analysis_jobs(finished_at) WHERE finished_at IS NOT NULL;
+        """
+        )
+    print__analyze_debug(f"{ANALYSIS_JOBS_ID}: analysis_jobs table ready")
+
+
+def _job_from_row(row) -> Dict[str, Any]:
+    return {
+        "run_id": row[0],
+        "thread_id": row[1],
+        "status": row[2],
+        "result": row[3],
+        "error": row[4],
+        "created_at": row[5],
+        "started_at": row[6],
+        "finished_at": row[7],
+    }
+
+
+async def _expire_stale_jobs(cur, condition: str, params: tuple) -> None:
+    """Fail unfinished jobs (matching the condition) whose process stopped sending heartbeats."""
+    await cur.execute(
+        f"""
+        UPDATE analysis_jobs
+        SET status = %s, error = %s, finished_at = CURRENT_TIMESTAMP
+        WHERE {condition}
+          AND status IN (%s, %s)
+          AND heartbeat_at < CURRENT_TIMESTAMP - make_interval(secs => %s)
+    """,
+        (
+            JOB_FAILED,
+            "The server running this job stopped, please resubmit",
+            *params,
+            JOB_QUEUED,
+            JOB_RUNNING,
+            ANALYSIS_JOB_STALE_SECONDS,
+        ),
+    )
+
+
+async def get_analysis_job(email: str, run_id: str) -> Optional[Dict[str, Any]]:
+    """Return the user's job (None if it does not exist or belongs to someone else)."""
+    async with get_direct_connection() as conn:
+        async with conn.cursor() as cur:
+            await _expire_stale_jobs(cur, "run_id = %s AND email = %s", (run_id, email))
+            await cur.execute(
+                f"""
+                SELECT {_JOB_COLUMNS} FROM analysis_jobs
+                WHERE run_id = %s AND email = %s
+            """,
+                (run_id, email),
+            )
+            row = await cur.fetchone()
+    return _job_from_row(row) if row else None
+
+
+def _retry_after_seconds() -> int:
+    """Rough time until a worker frees up: average run time per queued job and worker."""
+    finished = _STATS["completed"] + _STATS["failed"]
+    average_run = _STATS["total_run_seconds"] / finished if finished else 60
+    backlog = (_QUEUE.qsize() if _QUEUE else 0) + _RESERVED + 1
+    return max(1, int(average_run * backlog / max(ANALYSIS_JOB_WORKERS, 1)))
+
+
+async def create_analysis_job(
+    email: str, thread_id: str, prompt: str
+) -> Tuple[Dict[str, Any], bool]:
+    """Record a queued job, or return the user's unfinished job for the same prompt.
+
+    Returns (job, created). Raises 429 if the user already has
+    ANALYSIS_JOB_MAX_PER_USER unfinished jobs on any worker.
+    """
+    run_id = str(uuid.uuid4())
+    async with get_direct_connection() as conn:
+        async with conn.cursor() as cur:
+            # Held until commit: the user's count and insert cannot interleave
+            await cur.execute(
+                "SELECT pg_advisory_xact_lock(%s, hashtext(%s))",
+                (ANALYSIS_JOBS_LOCK_KEY, email),
+            )
+            await _expire_stale_jobs(cur, "email = %s", (email,))
+            await cur.execute(
+                f"""
+                INSERT INTO analysis_jobs
+                    (run_id, email, thread_id, prompt, status, worker_id)
+                SELECT %s, %s, %s, %s, %s, %s
+                WHERE (
+                    SELECT COUNT(*) FROM analysis_jobs
+                    WHERE email = %s AND status IN ('queued', 'running')
+                ) < %s
+                ON CONFLICT (email, thread_id, md5(prompt))
+                    WHERE status IN ('queued', 'running')
+                    DO UPDATE SET heartbeat_at = analysis_jobs.heartbeat_at
+                RETURNING {_JOB_COLUMNS}
+            """,
+                (
+                    run_id,
+                    email,
+                    thread_id,
+                    prompt,
+                    JOB_QUEUED,
+                    WORKER_ID,
+                    email,
+                    ANALYSIS_JOB_MAX_PER_USER,
+                ),
+            )
+            row = await cur.fetchone()
+            if row is None:
+                # At the limit nothing was inserted; a resubmission still gets its job
+                await cur.execute(
+                    f"""
+                    SELECT {_JOB_COLUMNS} FROM analysis_jobs
+                    WHERE email = %s AND thread_id = %s AND md5(prompt) = md5(%s)
+                      AND status IN ('queued', 'running')
+                """,
+                    (email, thread_id, prompt),
+                )
+                row = await cur.fetchone()
+
+    if row is None:
+        _STATS["rejected_user_limit"] += 1
+        raise HTTPException(
+            status_code=429,
+            detail=f"You already have {ANALYSIS_JOB_MAX_PER_USER} analyses in progress. Please wait for one to finish.",
+            headers={"Retry-After": str(_retry_after_seconds())},
+        )
+    job = _job_from_row(row)
+    if job["run_id"] != run_id:
+        _STATS["deduplicated"] += 1
+        return job, False
+    return job, True
+
+
+async def discard_analysis_job(run_id: str) -> None:
+    """Delete a job recorded by create_analysis_job that could not be queued."""
+    try:
+        async with get_direct_connection() as conn:
+            await conn.execute("DELETE FROM analysis_jobs WHERE run_id = %s", (run_id,))
+    except Exception as e:
+        print__analyze_debug(
+            f"❌ {ANALYSIS_JOBS_ID}: Could not discard analysis job {run_id}: {e}"
+        )
+
+
+def admit_analysis_job() -> None:
+    """Reserve a slot on this process's queue or raise 503 (queue full)."""
+    global _RESERVED
+    if _QUEUE is None:
+        raise HTTPException(
+            status_code=503, detail="Analysis jobs are not available on this server"
+        )
+    if _QUEUE.qsize() + _RESERVED >= ANALYSIS_JOB_QUEUE_SIZE:
+        _STATS["rejected_queue_full"] += 1
+        raise HTTPException(
+            status_code=503,
+            detail="The analysis queue is full. Please try again later.",
+            headers={"Retry-After": str(_retry_after_seconds())},
+        )
+    _RESERVED += 1
+
+
+def release_analysis_job() -> None:
+    """Give back a slot reserved by admit_analysis_job whose job was never submitted."""
+    global _RESERVED
+    _RESERVED -= 1
+
+
+def submit_analysis_job(job: Dict[str, Any], email: str, prompt: str) -> None:
+    """Put a job recorded by create_analysis_job on the queue (consumes the admitted slot)."""
+    global _RESERVED
+    _RESERVED -= 1
+    _DONE_EVENTS[job["run_id"]] = asyncio.Event()
+    # Cannot raise QueueFull: admit_analysis_job reserved the slot
+    _QUEUE.put_nowait(
+        {
+            "run_id": job["run_id"],
+            "email": email,
+            "thread_id": job["thread_id"],
+            "prompt": prompt,
+            "enqueued_at": time.monotonic(),
+        }
+    )
+    _STATS["submitted"] += 1
+    print__analyze_debug(
+        f"{ANALYSIS_JOBS_ID}: Queued analysis job {job['run_id']} (queue depth {_QUEUE.qsize()})"
+    )
+
+
+async def _update_job(run_id: str, status: str, result=None, error=None) -> None:
+    """Store a status change; failures are logged so the worker keeps running."""
+    try:
+        async with get_direct_connection() as conn:
+            if status == JOB_RUNNING:
+                await conn.execute(
+                    """
+                    UPDATE analysis_jobs
+                    SET status = %s, started_at = CURRENT_TIMESTAMP,
+                        heartbeat_at = CURRENT_TIMESTAMP
+                    WHERE run_id = %s
+                """,
+                    (status, run_id),
+                )
+            else:
+                await conn.execute(
+                    """
+                    UPDATE analysis_jobs
+                    SET status = %s, result = %s, error = %s,
+                        finished_at = CURRENT_TIMESTAMP
+                    WHERE run_id = %s
+                """,
+                    (
+                        status,
+                        Jsonb(result, dumps=_dumps_jsonb) if result else None,
+                        error,
+                        run_id,
+                    ),
+                )
+    except Exception as e:
+        print__analyze_debug(
+            f"❌ {ANALYSIS_JOBS_ID}: Could not mark analysis job {run_id} as {status}: {e}"
+        )
+
+
+async def _record_failed_run(job: Dict[str, Any], error: str) -> None:
+    """Store the failed run in thread_messages (never replacing a stored answer)."""
+    if await save_thread_message(
+        job["email"],
+        job["thread_id"],
+        job["run_id"],
+        prompt=job["prompt"],
+        error=error,
+        overwrite=False,
+    ):
+        _bulk_loading_cache.invalidate_user(job["email"])
+
+
+async def _run_job(job: Dict[str, Any], runner) -> None:
+    global _RUNNING
+    run_id = job["run_id"]
+    status, result, error = JOB_FAILED, None, None
+    try:
+        async with analysis_slot(job["thread_id"]):
+            started = time.monotonic()
+            _STATS["total_wait_seconds"] += started - job["enqueued_at"]
+            _RUNNING += 1
+            try:
+                await _update_job(run_id, JOB_RUNNING)
+                result = await asyncio.wait_for(
+                    runner(job), timeout=ANALYSIS_TIMEOUT_SECONDS
+                )
+                status = JOB_COMPLETED
+            finally:
+                _RUNNING -= 1
+                _STATS["total_run_seconds"] += time.monotonic() - started
+    except asyncio.CancelledError:
+        error = "The server was shut down during the analysis, please resubmit"
+        raise
+    except asyncio.TimeoutError:
+        error = f"Analysis timed out after {ANALYSIS_TIMEOUT_SECONDS // 60} minutes"
+    except HTTPException as e:
+        # No analysis slot within ANALYSIS_ADMISSION_MAX_WAIT_SECONDS
+        error = e.detail
+    except Exception as e:
+        print__analyze_debug(
+            f"🚨 {ANALYSIS_JOBS_ID}: Analysis job {run_id} failed: {type(e).__name__}: {e}"
+        )
+        error = "Sorry, there was an error processing your request. Please try again."
+    finally:
+        await _update_job(run_id, status, result=result, error=error)
+        if status != JOB_COMPLETED:
+            await _record_failed_run(job, error)
+        _STATS["completed" if status == JOB_COMPLETED else "failed"] += 1
+        event = _DONE_EVENTS.pop(run_id, None)
+        if event is not None:
+            event.set()
+        print__analyze_debug(
+            f"{ANALYSIS_JOBS_ID}: Analysis job {run_id} {status} (queue depth {_QUEUE.qsize()})"
+        )
+
+
+async def _worker(runner) -> None:
+    while True:
+        job = await _QUEUE.get()
+        try:
+            await _run_job(job, runner)
+        finally:
+            _QUEUE.task_done()
+
+
+async def _heartbeat() -> None:
+    """Keep this process's unfinished jobs alive and prune old finished jobs."""
+    last_prune = 0.0
+    while True:
+        await asyncio.sleep(ANALYSIS_JOB_HEARTBEAT_SECONDS)
+        try:
+            async with get_direct_connection() as conn:
+                if _DONE_EVENTS:
+                    await conn.execute(
+                        """
+                        UPDATE analysis_jobs SET heartbeat_at = CURRENT_TIMESTAMP
+                        WHERE worker_id = %s AND status IN (%s, %s)
+                    """,
+                        (WORKER_ID, JOB_QUEUED, JOB_RUNNING),
+                    )
+                if time.monotonic() - last_prune > ANALYSIS_JOB_PRUNE_INTERVAL:
+                    await conn.execute(
+                        """
+                        DELETE FROM analysis_jobs
+                        WHERE finished_at < CURRENT_TIMESTAMP - make_interval(hours => %s)
+                    """,
+                        (ANALYSIS_JOB_RETENTION_HOURS,),
+                    )
+                    last_prune = time.monotonic()
+        except Exception as e:
+            print__analyze_debug(
+                f"❌ {ANALYSIS_JOBS_ID}: Analysis job heartbeat failed: {e}"
+            )
+
+
+async def start_analysis_job_workers(
+    runner: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]],
+) -> None:
+    """Create the job table and start the workers; runner(job) returns the job result."""
+    global _QUEUE
+    if _QUEUE is not None:
+        return
+    try:
+        await setup_analysis_jobs_table()
+    except Exception as e:
+        # Submissions get 503 while _QUEUE is None; /analyze keeps working
+        print__analyze_debug(
+            f"❌ {ANALYSIS_JOBS_ID}: Analysis jobs disabled, table setup failed: {e}"
+        )
+        return
+    _QUEUE = asyncio.Queue(maxsize=ANALYSIS_JOB_QUEUE_SIZE)
+    _TASKS.extend(
+        asyncio.create_task(_worker(runner)) for _ in range(ANALYSIS_JOB_WORKERS)
+    )
+    _TASKS.append(asyncio.create_task(_heartbeat()))
+    print__analyze_debug(
+        f"{ANALYSIS_JOBS_ID}: Started {ANALYSIS_JOB_WORKERS} analysis job workers (queue size {ANALYSIS_JOB_QUEUE_SIZE}, worker {WORKER_ID})"
+    )
+
+
+async def stop_analysis_job_workers() -> None:
+    """Cancel the workers and fail jobs that were still queued in this process."""
+    global _QUEUE
+    if _QUEUE is None:
+        return
+    for task in _TASKS:
+        task.cancel()
+    await asyncio.gather(*_TASKS, return_exceptions=True)
+    _TASKS.clear()
+    while not _QUEUE.empty():
+        job = _QUEUE.get_nowait()
+        error = "The server was shut down before the analysis started, please resubmit"
+        await _update_job(job["run_id"], JOB_FAILED, error=error)
+        await _record_failed_run(job, error)
+        _STATS["failed"] += 1
+    _QUEUE = None
+    for event in _DONE_EVENTS.values():
+        event.set()
+    _DONE_EVENTS.clear()
+
+
+async def wait_for_analysis_job(run_id: str, timeout: float) -> None:
+    """Wait up to timeout seconds, returning early if this process finishes the job."""
+    event = _DONE_EVENTS.get(run_id)
+    if event is None:
+        await asyncio.sleep(timeout)
+        return
+    try:
+        await asyncio.wait_for(event.wait(), timeout=timeout)
+    except asyncio.TimeoutError:
+        pass
+
+
+async def get_analysis_job_counts() -> Dict[str, int]:
+    """Unfinished jobs per status across all workers."""
+    async with get_direct_connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                """
+                SELECT status, COUNT(*) FROM analysis_jobs
+                WHERE status IN (%s, %s)
+                GROUP BY status
+            """,
+                (JOB_QUEUED, JOB_RUNNING),
+            )
+            counts = dict(await cur.fetchall())
+    return {status: counts.get(status, 0) for status in (JOB_QUEUED, JOB_RUNNING)}
+
+
+def get_analysis_job_stats() -> Dict[str, Any]:
+    finished = _STATS["completed"] + _STATS["failed"]
+    started = finished + _RUNNING
+    return {
+        "enabled": _QUEUE is not None,
+        "worker_id": WORKER_ID,
+        "workers": ANALYSIS_JOB_WORKERS,
+        "queue_depth": _QUEUE.qsize() if _QUEUE else 0,
+        "queue_size": ANALYSIS_JOB_QUEUE_SIZE,
+        "running": _RUNNING,
+        **{key: value for key, value in _STATS.items() if not key.startswith("total_")},
+        "avg_wait_seconds": (
+            round(_STATS["total_wait_seconds"] / started, 2) if started else 0.0
+        ),
+        "avg_run_seconds": (
+            round(_STATS["total_run_seconds"] / finished, 2) if finished else 0.0
+        ),
+    }
@@ -36,14 +36,11 @@ import psutil
 from fastapi import Request
 
 # Import global variables from api.config.settings
-from api.config.settings import (
-    BULK_CACHE_TIMEOUT,
-    GC_MEMORY_THRESHOLD,
-    _bulk_loading_cache,
-)
+from api.config.settings import GC_MEMORY_THRESHOLD, _bulk_loading_cache
 
 # Import debug functions from utils
 from api.utils.debug import print__memory_monitoring
+from my_agent.utils.thread_ownership import invalidate_thread, user_owns_thread
 
 
 # ============================================================
@@ -51,17 +48,7 @@ from api.utils.debug import print__memory_monitoring
 # ============================================================
 def cleanup_bulk_cache():
     """Clean up expired cache entries."""
-    current_time = time.time()
-    expired_keys = []
-
-    for cache_key, (cached_data, cache_time) in _bulk_loading_cache.items():
-        if current_time - cache_time > BULK_CACHE_TIMEOUT:
-            expired_keys.append(cache_key)
-
-    for key in expired_keys:
-        del _bulk_loading_cache[key]
-
-    return len(expired_keys)
+    return _bulk_loading_cache.cleanup_expired()
 
 
 def check_memory_and_gc():
@@ -185,6 +172,7 @@ async def perform_deletion_operations(conn, user_email: str, thread_id: str):
     """Perform the actual deletion operations on the given connection."""
     # Import debug function
     from api.utils.debug import print__api_postgresql
+    from my_agent.utils.postgres_checkpointer import record_thread_deletion
 
     print__api_postgresql(f"🔧 DEBUG: Starting deletion operations...")
 
@@ -197,27 +185,7 @@ async def perform_deletion_operations(conn, user_email: str, thread_id: str):
         f"🔒 Verifying thread ownership for deletion - user: {user_email}, thread: {thread_id}"
     )
 
-    print__api_postgresql(f"🔧 DEBUG: Creating cursor for ownership check...")
-    async with conn.cursor() as cur:
-        print__api_postgresql(f"🔧 DEBUG: Cursor created, executing ownership query...")
-        # Fix: Use correct psycopg approach with fetchone() instead of fetchval()
-        await cur.execute(
-            """
-            SELECT COUNT(*) FROM users_threads_runs 
-            WHERE email = %s AND thread_id = %s
-        """,
-            (user_email, thread_id),
-        )
-
-        # Get the result row and extract the count value
-        result_row = await cur.fetchone()
-        # Fix: psycopg Row objects don't support [0] indexing, convert to tuple first
-        thread_entries_count = tuple(result_row)[0] if result_row else 0
-        print__api_postgresql(
-            f"🔧 DEBUG: Ownership check complete, count: {thread_entries_count}"
-        )
-
-    if thread_entries_count == 0:
+    if not await user_owns_thread(user_email, thread_id):
         print__api_postgresql(
             f"🚫 SECURITY: User {user_email} does not own thread {thread_id} - deletion denied"
         )
@@ -229,13 +197,13 @@ async def perform_deletion_operations(conn, user_email: str, thread_id: str):
         }
 
     print__api_postgresql(
-        f"✅ SECURITY: User {user_email} owns thread {thread_id} ({thread_entries_count} entries) - deletion authorized"
+        f"✅ SECURITY: User {user_email} owns thread {thread_id} - deletion authorized"
     )
 
     print__api_postgresql(f"🔄 Deleting from checkpoint tables for thread {thread_id}")
 
-    # Delete from all checkpoint tables
-    tables = ["checkpoint_blobs", "checkpoint_writes", "checkpoints"]
+    # Delete from all checkpoint tables and the materialized chat history
+    tables = ["checkpoint_blobs", "checkpoint_writes", "checkpoints", "thread_messages"]
     deleted_counts = {}
 
     for table in tables:
@@ -333,6 +301,11 @@ async def perform_deletion_operations(conn, user_email: str, thread_id: str):
 
             deleted_counts["users_threads_runs"] = users_threads_runs_deleted
 
+            # Drop the thread summary and leave a tombstone for delta sync
+            await record_thread_deletion(cur, user_email, thread_id)
+        invalidate_thread(user_email, thread_id)
+        _bulk_loading_cache.invalidate_user(user_email)
+
     except Exception as e:
         print__api_postgresql(f"❌ Error deleting from users_threads_runs: {e}")
         print__api_postgresql(
@@ -0,0 +1,87 @@
+"""Backfill thread_messages from existing checkpoints.
+
+Interactions finished before the thread_messages table existed are only
+recorded in checkpoint metadata. This job walks every thread in
+users_threads_runs, extracts its interactions from the checkpoints (prompt
+from ``__start__``, answer and metadata from ``submit_final_answer``) and
+stores them under the run_id whose prompt matches, in order; settled runs
+without an answer are stored with an error. Existing rows are never
+overwritten, so the job is safe to re-run and to run while the API serves
+requests.
+
+Usage:
+    python -m api.utils.thread_messages_backfill [--limit N]
+"""
+
+import argparse
+import asyncio
+import sys
+from typing import Dict
+
+if sys.platform == "win32":
+    asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from api.routes.chat import RUN_SETTLE_SECONDS, add_missing_interactions
+from my_agent.utils.postgres_checkpointer import (
+    cleanup_checkpointer,
+    get_direct_connection,
+    get_healthy_checkpointer,
+    get_thread_messages,
+    get_thread_runs,
+)
+
+
+async def backfill_thread(checkpointer, email: str, thread_id: str) -> int:
+    stored_rows = await get_thread_messages(email, thread_id)
+    runs = await get_thread_runs(email, thread_id, RUN_SETTLE_SECONDS)
+    rows = await add_missing_interactions(
+        checkpointer, email, thread_id, stored_rows, runs
+    )
+    return len(rows) - len(stored_rows)
+
+
+async def backfill_thread_messages(limit: int = None) -> Dict[str, int]:
+    checkpointer = await get_healthy_checkpointer()
+    async with get_direct_connection() as conn:
+        async with conn.cursor() as cur:
+            query = "SELECT DISTINCT email, thread_id FROM users_threads_runs"
+            params = ()
+            if limit is not None:
+                query += " LIMIT %s"
+                params = (limit,)
+            await cur.execute(query, params)
+            threads = await cur.fetchall()
+
+    stats = {"threads": len(threads), "messages_stored": 0, "failed_threads": 0}
+    for index, (email, thread_id) in enumerate(threads, 1):
+        try:
+            stats["messages_stored"] += await backfill_thread(
+                checkpointer, email, thread_id
+            )
+        except Exception as e:
+            stats["failed_threads"] += 1
+            print(f"Failed to backfill thread {thread_id}: {e}")
+        if index % 50 == 0:
+            print(f"[{index}/{len(threads)}] {stats}")
+    return stats
+
+
+async def _main(limit: int = None):
+    try:
+        print(await backfill_thread_messages(limit))
+    finally:
+        await cleanup_checkpointer()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Backfill thread_messages from checkpoints"
+    )
+    parser.add_argument(
+        "--limit", type=int, default=None, help="Maximum threads to process"
+    )
+    asyncio.run(_main(parser.parse_args().limit))
@@ -111,6 +111,7 @@ export function ChatCacheProvider({ children }: { children: React.ReactNode }) {
   
   // NEW: Pagination state
   const [threadsPage, setThreadsPage] = useState(1)
+  const [threadsCursor, setThreadsCursor] = useState<string | null>(null)
   const [threadsHasMore, setThreadsHasMore] = useState(true)
   const [threadsLoading, setThreadsLoading] = useState(false)
   const [totalThreadsCount, setTotalThreadsCount] = useState(0)
@@ -673,8 +674,9 @@ export function ChatCacheProvider({ children }: { children: React.ReactNode }) {
       
       setThreadsState(threadMetas);
       setThreadsPage(1);
+      setThreadsCursor(response.next_cursor ?? null);
       setThreadsHasMore(response.has_more);
-      setTotalThreadsCount(response.total_count);
+      setTotalThreadsCount(response.total_count ?? 0);
       
       console.log('[ChatCache] 📊 Pagination state:', {
         loaded: threadMetas.length,
@@ -718,8 +720,12 @@ export function ChatCacheProvider({ children }: { children: React.ReactNode }) {
       }
 
       const nextPage = threadsPage + 1;
+      // Keyset cursor from the previous page; page number only as a fallback
+      const pageQuery = threadsCursor
+        ? `cursor=${encodeURIComponent(threadsCursor)}`
+        : `page=${nextPage}`;
       const response = await authApiFetch<PaginatedChatThreadsResponse>(
-        `/chat-threads?page=${nextPage}&limit=10`, 
+        `/chat-threads?${pageQuery}&limit=10`, 
         freshSession.id_token
       );
       
@@ -737,8 +743,12 @@ export function ChatCacheProvider({ children }: { children: React.ReactNode }) {
       // Append to existing threads
       setThreadsState(prev => [...prev, ...newThreadMetas]);
       setThreadsPage(nextPage);
+      setThreadsCursor(response.next_cursor ?? null);
       setThreadsHasMore(response.has_more);
-      setTotalThreadsCount(response.total_count);
+      // Cursor pages skip the count; keep the one from the first page
+      if (response.total_count !== null) {
+        setTotalThreadsCount(response.total_count);
+      }
       
       console.log('[ChatCache] 📊 Updated pagination state:', {
         loaded: threads.length + newThreadMetas.length,
@@ -767,13 +777,14 @@ export function ChatCacheProvider({ children }: { children: React.ReactNode }) {
     } finally {
       setThreadsLoading(false);
     }
-  }, [userEmail, threadsLoading, threadsHasMore, threadsPage, threads.length, loadAllMessagesFromAPI]);
+  }, [userEmail, threadsLoading, threadsHasMore, threadsPage, threadsCursor, threads.length, loadAllMessagesFromAPI]);
   
   // NEW: Reset pagination
   const resetPagination = useCallback(() => {
     console.log('[ChatCache] 🔄 Resetting pagination...');
     setThreadsState([]);
     setThreadsPage(1);
+    setThreadsCursor(null);
     setThreadsHasMore(true);
     setTotalThreadsCount(0);
     setThreadsLoading(false);
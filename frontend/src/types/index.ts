@@ -84,10 +84,11 @@ export interface ChatThreadResponse {
 
 export interface PaginatedChatThreadsResponse {
   threads: ChatThreadResponse[];
-  total_count: number;
+  total_count: number | null; // null on cursor pages
   page: number;
   limit: number;
   has_more: boolean;
+  next_cursor?: string | null;
 }
 
 export interface ApiError {
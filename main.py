@@ -23,6 +23,7 @@ import argparse
 import gc
 import os
 import re
+import time
 import uuid
 from pathlib import Path
 from typing import List
@@ -35,11 +36,14 @@ from langchain_core.messages import AIMessage, SystemMessage
 load_dotenv()
 
 from my_agent import create_graph
+from my_agent.utils.checkpoint_durability import flush_deferred_checkpoint
 from my_agent.utils.nodes import MAX_ITERATIONS
 from my_agent.utils.postgres_checkpointer import (
     get_healthy_checkpointer,
     retry_on_prepared_statement_error,
 )
+from my_agent.utils.run_store import get_documents, new_store_id, release_store
+from my_agent.utils.speculative_sql import is_fanout_run, record_run
 from my_agent.utils.state import DataAnalysisState
 
 # Robust BASE_DIR logic for project root
@@ -358,6 +362,8 @@ async def main(prompt=None, thread_id=None, checkpointer=None, run_id=None):
         is_continuing_conversation = False
 
     print__analysis_tracing_debug("55 - STATE PREPARATION: Preparing input state")
+    # Bulky retrieval Documents live in a run-scoped store, state keeps only keys
+    side_store_id = new_store_id()
     # Prepare input state based on whether this is a new or continuing conversation
     if is_continuing_conversation:
         print__analysis_tracing_debug(
@@ -369,6 +375,8 @@ async def main(prompt=None, thread_id=None, checkpointer=None, run_id=None):
             "prompt": prompt,
             "rewritten_prompt": None,
             "iteration": 0,  # Reset for new question
+            "schema": "",  # Reset so the schema is reloaded for the new selections
+            "side_store_id": side_store_id,
         }
     else:
         print__analysis_tracing_debug(
@@ -387,23 +395,39 @@ async def main(prompt=None, thread_id=None, checkpointer=None, run_id=None):
             ],  # Initialize for new conversation
             "iteration": 0,
             "queries_and_results": [],
+            "structured_query_results": [],
             "chromadb_missing": False,
             "final_answer": "",  # Initialize final_answer field
             # MISSING FIELDS - These were causing checkpoint storage issues
             "reflection_decision": "",  # Last decision from reflection node
-            "hybrid_search_results": [],  # Intermediate hybrid search results before reranking
+            "hybrid_search_results": [],  # Run-store keys of hybrid search results before reranking
             "most_similar_selections": [],  # List of (selection_code, cohere_rerank_score) after reranking
             "top_selection_codes": [],  # List of top N selection codes
+            "schema": "",  # Schema text loaded once per run by get_schema_node
             # PDF chunk functionality states
-            "hybrid_search_chunks": [],  # Intermediate hybrid search results for PDF chunks
-            "most_similar_chunks": [],  # List of (document, cohere_rerank_score) after reranking PDF chunks
-            "top_chunks": [],  # List of top N PDF chunks that passed relevance threshold
+            "hybrid_search_chunks": [],  # Run-store keys of hybrid search results for PDF chunks
+            "most_similar_chunks": [],  # List of (run-store key, cohere_rerank_score) after reranking PDF chunks
+            "top_chunk_refs": [],  # Run-store keys of PDF chunks that passed relevance threshold
+            "top_chunks": [],  # Stays empty, main() resolves top_chunk_refs after the run
+            "side_store_id": side_store_id,  # Run-scoped store for retrieved Documents
         }
 
     print__analysis_tracing_debug("58 - GRAPH EXECUTION: Starting LangGraph execution")
     # Execute the graph with checkpoint configuration and run_id for LangSmith tracing
     # Checkpoints allow resuming execution if interrupted and maintaining conversation memory
-    result = await graph.ainvoke(input_state, config=config)
+    graph_start = time.perf_counter()
+    try:
+        result = await graph.ainvoke(input_state, config=config)
+        # PDF chunks stay out of the checkpoints; resolve them before the store is released
+        top_chunks = list(
+            get_documents(side_store_id, result.get("top_chunk_refs") or []).values()
+        )
+    finally:
+        # Persist the last checkpoint deferred by CHECKPOINT_DURABILITY (also on error)
+        await flush_deferred_checkpoint(checkpointer, thread_id)
+        # Retrieved Documents are only needed while the graph runs
+        release_store(side_store_id)
+    graph_elapsed_ms = (time.perf_counter() - graph_start) * 1000
 
     print__analysis_tracing_debug(
         "59 - GRAPH EXECUTION COMPLETE: LangGraph execution completed"
@@ -515,6 +539,13 @@ async def main(prompt=None, thread_id=None, checkpointer=None, run_id=None):
     # Extract values from the graph result dictionary
     # The graph now uses a messages list: [summary (SystemMessage), last_message (AIMessage)]
     queries_and_results = result["queries_and_results"]
+    if result.get("top_selection_codes"):
+        # Runs with selections went through the query/reflect loop
+        record_run(
+            result.get("iteration", 0),
+            graph_elapsed_ms,
+            fanout=is_fanout_run(result["top_selection_codes"]),
+        )
     final_answer = (
         result["messages"][-1].content
         if result.get("messages") and len(result["messages"]) > 1
@@ -549,13 +580,13 @@ async def main(prompt=None, thread_id=None, checkpointer=None, run_id=None):
     # Convert the result to a JSON-serializable format
     # Convert top_chunks (Document objects) to JSON-serializable format
     top_chunks_serialized = []
-    if result.get("top_chunks"):
-        chunk_count = len(result["top_chunks"])
+    if top_chunks:
+        chunk_count = len(top_chunks)
         print__debug(f"📦 main.py - Found {chunk_count} top_chunks to serialize")
         print__analysis_tracing_debug(
             f"78 - CHUNKS FOUND: Found {chunk_count} top_chunks to serialize"
         )
-        for i, chunk in enumerate(result["top_chunks"]):
+        for i, chunk in enumerate(top_chunks):
             chunk_data = {
                 "content": (
                     chunk.page_content if hasattr(chunk, "page_content") else str(chunk)
@@ -582,6 +613,7 @@ async def main(prompt=None, thread_id=None, checkpointer=None, run_id=None):
         "prompt": prompt,
         "result": final_answer,
         "queries_and_results": queries_and_results,
+        "structured_query_results": result.get("structured_query_results", []),
         "thread_id": thread_id,
         "top_selection_codes": used_selection_codes,  # Return only codes actually used in queries
         "iteration": result.get("iteration", 0),
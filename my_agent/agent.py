@@ -192,7 +192,7 @@ def create_graph(checkpointer=None):
             print(
                 "⚠️ No relevant dataset selections found, proceeding with PDF chunks only"
             )
-            chunks_available = len(state.get("top_chunks", []))
+            chunks_available = len(state.get("top_chunk_refs", []))
             print__analysis_tracing_debug(
                 f"96 - CHUNKS ONLY ROUTE: No selections found, proceeding with {chunks_available} PDF chunks"
             )
@@ -0,0 +1,220 @@
+"""Token-budgeted context assembly for format_answer_node.
+
+The answer prompt used to concatenate every stored query result and up to ten
+full PDF chunks, so its size (and gpt-4o-mini latency) varied wildly. The
+context is now assembled under ANSWER_CONTEXT_TOKEN_BUDGET:
+
+1. SQL results: failed queries (errors, cost-guard aborts) and duplicates of a
+   later identical query are dropped. The remaining results are added newest
+   first until the SQL share of the budget is used, then restored to execution
+   order. A result that does not fit whole is cut at a row boundary.
+2. PDF chunks: sentences are scored by overlap with the question terms
+   (accent-insensitive, prefix matching for Czech inflection) and the best ones
+   are selected across chunks until the remaining budget is used. Selected
+   sentences are shown in their original order per source.
+
+Configuration (environment variables):
+    - ANSWER_CONTEXT_TOKEN_BUDGET: Total tokens for SQL + PDF context (default 6000)
+    - ANSWER_PDF_TOKEN_RESERVE: Tokens kept for PDF context when chunks exist (default 1500)
+    - ANSWER_PDF_MAX_CHUNKS: Maximum PDF chunks considered (default 10)
+"""
+
+import os
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .schema_pruning import count_matching_terms, extract_question_terms
+from .sql_result_cache import normalize_sql
+from .token_utils import count_tokens, get_encoder
+
+ANSWER_CONTEXT_TOKEN_BUDGET = int(os.environ.get("ANSWER_CONTEXT_TOKEN_BUDGET", "6000"))
+ANSWER_PDF_TOKEN_RESERVE = int(os.environ.get("ANSWER_PDF_TOKEN_RESERVE", "1500"))
+ANSWER_PDF_MAX_CHUNKS = int(os.environ.get("ANSWER_PDF_MAX_CHUNKS", "10"))
+
+# Result prefixes written by query_node / SQLiteQueryTool for unusable results
+FAILED_RESULT_PREFIXES = ("Error", "QUERY ABORTED")
+
+_SENTENCE_SPLIT_PATTERN = re.compile(r"(?<=[.!?])\s+|\n{2,}")
+
+
+def _is_failed_result(result: Any) -> bool:
+    return str(result).lstrip().startswith(FAILED_RESULT_PREFIXES)
+
+
+def _trim_result_rows(result: str, budget: int) -> str:
+    """Keep the leading lines of a TSV result that fit the budget (header first)."""
+    lines = result.split("\n")
+    kept = []
+    used = 0
+    for line in lines:
+        line_tokens = count_tokens(line) + 1
+        if used + line_tokens > budget:
+            break
+        kept.append(line)
+        used += line_tokens
+    if len(kept) < 2:
+        return ""
+    return "\n".join(kept) + f"\n[... {len(lines) - len(kept)} more lines omitted]"
+
+
+def select_query_results(
+    queries_and_results: Sequence[Tuple[str, str]], budget: int
+) -> Tuple[List[Tuple[str, str]], Dict[str, int]]:
+    """Drop failed and duplicate queries and fit the rest into the token budget.
+
+    Returns:
+        Tuple of (kept (query, result) pairs in execution order, counters)
+    """
+    stats = {
+        "total": len(queries_and_results),
+        "failed": 0,
+        "duplicate": 0,
+        "over_budget": 0,
+        "trimmed": 0,
+    }
+    seen = set()
+    candidates = []
+    # Newest first: the latest iteration reflects the reflection feedback
+    for query, result in reversed(list(queries_and_results)):
+        if _is_failed_result(result):
+            stats["failed"] += 1
+            continue
+        key = normalize_sql(query, fold_case=True)
+        if key in seen:
+            stats["duplicate"] += 1
+            continue
+        seen.add(key)
+        candidates.append((query, str(result)))
+
+    kept = []
+    used = 0
+    for query, result in candidates:
+        entry_tokens = count_tokens(f"Query:\n{query}\nResult:\n{result}")
+        if used + entry_tokens <= budget:
+            kept.append((query, result))
+            used += entry_tokens
+            continue
+        remaining = budget - used - count_tokens(f"Query:\n{query}\nResult:\n")
+        trimmed = _trim_result_rows(result, remaining) if remaining > 0 else ""
+        if trimmed:
+            kept.append((query, trimmed))
+            used += count_tokens(f"Query:\n{query}\nResult:\n{trimmed}")
+            stats["trimmed"] += 1
+        else:
+            stats["over_budget"] += 1
+    kept.reverse()
+    stats["kept"] = len(kept)
+    stats["tokens"] = used
+    return kept, stats
+
+
+def split_sentences(text: str) -> List[str]:
+    return [s.strip() for s in _SENTENCE_SPLIT_PATTERN.split(text) if s and s.strip()]
+
+
+def select_pdf_sentences(
+    question: str, chunks: Sequence[Any], budget: int
+) -> Tuple[List[Tuple[str, str]], Dict[str, int]]:
+    """Extract the sentences most relevant to the question from the top PDF chunks.
+
+    Args:
+        question: Rewritten user question
+        chunks: Reranked LangChain Documents (best first)
+        budget: Token budget for the PDF context
+
+    Returns:
+        Tuple of (list of (source, extract) per chunk with selected sentences, counters)
+    """
+    terms = extract_question_terms(question)
+    chunks = list(chunks)[:ANSWER_PDF_MAX_CHUNKS]
+    scored = []
+    per_chunk_sentences = []
+    for chunk_index, chunk in enumerate(chunks):
+        content = chunk.page_content if hasattr(chunk, "page_content") else str(chunk)
+        sentences = split_sentences(content)
+        per_chunk_sentences.append(sentences)
+        for sentence_index, sentence in enumerate(sentences):
+            matches = count_matching_terms(sentence, terms) if terms else 0
+            # Among relevant sentences prefer those with numbers
+            score = (matches * 2 + (1 if re.search(r"\d", sentence) else 0)) if matches else 0
+            scored.append((score, -chunk_index, -sentence_index, chunk_index, sentence_index))
+
+    # Relevant sentences first; ties broken by chunk rank, then position in the chunk.
+    # Without any match the leading sentences of the best-ranked chunks are used.
+    scored.sort(reverse=True)
+    has_relevant = bool(scored) and scored[0][0] > 0
+    selected = {}
+    used = 0
+    for score, _, _, chunk_index, sentence_index in scored:
+        if has_relevant and score == 0:
+            break
+        sentence = per_chunk_sentences[chunk_index][sentence_index]
+        sentence_tokens = count_tokens(sentence) + 1
+        if used + sentence_tokens > budget:
+            continue
+        selected.setdefault(chunk_index, set()).add(sentence_index)
+        used += sentence_tokens
+
+    extracts = []
+    for chunk_index in sorted(selected):
+        chunk = chunks[chunk_index]
+        metadata = getattr(chunk, "metadata", None) or {}
+        parts = []
+        previous = None
+        for sentence_index in sorted(selected[chunk_index]):
+            if previous is not None and sentence_index != previous + 1:
+                parts.append("...")
+            parts.append(per_chunk_sentences[chunk_index][sentence_index])
+            previous = sentence_index
+        extracts.append((metadata.get("source", "unknown"), " ".join(parts)))
+
+    stats = {
+        "chunks": len(chunks),
+        "chunks_used": len(extracts),
+        "sentences": len(scored),
+        "sentences_kept": sum(len(indexes) for indexes in selected.values()),
+        "tokens": used,
+    }
+    return extracts, stats
+
+
+def build_answer_context(
+    question: str,
+    queries_and_results: Sequence[Tuple[str, str]],
+    chunks: Sequence[Any],
+    budget: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Assemble the SQL and PDF context of the answer prompt within a token budget.
+
+    Returns:
+        Dict with "sql_context" and "pdf_context" (empty string when nothing was
+        kept) and "stats" describing what was kept and dropped
+    """
+    budget = budget if budget is not None else ANSWER_CONTEXT_TOKEN_BUDGET
+    get_encoder()  # Warm the cached encoder once per process
+
+    pdf_reserve = min(ANSWER_PDF_TOKEN_RESERVE, budget // 2) if chunks else 0
+    kept_queries, sql_stats = select_query_results(
+        queries_and_results, budget - pdf_reserve
+    )
+    sql_context = "\n\n".join(
+        f"Query {i+1}:\n{query}\nResult {i+1}:\n{result}"
+        for i, (query, result) in enumerate(kept_queries)
+    )
+
+    pdf_context = ""
+    pdf_stats = {}
+    if chunks:
+        extracts, pdf_stats = select_pdf_sentences(
+            question, chunks, budget - sql_stats["tokens"]
+        )
+        pdf_context = "\n\n".join(
+            f"PDF Source {i} ({source}):\n{extract}"
+            for i, (source, extract) in enumerate(extracts, 1)
+        )
+
+    return {
+        "sql_context": sql_context,
+        "pdf_context": pdf_context,
+        "stats": {"budget": budget, "sql": sql_stats, "pdf": pdf_stats},
+    }
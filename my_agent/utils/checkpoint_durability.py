@@ -0,0 +1,232 @@
+"""Configurable checkpoint durability for AsyncPostgresSaver.
+
+LangGraph writes a checkpoint (plus its channel blobs) after every superstep and
+the pending writes of every task, so one analysis of the 18-node graph costs
+dozens of round-trips through the small checkpointer pool. With
+CHECKPOINT_DURABILITY other than "full", the checkpointer is wrapped so that
+only checkpoints at meaningful boundaries are written:
+
+- "boundary": the input checkpoint of a run, checkpoints created after one of
+  CHECKPOINT_BOUNDARY_NODES (default rewrite_query and submit_final_answer) and
+  the last checkpoint of the run, flushed by main() when the graph finishes or
+  fails.
+- "exit": only the input checkpoint and the flushed last checkpoint.
+
+Skipped checkpoints are held in memory until the next persisted one, which
+then carries everything needed to stay consistent:
+
+- blobs of every channel changed since the last persisted checkpoint (so the
+  persisted checkpoint is complete and threads resume from it),
+- the last persisted checkpoint as its parent,
+- the merged ``metadata["writes"]`` of the skipped steps. The chat history
+  (get_thread_messages_with_metadata) reads the prompt from the input
+  checkpoint's ``__start__`` writes and the answer from the
+  ``submit_final_answer`` writes, which therefore survive in whichever
+  checkpoint is persisted next.
+
+Pending writes are only stored for persisted checkpoints; writes against a
+skipped checkpoint would never be read. The trade-off is that a process crash
+mid-run loses the progress since the last boundary (the run is not resumable
+from the middle anyway; the user re-sends the question).
+
+Configuration (environment variables):
+    - CHECKPOINT_DURABILITY: "full" (default, every superstep), "boundary" or "exit"
+    - CHECKPOINT_BOUNDARY_NODES: Comma-separated nodes persisted in "boundary" mode
+      (default "rewrite_query,submit_final_answer")
+"""
+
+import functools
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+# Import debug functions from utils
+from api.utils.debug import print__checkpointers_debug
+
+DURABILITY_FULL = "full"
+DURABILITY_BOUNDARY = "boundary"
+DURABILITY_EXIT = "exit"
+
+CHECKPOINT_DURABILITY = os.environ.get("CHECKPOINT_DURABILITY", DURABILITY_FULL)
+CHECKPOINT_BOUNDARY_NODES = frozenset(
+    node.strip()
+    for node in os.environ.get(
+        "CHECKPOINT_BOUNDARY_NODES", "rewrite_query,submit_final_answer"
+    ).split(",")
+    if node.strip()
+)
+CHECKPOINT_DURABILITY_ID = 33  # Static ID for checkpoint durability debug messages
+
+_LOCK = threading.Lock()
+# (thread_id, checkpoint_ns) -> deferred checkpoint of the running graph
+_PENDING: Dict[Tuple[str, str], Dict[str, Any]] = {}
+# (thread_id, checkpoint_ns) -> ID of the last checkpoint persisted by the running graph
+_PERSISTED_IDS: Dict[Tuple[str, str], str] = {}
+_STATS = {
+    "checkpoints_persisted": 0,
+    "checkpoints_deferred": 0,
+    "checkpoints_flushed": 0,
+    "writes_persisted": 0,
+    "writes_skipped": 0,
+}
+
+
+def _thread_key(config: Dict[str, Any]) -> Tuple[str, str]:
+    configurable = config.get("configurable", {})
+    return (
+        str(configurable.get("thread_id", "")),
+        configurable.get("checkpoint_ns", ""),
+    )
+
+
+def _is_boundary(metadata: Dict[str, Any], mode: str) -> bool:
+    if metadata.get("source") == "input":
+        return True
+    if mode != DURABILITY_BOUNDARY:
+        return False
+    writes = metadata.get("writes") or {}
+    return any(node in CHECKPOINT_BOUNDARY_NODES for node in writes)
+
+
+def _merge_pending(
+    key: Tuple[str, str], config, checkpoint, metadata, new_versions
+) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]:
+    """Fold the skipped checkpoints of a thread into the one about to be persisted."""
+    pending = _PENDING.pop(key, None)
+    if pending is None:
+        return config, metadata, new_versions
+    # Blobs of channels changed in skipped steps must be written with this checkpoint
+    versions = dict(new_versions)
+    for channel in pending["changed_channels"]:
+        if channel not in versions and channel in checkpoint["channel_versions"]:
+            versions[channel] = checkpoint["channel_versions"][channel]
+    metadata = {
+        **metadata,
+        "writes": {**pending["writes"], **(metadata.get("writes") or {})},
+    }
+    parent_id = _PERSISTED_IDS.get(key)
+    if parent_id:
+        config = {
+            **config,
+            "configurable": {**config["configurable"], "checkpoint_id": parent_id},
+        }
+    return config, metadata, versions
+
+
+def apply_checkpoint_durability(checkpointer, mode: Optional[str] = None):
+    """Wrap the checkpointer's aput/aput_writes according to the durability mode."""
+    mode = mode or CHECKPOINT_DURABILITY
+    if mode not in (DURABILITY_BOUNDARY, DURABILITY_EXIT):
+        print__checkpointers_debug(
+            f"{CHECKPOINT_DURABILITY_ID}: Checkpoint durability: {DURABILITY_FULL}"
+        )
+        return checkpointer
+
+    persist = checkpointer.aput
+    persist_writes = checkpointer.aput_writes
+
+    @functools.wraps(persist)
+    async def aput(config, checkpoint, metadata, new_versions):
+        key = _thread_key(config)
+        if metadata.get("source") == "input":
+            with _LOCK:
+                if _PENDING.pop(key, None) is not None:
+                    # A previous run of this thread was never flushed
+                    print__checkpointers_debug(
+                        f"⚠️ {CHECKPOINT_DURABILITY_ID}: Dropping unflushed checkpoint of thread {key[0]}"
+                    )
+                _PERSISTED_IDS.pop(key, None)
+
+        if not _is_boundary(metadata, mode):
+            with _LOCK:
+                pending = _PENDING.setdefault(
+                    key, {"changed_channels": set(), "writes": {}}
+                )
+                pending["changed_channels"].update(new_versions)
+                pending["writes"].update(metadata.get("writes") or {})
+                pending["args"] = (config, checkpoint, metadata, new_versions)
+                _STATS["checkpoints_deferred"] += 1
+            return {
+                "configurable": {
+                    "thread_id": key[0],
+                    "checkpoint_ns": key[1],
+                    "checkpoint_id": checkpoint["id"],
+                }
+            }
+
+        with _LOCK:
+            config, metadata, new_versions = _merge_pending(
+                key, config, checkpoint, metadata, new_versions
+            )
+        next_config = await persist(config, checkpoint, metadata, new_versions)
+        with _LOCK:
+            _PERSISTED_IDS[key] = checkpoint["id"]
+            _STATS["checkpoints_persisted"] += 1
+        return next_config
+
+    @functools.wraps(persist_writes)
+    async def aput_writes(config, writes, task_id, *args, **kwargs):
+        key = _thread_key(config)
+        checkpoint_id = config["configurable"].get("checkpoint_id")
+        with _LOCK:
+            persisted_id = _PERSISTED_IDS.get(key)
+            skip = persisted_id is not None and checkpoint_id != persisted_id
+            _STATS["writes_skipped" if skip else "writes_persisted"] += 1
+        if skip:
+            return None
+        return await persist_writes(config, writes, task_id, *args, **kwargs)
+
+    async def aflush(thread_id: str, checkpoint_ns: str = "") -> None:
+        """Persist the last deferred checkpoint of a finished (or failed) run."""
+        key = (str(thread_id), checkpoint_ns)
+        with _LOCK:
+            pending = _PENDING.get(key)
+            if pending is None:
+                _PERSISTED_IDS.pop(key, None)
+                return
+            config, checkpoint, metadata, new_versions = pending["args"]
+            config, metadata, new_versions = _merge_pending(
+                key, config, checkpoint, metadata, new_versions
+            )
+        try:
+            await persist(config, checkpoint, metadata, new_versions)
+            with _LOCK:
+                _STATS["checkpoints_flushed"] += 1
+            print__checkpointers_debug(
+                f"{CHECKPOINT_DURABILITY_ID}: Flushed checkpoint step {metadata.get('step')} of thread {key[0]}"
+            )
+        finally:
+            with _LOCK:
+                _PERSISTED_IDS.pop(key, None)
+
+    checkpointer.aput = aput
+    checkpointer.aput_writes = aput_writes
+    checkpointer.aflush_deferred = aflush
+    print__checkpointers_debug(
+        f"{CHECKPOINT_DURABILITY_ID}: Checkpoint durability: {mode} (boundary nodes: {sorted(CHECKPOINT_BOUNDARY_NODES)})"
+    )
+    return checkpointer
+
+
+async def flush_deferred_checkpoint(checkpointer, thread_id: str) -> None:
+    """Persist the deferred checkpoint of a run; no-op for checkpointers in "full" mode."""
+    aflush = getattr(checkpointer, "aflush_deferred", None)
+    if aflush is None:
+        return
+    try:
+        await aflush(thread_id)
+    except Exception as e:
+        # Must not mask the result (or the original error) of the graph run
+        print__checkpointers_debug(
+            f"❌ {CHECKPOINT_DURABILITY_ID}: Failed to flush checkpoint of thread {thread_id}: {e}"
+        )
+
+
+def get_checkpoint_durability_stats() -> Dict[str, Any]:
+    with _LOCK:
+        return {
+            "mode": CHECKPOINT_DURABILITY,
+            "boundary_nodes": sorted(CHECKPOINT_BOUNDARY_NODES),
+            **_STATS,
+            "pending_threads": len(_PENDING),
+        }
@@ -0,0 +1,321 @@
+"""Compressed checkpoint serializer for AsyncPostgresSaver.
+
+AsyncPostgresSaver stores every channel value (message histories, query
+results, chunks) and every pending write as a typed blob produced by the
+serializer. LangGraph's default JsonPlusSerializer already encodes them as
+msgpack, but uncompressed. This serializer wraps it and compresses each blob
+with zstd, using a dictionary trained on our own checkpoints when one is
+available (small blobs with repeated keys and prompts compress far better with
+a dictionary). Compressed blobs are tagged with a "+zstd" type suffix
+("msgpack+zstd"); blobs without the suffix are passed to JsonPlusSerializer
+unchanged, so checkpoints written before this change stay readable.
+
+Dictionaries are loaded from every ``*.dict`` file in CHECKPOINT_ZSTD_DICT_DIR
+and selected by the dictionary ID stored in each zstd frame, so retraining
+never breaks older checkpoints. New blobs use the most recently trained
+dictionary. Dictionary files must be deployed with the app and never deleted
+while checkpoints compressed with them exist. Train one with:
+
+    python -m my_agent.utils.checkpoint_serde
+
+Configuration (environment variables):
+    - CHECKPOINT_COMPRESSION_ENABLED: Compress new blobs (default "1"; reads always work)
+    - CHECKPOINT_ZSTD_LEVEL: zstd compression level (default 3)
+    - CHECKPOINT_ZSTD_MIN_BYTES: Blobs smaller than this are stored uncompressed (default 64)
+    - CHECKPOINT_ZSTD_DICT_DIR: Directory with trained dictionaries (default data/checkpoint_zstd_dicts)
+    - CHECKPOINT_ZSTD_DICT_SIZE: Size of newly trained dictionaries in bytes (default 114688)
+"""
+
+import contextvars
+import functools
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Get base directory
+try:
+    BASE_DIR = Path(__file__).resolve().parents[2]
+except NameError:
+    BASE_DIR = Path(os.getcwd()).parents[0]
+
+# Import debug functions from utils
+from api.utils.debug import print__checkpointers_debug
+
+CHECKPOINT_COMPRESSION_ENABLED = (
+    os.environ.get("CHECKPOINT_COMPRESSION_ENABLED", "1") == "1"
+)
+CHECKPOINT_ZSTD_LEVEL = int(os.environ.get("CHECKPOINT_ZSTD_LEVEL", "3"))
+CHECKPOINT_ZSTD_MIN_BYTES = int(os.environ.get("CHECKPOINT_ZSTD_MIN_BYTES", "64"))
+CHECKPOINT_ZSTD_DICT_DIR = Path(
+    os.environ.get(
+        "CHECKPOINT_ZSTD_DICT_DIR", str(BASE_DIR / "data" / "checkpoint_zstd_dicts")
+    )
+)
+CHECKPOINT_ZSTD_DICT_SIZE = int(os.environ.get("CHECKPOINT_ZSTD_DICT_SIZE", "114688"))
+CHECKPOINT_SERDE_ID = 32  # Static ID for checkpoint serializer debug messages
+
+COMPRESSED_SUFFIX = "+zstd"
+
+# Bytes accumulated by the checkpoint put currently running in this task
+_CURRENT_PUT: contextvars.ContextVar = contextvars.ContextVar(
+    "checkpoint_serde_current_put", default=None
+)
+
+
+def load_dictionaries(
+    dict_dir: Optional[Path] = None,
+) -> Tuple[Dict[int, Any], Optional[Any]]:
+    """Load every trained dictionary; return ({dict_id: dict}, newest dict or None)."""
+    dictionaries = {}
+    newest = None
+    dict_dir = dict_dir or CHECKPOINT_ZSTD_DICT_DIR
+    if zstandard is None or not dict_dir.is_dir():
+        return dictionaries, None
+    for path in sorted(dict_dir.glob("*.dict"), key=lambda p: p.stat().st_mtime):
+        dictionary = zstandard.ZstdCompressionDict(path.read_bytes())
+        dictionaries[dictionary.dict_id()] = dictionary
+        newest = dictionary
+    return dictionaries, newest
+
+
+class CompressedCheckpointSerializer:
+    """JsonPlusSerializer (msgpack) + zstd with backward-compatible reads."""
+
+    def __init__(
+        self,
+        inner: Optional[JsonPlusSerializer] = None,
+        level: int = CHECKPOINT_ZSTD_LEVEL,
+        min_bytes: int = CHECKPOINT_ZSTD_MIN_BYTES,
+        compress: bool = CHECKPOINT_COMPRESSION_ENABLED,
+        dict_dir: Optional[Path] = None,
+    ):
+        self.inner = inner or JsonPlusSerializer()
+        self.level = level
+        self.min_bytes = min_bytes
+        self.compress = compress and zstandard is not None
+        self.dictionaries, self.dictionary = load_dictionaries(dict_dir)
+        # zstd contexts are not safe for concurrent use from several threads
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._stats = {
+            "blobs_written": 0,
+            "blobs_compressed": 0,
+            "bytes_raw": 0,
+            "bytes_written": 0,
+            "blobs_read": 0,
+            "legacy_blobs_read": 0,
+            "bytes_read": 0,
+            "bytes_read_raw": 0,
+            "checkpoints": 0,
+            "checkpoint_bytes_raw": 0,
+            "checkpoint_bytes_written": 0,
+            "write_batches": 0,
+            "write_batch_bytes_written": 0,
+        }
+        if compress and zstandard is None:
+            print__checkpointers_debug(
+                f"{CHECKPOINT_SERDE_ID}: zstandard not installed, checkpoints stay uncompressed"
+            )
+        print__checkpointers_debug(
+            f"{CHECKPOINT_SERDE_ID}: Checkpoint serializer ready (compression={self.compress}, "
+            f"dictionaries={list(self.dictionaries)})"
+        )
+
+    # -- zstd contexts ---------------------------------------------------------
+    def _compressor(self):
+        compressor = getattr(self._local, "compressor", None)
+        if compressor is None:
+            compressor = zstandard.ZstdCompressor(
+                level=self.level, dict_data=self.dictionary
+            )
+            self._local.compressor = compressor
+        return compressor
+
+    def _decompressor(self, dict_id: int):
+        decompressors = getattr(self._local, "decompressors", None)
+        if decompressors is None:
+            decompressors = self._local.decompressors = {}
+        if dict_id not in decompressors:
+            if dict_id and dict_id not in self.dictionaries:
+                raise ValueError(
+                    f"Checkpoint blob was compressed with zstd dictionary {dict_id}, "
+                    f"which is not present in {CHECKPOINT_ZSTD_DICT_DIR}"
+                )
+            decompressors[dict_id] = zstandard.ZstdDecompressor(
+                dict_data=self.dictionaries.get(dict_id)
+            )
+        return decompressors[dict_id]
+
+    def decompress_blob(self, type_: str, data: bytes) -> Tuple[str, bytes]:
+        """Undo the zstd layer, returning the JsonPlusSerializer (type, bytes) pair."""
+        if not type_.endswith(COMPRESSED_SUFFIX):
+            return type_, data
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read compressed checkpoints")
+        dict_id = zstandard.get_frame_parameters(data).dict_id
+        raw = self._decompressor(dict_id).decompress(data)
+        return type_[: -len(COMPRESSED_SUFFIX)], raw
+
+    # -- SerializerProtocol ----------------------------------------------------
+    def dumps(self, obj: Any) -> bytes:
+        return self.inner.dumps(obj)
+
+    def loads(self, data: bytes) -> Any:
+        return self.inner.loads(data)
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        type_, data = self.inner.dumps_typed(obj)
+        written_type, written = type_, data
+        if self.compress and data and len(data) >= self.min_bytes:
+            compressed = self._compressor().compress(data)
+            if len(compressed) < len(data):
+                written_type, written = type_ + COMPRESSED_SUFFIX, compressed
+        with self._lock:
+            self._stats["blobs_written"] += 1
+            self._stats["blobs_compressed"] += written_type != type_
+            self._stats["bytes_raw"] += len(data or b"")
+            self._stats["bytes_written"] += len(written or b"")
+        current = _CURRENT_PUT.get()
+        if current is not None:
+            current["raw"] += len(data or b"")
+            current["written"] += len(written or b"")
+        return written_type, written
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        type_, payload = data
+        raw_type, raw = self.decompress_blob(type_, payload)
+        with self._lock:
+            self._stats["blobs_read"] += 1
+            self._stats["legacy_blobs_read"] += raw_type == type_
+            self._stats["bytes_read"] += len(payload or b"")
+            self._stats["bytes_read_raw"] += len(raw or b"")
+        return self.inner.loads_typed((raw_type, raw))
+
+    # -- Metrics ---------------------------------------------------------------
+    def record_put(self, kind: str, raw: int, written: int) -> None:
+        with self._lock:
+            if kind == "checkpoint":
+                self._stats["checkpoints"] += 1
+                self._stats["checkpoint_bytes_raw"] += raw
+                self._stats["checkpoint_bytes_written"] += written
+            else:
+                self._stats["write_batches"] += 1
+                self._stats["write_batch_bytes_written"] += written
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        checkpoints = stats["checkpoints"]
+        return {
+            **stats,
+            "compression_enabled": self.compress,
+            "dictionary_id": self.dictionary.dict_id() if self.dictionary else None,
+            "compression_ratio": (
+                round(stats["bytes_raw"] / stats["bytes_written"], 3)
+                if stats["bytes_written"]
+                else None
+            ),
+            "avg_checkpoint_bytes_raw": (
+                round(stats["checkpoint_bytes_raw"] / checkpoints) if checkpoints else 0
+            ),
+            "avg_checkpoint_bytes_written": (
+                round(stats["checkpoint_bytes_written"] / checkpoints)
+                if checkpoints
+                else 0
+            ),
+        }
+
+
+_SERIALIZER: Optional[CompressedCheckpointSerializer] = None
+
+
+def get_checkpoint_serializer() -> CompressedCheckpointSerializer:
+    global _SERIALIZER
+    if _SERIALIZER is None:
+        _SERIALIZER = CompressedCheckpointSerializer()
+    return _SERIALIZER
+
+
+def get_checkpoint_serde_stats() -> Dict[str, Any]:
+    if _SERIALIZER is None:
+        return {"initialized": False}
+    return _SERIALIZER.get_stats()
+
+
+def instrument_checkpointer(checkpointer, serializer: CompressedCheckpointSerializer):
+    """Attribute serialized bytes to each aput (one checkpoint) and aput_writes call."""
+
+    def _wrap(method, kind):
+        @functools.wraps(method)
+        async def wrapper(*args, **kwargs):
+            counters = {"raw": 0, "written": 0}
+            token = _CURRENT_PUT.set(counters)
+            try:
+                return await method(*args, **kwargs)
+            finally:
+                _CURRENT_PUT.reset(token)
+                serializer.record_put(kind, counters["raw"], counters["written"])
+
+        return wrapper
+
+    checkpointer.aput = _wrap(checkpointer.aput, "checkpoint")
+    checkpointer.aput_writes = _wrap(checkpointer.aput_writes, "writes")
+    return checkpointer
+
+
+# ==============================================================================
+# DICTIONARY TRAINING
+# ==============================================================================
+def train_dictionary(
+    samples: List[bytes], dict_size: int = CHECKPOINT_ZSTD_DICT_SIZE
+) -> Path:
+    """Train a zstd dictionary on raw (uncompressed) blobs and store it in the dict dir."""
+    if zstandard is None:
+        raise RuntimeError("zstandard is not installed")
+    dictionary = zstandard.train_dictionary(dict_size, samples)
+    CHECKPOINT_ZSTD_DICT_DIR.mkdir(parents=True, exist_ok=True)
+    path = CHECKPOINT_ZSTD_DICT_DIR / f"checkpoint_{dictionary.dict_id()}.dict"
+    path.write_bytes(dictionary.as_bytes())
+    return path
+
+
+async def collect_training_samples(limit: int = 5000) -> List[bytes]:
+    """Sample raw serialized blobs from checkpoint_blobs and checkpoint_writes."""
+    from my_agent.utils.postgres_checkpointer import get_direct_connection
+
+    serializer = CompressedCheckpointSerializer(compress=False)
+    samples = []
+    async with get_direct_connection() as conn:
+        async with conn.cursor() as cur:
+            for table in ("checkpoint_blobs", "checkpoint_writes"):
+                await cur.execute(
+                    f"SELECT type, blob FROM {table} WHERE blob IS NOT NULL "
+                    "ORDER BY random() LIMIT %s",
+                    (limit,),
+                )
+                for type_, blob in await cur.fetchall():
+                    _, raw = serializer.decompress_blob(type_, bytes(blob))
+                    if raw:
+                        samples.append(raw)
+    return samples
+
+
+if __name__ == "__main__":
+    import asyncio
+    import sys
+
+    if sys.platform == "win32":
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+    training_samples = asyncio.run(collect_training_samples())
+    print(f"Collected {len(training_samples)} checkpoint blobs")
+    dict_path = train_dictionary(training_samples)
+    print(f"Dictionary written to {dict_path}")
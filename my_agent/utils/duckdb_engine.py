@@ -0,0 +1,368 @@
+"""Optional DuckDB execution backend for the sqlite_query tool.
+
+CZSU tables are long-format fact tables (dimensions plus ``value``) and the
+generated SQL is dominated by GROUP BY / SUM / window queries, which DuckDB
+runs vectorized across cores. When SQL_ENGINE=duckdb the tool executes the
+same SQLite-dialect query in DuckDB against either:
+
+    - a columnar copy of czsu_data.db (DUCKDB_DATABASE_PATH, built with
+      ``python -m my_agent.utils.duckdb_engine``), used only while it was built
+      from the current czsu_data.db, or
+    - czsu_data.db attached read-only through DuckDB's sqlite extension.
+
+SQLite stays the default engine: the dialects differ in ways that change
+results rather than raise errors. The differences handled here:
+
+    - ``5/2`` is 2 in SQLite and 2.5 in DuckDB; connections run with
+      ``integer_division`` so integer operands divide as in SQLite.
+    - NULLs sort first in ascending order in SQLite and last in DuckDB;
+      connections use SQLite's NULL order.
+    - LIKE is case-insensitive in SQLite (ASCII only) and case-sensitive in
+      DuckDB; LIKE is rewritten to ILIKE, which also folds non-ASCII letters
+      such as "Č".
+    - SQLite reads a double-quoted string that matches no column as a string
+      literal, DuckDB always as an identifier; the binder error falls back to
+      SQLite.
+    - Backtick-quoted identifiers are rewritten to standard double quotes.
+
+Any other DuckDB parser/binder/catalog error also falls back to SQLite, but
+remaining semantic differences (e.g. text collation, float formatting of
+aggregates) are not detected. Check a workload with
+``Evaluations/SQL_Engine_Benchmark/benchmark_sql_engines.py`` before enabling
+DuckDB. duckdb is an optional dependency (``pip install .[duckdb]``); without
+it the tool stays on SQLite.
+
+Configuration (environment variables):
+    - SQL_ENGINE: "sqlite" (default) or "duckdb"
+    - DUCKDB_DATABASE_PATH: Columnar copy (default data/czsu_data.duckdb)
+    - DUCKDB_THREADS: Worker threads per query (default: DuckDB default, all cores)
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+# Get base directory
+try:
+    BASE_DIR = Path(__file__).resolve().parents[2]
+except NameError:
+    BASE_DIR = Path(os.getcwd()).parents[0]
+
+# Import debug functions from utils
+from api.utils.debug import print__tools_debug
+from my_agent.utils.sql_guard import (
+    SQL_GUARD_MAX_ROWS,
+    SQL_GUARD_TIMEOUT_SECONDS,
+    STATUS_ABORTED,
+    STATUS_OK,
+    STATUS_TRUNCATED,
+)
+from my_agent.utils.sqlite_pool import DB_PATH, get_db_identity
+
+SQL_ENGINE = os.environ.get("SQL_ENGINE", "sqlite").lower()
+DUCKDB_DATABASE_PATH = Path(
+    os.environ.get("DUCKDB_DATABASE_PATH", str(BASE_DIR / "data" / "czsu_data.duckdb"))
+)
+DUCKDB_THREADS = os.environ.get("DUCKDB_THREADS")
+DUCKDB_ENGINE_ID = 24  # Static ID for DuckDB engine debug messages
+FETCH_BATCH_SIZE = 100
+
+# Statements that only make sense against SQLite itself
+SQLITE_ONLY_PREFIXES = ("pragma", "explain")
+
+# Session settings applied to every connection to match SQLite semantics
+DUCKDB_SQLITE_COMPAT_SETTINGS = (
+    "SET GLOBAL integer_division = true",
+    "SET GLOBAL default_null_order = 'nulls_first_on_asc_last_on_desc'",
+)
+
+_QUOTED_PATTERN = re.compile(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|`[^`]*`)")
+_LIKE_PATTERN = re.compile(r"\bLIKE\b", re.IGNORECASE)
+
+_CONN = None
+_CONN_IDENTITY = None  # czsu_data.db identity the connection was opened for
+_UNAVAILABLE_REASON = None
+_CONN_LOCK = threading.Lock()
+_ENGINE_STATS = {
+    "duckdb_queries": 0,
+    "fallbacks": 0,
+    "interrupted": 0,
+    "unavailable": 0,
+    "stale_copy_skipped": 0,
+    "exec_time_total_ms": 0.0,
+}
+
+
+class DuckDBFallback(Exception):
+    """Raised when a query should be executed by SQLite instead."""
+
+
+def is_duckdb_enabled() -> bool:
+    return SQL_ENGINE == "duckdb" and duckdb is not None
+
+
+def sqlite_to_duckdb_sql(query: str) -> str:
+    """Rewrite SQLite backtick identifiers to double quotes and LIKE to ILIKE.
+
+    Quoted literals and identifiers are left untouched.
+    """
+    parts = _QUOTED_PATTERN.split(query)
+    for index in range(0, len(parts), 2):
+        parts[index] = _LIKE_PATTERN.sub("ILIKE", parts[index])
+    for index in range(1, len(parts), 2):
+        part = parts[index]
+        if part.startswith("`"):
+            parts[index] = '"' + part[1:-1].replace('"', '""') + '"'
+    return "".join(parts).strip().rstrip(";")
+
+
+def _source_identity_path(target_path: Path) -> Path:
+    return target_path.with_name(target_path.name + ".source.json")
+
+
+def is_columnar_copy_current(target_path: Optional[Path] = None) -> bool:
+    """Whether the columnar copy exists and was built from the current czsu_data.db."""
+    target_path = target_path or DUCKDB_DATABASE_PATH
+    identity_path = _source_identity_path(target_path)
+    if not target_path.exists() or not identity_path.exists():
+        return False
+    try:
+        built_from = json.loads(identity_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return False
+    return tuple(built_from) == get_db_identity()
+
+
+def _open_connection():
+    if is_columnar_copy_current():
+        conn = duckdb.connect(str(DUCKDB_DATABASE_PATH), read_only=True)
+        source = f"columnar copy {DUCKDB_DATABASE_PATH.name}"
+    else:
+        if DUCKDB_DATABASE_PATH.exists():
+            # Stale results are worse than slower queries: rebuild the copy to use it again
+            _ENGINE_STATS["stale_copy_skipped"] += 1
+            print__tools_debug(
+                f"⚠️ {DUCKDB_ENGINE_ID}: {DUCKDB_DATABASE_PATH.name} was not built from the "
+                "current czsu_data.db, attaching czsu_data.db instead"
+            )
+        conn = duckdb.connect(":memory:")
+        conn.execute("INSTALL sqlite")
+        conn.execute("LOAD sqlite")
+        conn.execute(
+            f"ATTACH '{DB_PATH.as_posix()}' AS czsu (TYPE SQLITE, READ_ONLY)"
+        )
+        conn.execute("USE czsu")
+        source = "attached czsu_data.db"
+    for setting in DUCKDB_SQLITE_COMPAT_SETTINGS:
+        conn.execute(setting)
+    if DUCKDB_THREADS:
+        conn.execute(f"SET threads TO {int(DUCKDB_THREADS)}")
+    print__tools_debug(f"{DUCKDB_ENGINE_ID}: DuckDB engine ready ({source})")
+    return conn
+
+
+def _get_connection():
+    global _CONN, _CONN_IDENTITY, _UNAVAILABLE_REASON
+    identity = get_db_identity()
+    if _CONN is None or _CONN_IDENTITY != identity:
+        with _CONN_LOCK:
+            if _UNAVAILABLE_REASON:
+                raise RuntimeError(_UNAVAILABLE_REASON)
+            if _CONN is None or _CONN_IDENTITY != identity:
+                try:
+                    # czsu_data.db was replaced: reopen, re-checking the columnar copy.
+                    # Cursors of in-flight queries keep the old connection alive.
+                    _CONN = _open_connection()
+                    _CONN_IDENTITY = identity
+                except Exception as e:
+                    # Do not retry (e.g. extension download) on every query
+                    _UNAVAILABLE_REASON = str(e)
+                    raise
+    return _CONN
+
+
+def execute_duckdb_query(query: str, max_rows: Optional[int] = None) -> Dict[str, Any]:
+    """Execute a SQLite-dialect query in DuckDB with the same budgets as the SQLite guard.
+
+    Args:
+        query: SQLite-dialect SQL
+        max_rows: Row cap (default SQL_GUARD_MAX_ROWS)
+
+    Returns:
+        Dict with the same keys as ``sql_guard.execute_guarded_query`` plus "engine"
+
+    Raises:
+        DuckDBFallback: If the query should be run by SQLite instead
+    """
+    if query.strip().lower().startswith(SQLITE_ONLY_PREFIXES):
+        raise DuckDBFallback("SQLite-specific statement")
+    max_rows = max_rows or SQL_GUARD_MAX_ROWS
+    try:
+        base_conn = _get_connection()
+    except Exception as e:
+        _ENGINE_STATS["unavailable"] += 1
+        raise DuckDBFallback(f"DuckDB unavailable: {e}")
+
+    start = time.perf_counter()
+    cursor = base_conn.cursor()
+    timer = threading.Timer(SQL_GUARD_TIMEOUT_SECONDS, cursor.interrupt)
+    result = {
+        "status": STATUS_OK,
+        "reason": None,
+        "columns": [],
+        "rows": [],
+        "row_count": 0,
+        "elapsed_ms": 0.0,
+        "engine": "duckdb",
+    }
+    try:
+        timer.start()
+        cursor.execute(sqlite_to_duckdb_sql(query))
+        result["columns"] = [column[0] for column in cursor.description or []]
+        rows = []
+        while True:
+            batch = cursor.fetchmany(FETCH_BATCH_SIZE)
+            if not batch:
+                break
+            remaining = max_rows - len(rows)
+            if len(batch) > remaining:
+                rows.extend(batch[:remaining])
+                result["status"] = STATUS_TRUNCATED
+                result["reason"] = (
+                    f"only the first {max_rows} rows were returned; "
+                    "aggregate, filter or add LIMIT"
+                )
+                break
+            rows.extend(batch)
+        result["rows"] = rows
+        result["row_count"] = len(rows)
+        _ENGINE_STATS["duckdb_queries"] += 1
+    except duckdb.InterruptException:
+        _ENGINE_STATS["interrupted"] += 1
+        result["status"] = STATUS_ABORTED
+        result["reason"] = (
+            f"query exceeded the time budget of {SQL_GUARD_TIMEOUT_SECONDS}s; "
+            "simplify it, filter earlier or aggregate"
+        )
+    except duckdb.Error as e:
+        _ENGINE_STATS["fallbacks"] += 1
+        print__tools_debug(f"{DUCKDB_ENGINE_ID}: Falling back to SQLite: {e}")
+        raise DuckDBFallback(str(e))
+    finally:
+        timer.cancel()
+        cursor.close()
+
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    _ENGINE_STATS["exec_time_total_ms"] += elapsed_ms
+    result["elapsed_ms"] = round(elapsed_ms, 3)
+    return result
+
+
+def get_duckdb_engine_stats() -> Dict[str, Any]:
+    stats = dict(_ENGINE_STATS)
+    stats["exec_time_total_ms"] = round(stats["exec_time_total_ms"], 3)
+    stats["engine"] = SQL_ENGINE
+    stats["duckdb_installed"] = duckdb is not None
+    stats["columnar_copy"] = DUCKDB_DATABASE_PATH.exists()
+    stats["columnar_copy_current"] = is_columnar_copy_current()
+    stats["unavailable_reason"] = _UNAVAILABLE_REASON
+    return stats
+
+
+def build_columnar_copy(target_path: Optional[Path] = None) -> Path:
+    """Copy every table of czsu_data.db into a DuckDB database file.
+
+    Uses DuckDB's sqlite extension when it can be loaded, otherwise transfers
+    the rows through Python. The identity (size, mtime, inode) of the source
+    file is written next to the copy; the engine ignores a copy whose source
+    identity no longer matches czsu_data.db.
+    """
+    if duckdb is None:
+        raise RuntimeError("duckdb is not installed (pip install .[duckdb])")
+    target_path = target_path or DUCKDB_DATABASE_PATH
+    source_identity = get_db_identity()
+    temp_path = target_path.with_suffix(".tmp.duckdb")
+    if temp_path.exists():
+        temp_path.unlink()
+
+    conn = duckdb.connect(str(temp_path))
+    try:
+        try:
+            conn.execute("INSTALL sqlite")
+            conn.execute("LOAD sqlite")
+            conn.execute(
+                f"ATTACH '{DB_PATH.as_posix()}' AS czsu (TYPE SQLITE, READ_ONLY)"
+            )
+            target_catalog = conn.execute("SELECT current_database()").fetchone()[0]
+            conn.execute(f'COPY FROM DATABASE czsu TO "{target_catalog}"')
+        except duckdb.Error as e:
+            print__tools_debug(
+                f"{DUCKDB_ENGINE_ID}: sqlite extension unavailable ({e}), copying through Python"
+            )
+            _copy_tables_through_python(conn)
+    finally:
+        conn.close()
+    if get_db_identity() != source_identity:
+        temp_path.unlink()
+        raise RuntimeError("czsu_data.db changed while the columnar copy was built")
+    os.replace(temp_path, target_path)
+    _source_identity_path(target_path).write_text(
+        json.dumps(list(source_identity)), encoding="utf-8"
+    )
+    return target_path
+
+
+def _copy_tables_through_python(conn) -> None:
+    import pandas as pd
+
+    source = sqlite3.connect(f"file:{DB_PATH.as_posix()}?mode=ro", uri=True)
+    try:
+        tables = [
+            row[0]
+            for row in source.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+            ).fetchall()
+        ]
+        for table_name in tables:
+            quoted_table = '"' + table_name.replace('"', '""') + '"'
+            columns = source.execute(f"PRAGMA table_info({quoted_table})").fetchall()
+            column_defs = []
+            for column in columns:
+                declared = (column[2] or "").upper()
+                if "INT" in declared:
+                    duck_type = "BIGINT"
+                elif any(t in declared for t in ("REAL", "FLOA", "DOUB", "NUM", "DEC")):
+                    duck_type = "DOUBLE"
+                else:
+                    duck_type = "VARCHAR"
+                column_defs.append(
+                    '"' + column[1].replace('"', '""') + f'" {duck_type}'
+                )
+            conn.execute(f"CREATE TABLE {quoted_table} ({', '.join(column_defs)})")
+            column_names = [column[1] for column in columns]
+            cursor = source.execute(f"SELECT * FROM {quoted_table}")
+            while True:
+                batch = cursor.fetchmany(50000)
+                if not batch:
+                    break
+                # Bulk insert through a registered DataFrame (executemany is row by row)
+                conn.register("batch_df", pd.DataFrame(batch, columns=column_names))
+                conn.execute(f"INSERT INTO {quoted_table} SELECT * FROM batch_df")
+                conn.unregister("batch_df")
+    finally:
+        source.close()
+
+
+if __name__ == "__main__":
+    # Build the columnar copy: python -m my_agent.utils.duckdb_engine
+    print(f"Columnar copy written to {build_columnar_copy()}")
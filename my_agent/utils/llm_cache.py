@@ -0,0 +1,419 @@
+"""Persistent exact-match cache for deterministic LLM calls.
+
+The rewrite, query generation, reflection and summarization nodes all call
+Azure OpenAI at temperature 0.0, so identical inputs produce identical outputs.
+This module stores those responses keyed by a hash of the model deployment,
+the fully formatted prompt messages and the generation parameters, so replays
+(golden dataset evaluations, popular prompts, retries) skip the LLM round-trip.
+
+Backends:
+    - sqlite (default): local file next to the data directory
+    - postgres: shared ``llm_response_cache`` table on the application database
+
+Configuration (environment variables):
+    - LLM_CACHE_ENABLED: Master switch (default "1")
+    - LLM_CACHE_BACKEND: "sqlite" or "postgres" (default "sqlite")
+    - LLM_CACHE_SQLITE_PATH: SQLite cache file (default data/llm_cache.db)
+    - LLM_CACHE_MAX_MB: Size budget before least-recently-used eviction (default 100)
+    - LLM_CACHE_NODE_<NODE>: Per-node switch, e.g. LLM_CACHE_NODE_QUERY_GEN=0
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from langchain_core.messages import AIMessage, BaseMessage
+
+# Get base directory
+try:
+    BASE_DIR = Path(__file__).resolve().parents[2]
+except NameError:
+    BASE_DIR = Path(os.getcwd()).parents[0]
+
+# Import debug functions from utils
+from api.utils.debug import print__nodes_debug
+
+# ==============================================================================
+# CONFIGURATION
+# ==============================================================================
+LLM_CACHE_ID = 30  # Static ID for LLM cache debug messages
+
+LLM_CACHE_ENABLED = os.environ.get("LLM_CACHE_ENABLED", "1") == "1"
+LLM_CACHE_BACKEND = os.environ.get("LLM_CACHE_BACKEND", "sqlite").lower()
+LLM_CACHE_SQLITE_PATH = Path(
+    os.environ.get("LLM_CACHE_SQLITE_PATH", str(BASE_DIR / "data" / "llm_cache.db"))
+)
+LLM_CACHE_MAX_BYTES = int(float(os.environ.get("LLM_CACHE_MAX_MB", "100")) * 1024 * 1024)
+LLM_CACHE_EVICTION_BATCH = 50  # Rows removed per eviction round
+
+# Nodes whose LLM calls are deterministic and therefore cacheable by default
+DEFAULT_CACHED_NODES = {
+    "rewrite_query": True,
+    "query_gen": True,
+    "reflect": True,
+    "summarize_messages": True,
+}
+
+# Hit/miss statistics per node (process-local)
+_LLM_CACHE_STATS = defaultdict(
+    lambda: {"hits": 0, "misses": 0, "writes": 0, "errors": 0, "evictions": 0}
+)
+
+
+def is_node_cache_enabled(node_name: str) -> bool:
+    """Return True if responses for the given node may be served from the cache."""
+    if not LLM_CACHE_ENABLED:
+        return False
+    default = "1" if DEFAULT_CACHED_NODES.get(node_name, False) else "0"
+    return os.environ.get(f"LLM_CACHE_NODE_{node_name.upper()}", default) == "1"
+
+
+def build_cache_key(llm: Any, messages: List[BaseMessage]) -> Optional[str]:
+    """Hash deployment, messages and generation parameters into a cache key.
+
+    Returns None when the model is not deterministic (temperature > 0), because
+    caching a sampled response would freeze one arbitrary completion.
+    """
+    temperature = getattr(llm, "temperature", None)
+    if temperature is None or temperature > 0.0:
+        return None
+
+    key_payload = {
+        "deployment": getattr(llm, "deployment_name", None),
+        "model": getattr(llm, "model_name", None),
+        "api_version": getattr(llm, "openai_api_version", None),
+        "params": {
+            "temperature": temperature,
+            "max_tokens": getattr(llm, "max_tokens", None),
+            "top_p": getattr(llm, "top_p", None),
+        },
+        "messages": [
+            {"type": message.type, "content": message.content} for message in messages
+        ],
+    }
+    serialized = json.dumps(key_payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+# ==============================================================================
+# BACKENDS
+# ==============================================================================
+class SQLiteLLMCacheBackend:
+    """Local SQLite backend with least-recently-used eviction by total size."""
+
+    def __init__(self, path: Path, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _get_conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS llm_response_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    node TEXT,
+                    response TEXT NOT NULL,
+                    size_bytes INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    hit_count INTEGER DEFAULT 0
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_llm_response_cache_last_access "
+                "ON llm_response_cache(last_access)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def get(self, cache_key: str) -> Optional[str]:
+        with self._lock:
+            conn = self._get_conn()
+            row = conn.execute(
+                "SELECT response FROM llm_response_cache WHERE cache_key = ?",
+                (cache_key,),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE llm_response_cache SET last_access = ?, hit_count = hit_count + 1 "
+                "WHERE cache_key = ?",
+                (time.time(), cache_key),
+            )
+            conn.commit()
+            return row[0]
+
+    def set(self, cache_key: str, node_name: str, response: str) -> int:
+        """Store a response and return the number of evicted entries."""
+        size_bytes = len(response.encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            conn = self._get_conn()
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO llm_response_cache
+                    (cache_key, node, response, size_bytes, created_at, last_access, hit_count)
+                VALUES (?, ?, ?, ?, ?, ?, 0)
+                """,
+                (cache_key, node_name, response, size_bytes, now, now),
+            )
+            evicted = self._evict(conn)
+            conn.commit()
+            return evicted
+
+    def _evict(self, conn: sqlite3.Connection) -> int:
+        evicted = 0
+        total = conn.execute(
+            "SELECT COALESCE(SUM(size_bytes), 0) FROM llm_response_cache"
+        ).fetchone()[0]
+        while total > self.max_bytes:
+            rows = conn.execute(
+                "SELECT cache_key, size_bytes FROM llm_response_cache "
+                "ORDER BY last_access ASC LIMIT ?",
+                (LLM_CACHE_EVICTION_BATCH,),
+            ).fetchall()
+            if not rows:
+                break
+            for cache_key, size_bytes in rows:
+                if total <= self.max_bytes:
+                    break
+                conn.execute(
+                    "DELETE FROM llm_response_cache WHERE cache_key = ?", (cache_key,)
+                )
+                total -= size_bytes
+                evicted += 1
+        return evicted
+
+    def size_info(self) -> Dict[str, int]:
+        with self._lock:
+            conn = self._get_conn()
+            entries, total = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM llm_response_cache"
+            ).fetchone()
+            return {"entries": entries, "size_bytes": total}
+
+
+class PostgresLLMCacheBackend:
+    """Shared Postgres backend so every worker and instance reuses responses."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._table_ready = False
+
+    async def _ensure_table(self, conn) -> None:
+        if self._table_ready:
+            return
+        await conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_response_cache (
+                cache_key VARCHAR(64) PRIMARY KEY,
+                node VARCHAR(64),
+                response TEXT NOT NULL,
+                size_bytes INTEGER NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                last_access TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                hit_count INTEGER DEFAULT 0
+            );
+            """
+        )
+        await conn.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_llm_response_cache_last_access
+            ON llm_response_cache(last_access);
+            """
+        )
+        self._table_ready = True
+
+    async def get(self, cache_key: str) -> Optional[str]:
+        from my_agent.utils.postgres_checkpointer import get_direct_connection
+
+        async with get_direct_connection() as conn:
+            await conn.set_autocommit(True)
+            await self._ensure_table(conn)
+            async with conn.cursor() as cur:
+                await cur.execute(
+                    """
+                    UPDATE llm_response_cache
+                    SET last_access = CURRENT_TIMESTAMP, hit_count = hit_count + 1
+                    WHERE cache_key = %s
+                    RETURNING response
+                    """,
+                    (cache_key,),
+                )
+                row = await cur.fetchone()
+        return row[0] if row else None
+
+    async def set(self, cache_key: str, node_name: str, response: str) -> int:
+        from my_agent.utils.postgres_checkpointer import get_direct_connection
+
+        size_bytes = len(response.encode("utf-8"))
+        async with get_direct_connection() as conn:
+            await conn.set_autocommit(True)
+            await self._ensure_table(conn)
+            async with conn.cursor() as cur:
+                await cur.execute(
+                    """
+                    INSERT INTO llm_response_cache (cache_key, node, response, size_bytes)
+                    VALUES (%s, %s, %s, %s)
+                    ON CONFLICT (cache_key) DO UPDATE SET
+                        response = EXCLUDED.response,
+                        size_bytes = EXCLUDED.size_bytes,
+                        last_access = CURRENT_TIMESTAMP
+                    """,
+                    (cache_key, node_name, response, size_bytes),
+                )
+                # Evict least recently used rows beyond the size budget
+                await cur.execute(
+                    """
+                    DELETE FROM llm_response_cache
+                    WHERE cache_key IN (
+                        SELECT cache_key FROM (
+                            SELECT cache_key,
+                                   SUM(size_bytes) OVER (ORDER BY last_access DESC) AS running_total
+                            FROM llm_response_cache
+                        ) ranked
+                        WHERE running_total > %s
+                    )
+                    """,
+                    (self.max_bytes,),
+                )
+                return cur.rowcount or 0
+
+    async def size_info(self) -> Dict[str, int]:
+        from my_agent.utils.postgres_checkpointer import get_direct_connection
+
+        async with get_direct_connection() as conn:
+            await conn.set_autocommit(True)
+            await self._ensure_table(conn)
+            async with conn.cursor() as cur:
+                await cur.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM llm_response_cache"
+                )
+                row = await cur.fetchone()
+        return {"entries": row[0], "size_bytes": row[1]}
+
+
+_BACKEND = None
+
+
+def get_llm_cache_backend():
+    """Return the configured cache backend, creating it on first use."""
+    global _BACKEND
+    if _BACKEND is None:
+        if LLM_CACHE_BACKEND == "postgres":
+            _BACKEND = PostgresLLMCacheBackend(LLM_CACHE_MAX_BYTES)
+        else:
+            _BACKEND = SQLiteLLMCacheBackend(LLM_CACHE_SQLITE_PATH, LLM_CACHE_MAX_BYTES)
+    return _BACKEND
+
+
+async def _backend_get(backend, cache_key: str) -> Optional[str]:
+    if isinstance(backend, SQLiteLLMCacheBackend):
+        return await asyncio.to_thread(backend.get, cache_key)
+    return await backend.get(cache_key)
+
+
+async def _backend_set(backend, cache_key: str, node_name: str, response: str) -> int:
+    if isinstance(backend, SQLiteLLMCacheBackend):
+        return await asyncio.to_thread(backend.set, cache_key, node_name, response)
+    return await backend.set(cache_key, node_name, response)
+
+
+# ==============================================================================
+# PUBLIC API
+# ==============================================================================
+async def cached_ainvoke(llm: Any, messages: List[BaseMessage], node_name: str):
+    """Invoke the LLM, serving and storing the response through the cache.
+
+    Cache failures never break the node: any backend error falls through to a
+    normal ``llm.ainvoke`` call and is counted in the statistics.
+
+    Args:
+        llm: LangChain chat model (AzureChatOpenAI / ChatOpenAI)
+        messages: Fully formatted prompt messages
+        node_name: Graph node name used for per-node flags and statistics
+
+    Returns:
+        AIMessage: Either the cached response or the fresh LLM response
+    """
+    if not is_node_cache_enabled(node_name):
+        return await llm.ainvoke(messages)
+
+    cache_key = build_cache_key(llm, messages)
+    if cache_key is None:
+        return await llm.ainvoke(messages)
+
+    stats = _LLM_CACHE_STATS[node_name]
+    backend = get_llm_cache_backend()
+
+    try:
+        cached = await _backend_get(backend, cache_key)
+    except Exception as e:
+        stats["errors"] += 1
+        print__nodes_debug(f"⚠️ {LLM_CACHE_ID}: LLM cache read failed ({node_name}): {e}")
+        cached = None
+
+    if cached is not None:
+        stats["hits"] += 1
+        print__nodes_debug(
+            f"⚡ {LLM_CACHE_ID}: LLM cache HIT for {node_name} ({cache_key[:12]})"
+        )
+        payload = json.loads(cached)
+        return AIMessage(
+            content=payload["content"],
+            response_metadata={"llm_cache": "hit", "cache_key": cache_key},
+        )
+
+    stats["misses"] += 1
+    result = await llm.ainvoke(messages)
+
+    try:
+        payload = json.dumps({"content": result.content}, ensure_ascii=False)
+        evicted = await _backend_set(backend, cache_key, node_name, payload)
+        stats["writes"] += 1
+        stats["evictions"] += evicted
+    except Exception as e:
+        stats["errors"] += 1
+        print__nodes_debug(f"⚠️ {LLM_CACHE_ID}: LLM cache write failed ({node_name}): {e}")
+
+    return result
+
+
+def get_llm_cache_stats() -> Dict[str, Any]:
+    """Return per-node and total hit-rate statistics for this process."""
+    nodes = {}
+    totals = {"hits": 0, "misses": 0, "writes": 0, "errors": 0, "evictions": 0}
+    for node_name, stats in _LLM_CACHE_STATS.items():
+        lookups = stats["hits"] + stats["misses"]
+        nodes[node_name] = {
+            **stats,
+            "hit_rate": round(stats["hits"] / lookups, 4) if lookups else 0.0,
+        }
+        for field in totals:
+            totals[field] += stats[field]
+    total_lookups = totals["hits"] + totals["misses"]
+    return {
+        "enabled": LLM_CACHE_ENABLED,
+        "backend": LLM_CACHE_BACKEND,
+        "max_bytes": LLM_CACHE_MAX_BYTES,
+        "nodes": nodes,
+        "totals": {
+            **totals,
+            "hit_rate": round(totals["hits"] / total_lookups, 4)
+            if total_lookups
+            else 0.0,
+        },
+    }
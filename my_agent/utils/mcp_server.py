@@ -1,13 +1,13 @@
 """MCP server implementation for SQLite queries.
 
 This module implements a Model Context Protocol (MCP) server that provides
-a SQLite query tool for data analysis.
+a SQLite query tool and a dimension-value lookup tool for data analysis.
 """
 
+import asyncio
 import os
-import sqlite3
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
 from langchain.tools import BaseTool
 from langchain_core.tools import ToolException
@@ -23,22 +23,47 @@ except NameError:
 
 # Import debug functions from utils
 from api.utils.debug import print__tools_debug
-
-# Database path
-DB_PATH = BASE_DIR / "data" / "czsu_data.db"
+from my_agent.utils.duckdb_engine import (
+    DuckDBFallback,
+    execute_duckdb_query,
+    is_duckdb_enabled,
+)
+from my_agent.utils.result_format import build_structured_result, encode_result_tsv
+from my_agent.utils.sql_guard import (
+    STATUS_ABORTED,
+    STATUS_TRUNCATED,
+    execute_guarded_query,
+)
+from my_agent.utils.sql_result_cache import (
+    SQL_RESULT_CACHE_ENABLED,
+    get_sql_result_cache,
+    normalize_sql,
+)
+from my_agent.utils.sqlite_pool import (
+    DB_PATH,
+    get_db_identity,
+    get_sqlite_pool,
+    run_in_sqlite_executor,
+)
 
 # Debug constant for tool ID
 SQLITE_TOOL_ID = 21  # Static ID for SQLiteQueryTool
+VALUE_LOOKUP_TOOL_ID = 22  # Static ID for DimensionValueLookupTool
 
 
 class SQLiteQueryTool(BaseTool):
-    """Tool for executing SQL queries against a SQLite database."""
+    """Tool for executing SQL queries against a SQLite database.
+
+    Returns the result as compact header + TSV text (content) and the structured
+    result dict (artifact); invoke it with a ToolCall to receive both.
+    """
 
     name: str = "sqlite_query"
     description: str = "Execute SQL query on the SQLite database"
+    response_format: str = "content_and_artifact"
 
-    def _run(self, query: str) -> str:
-        """Execute the SQL query and return results."""
+    def _run(self, query: str) -> Tuple[str, Dict[str, Any]]:
+        """Execute the SQL query and return (text result, structured result)."""
         try:
             # Debug print query
             print__tools_debug(
@@ -50,19 +75,52 @@ class SQLiteQueryTool(BaseTool):
                 f"{SQLITE_TOOL_ID}: ====================================="
             )
 
-            # Execute SQL query
-            with sqlite3.connect(DB_PATH) as conn:
-                cursor = conn.cursor()
-                cursor.execute(query)
-                result = cursor.fetchall()
+            # Serve repeated queries against the same DB file version from the cache
+            cache_key = (normalize_sql(query), get_db_identity())
+            if SQL_RESULT_CACHE_ENABLED:
+                cached = get_sql_result_cache().get(cache_key)
+                if cached is not None:
+                    print__tools_debug(f"{SQLITE_TOOL_ID}: Result cache HIT")
+                    result_value, structured_result = cached
+                    return result_value, {
+                        **structured_result,
+                        "query": query,
+                        "cache_hit": True,
+                    }
+
+            # Optional vectorized engine; dialect errors fall back to SQLite
+            guarded = None
+            if is_duckdb_enabled():
+                try:
+                    guarded = execute_duckdb_query(query)
+                except DuckDBFallback:
+                    guarded = None
+
+            # Execute SQL query on a pooled read-only connection under the cost guard
+            if guarded is None:
+                with get_sqlite_pool().connection() as conn:
+                    guarded = execute_guarded_query(conn, query)
 
             # Format the result
-            if not result:
-                result_value = "No results found"
-            elif len(result) == 1 and len(result[0]) == 1:
-                result_value = str(result[0][0])
+            if guarded["status"] == STATUS_ABORTED:
+                result_value = f"QUERY ABORTED: {guarded['reason']}"
             else:
-                result_value = str(result)
+                note = (
+                    f"RESULT TRUNCATED: {guarded['reason']}"
+                    if guarded["status"] == STATUS_TRUNCATED
+                    else None
+                )
+                result_value = encode_result_tsv(
+                    guarded["columns"], guarded["rows"], note=note
+                )
+            structured_result = build_structured_result(
+                query,
+                guarded["columns"],
+                guarded["rows"],
+                guarded["status"],
+                guarded["reason"],
+                guarded["elapsed_ms"],
+            )
 
             # Debug print result
             print__tools_debug(f"{SQLITE_TOOL_ID}: Query result:")
@@ -71,14 +129,64 @@ class SQLiteQueryTool(BaseTool):
                 f"{SQLITE_TOOL_ID}: ====================================="
             )
 
-            return result_value
+            # Budget aborts depend on load, so only completed results are cached
+            if SQL_RESULT_CACHE_ENABLED and guarded["status"] != STATUS_ABORTED:
+                get_sql_result_cache().put(
+                    cache_key, (result_value, structured_result)
+                )
+
+            return result_value, structured_result
 
         except Exception as e:
             raise ToolException(f"Query error: {str(e)}")
 
-    async def _arun(self, query: str) -> str:
-        """Execute the SQL query asynchronously."""
-        return self._run(query)
+    async def _arun(self, query: str) -> Tuple[str, Dict[str, Any]]:
+        """Execute the SQL query on the dedicated SQLite thread pool, off the event loop."""
+        return await run_in_sqlite_executor(self._run, query)
+
+
+class DimensionValueLookupTool(BaseTool):
+    """Tool for resolving user terms into exact dimension values stored in the data."""
+
+    name: str = "dimension_value_lookup"
+    description: str = (
+        "Find exact dimension values (table, column, value) in the SQLite database "
+        "matching user terms, accent-insensitive. Optionally restrict to a "
+        "comma-separated list of table names."
+    )
+
+    def _run(self, term: str, tables: Optional[str] = None, limit: int = 20) -> str:
+        """Look up matching dimension values and return them one per line."""
+        from .value_index import search_dimension_values
+
+        try:
+            table_list = (
+                [t.strip() for t in tables.split(",") if t.strip()] if tables else None
+            )
+            matches = search_dimension_values(term, table_list, limit)
+            if matches is None:
+                return (
+                    "Dimension value index is still being built; "
+                    "use the values listed in the schema"
+                )
+            print__tools_debug(
+                f"{VALUE_LOOKUP_TOOL_ID}: Lookup '{term}' -> {len(matches)} matches"
+            )
+            if not matches:
+                return "No matching dimension values found"
+            return "\n".join(
+                f"{table_name} | {column_name} | {value}"
+                for table_name, column_name, value in matches
+            )
+        except Exception as e:
+            raise ToolException(f"Lookup error: {str(e)}")
+
+    async def _arun(
+        self, term: str, tables: Optional[str] = None, limit: int = 20
+    ) -> str:
+        """Look up matching dimension values asynchronously."""
+        # FTS lookup on a SQLite connection, kept off the event loop
+        return await asyncio.to_thread(self._run, term, tables, limit)
 
 
 async def create_mcp_server() -> List[BaseTool]:
@@ -87,8 +195,8 @@ async def create_mcp_server() -> List[BaseTool]:
     Returns:
         A list of LangChain tools that can be used with the MCP server
     """
-    # Create and return the SQLite query tool
-    return [SQLiteQueryTool()]
+    # Create and return the SQLite query and dimension value lookup tools
+    return [SQLiteQueryTool(), DimensionValueLookupTool()]
 
 
 if __name__ == "__main__":
@@ -7,8 +7,10 @@ including schema loading, query generation, execution, and result formatting.
 # ==============================================================================
 # IMPORTS
 # ==============================================================================
+import asyncio
 import os
 import sqlite3
+import time
 from pathlib import Path
 
 from langchain_core.messages import AIMessage, SystemMessage
@@ -60,8 +62,21 @@ from my_agent.utils.models import (
     get_ollama_llm,
 )
 
+from .answer_context import build_answer_context
+from .llm_cache import cached_ainvoke
 from .mcp_server import create_mcp_server
+from .result_format import build_structured_result
+from .run_store import get_documents, new_store_id, put_documents
+from .schema_pruning import SCHEMA_PRUNING_ENABLED, build_pruned_schema_text
+from .speculative_sql import (
+    SPECULATIVE_SQL_CANDIDATES,
+    dedupe_candidates,
+    get_candidate_strategy,
+    get_fanout_codes,
+    is_fanout_run,
+)
 from .state import DataAnalysisState
+from .token_utils import count_tokens
 
 PDF_FUNCTIONALITY_AVAILABLE = True
 
@@ -76,46 +91,131 @@ INCREMENT_ITERATION_ID = 13
 CHROMA_DB_PATH = BASE_DIR / "metadata" / "czsu_chromadb"
 CHROMA_COLLECTION_NAME = "czsu_selections_chromadb"
 EMBEDDING_DEPLOYMENT = "text-embedding-3-large__test1"
+SCHEMA_DB_PATH = (
+    BASE_DIR / "metadata" / "llm_selection_descriptions" / "selection_descriptions.db"
+)
+SCHEMA_SEPARATOR = "\n**************\n"  # Between the schemas of several selections
+
+# In-memory schema cache keyed by selection code, invalidated by DB file mtime
+_SCHEMA_CACHE = {}
+_SCHEMA_CACHE_MTIME = None
 
 
 # ==============================================================================
 # HELPER FUNCTIONS
 # ==============================================================================
-async def load_schema(state=None):
-    """Load the schema metadata from the SQLite database based on top_selection_codes in state."""
+def _get_side_store_id(state) -> str:
+    """Run-store ID of the current run (set by main() or by rewrite_query_node)."""
+    return state["side_store_id"]
+
+
+def _get_schema_db_mtime() -> float:
+    """Return the schema DB modification time, or 0.0 if the file is missing."""
+    try:
+        return SCHEMA_DB_PATH.stat().st_mtime
+    except OSError:
+        return 0.0
+
+
+def _split_schema(schema, selection_codes):
+    """Per-selection parts of a schema text built by load_schema, or None if it does not split."""
+    parts = schema.split(SCHEMA_SEPARATOR) if schema else []
+    return parts if len(parts) == len(selection_codes) else None
+
+
+def _load_schemas_from_db(selection_codes):
+    """Fetch schema rows for the given codes with one read-only query."""
+    placeholders = ",".join("?" for _ in selection_codes)
+    conn = sqlite3.connect(f"file:{SCHEMA_DB_PATH.as_posix()}?mode=ro", uri=True)
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            f"""
+            SELECT selection_code, extended_description, selection_schema_json, short_description
+            FROM selection_descriptions
+            WHERE selection_code IN ({placeholders})
+            AND extended_description IS NOT NULL AND extended_description != ''
+            """,
+            list(selection_codes),
+        )
+        return {
+            code: {
+                "extended_description": extended_description,
+                "schema_json": schema_json,
+                "short_description": short_description,
+            }
+            for code, extended_description, schema_json, short_description in cursor.fetchall()
+        }
+    finally:
+        conn.close()
+
+
+async def load_schema(state=None, question=None):
+    """Load the schema metadata from the SQLite database based on top_selection_codes in state.
+
+    Schemas are cached in memory by selection code; the cache is dropped whenever
+    the modification time of selection_descriptions.db changes. When a question is
+    given and SCHEMA_PRUNING_ENABLED is on, each schema is pruned to the dimension
+    values relevant to the question.
+    """
+    global _SCHEMA_CACHE_MTIME
     if state and state.get("top_selection_codes"):
         selection_codes = state["top_selection_codes"]
-        db_path = (
-            BASE_DIR
-            / "metadata"
-            / "llm_selection_descriptions"
-            / "selection_descriptions.db"
-        )
         schemas = []
+        full_schemas = []
         try:
-            conn = sqlite3.connect(str(db_path))
-            cursor = conn.cursor()
+            current_mtime = _get_schema_db_mtime()
+            if current_mtime != _SCHEMA_CACHE_MTIME:
+                if _SCHEMA_CACHE:
+                    print__nodes_debug(
+                        f"💾 {GET_SCHEMA_ID}: Schema DB changed, invalidating {len(_SCHEMA_CACHE)} cached schemas"
+                    )
+                _SCHEMA_CACHE.clear()
+                _SCHEMA_CACHE_MTIME = current_mtime
+
+            missing_codes = [
+                code for code in selection_codes if code not in _SCHEMA_CACHE
+            ]
+            if missing_codes:
+                _SCHEMA_CACHE.update(_load_schemas_from_db(missing_codes))
+            print__nodes_debug(
+                f"💾 {GET_SCHEMA_ID}: Schema cache hits: {len(selection_codes) - len(missing_codes)}, loaded: {len(missing_codes)}"
+            )
+
             for selection_code in selection_codes:
-                cursor.execute(
-                    """
-                    SELECT extended_description FROM selection_descriptions
-                    WHERE selection_code = ? AND extended_description IS NOT NULL AND extended_description != ''
-                    """,
-                    (selection_code,),
-                )
-                row = cursor.fetchone()
-                if row:
-                    schemas.append(f"Dataset: {selection_code}.\n" + row[0])
+                entry = _SCHEMA_CACHE.get(selection_code)
+                if entry:
+                    full_schema = (
+                        f"Dataset: {selection_code}.\n" + entry["extended_description"]
+                    )
+                    full_schemas.append(full_schema)
+                    pruned_schema = None
+                    if question and SCHEMA_PRUNING_ENABLED:
+                        pruned_schema = build_pruned_schema_text(
+                            selection_code,
+                            entry["schema_json"],
+                            question,
+                            entry["short_description"],
+                        )
+                    schemas.append(pruned_schema or full_schema)
                 else:
                     schemas.append(
                         f"No schema found for selection_code {selection_code}."
                     )
         except Exception as e:
             schemas.append(f"Error loading schema from DB: {e}")
-        finally:
-            if "conn" in locals():
-                conn.close()
-        return "\n**************\n".join(schemas)
+
+        schema_text = SCHEMA_SEPARATOR.join(schemas)
+        if question and SCHEMA_PRUNING_ENABLED and full_schemas:
+            try:
+                tokens_before = count_tokens(SCHEMA_SEPARATOR.join(full_schemas))
+                tokens_after = count_tokens(schema_text)
+                print__nodes_debug(
+                    f"✂️ {GET_SCHEMA_ID}: Schema pruning: {tokens_before} -> {tokens_after} tokens"
+                )
+            except Exception as e:
+                print__nodes_debug(f"⚠️ {GET_SCHEMA_ID}: Token counting failed: {e}")
+        return schema_text
     # fallback
     return "No selection_code provided in state."
 
@@ -229,8 +329,10 @@ Now process this conversation:
     prompt = ChatPromptTemplate.from_messages(
         [("system", system_prompt), ("human", human_prompt)]
     )
-    result = await llm.ainvoke(
-        prompt.format_messages(summary_content=summary.content, prompt_text=prompt_text)
+    result = await cached_ainvoke(
+        llm,
+        prompt.format_messages(summary_content=summary.content, prompt_text=prompt_text),
+        "rewrite_query",
     )
     rewritten_prompt = result.content.strip()
     # FIX: Escape curly braces in rewritten_prompt to prevent f-string parsing errors
@@ -239,7 +341,13 @@ Now process this conversation:
     if not hasattr(result, "id") or not result.id:
         result.id = "rewrite_query"
 
-    return {"rewritten_prompt": rewritten_prompt, "messages": [summary, result]}
+    return {
+        "rewritten_prompt": rewritten_prompt,
+        "messages": [summary, result],
+        # Runs started without a side_store_id (e.g. LangGraph Studio) get one here;
+        # main() does not release it, it expires after RUN_STORE_TTL_SECONDS
+        "side_store_id": state.get("side_store_id") or new_store_id(),
+    }
 
 
 async def get_schema_node(state: DataAnalysisState) -> DataAnalysisState:
@@ -254,10 +362,14 @@ async def get_schema_node(state: DataAnalysisState) -> DataAnalysisState:
         else SystemMessage(content="")
     )
 
-    schema = await load_schema({"top_selection_codes": top_selection_codes})
+    schema = await load_schema(
+        {"top_selection_codes": top_selection_codes},
+        question=state.get("rewritten_prompt") or state.get("prompt"),
+    )
     msg = AIMessage(content=f"Schema details: {schema}", id="schema_details")
 
-    return {"messages": [summary, msg]}
+    # Carry the schema in state so query_node does not reload it every iteration
+    return {"messages": [summary, msg], "schema": schema}
 
 
 async def query_node(state: DataAnalysisState) -> DataAnalysisState:
@@ -285,6 +397,9 @@ async def query_node(state: DataAnalysisState) -> DataAnalysisState:
     # llm = get_ollama_llm("qwen:7b")
     tools = await create_mcp_server()
     sqlite_tool = next(tool for tool in tools if tool.name == "sqlite_query")
+    value_lookup_tool = next(
+        (tool for tool in tools if tool.name == "dimension_value_lookup"), None
+    )
 
     summary = (
         messages[0]
@@ -304,8 +419,13 @@ async def query_node(state: DataAnalysisState) -> DataAnalysisState:
     else:
         last_message_content = last_message.content if last_message else ""
 
-    # Load schema before building the prompt
-    schema = await load_schema({"top_selection_codes": top_selection_codes})
+    # Use the schema loaded once per run by get_schema_node
+    schema = state.get("schema")
+    if not schema:
+        schema = await load_schema(
+            {"top_selection_codes": top_selection_codes},
+            question=rewritten_prompt or prompt,
+        )
 
     system_prompt = """
 You are a Bilingual Data Query Specialist proficient in both Czech and English and an expert in SQL with SQLite dialect. 
@@ -384,57 +504,189 @@ IMPORTANT notes about SQL query generation:
 - REMEMBER, only SQLITE SQL QUERY is allowed to be returned, nothing else, or tool called with it will fail.
 
 """
-    # Build human prompt conditionally to avoid empty "Last message:" section
-    human_prompt_parts = [
-        "User question: {user_question}",
-        "Schema: {schema}",
-        "Summary of conversation:\n{summary_content}",
-    ]
+    question = rewritten_prompt or prompt
+
+    # Fan-out mode: one branch per relevant selection with only its own part of the schema
+    fanout = is_fanout_run(top_selection_codes)
+    if fanout:
+        branch_codes = get_fanout_codes(top_selection_codes)
+        schema_parts = _split_schema(schema, top_selection_codes)
+        if schema_parts is None:
+            # The schema was not built from these codes (or failed to load): load per code
+            schema_parts = [
+                await load_schema({"top_selection_codes": [code]}, question=question)
+                for code in branch_codes
+            ]
+        branch_schemas = schema_parts[: len(branch_codes)]
+        print__nodes_debug(
+            f"🔀 {QUERY_GEN_ID}: Fan-out over {len(branch_codes)} of {len(top_selection_codes)} datasets: {branch_codes}"
+        )
+    else:
+        branch_codes = [None]
+        branch_schemas = [schema]
 
-    if last_message_content:
-        human_prompt_parts.append("Last message:\n{last_message_content}")
+    async def _lookup_values(tables):
+        # Resolve user terms into exact filter values present in the candidate tables
+        if not value_lookup_tool or not tables:
+            return ""
+        try:
+            value_matches = await value_lookup_tool.ainvoke(
+                {"term": question, "tables": ",".join(tables)}
+            )
+            return "" if value_matches.startswith("No matching") else value_matches
+        except Exception as e:
+            print__nodes_debug(f"⚠️ {QUERY_GEN_ID}: Dimension value lookup failed: {e}")
+            return ""
 
-    human_prompt = "\n".join(human_prompt_parts)
+    branch_value_matches = await asyncio.gather(
+        *(
+            _lookup_values([code] if code else top_selection_codes)
+            for code in branch_codes
+        )
+    )
 
-    # Create template variables dict
-    template_vars = {
-        "user_question": rewritten_prompt or prompt,
-        "schema": schema,
-        "summary_content": summary.content,
-    }
+    def _build_prompt_messages(branch_index, candidate_index):
+        code = branch_codes[branch_index]
+        value_matches = branch_value_matches[branch_index]
 
-    if last_message_content:
-        template_vars["last_message_content"] = last_message_content
+        # Build human prompt conditionally to avoid empty "Last message:" section
+        human_prompt_parts = [
+            "User question: {user_question}",
+            "Schema: {schema}",
+            "Summary of conversation:\n{summary_content}",
+        ]
 
-    prompt_template = ChatPromptTemplate.from_messages(
-        [("system", system_prompt), ("human", human_prompt)]
-    )
-    result = await llm.ainvoke(prompt_template.format_messages(**template_vars))
-    query = result.content.strip()
+        if value_matches:
+            human_prompt_parts.append(
+                "Exact dimension values found in the data matching the question (table | column | value):\n{value_matches}"
+            )
 
-    print__nodes_debug(f"⚡ {QUERY_GEN_ID}: Generated query: {query}")
+        if last_message_content:
+            human_prompt_parts.append("Last message:\n{last_message_content}")
 
-    try:
-        tool_result = await sqlite_tool.ainvoke({"query": query})
-        if isinstance(tool_result, Exception):
-            error_msg = f"Error executing query: {str(tool_result)}"
-            print__nodes_debug(f"❌ {QUERY_GEN_ID}: {error_msg}")
-            new_queries = [(query, f"Error: {str(tool_result)}")]
-            last_message = AIMessage(content=error_msg)
-        else:
-            print__nodes_debug(
-                f"✅ {QUERY_GEN_ID}: Successfully executed query: {query}"
+        # Create template variables dict
+        template_vars = {
+            "user_question": question,
+            "schema": branch_schemas[branch_index],
+            "summary_content": summary.content,
+        }
+
+        if value_matches:
+            template_vars["value_matches"] = value_matches
+
+        if last_message_content:
+            template_vars["last_message_content"] = last_message_content
+
+        instructions = []
+        if code:
+            instructions.append(
+                f"Query only the dataset {code}. The other relevant datasets "
+                f"({', '.join(c for c in branch_codes if c != code)}) are queried in parallel, "
+                "so return the part of the answer this dataset can provide."
             )
+        if candidate_index:
+            instructions.append(get_candidate_strategy(candidate_index))
+        if instructions:
+            human_prompt_parts.append("{branch_instructions}")
+            template_vars["branch_instructions"] = "\n".join(instructions)
+
+        prompt_template = ChatPromptTemplate.from_messages(
+            [("system", system_prompt), ("human", "\n".join(human_prompt_parts))]
+        )
+        return prompt_template.format_messages(**template_vars)
+
+    async def _generate_query(branch_index, candidate_index):
+        result = await cached_ainvoke(
+            llm, _build_prompt_messages(branch_index, candidate_index), "query_gen"
+        )
+        return result.content.strip()
+
+    jobs = [
+        (branch_index, candidate_index)
+        for branch_index in range(len(branch_codes))
+        for candidate_index in range(SPECULATIVE_SQL_CANDIDATES)
+    ]
+    if len(jobs) > 1:
+        # Fan-out branches and speculative candidates are generated concurrently
+        generation_start = time.perf_counter()
+        generated = await asyncio.gather(
+            *(_generate_query(*job) for job in jobs), return_exceptions=True
+        )
+        errors = [g for g in generated if isinstance(g, Exception)]
+        for error in errors:
+            print__nodes_debug(f"⚠️ {QUERY_GEN_ID}: Query generation failed: {error}")
+        if len(errors) == len(generated):
+            raise errors[0]
+        candidates = [g for g in generated if isinstance(g, str)]
+        queries = dedupe_candidates(candidates) or candidates[:1]
+        print__nodes_debug(
+            f"⚡ {QUERY_GEN_ID}: Generated {len(queries)} distinct of {len(jobs)} "
+            f"queries in {(time.perf_counter() - generation_start) * 1000:.0f}ms"
+        )
+    else:
+        queries = [await _generate_query(0, 0)]
+
+    async def _execute_query(query, tool_call_id):
+        print__nodes_debug(f"⚡ {QUERY_GEN_ID}: Generated query: {query}")
+        try:
+            # Invoke with a ToolCall so the structured result comes back as the artifact
+            tool_message = await sqlite_tool.ainvoke(
+                {
+                    "name": sqlite_tool.name,
+                    "args": {"query": query},
+                    "id": tool_call_id,
+                    "type": "tool_call",
+                }
+            )
+            tool_result = tool_message.content
+            print__nodes_debug(f"✅ {QUERY_GEN_ID}: Successfully executed query: {query}")
             print__nodes_debug(f"📊 {QUERY_GEN_ID}: Query result: {tool_result}")
-            new_queries = [(query, tool_result)]
-            # Format the last message to include both query and result
-            formatted_content = f"Query:\n{query}\n\nResult:\n{tool_result}"
-            last_message = AIMessage(content=formatted_content, id="query_result")
-    except Exception as e:
-        error_msg = f"Error executing query: {str(e)}"
-        print__nodes_debug(f"❌ {QUERY_GEN_ID}: {error_msg}")
-        new_queries = [(query, f"Error: {str(e)}")]
-        last_message = AIMessage(content=error_msg)
+            # Format the message content to include both query and result
+            return (
+                (query, tool_result),
+                tool_message.artifact,
+                f"Query:\n{query}\n\nResult:\n{tool_result}",
+                True,
+            )
+        except Exception as e:
+            error_msg = f"Error executing query: {str(e)}"
+            print__nodes_debug(f"❌ {QUERY_GEN_ID}: {error_msg}")
+            return (
+                (query, f"Error: {str(e)}"),
+                build_structured_result(query, [], [], "error", str(e)),
+                error_msg,
+                False,
+            )
+
+    # Candidates run concurrently on the SQLite executor
+    executed = await asyncio.gather(
+        *(
+            _execute_query(
+                query,
+                f"query_gen_{current_iteration}"
+                + (f"_{index}" if len(queries) > 1 else ""),
+            )
+            for index, query in enumerate(queries)
+        )
+    )
+    new_queries = [item[0] for item in executed]
+    new_structured_results = [item[1] for item in executed]
+
+    if len(executed) == 1:
+        content, succeeded = executed[0][2], executed[0][3]
+        last_message = (
+            AIMessage(content=content, id="query_result")
+            if succeeded
+            else AIMessage(content=content)
+        )
+    else:
+        last_message = AIMessage(
+            content="\n\n".join(
+                f"{'Query' if fanout else 'Candidate'} {index + 1}:\n{item[2]}"
+                for index, item in enumerate(executed)
+            ),
+            id="query_result",
+        )
 
     print__nodes_debug(
         f"🔄 {QUERY_GEN_ID}: Current state of queries_and_results: {new_queries}"
@@ -445,6 +697,7 @@ IMPORTANT notes about SQL query generation:
         "messages": [summary, last_message],
         "iteration": current_iteration,
         "queries_and_results": new_queries,
+        "structured_query_results": new_structured_results,
     }
 
 
@@ -500,7 +753,12 @@ async def reflect_node(state: DataAnalysisState) -> DataAnalysisState:
 
     # Limit the queries_results_text to prevent token overflow
     # Only include the last few queries to prevent token overflow
-    max_queries_for_reflection = 5  # Show only last 5 queries in reflection
+    # Show only last 5 queries in reflection (at least one full speculative/fan-out batch)
+    fanout = is_fanout_run(state.get("top_selection_codes"))
+    batch_size = SPECULATIVE_SQL_CANDIDATES * (
+        len(get_fanout_codes(state["top_selection_codes"])) if fanout else 1
+    )
+    max_queries_for_reflection = max(5, batch_size)
     recent_queries = (
         queries_and_results[-max_queries_for_reflection:]
         if len(queries_and_results) > max_queries_for_reflection
@@ -547,6 +805,8 @@ Guidelines:
   - For trend analysis, ensure we have data across all relevant time periods.
   - For distribution questions, ensure we have complete coverage of all categories.
   - If you see repetitive or very similar queries, strongly consider answering with current data.
+  - If a result starts with "QUERY ABORTED" or contains "RESULT TRUNCATED", the query was stopped by the cost guard:
+    instruct a cheaper query (join conditions, WHERE filters, aggregation or LIMIT) instead of repeating it.
 
 Your response should be detailed and specific, helping guide the next query. 
 But it also must be to the point and not too long, max 400 words.
@@ -556,6 +816,17 @@ If improvement will be needed - Imagine it is a chatbot and you are now playing
 how to improve the SQL QUERY - so phrase it like instructions.
 
 REMEMBER: Always end your response with either 'DECISION: answer' or 'DECISION: improve' on its own line.
+"""
+    if SPECULATIVE_SQL_CANDIDATES > 1:
+        system_prompt += """
+Several candidate queries are executed in parallel in each iteration. Judge them together:
+if any candidate (or a combination of them) answers the question, decide to answer and point out which
+results are reliable; otherwise base the instructions on the most promising candidate.
+"""
+    if fanout:
+        system_prompt += """
+Each relevant dataset is queried by its own query in parallel in each iteration. Combine the results
+across datasets; if one dataset's query needs improvement, name the dataset in your instructions.
 """
     prompt_template = ChatPromptTemplate.from_messages(
         [
@@ -566,13 +837,15 @@ REMEMBER: Always end your response with either 'DECISION: answer' or 'DECISION:
             ),
         ]
     )
-    result = await llm.ainvoke(
+    result = await cached_ainvoke(
+        llm,
         prompt_template.format_messages(
             question=rewritten_prompt or prompt,
             summary=summary.content,
             last_message=last_message_content,
             results=queries_results_text,
-        )
+        ),
+        "reflect",
     )
     content = result.content if hasattr(result, "content") else str(result)
     if "DECISION: answer" in content:
@@ -603,7 +876,11 @@ async def format_answer_node(state: DataAnalysisState) -> DataAnalysisState:
     print__nodes_debug(f"🎨 {FORMAT_ANSWER_ID}: Enter format_answer_node")
 
     queries_and_results = state.get("queries_and_results", [])
-    top_chunks = state.get("top_chunks", [])
+    top_chunks = list(
+        get_documents(
+            _get_side_store_id(state), state.get("top_chunk_refs", [])
+        ).values()
+    )
     rewritten_prompt = state.get("rewritten_prompt")
     prompt = state["prompt"]
     messages = state.get("messages", [])
@@ -617,30 +894,25 @@ async def format_answer_node(state: DataAnalysisState) -> DataAnalysisState:
 
     llm = get_azure_llm_gpt_4o_mini(temperature=0.1)
 
-    # Prepare SQL queries and results context
-    queries_results_text = "\n\n".join(
-        f"Query {i+1}:\n{query}\nResult {i+1}:\n{result}"
-        for i, (query, result) in enumerate(queries_and_results)
+    # Assemble SQL and PDF context within the token budget
+    answer_context = build_answer_context(
+        rewritten_prompt or prompt, queries_and_results, top_chunks
+    )
+    queries_results_text = answer_context["sql_context"]
+    pdf_chunks_text = answer_context["pdf_context"]
+    context_stats = answer_context["stats"]
+    sql_stats, pdf_stats = context_stats["sql"], context_stats["pdf"]
+    print__nodes_debug(
+        f"✂️ {FORMAT_ANSWER_ID}: SQL context: kept {sql_stats['kept']}/{sql_stats['total']} queries "
+        f"(failed {sql_stats['failed']}, duplicate {sql_stats['duplicate']}, trimmed {sql_stats['trimmed']}, "
+        f"over budget {sql_stats['over_budget']}), {sql_stats['tokens']} tokens"
     )
-
-    # Prepare PDF chunks context separately
-    pdf_chunks_text = ""
     if top_chunks:
         print__nodes_debug(
-            f"📄 {FORMAT_ANSWER_ID}: Including {len(top_chunks)} PDF chunks in context"
+            f"📄 {FORMAT_ANSWER_ID}: PDF context: {pdf_stats['sentences_kept']}/{pdf_stats['sentences']} sentences "
+            f"from {pdf_stats['chunks_used']}/{pdf_stats['chunks']} chunks, {pdf_stats['tokens']} tokens "
+            f"(budget {context_stats['budget']})"
         )
-        chunks_content = []
-        for i, chunk in enumerate(
-            top_chunks[:10], 1
-        ):  # Limit to top 10 chunks to prevent token overflow
-            source = (
-                chunk.metadata.get("source", "unknown") if chunk.metadata else "unknown"
-            )
-            content = (
-                chunk.page_content if hasattr(chunk, "page_content") else str(chunk)
-            )
-            chunks_content.append(f"PDF Source {i} ({source}):\n{content}")
-        pdf_chunks_text = "\n\n".join(chunks_content)
     else:
         print__nodes_debug(
             f"📄 {FORMAT_ANSWER_ID}: No PDF chunks available for context"
@@ -690,7 +962,7 @@ Bad: "The query shows X is 1,234,567"
     formatted_prompt_parts = ["Question: {question}"]
 
     # Add SQL data section if available
-    if queries_and_results:
+    if queries_results_text:
         formatted_prompt_parts.append("SQL Data Context:\n{sql_context}")
 
     # Add PDF data section if available
@@ -698,9 +970,9 @@ Bad: "The query shows X is 1,234,567"
         formatted_prompt_parts.append("PDF Document Context:\n{pdf_context}")
 
     # Add instruction
-    if queries_and_results and pdf_chunks_text:
+    if queries_results_text and pdf_chunks_text:
         instruction = "Please answer the question based on both the SQL queries/results and the PDF document context provided."
-    elif queries_and_results:
+    elif queries_results_text:
         instruction = (
             "Please answer the question based on the SQL queries and results provided."
         )
@@ -717,7 +989,7 @@ Bad: "The query shows X is 1,234,567"
     # Prepare template variables
     template_vars = {"question": rewritten_prompt or prompt}
 
-    if queries_and_results:
+    if queries_results_text:
         template_vars["sql_context"] = queries_results_text
 
     if pdf_chunks_text:
@@ -748,15 +1020,9 @@ Bad: "The query shows X is 1,234,567"
     if not hasattr(result, "id") or not result.id:
         result.id = "format_answer"
 
-    # Add final debug logging
-    print__nodes_debug(
-        f"📄 {FORMAT_ANSWER_ID}: Preserving {len(top_chunks)} PDF chunks for frontend"
-    )
-
     return {
         "messages": [summary, result],
         "final_answer": final_answer_content,
-        "top_chunks": top_chunks,  # Preserve chunks for frontend instead of clearing them
     }
 
 
@@ -794,7 +1060,7 @@ async def submit_final_answer_node(state: DataAnalysisState) -> DataAnalysisStat
         # Preserve other important state
         "messages": state.get("messages", []),
         "queries_and_results": state.get("queries_and_results", []),
-        "top_chunks": state.get("top_chunks", []),
+        "structured_query_results": state.get("structured_query_results", []),
         "top_selection_codes": state.get("top_selection_codes", []),
     }
 
@@ -949,7 +1215,12 @@ async def retrieve_similar_selections_hybrid_search_node(
             f"📄 {HYBRID_SEARCH_NODE_ID}: All selection codes: {[doc.metadata.get('selection') for doc in hybrid_docs]}"
         )
 
-        return {"hybrid_search_results": hybrid_docs}
+        # Keep the Documents in the run store, only their keys go into state
+        return {
+            "hybrid_search_results": put_documents(
+                _get_side_store_id(state), "selections", hybrid_docs
+            )
+        }
     except Exception as e:
         print__nodes_debug(f"❌ {HYBRID_SEARCH_NODE_ID}: Error in hybrid search: {e}")
         import traceback
@@ -969,7 +1240,11 @@ async def rerank_node(state: DataAnalysisState) -> DataAnalysisState:
     print__nodes_debug(f"🔄 {RERANK_NODE_ID}: Enter rerank_node")
 
     query = state.get("rewritten_prompt") or state["prompt"]
-    hybrid_results = state.get("hybrid_search_results", [])
+    hybrid_results = list(
+        get_documents(
+            _get_side_store_id(state), state.get("hybrid_search_results", [])
+        ).values()
+    )
     n_results = state.get("n_results", 20)
 
     print__nodes_debug(f"🔄 {RERANK_NODE_ID}: Query: {query}")
@@ -1104,10 +1379,12 @@ Do not include any meta-commentary or formatting, just the summary text."""
     prompt = ChatPromptTemplate.from_messages(
         [("system", system_prompt), ("human", human_prompt)]
     )
-    result = await llm.ainvoke(
+    result = await cached_ainvoke(
+        llm,
         prompt.format_messages(
             prev_summary=prev_summary, last_message_content=last_message_content
-        )
+        ),
+        "summarize_messages",
     )
     new_summary = result.content.strip()
     print__nodes_debug(f"📝 SUMMARY: Updated summary: {new_summary}")
@@ -1192,7 +1469,12 @@ async def retrieve_similar_chunks_hybrid_search_node(
                 f"📄 {RETRIEVE_CHUNKS_NODE_ID}: #{i}: {source} | Content: {content_preview}..."
             )
 
-        return {"hybrid_search_chunks": hybrid_docs}
+        # Keep the Documents in the run store, only their keys go into state
+        return {
+            "hybrid_search_chunks": put_documents(
+                _get_side_store_id(state), "chunks", hybrid_docs
+            )
+        }
     except Exception as e:
         print__nodes_debug(
             f"❌ {RETRIEVE_CHUNKS_NODE_ID}: Error in PDF hybrid search: {e}"
@@ -1216,7 +1498,11 @@ async def rerank_chunks_node(state: DataAnalysisState) -> DataAnalysisState:
         return {"most_similar_chunks": []}
 
     query = state.get("rewritten_prompt") or state["prompt"]
-    hybrid_results = state.get("hybrid_search_chunks", [])
+    hybrid_documents = get_documents(
+        _get_side_store_id(state), state.get("hybrid_search_chunks", [])
+    )
+    hybrid_results = list(hybrid_documents.values())
+    document_keys = {id(doc): key for key, doc in hybrid_documents.items()}
     n_results = state.get("n_results", 5)
 
     print__nodes_debug(f"🔄 {RERANK_CHUNKS_NODE_ID}: Query: {query}")
@@ -1259,7 +1545,7 @@ async def rerank_chunks_node(state: DataAnalysisState) -> DataAnalysisState:
         most_similar = []
         for i, (doc, res) in enumerate(reranked, 1):
             score = res.relevance_score
-            most_similar.append((doc, score))
+            most_similar.append((document_keys.get(id(doc)), score))
             # Debug: Show detailed rerank results
             if i <= 5:  # Show top 5 results
                 source = doc.metadata.get("source") if doc.metadata else "unknown"
@@ -1290,17 +1576,20 @@ async def relevant_chunks_node(state: DataAnalysisState) -> DataAnalysisState:
     most_similar = state.get("most_similar_chunks", [])
 
     # Select chunks above threshold
-    top_chunks = [
-        doc
-        for doc, score in most_similar
-        if score is not None and score >= SIMILARITY_THRESHOLD
+    top_chunk_refs = [
+        key
+        for key, score in most_similar
+        if key is not None and score is not None and score >= SIMILARITY_THRESHOLD
     ]
     print__nodes_debug(
-        f"📄 {RELEVANT_CHUNKS_NODE_ID}: top_chunks: {len(top_chunks)} chunks passed threshold {SIMILARITY_THRESHOLD}"
+        f"📄 {RELEVANT_CHUNKS_NODE_ID}: top_chunks: {len(top_chunk_refs)} chunks passed threshold {SIMILARITY_THRESHOLD}"
     )
 
     # Debug: Show what passed
-    for i, chunk in enumerate(top_chunks[:5], 1):
+    top_chunks = list(
+        get_documents(_get_side_store_id(state), top_chunk_refs[:5]).values()
+    )
+    for i, chunk in enumerate(top_chunks, 1):
         source = chunk.metadata.get("source") if chunk.metadata else "unknown"
         content_preview = (
             chunk.page_content[:100].replace("\n", " ")
@@ -1312,7 +1601,8 @@ async def relevant_chunks_node(state: DataAnalysisState) -> DataAnalysisState:
         )
 
     return {
-        "top_chunks": top_chunks,
+        "top_chunk_refs": top_chunk_refs,
+        "top_chunks": [],  # Materialized by main() from top_chunk_refs
         "hybrid_search_chunks": [],
         "most_similar_chunks": [],
     }
@@ -75,7 +75,7 @@ Core Components:
    - get_connection_string(): Cloud-optimized PostgreSQL connection strings
    - get_connection_kwargs(): Connection parameters for cloud compatibility
    - modern_psycopg_pool(): Async context manager for connection pooling
-   - get_direct_connection(): Direct database connections for utility operations
+   - get_direct_connection(): Pooled connections (shared application pool) for utility operations
 
 2. Checkpointer Lifecycle:
    - create_async_postgres_saver(): Main checkpointer factory with retry logic
@@ -97,6 +97,10 @@ Core Components:
 
 5. Utility Functions:
    - setup_users_threads_runs_table(): Custom table creation and indexing
+   - setup_thread_messages_table(): Materialized chat history table
+   - setup_user_threads_table(): Per-thread summary behind the thread list
+   - save_thread_message() / get_thread_messages(): Per-interaction chat history
+   - get_thread_runs(): Runs of a thread, to find settled runs missing from thread_messages
    - update_thread_run_sentiment(): User feedback storage
    - get_thread_run_sentiments(): Sentiment data retrieval
 
@@ -275,20 +279,23 @@ from __future__ import annotations
 import asyncio
 import functools
 import gc
+import json
 import os
 import sys
 import threading
 import time
 import traceback
 import uuid
+from collections import deque
 from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Any, Awaitable, Callable, Dict, List, TypeVar
+from typing import Any, Awaitable, Callable, Dict, List, Tuple, TypeVar
 
 import psycopg
 from langgraph.checkpoint.memory import MemorySaver
 from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
-from psycopg_pool import AsyncConnectionPool
+from psycopg.types.json import Jsonb
+from psycopg_pool import AsyncConnectionPool, PoolTimeout
 
 # Windows event loop fix for PostgreSQL compatibility
 if sys.platform == "win32":
@@ -320,6 +327,17 @@ DEFAULT_POOL_TIMEOUT = 20  # Pool connection timeout
 DEFAULT_MAX_IDLE = 300  # 5 minutes idle timeout
 DEFAULT_MAX_LIFETIME = 1800  # 30 minutes max connection lifetime
 
+# Application pool (users_threads_runs, thread_messages, caches), separate from the checkpointer pool
+APP_POOL_MIN_SIZE = int(os.environ.get("APP_POOL_MIN_SIZE", "1"))
+APP_POOL_MAX_SIZE = int(os.environ.get("APP_POOL_MAX_SIZE", "5"))
+APP_POOL_TIMEOUT = int(os.environ.get("APP_POOL_TIMEOUT", "20"))
+APP_POOL_WAIT_WINDOW = 1000  # Recent acquisitions kept for wait-time percentiles
+
+# Deleted threads are reported to syncing clients for this long (see deleted_user_threads)
+THREAD_TOMBSTONE_RETENTION_DAYS = int(
+    os.environ.get("THREAD_TOMBSTONE_RETENTION_DAYS", "30")
+)
+
 # String truncation constants for logging and display
 USER_MESSAGE_PREVIEW_LENGTH = 50  # Length for user message previews in logs
 AI_MESSAGE_PREVIEW_LENGTH = 100  # Length for AI message previews in logs
@@ -331,6 +349,9 @@ MAX_RECENT_CHECKPOINTS = 10  # Limit checkpoints to recent ones only
 MAX_DEBUG_MESSAGES_DETAILED = 6  # Show first N messages in detail
 DEBUG_CHECKPOINT_LOG_INTERVAL = 5  # Log every Nth checkpoint
 
+# JSONB encoder for thread_messages (chunk metadata may hold non-JSON values)
+_dumps_jsonb = functools.partial(json.dumps, ensure_ascii=False, default=str)
+
 # ==============================================================================
 # Global State Management
 ## Single global checkpointer variable and context for proper cleanup
@@ -343,6 +364,20 @@ _CONNECTION_STRING_CACHE = None
 ## Lock for checkpointer initialization to prevent race conditions
 _CHECKPOINTER_INIT_LOCK = None
 
+## Shared pool for application queries (get_direct_connection) and its event loop
+_APP_POOL = None
+_APP_POOL_LOOP = None
+_APP_POOL_STATS = {
+    "acquisitions": 0,
+    "saturated_acquisitions": 0,
+    "timeouts": 0,
+    "in_use": 0,
+    "peak_in_use": 0,
+    "total_wait_ms": 0.0,
+    "max_wait_ms": 0.0,
+}
+_APP_POOL_WAITS = deque(maxlen=APP_POOL_WAIT_WINDOW)
+
 # Type variable for the retry decorator
 T = TypeVar("T")
 
@@ -355,6 +390,12 @@ except NameError:
 
 # Import debug functions from utils
 from api.utils.debug import print__checkpointers_debug
+from my_agent.utils.checkpoint_durability import apply_checkpoint_durability
+from my_agent.utils.checkpoint_serde import (
+    get_checkpoint_serializer,
+    instrument_checkpointer,
+)
+from my_agent.utils.thread_ownership import invalidate_thread, record_thread_run
 
 
 # ==============================================================================
@@ -1053,8 +1094,14 @@ async def create_async_postgres_saver():
             "247 - POOL OPENED: Connection pool opened successfully"
         )
 
-        # Create checkpointer with the pool
-        _GLOBAL_CHECKPOINTER = AsyncPostgresSaver(pool, serde=None)
+        # Create checkpointer with the pool and the compressed (msgpack + zstd) serializer
+        serializer = get_checkpoint_serializer()
+        # Only persist checkpoints at run boundaries when CHECKPOINT_DURABILITY allows it
+        _GLOBAL_CHECKPOINTER = apply_checkpoint_durability(
+            instrument_checkpointer(
+                AsyncPostgresSaver(pool, serde=serializer), serializer
+            )
+        )
         _GLOBAL_CHECKPOINTER_CONTEXT = pool  # Store pool for cleanup
 
         print__checkpointers_debug(
@@ -1097,6 +1144,8 @@ async def create_async_postgres_saver():
         "258 - CUSTOM TABLES: Setting up custom users_threads_runs table"
     )
     await setup_users_threads_runs_table()
+    await setup_thread_messages_table()
+    await setup_user_threads_table()
 
     print__checkpointers_debug(
         "259 - CREATE SAVER SUCCESS: AsyncPostgresSaver creation completed successfully"
@@ -1154,7 +1203,7 @@ async def setup_checkpointer_with_autocommit():
 
         # Create a temporary AsyncPostgresSaver with autocommit=True for setup only
         setup_checkpointer_context = AsyncPostgresSaver.from_conn_string(
-            conn_string=connection_string, serde=None
+            conn_string=connection_string, serde=get_checkpoint_serializer()
         )
 
         async with setup_checkpointer_context as setup_checkpointer:
@@ -1385,16 +1434,399 @@ async def setup_users_threads_runs_table():
         raise
 
 
+async def setup_thread_messages_table():
+    """Create the thread_messages table holding one materialized row per interaction.
+
+    Chat history used to be rebuilt from up to 200 checkpoints per thread
+    (metadata.writes of ``__start__`` and ``submit_final_answer``). The analysis
+    route now writes each finished interaction here, keyed by its run_id, and the
+    chat endpoints read a thread with a single indexed query. Threads created
+    before this table existed are filled by ``python -m api.utils.thread_messages_backfill``.
+
+    Table Schema:
+        - run_id: Run identifier shared with users_threads_runs (primary key)
+        - email / thread_id: Owner and thread, indexed together with created_at
+        - prompt, final_answer: The interaction itself
+        - queries_and_results, structured_query_results, datasets_used, top_chunks:
+          Per-interaction metadata shown by the frontend (JSONB)
+        - error: Why a failed, timed-out or cancelled run has no answer (NULL on success)
+        - created_at: Ordering within the thread
+    """
+    print__checkpointers_debug(
+        "275 - THREAD MESSAGES TABLE: Setting up thread_messages table"
+    )
+    try:
+        async with get_direct_connection() as conn:
+            await conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS thread_messages (
+                    run_id VARCHAR(255) PRIMARY KEY,
+                    email VARCHAR(255) NOT NULL,
+                    thread_id VARCHAR(255) NOT NULL,
+                    prompt TEXT,
+                    final_answer TEXT,
+                    queries_and_results JSONB,
+                    structured_query_results JSONB,
+                    datasets_used JSONB,
+                    top_chunks JSONB,
+                    error TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                );
+            """
+            )
+            # Tables created before failed runs were stored
+            await conn.execute(
+                """
+                ALTER TABLE thread_messages ADD COLUMN IF NOT EXISTS error TEXT;
+            """
+            )
+            await conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_thread_messages_email_thread_created
+                ON thread_messages(email, thread_id, created_at);
+            """
+            )
+        print__checkpointers_debug(
+            "276 - THREAD MESSAGES TABLE SUCCESS: thread_messages table and index created"
+        )
+    except Exception as e:
+        print__checkpointers_debug(
+            f"277 - THREAD MESSAGES TABLE ERROR: Failed to setup thread_messages table: {e}"
+        )
+        raise
+
+
+async def setup_user_threads_table():
+    """Create the user_threads summary table behind the thread list.
+
+    get_user_chat_threads used to aggregate all runs of a user (GROUP BY thread_id
+    with a correlated subquery for the first prompt) and page with OFFSET, so the
+    thread list got slower with every message. user_threads keeps one row per
+    thread, maintained in the same transaction as users_threads_runs by
+    create_thread_run_entry and the thread deletion paths, and is read with
+    keyset pagination on (latest_timestamp, thread_id).
+
+    Table Schema:
+        - email / thread_id: Owner and thread (primary key)
+        - first_prompt: Prompt of the first run, used as the thread title
+        - latest_timestamp: Timestamp of the latest run (list order)
+        - run_count: Number of runs in the thread
+        - updated_at: Last change of the thread (new run, stored answer, sentiment),
+          the watermark of the bulk endpoint's delta sync
+
+    Deleted threads leave a tombstone in deleted_user_threads for
+    THREAD_TOMBSTONE_RETENTION_DAYS so syncing clients learn about them.
+
+    The table is filled from users_threads_runs when it is first created.
+    """
+    print__checkpointers_debug("280 - USER THREADS TABLE: Setting up user_threads table")
+    try:
+        async with get_direct_connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute("SELECT to_regclass('user_threads') IS NULL")
+                created = (await cur.fetchone())[0]
+            await conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS user_threads (
+                    email VARCHAR(255) NOT NULL,
+                    thread_id VARCHAR(255) NOT NULL,
+                    first_prompt TEXT,
+                    latest_timestamp TIMESTAMP NOT NULL,
+                    run_count INTEGER NOT NULL DEFAULT 0,
+                    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (email, thread_id)
+                );
+            """
+            )
+            await conn.execute(
+                """
+                ALTER TABLE user_threads
+                ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP;
+            """
+            )
+            await conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_user_threads_email_latest
+                ON user_threads(email, latest_timestamp DESC, thread_id DESC);
+            """
+            )
+            await conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_user_threads_email_updated
+                ON user_threads(email, updated_at);
+            """
+            )
+            await conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS deleted_user_threads (
+                    email VARCHAR(255) NOT NULL,
+                    thread_id VARCHAR(255) NOT NULL,
+                    deleted_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (email, thread_id)
+                );
+            """
+            )
+            await conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_deleted_user_threads_email_deleted
+                ON deleted_user_threads(email, deleted_at);
+            """
+            )
+            if created:
+                async with conn.cursor() as cur:
+                    await cur.execute(
+                        """
+                        INSERT INTO user_threads
+                            (email, thread_id, first_prompt, latest_timestamp,
+                             run_count, updated_at)
+                        SELECT email, thread_id,
+                               (ARRAY_AGG(prompt ORDER BY timestamp ASC))[1],
+                               MAX(timestamp), COUNT(*), MAX(timestamp)
+                        FROM users_threads_runs
+                        GROUP BY email, thread_id
+                        ON CONFLICT (email, thread_id) DO NOTHING
+                    """
+                    )
+                    print__checkpointers_debug(
+                        f"281 - USER THREADS BACKFILL: Summarized {cur.rowcount} existing threads"
+                    )
+        print__checkpointers_debug(
+            "281 - USER THREADS TABLE SUCCESS: user_threads and deleted_user_threads tables ready"
+        )
+    except Exception as e:
+        print__checkpointers_debug(
+            f"282 - USER THREADS TABLE ERROR: Failed to setup user_threads table: {e}"
+        )
+        raise
+
+
+async def refresh_user_thread(cur, email: str, thread_id: str) -> None:
+    """Recompute the user_threads row of one thread from its runs (removed when none are left)."""
+    await cur.execute(
+        """
+        DELETE FROM user_threads WHERE email = %s AND thread_id = %s
+    """,
+        (email, thread_id),
+    )
+    await cur.execute(
+        """
+        INSERT INTO user_threads
+            (email, thread_id, first_prompt, latest_timestamp, run_count)
+        SELECT email, thread_id,
+               (ARRAY_AGG(prompt ORDER BY timestamp ASC))[1],
+               MAX(timestamp), COUNT(*)
+        FROM users_threads_runs
+        WHERE email = %s AND thread_id = %s
+        GROUP BY email, thread_id
+    """,
+        (email, thread_id),
+    )
+
+
+async def record_thread_deletion(cur, email: str, thread_id: str) -> None:
+    """Drop the thread's summary and leave a tombstone for syncing clients."""
+    await cur.execute(
+        """
+        DELETE FROM user_threads WHERE email = %s AND thread_id = %s
+    """,
+        (email, thread_id),
+    )
+    await cur.execute(
+        """
+        INSERT INTO deleted_user_threads (email, thread_id, deleted_at)
+        VALUES (%s, %s, CURRENT_TIMESTAMP)
+        ON CONFLICT (email, thread_id) DO UPDATE SET deleted_at = EXCLUDED.deleted_at
+    """,
+        (email, thread_id),
+    )
+    await cur.execute(
+        """
+        DELETE FROM deleted_user_threads
+        WHERE email = %s AND deleted_at < CURRENT_TIMESTAMP - make_interval(days => %s)
+    """,
+        (email, THREAD_TOMBSTONE_RETENTION_DAYS),
+    )
+
+
+@retry_on_prepared_statement_error(max_retries=DEFAULT_MAX_RETRIES)
+async def get_user_sync_state(email: str) -> Dict[str, Any]:
+    """Summarize what a syncing client may have missed: latest change and counts.
+
+    ``watermark`` is the latest change of any thread or deletion (the database
+    time when the user has no history); the counts also change the bulk ETag
+    when a change keeps the same timestamp.
+    """
+    async with get_direct_connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                """
+                SELECT MAX(updated_at), COUNT(*), COALESCE(SUM(run_count), 0),
+                       (SELECT MAX(deleted_at) FROM deleted_user_threads WHERE email = %s),
+                       (SELECT COUNT(*) FROM deleted_user_threads WHERE email = %s),
+                       CURRENT_TIMESTAMP::timestamp
+                FROM user_threads
+                WHERE email = %s
+            """,
+                (email, email, email),
+            )
+            (
+                latest_update,
+                thread_count,
+                run_count,
+                latest_deletion,
+                deletion_count,
+                now,
+            ) = await cur.fetchone()
+    changes = [ts for ts in (latest_update, latest_deletion) if ts is not None]
+    return {
+        "watermark": max(changes) if changes else now,
+        "thread_count": thread_count,
+        "run_count": int(run_count),
+        "deletion_count": deletion_count,
+        "now": now,
+    }
+
+
+@retry_on_prepared_statement_error(max_retries=DEFAULT_MAX_RETRIES)
+async def get_user_thread_changes(email: str, since) -> Tuple[List[str], List[str]]:
+    """Return (changed thread_ids, deleted thread_ids) with changes after ``since``."""
+    async with get_direct_connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                """
+                SELECT thread_id FROM user_threads
+                WHERE email = %s AND updated_at > %s
+            """,
+                (email, since),
+            )
+            changed = [row[0] for row in await cur.fetchall()]
+            await cur.execute(
+                """
+                SELECT thread_id FROM deleted_user_threads
+                WHERE email = %s AND deleted_at > %s
+            """,
+                (email, since),
+            )
+            deleted = [row[0] for row in await cur.fetchall() if row[0] not in changed]
+    return changed, deleted
+
+
+async def _reset_app_connection(conn) -> None:
+    """Restore defaults on connections returned to the app pool (deletion sets autocommit)."""
+    if conn.autocommit:
+        await conn.set_autocommit(False)
+
+
+async def get_app_pool() -> AsyncConnectionPool:
+    """Return the shared application pool, opening it on first use in this event loop.
+
+    Connections use the same kwargs as the checkpointer (prepared statements
+    disabled), are checked before being handed out and are recycled after
+    DEFAULT_MAX_LIFETIME, so TLS and authentication happen once per connection
+    instead of once per query.
+    """
+    global _APP_POOL, _APP_POOL_LOOP
+    loop = asyncio.get_running_loop()
+    if _APP_POOL is not None and _APP_POOL_LOOP is loop and not _APP_POOL.closed:
+        return _APP_POOL
+
+    pool = AsyncConnectionPool(
+        conninfo=get_connection_string(),
+        min_size=APP_POOL_MIN_SIZE,
+        max_size=APP_POOL_MAX_SIZE,
+        timeout=APP_POOL_TIMEOUT,
+        max_idle=DEFAULT_MAX_IDLE,
+        max_lifetime=DEFAULT_MAX_LIFETIME,
+        kwargs=get_connection_kwargs(),
+        check=AsyncConnectionPool.check_connection,
+        reset=_reset_app_connection,
+        name="app",
+        open=False,
+    )
+    await pool.open()
+    if _APP_POOL is not None and _APP_POOL_LOOP is loop and not _APP_POOL.closed:
+        # Another task opened the pool while this one was connecting
+        await pool.close()
+        return _APP_POOL
+    _APP_POOL, _APP_POOL_LOOP = pool, loop
+    print__checkpointers_debug(
+        f"278 - APP POOL OPENED: Application pool opened (min={APP_POOL_MIN_SIZE}, max={APP_POOL_MAX_SIZE})"
+    )
+    return pool
+
+
+async def close_app_pool() -> None:
+    global _APP_POOL, _APP_POOL_LOOP
+    pool, _APP_POOL, _APP_POOL_LOOP = _APP_POOL, None, None
+    if pool is not None and not pool.closed:
+        await pool.close()
+        print__checkpointers_debug("279 - APP POOL CLOSED: Application pool closed")
+
+
 @asynccontextmanager
 async def get_direct_connection():
-    """Get a direct database connection for users_threads_runs operations."""
+    """Get a pooled database connection for application queries.
+
+    Commits when the block exits normally and rolls back on error, like a
+    directly opened connection used as a context manager.
+    """
+    pool = await get_app_pool()
+    saturated = _APP_POOL_STATS["in_use"] >= APP_POOL_MAX_SIZE
+    acquired = False
+    start = time.perf_counter()
+    try:
+        async with pool.connection() as conn:
+            acquired = True
+            _record_app_pool_acquisition(
+                (time.perf_counter() - start) * 1000, saturated
+            )
+            try:
+                yield conn
+            finally:
+                _APP_POOL_STATS["in_use"] -= 1
+    except PoolTimeout:
+        if not acquired:
+            _APP_POOL_STATS["timeouts"] += 1
+        raise
 
-    connection_string = get_connection_string()
-    connection_kwargs = get_connection_kwargs()
-    async with await psycopg.AsyncConnection.connect(
-        connection_string, **connection_kwargs
-    ) as conn:
-        yield conn
+
+def _record_app_pool_acquisition(wait_ms: float, saturated: bool) -> None:
+    _APP_POOL_STATS["acquisitions"] += 1
+    _APP_POOL_STATS["saturated_acquisitions"] += int(saturated)
+    _APP_POOL_STATS["total_wait_ms"] += wait_ms
+    _APP_POOL_STATS["max_wait_ms"] = max(_APP_POOL_STATS["max_wait_ms"], wait_ms)
+    _APP_POOL_WAITS.append(wait_ms)
+    _APP_POOL_STATS["in_use"] += 1
+    _APP_POOL_STATS["peak_in_use"] = max(
+        _APP_POOL_STATS["peak_in_use"], _APP_POOL_STATS["in_use"]
+    )
+
+
+def get_app_pool_stats() -> Dict[str, Any]:
+    """Wait time and saturation of the application pool (for /health/database)."""
+    waits = sorted(_APP_POOL_WAITS)
+    stats = {
+        **_APP_POOL_STATS,
+        "max_size": APP_POOL_MAX_SIZE,
+        "open": _APP_POOL is not None and not _APP_POOL.closed,
+        "saturation": round(_APP_POOL_STATS["in_use"] / APP_POOL_MAX_SIZE, 3),
+        "avg_wait_ms": round(
+            _APP_POOL_STATS["total_wait_ms"] / max(1, _APP_POOL_STATS["acquisitions"]),
+            3,
+        ),
+        "p50_wait_ms": round(waits[len(waits) // 2], 3) if waits else None,
+        "p95_wait_ms": (
+            round(waits[min(len(waits) - 1, int(len(waits) * 0.95))], 3)
+            if waits
+            else None
+        ),
+    }
+    stats["total_wait_ms"] = round(stats["total_wait_ms"], 3)
+    stats["max_wait_ms"] = round(stats["max_wait_ms"], 3)
+    if stats["open"]:
+        # psycopg_pool counters: pool_size, pool_available, requests_waiting, ...
+        stats["pool"] = _APP_POOL.get_stats()
+    return stats
 
 
 # HELPER FUNCTIONS FOR COMPATIBILITY - USING DIRECT CONNECTIONS
@@ -1421,6 +1853,9 @@ async def create_thread_run_entry(
             async with conn.cursor() as cur:
                 await cur.execute(
                     """
+                    WITH previous AS (
+                        SELECT email, thread_id FROM users_threads_runs WHERE run_id = %s
+                    )
                     INSERT INTO users_threads_runs (email, thread_id, run_id, prompt)
                     VALUES (%s, %s, %s, %s)
                     ON CONFLICT (run_id) DO UPDATE SET
@@ -1428,9 +1863,43 @@ async def create_thread_run_entry(
                         thread_id = EXCLUDED.thread_id,
                         prompt = EXCLUDED.prompt,
                         timestamp = CURRENT_TIMESTAMP
+                    RETURNING timestamp, (SELECT email FROM previous),
+                        (SELECT thread_id FROM previous)
+                """,
+                    (run_id, email, thread_id, run_id, prompt),
+                )
+                timestamp, previous_email, previous_thread_id = await cur.fetchone()
+
+                # Keep the thread summary in the same transaction
+                if previous_thread_id is None:
+                    await cur.execute(
+                        """
+                        INSERT INTO user_threads
+                            (email, thread_id, first_prompt, latest_timestamp, run_count)
+                        VALUES (%s, %s, %s, %s, 1)
+                        ON CONFLICT (email, thread_id) DO UPDATE SET
+                            latest_timestamp = GREATEST(
+                                user_threads.latest_timestamp, EXCLUDED.latest_timestamp
+                            ),
+                            run_count = user_threads.run_count + 1,
+                            updated_at = CURRENT_TIMESTAMP
+                    """,
+                        (email, thread_id, prompt, timestamp),
+                    )
+                else:
+                    # Re-used run_id: recompute the summaries it affects
+                    await refresh_user_thread(cur, email, thread_id)
+                    if (previous_email, previous_thread_id) != (email, thread_id):
+                        await refresh_user_thread(
+                            cur, previous_email, previous_thread_id
+                        )
+                await cur.execute(
+                    """
+                    DELETE FROM deleted_user_threads WHERE email = %s AND thread_id = %s
                 """,
-                    (email, thread_id, run_id, prompt),
+                    (email, thread_id),
                 )
+        record_thread_run(email, thread_id, run_id)
 
         print__checkpointers_debug(
             f"289 - CREATE THREAD ENTRY SUCCESS: Thread run entry created successfully: {run_id}"
@@ -1451,35 +1920,40 @@ async def create_thread_run_entry(
 
 @retry_on_prepared_statement_error(max_retries=DEFAULT_MAX_RETRIES)
 async def get_user_chat_threads(
-    email: str, limit: int = None, offset: int = 0
+    email: str, limit: int = None, offset: int = 0, before: Tuple[Any, str] = None
 ) -> List[Dict[str, Any]]:
-    """Get chat threads for a user with optional pagination and retry logic for prepared statement errors."""
+    """Get chat threads for a user, newest first, from the user_threads summary.
+
+    Pages are either keyset-based (``before`` = (latest_timestamp, thread_id) of the
+    last thread of the previous page; constant cost) or OFFSET-based for older
+    clients that still page by number.
+    """
     try:
         print__checkpointers_debug(
-            f"Getting chat threads for user: {email} (limit: {limit}, offset: {offset})"
+            f"Getting chat threads for user: {email} (limit: {limit}, offset: {offset}, before: {before})"
         )
 
         async with get_direct_connection() as conn:
             async with conn.cursor() as cur:
                 base_query = """
-                    SELECT 
-                        thread_id,
-                        MAX(timestamp) as latest_timestamp,
-                        COUNT(*) as run_count,
-                        (SELECT prompt FROM users_threads_runs utr2 
-                         WHERE utr2.email = %s AND utr2.thread_id = utr.thread_id 
-                         ORDER BY timestamp ASC LIMIT 1) as first_prompt
-                    FROM users_threads_runs utr
+                    SELECT thread_id, latest_timestamp, run_count, first_prompt
+                    FROM user_threads
                     WHERE email = %s
-                    GROUP BY thread_id
-                    ORDER BY latest_timestamp DESC
                 """
+                params = [email]
+
+                if before is not None:
+                    base_query += " AND (latest_timestamp, thread_id) < (%s, %s)"
+                    params.extend(before)
 
-                params = [email, email]
+                base_query += " ORDER BY latest_timestamp DESC, thread_id DESC"
 
                 if limit is not None:
-                    base_query += " LIMIT %s OFFSET %s"
-                    params.extend([limit, offset])
+                    base_query += " LIMIT %s"
+                    params.append(limit)
+                    if before is None and offset:
+                        base_query += " OFFSET %s"
+                        params.append(offset)
 
                 await cur.execute(base_query, params)
                 rows = await cur.fetchall()
@@ -1529,8 +2003,8 @@ async def get_user_chat_threads_count(email: str) -> int:
             async with conn.cursor() as cur:
                 await cur.execute(
                     """
-                    SELECT COUNT(DISTINCT thread_id) as total_threads
-                    FROM users_threads_runs
+                    SELECT COUNT(*) as total_threads
+                    FROM user_threads
                     WHERE email = %s
                 """,
                     (email,),
@@ -1566,6 +2040,15 @@ async def update_thread_run_sentiment(run_id: str, sentiment: bool) -> bool:
                     (sentiment, run_id),
                 )
                 updated = cur.rowcount
+                await cur.execute(
+                    """
+                    UPDATE user_threads ut SET updated_at = CURRENT_TIMESTAMP
+                    FROM users_threads_runs utr
+                    WHERE utr.run_id = %s
+                      AND ut.email = utr.email AND ut.thread_id = utr.thread_id
+                """,
+                    (run_id,),
+                )
         print__checkpointers_debug(f"Updated sentiment for {updated} entries")
         return int(updated) > 0
     except Exception as e:
@@ -1606,29 +2089,6 @@ async def delete_user_thread_entries(email: str, thread_id: str) -> Dict[str, An
         )
 
         async with get_direct_connection() as conn:
-            # First, count the entries to be deleted
-            async with conn.cursor() as cur:
-                await cur.execute(
-                    """
-                    SELECT COUNT(*) FROM users_threads_runs 
-                    WHERE email = %s AND thread_id = %s
-                """,
-                    (email, thread_id),
-                )
-                result = await cur.fetchone()
-                entries_to_delete = result[0] if result else 0
-
-            print__checkpointers_debug(f"Found {entries_to_delete} entries to delete")
-
-            if entries_to_delete == 0:
-                return {
-                    "deleted_count": 0,
-                    "message": "No entries found to delete",
-                    "thread_id": thread_id,
-                    "user_email": email,
-                }
-
-            # Delete the entries
             async with conn.cursor() as cur:
                 await cur.execute(
                     """
@@ -1638,18 +2098,28 @@ async def delete_user_thread_entries(email: str, thread_id: str) -> Dict[str, An
                     (email, thread_id),
                 )
                 deleted_count = cur.rowcount
+                await record_thread_deletion(cur, email, thread_id)
+        invalidate_thread(email, thread_id)
 
-            print__checkpointers_debug(
-                f"Deleted {deleted_count} entries for user {email}, thread {thread_id}"
-            )
+        print__checkpointers_debug(
+            f"Deleted {deleted_count} entries for user {email}, thread {thread_id}"
+        )
 
+        if deleted_count == 0:
             return {
-                "deleted_count": deleted_count,
-                "message": f"Successfully deleted {deleted_count} entries",
+                "deleted_count": 0,
+                "message": "No entries found to delete",
                 "thread_id": thread_id,
                 "user_email": email,
             }
 
+        return {
+            "deleted_count": deleted_count,
+            "message": f"Successfully deleted {deleted_count} entries",
+            "thread_id": thread_id,
+            "user_email": email,
+        }
+
     except Exception as e:
         print__checkpointers_debug(
             f"Failed to delete thread entries for user {email}, thread {thread_id}: {e}"
@@ -1658,6 +2128,150 @@ async def delete_user_thread_entries(email: str, thread_id: str) -> Dict[str, An
         raise
 
 
+@retry_on_prepared_statement_error(max_retries=DEFAULT_MAX_RETRIES)
+async def save_thread_message(
+    email: str,
+    thread_id: str,
+    run_id: str,
+    prompt: str,
+    final_answer: str = None,
+    queries_and_results: list = None,
+    structured_query_results: list = None,
+    datasets_used: list = None,
+    top_chunks: list = None,
+    error: str = None,
+    created_at=None,
+    overwrite: bool = True,
+) -> bool:
+    """Store one interaction of a thread in thread_messages (upsert by run_id).
+
+    Runs that ended without an answer are stored with ``error`` set. With
+    ``overwrite=False`` an existing row is kept (used by the backfill and for
+    failed runs so they never replace rows written at save time).
+    """
+    conflict_action = (
+        """DO UPDATE SET
+            prompt = EXCLUDED.prompt,
+            final_answer = EXCLUDED.final_answer,
+            queries_and_results = EXCLUDED.queries_and_results,
+            structured_query_results = EXCLUDED.structured_query_results,
+            datasets_used = EXCLUDED.datasets_used,
+            top_chunks = EXCLUDED.top_chunks,
+            error = EXCLUDED.error"""
+        if overwrite
+        else "DO NOTHING"
+    )
+    try:
+        async with get_direct_connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
+                    f"""
+                    INSERT INTO thread_messages (
+                        run_id, email, thread_id, prompt, final_answer,
+                        queries_and_results, structured_query_results,
+                        datasets_used, top_chunks, error, created_at
+                    )
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
+                            COALESCE(%s, CURRENT_TIMESTAMP))
+                    ON CONFLICT (run_id) {conflict_action}
+                """,
+                    (
+                        run_id,
+                        email,
+                        thread_id,
+                        prompt,
+                        final_answer,
+                        Jsonb(queries_and_results or [], dumps=_dumps_jsonb),
+                        Jsonb(structured_query_results or [], dumps=_dumps_jsonb),
+                        Jsonb(datasets_used or [], dumps=_dumps_jsonb),
+                        Jsonb(top_chunks or [], dumps=_dumps_jsonb),
+                        error,
+                        created_at,
+                    ),
+                )
+                stored = cur.rowcount
+                if stored:
+                    await cur.execute(
+                        """
+                        UPDATE user_threads SET updated_at = CURRENT_TIMESTAMP
+                        WHERE email = %s AND thread_id = %s
+                    """,
+                        (email, thread_id),
+                    )
+        print__checkpointers_debug(
+            f"Stored thread message for run {run_id} (thread {thread_id}, rows: {stored})"
+        )
+        return stored > 0
+    except Exception as e:
+        print__checkpointers_debug(
+            f"Failed to store thread message for run {run_id}: {e}"
+        )
+        return False
+
+
+@retry_on_prepared_statement_error(max_retries=DEFAULT_MAX_RETRIES)
+async def get_thread_messages(email: str, thread_id: str) -> List[Dict[str, Any]]:
+    """Get the stored interactions of a user's thread in chronological order."""
+    try:
+        async with get_direct_connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
+                    """
+                    SELECT run_id, prompt, final_answer, queries_and_results,
+                           structured_query_results, datasets_used, top_chunks,
+                           error, created_at
+                    FROM thread_messages
+                    WHERE email = %s AND thread_id = %s
+                    ORDER BY created_at ASC
+                """,
+                    (email, thread_id),
+                )
+                rows = await cur.fetchall()
+        return [
+            {
+                "run_id": row[0],
+                "prompt": row[1],
+                "final_answer": row[2],
+                "queries_and_results": row[3],
+                "structured_query_results": row[4],
+                "datasets_used": row[5],
+                "top_chunks": row[6],
+                "error": row[7],
+                "created_at": row[8],
+            }
+            for row in rows
+        ]
+    except Exception as e:
+        print__checkpointers_debug(
+            f"Failed to get thread messages for thread {thread_id}: {e}"
+        )
+        return []
+
+
+@retry_on_prepared_statement_error(max_retries=DEFAULT_MAX_RETRIES)
+async def get_thread_runs(
+    email: str, thread_id: str, settled_after_seconds: int = 0
+) -> List[Tuple[str, str, Any, bool]]:
+    """Get the (run_id, prompt, timestamp, settled) rows of a user's thread in chronological order.
+
+    A run is settled once it is older than ``settled_after_seconds``: it can no
+    longer be in flight, so it either finished or will never finish.
+    """
+    async with get_direct_connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                """
+                SELECT run_id, prompt, timestamp,
+                       timestamp < CURRENT_TIMESTAMP - make_interval(secs => %s)
+                FROM users_threads_runs
+                WHERE email = %s AND thread_id = %s
+                ORDER BY timestamp ASC
+            """,
+                (settled_after_seconds, email, thread_id),
+            )
+            return await cur.fetchall()
+
+
 # CHECKPOINTER MANAGEMENT
 # ==============================================================================
 
@@ -1742,6 +2356,8 @@ async def cleanup_checkpointer():
             "ℹ️ CHECKPOINTER CLEANUP: No checkpointer to clean up"
         )
 
+    await close_app_pool()
+
 
 async def get_healthy_checkpointer():
     """Get a healthy checkpointer instance, initializing if needed with thread-safe initialization."""
@@ -0,0 +1,117 @@
+"""Compact encoding of SQL results for prompts and state.
+
+Query results used to be stored as ``str(list_of_tuples)``, which spends tokens
+on quotes and parentheses and drops the column names. Results are now rendered
+as a header line of column names followed by tab-separated rows, with numbers
+formatted consistently (plain digits, no thousands separators, no exponents),
+and trimmed to a token budget. The structured form (columns, rows, status) is
+kept alongside so the API never has to parse the text back.
+
+Configuration (environment variables):
+    - SQL_RESULT_TOKEN_BUDGET: Maximum tokens of one rendered result (default 2000)
+    - SQL_RESULT_FLOAT_DECIMALS: Maximum decimals for floating point values (default 4)
+"""
+
+import os
+from typing import Any, Dict, Optional, Sequence
+
+from .token_utils import count_tokens
+
+SQL_RESULT_TOKEN_BUDGET = int(os.environ.get("SQL_RESULT_TOKEN_BUDGET", "2000"))
+SQL_RESULT_FLOAT_DECIMALS = int(os.environ.get("SQL_RESULT_FLOAT_DECIMALS", "4"))
+
+NO_RESULTS_TEXT = "No results found"
+
+
+def format_cell(value: Any) -> str:
+    """Render one value: integers as digits, floats without exponent or trailing zeros."""
+    if value is None:
+        return "NULL"
+    if isinstance(value, bool):
+        return str(int(value))
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        if value.is_integer():
+            return str(int(value))
+        text = f"{value:.{SQL_RESULT_FLOAT_DECIMALS}f}".rstrip("0").rstrip(".")
+        return "0" if text in ("-0", "") else text
+    if isinstance(value, bytes):
+        return f"<{len(value)} bytes>"
+    # Keep the row/column structure intact
+    return str(value).replace("\t", " ").replace("\r", " ").replace("\n", " ")
+
+
+def _render(columns: Sequence[str], rows: Sequence[Sequence[Any]]) -> str:
+    lines = ["\t".join(format_cell(c) for c in columns)] if columns else []
+    lines.extend("\t".join(format_cell(v) for v in row) for row in rows)
+    return "\n".join(lines)
+
+
+def encode_result_tsv(
+    columns: Sequence[str],
+    rows: Sequence[Sequence[Any]],
+    token_budget: Optional[int] = None,
+    note: Optional[str] = None,
+) -> str:
+    """Render columns and rows as header + TSV, trimming rows to fit the token budget.
+
+    Args:
+        columns: Column names from ``cursor.description``
+        rows: Result rows
+        token_budget: Maximum tokens (defaults to SQL_RESULT_TOKEN_BUDGET)
+        note: Optional trailing line (e.g. truncation notice from the cost guard)
+
+    Returns:
+        str: Rendered result
+    """
+    if not rows:
+        text = NO_RESULTS_TEXT
+        return f"{text}\n{note}" if note else text
+
+    budget = token_budget if token_budget is not None else SQL_RESULT_TOKEN_BUDGET
+    text = _render(columns, rows)
+    shown = len(rows)
+
+    if count_tokens(text) > budget:
+        # Binary search the largest row prefix that fits
+        low, high = 0, len(rows)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if count_tokens(_render(columns, rows[:middle])) <= budget:
+                low = middle
+            else:
+                high = middle - 1
+        shown = low
+        text = _render(columns, rows[:shown])
+
+    trailer = []
+    if shown < len(rows):
+        trailer.append(f"RESULT TRUNCATED: showing {shown} of {len(rows)} rows (token budget)")
+    if note:
+        trailer.append(note)
+    return "\n".join([text] + trailer) if trailer else text
+
+
+def build_structured_result(
+    query: str,
+    columns: Sequence[str],
+    rows: Sequence[Sequence[Any]],
+    status: str,
+    reason: Optional[str] = None,
+    elapsed_ms: Optional[float] = None,
+) -> Dict[str, Any]:
+    """JSON-serializable form of a query result kept in state and returned by the API."""
+    return {
+        "query": query,
+        "columns": list(columns),
+        "rows": [
+            [v if isinstance(v, (int, float, str)) or v is None else format_cell(v) for v in row]
+            for row in rows
+        ],
+        "row_count": len(rows),
+        "status": status,
+        "reason": reason,
+        "elapsed_ms": elapsed_ms,
+    }
+
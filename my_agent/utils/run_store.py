@@ -0,0 +1,104 @@
+"""Run-scoped side-store for bulky intermediate retrieval data.
+
+Hybrid search and rerank nodes produce full ``Document`` objects (20 selection
+descriptions, 10+ PDF chunks). Kept in ``DataAnalysisState`` they are
+serialized by AsyncPostgresSaver into the checkpoints of every superstep of the
+run. Instead, the documents live in this in-process store for the duration of
+one graph run and the state only carries their keys (plus selection codes and
+rerank scores). The final PDF chunks are resolved by main() from the store
+after the graph finishes, so they never enter a checkpoint.
+
+Each run gets its own store ID (``side_store_id`` in state), created and
+released by main(); graph runs started elsewhere get one from
+rewrite_query_node. Entries of runs that never released their store (crashes,
+cancelled requests, runs outside main()) expire after RUN_STORE_TTL_SECONDS.
+
+Configuration (environment variables):
+    - RUN_STORE_TTL_SECONDS: Lifetime of an unreleased run store (default 900)
+"""
+
+import os
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Sequence
+
+# Import debug functions from utils
+from api.utils.debug import print__nodes_debug
+
+RUN_STORE_TTL_SECONDS = int(os.environ.get("RUN_STORE_TTL_SECONDS", "900"))
+RUN_STORE_ID = 31  # Static ID for run store debug messages
+
+_STORES: Dict[str, Dict[str, Any]] = {}
+_LOCK = threading.Lock()
+_STATS = {
+    "runs": 0,
+    "documents_stored": 0,
+    "lookups": 0,
+    "misses": 0,
+    "released": 0,
+    "expired": 0,
+}
+
+
+def new_store_id() -> str:
+    return str(uuid.uuid4())
+
+
+def _expire_locked(now: float) -> None:
+    expired = [
+        store_id
+        for store_id, store in _STORES.items()
+        if now - store["created"] > RUN_STORE_TTL_SECONDS
+    ]
+    for store_id in expired:
+        del _STORES[store_id]
+    _STATS["expired"] += len(expired)
+
+
+def put_documents(store_id: str, kind: str, documents: Sequence[Any]) -> List[str]:
+    """Store documents for a run and return their keys ("<kind>:<index>")."""
+    keys = [f"{kind}:{index}" for index in range(len(documents))]
+    now = time.monotonic()
+    with _LOCK:
+        _expire_locked(now)
+        store = _STORES.get(store_id)
+        if store is None:
+            store = _STORES[store_id] = {"created": now, "items": {}}
+            _STATS["runs"] += 1
+        # A node re-running within the run replaces its previous documents
+        for key in [key for key in store["items"] if key.startswith(f"{kind}:")]:
+            del store["items"][key]
+        store["items"].update(zip(keys, documents))
+        _STATS["documents_stored"] += len(documents)
+    return keys
+
+
+def get_documents(store_id: str, keys: Sequence[str]) -> Dict[str, Any]:
+    """Resolve keys to documents in key order; keys no longer in the store are skipped."""
+    with _LOCK:
+        items = (_STORES.get(store_id) or {}).get("items", {})
+        documents = {key: items[key] for key in keys if key in items}
+        _STATS["lookups"] += len(keys)
+        _STATS["misses"] += len(keys) - len(documents)
+    if len(documents) < len(keys):
+        print__nodes_debug(
+            f"⚠️ {RUN_STORE_ID}: {len(keys) - len(documents)} of {len(keys)} documents missing from run store {store_id}"
+        )
+    return documents
+
+
+def release_store(store_id: str) -> None:
+    with _LOCK:
+        if _STORES.pop(store_id, None) is not None:
+            _STATS["released"] += 1
+
+
+def get_run_store_stats() -> Dict[str, Any]:
+    with _LOCK:
+        _expire_locked(time.monotonic())
+        return {
+            **_STATS,
+            "active_runs": len(_STORES),
+            "active_documents": sum(len(s["items"]) for s in _STORES.values()),
+        }
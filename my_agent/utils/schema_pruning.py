@@ -0,0 +1,171 @@
+"""Question-aware pruning of dataset schemas before SQL generation.
+
+Selection schemas are stored as JSON-stat documents (``selection_schema_json``)
+whose dimensions carry the full list of distinct values. Pasting every value of
+every dimension into the query prompt is the largest part of the gpt-4o input,
+so this module keeps every column name but only the dimension values that match
+the rewritten question lexically (accent-insensitive, with prefix matching to
+cope with Czech inflection), plus total markers such as CELKEM.
+
+Small dimensions are kept in full because they are cheap. Time dimensions are
+kept in full unless the question names specific periods (e.g. a year), since the
+model often needs the complete list to build trend queries.
+
+Configuration (environment variables):
+    - SCHEMA_PRUNING_ENABLED: Master switch (default "1")
+    - SCHEMA_PRUNE_KEEP_ALL_MAX: Dimensions with at most this many values are kept whole (default 20)
+    - SCHEMA_PRUNE_FALLBACK_VALUES: Values kept when nothing in a large dimension matches (default 10)
+"""
+
+import json
+import os
+import re
+import unicodedata
+from typing import Any, Dict, List, Optional, Set
+
+SCHEMA_PRUNING_ENABLED = os.environ.get("SCHEMA_PRUNING_ENABLED", "1") == "1"
+SCHEMA_PRUNE_KEEP_ALL_MAX = int(os.environ.get("SCHEMA_PRUNE_KEEP_ALL_MAX", "20"))
+SCHEMA_PRUNE_FALLBACK_VALUES = int(
+    os.environ.get("SCHEMA_PRUNE_FALLBACK_VALUES", "10")
+)
+
+# Minimum shared prefix for two words to count as the same term
+MIN_PREFIX_MATCH = 5
+
+# Values that mark aggregate rows - always kept so the model can exclude them
+TOTAL_MARKERS = ("celkem", "total", "uhrn")
+
+# Frequent Czech/English words that carry no filtering information
+STOPWORDS = {
+    "the", "and", "for", "with", "what", "which", "how", "many", "much", "from",
+    "that", "this", "are", "was", "were", "have", "has", "all", "per", "between",
+    "jaky", "jaka", "jake", "kolik", "ktery", "ktera", "ktere", "jsou", "bylo",
+    "byla", "byl", "pro", "pri", "nebo", "mezi", "podle", "jak", "kde", "roce",
+}
+
+
+def fold_text(text: str) -> str:
+    """Lowercase and strip diacritics so 'Praha' matches 'praha' and 'ženy' matches 'zeny'."""
+    normalized = unicodedata.normalize("NFKD", str(text))
+    return "".join(ch for ch in normalized if not unicodedata.combining(ch)).lower()
+
+
+def _tokenize(text: str) -> List[str]:
+    return re.findall(r"\w+", fold_text(text))
+
+
+def extract_question_terms(question: str) -> Set[str]:
+    """Return folded, informative words from the question (numbers such as years included)."""
+    return {
+        word
+        for word in _tokenize(question)
+        if (len(word) >= 3 or word.isdigit()) and word not in STOPWORDS
+    }
+
+
+def _words_match(word: str, term: str) -> bool:
+    if word == term:
+        return True
+    if word.isdigit() or term.isdigit():
+        return False
+    prefix_len = min(MIN_PREFIX_MATCH, len(word), len(term))
+    return prefix_len >= 3 and word[:prefix_len] == term[:prefix_len]
+
+
+def value_matches_question(value: str, terms: Set[str]) -> bool:
+    """True if any word of the dimension value matches any question term."""
+    return any(_words_match(word, term) for word in _tokenize(value) for term in terms)
+
+
+def count_matching_terms(text: str, terms: Set[str]) -> int:
+    """Number of distinct question terms matched by some word of the text."""
+    words = set(_tokenize(text))
+    return sum(1 for term in terms if any(_words_match(word, term) for word in words))
+
+
+def is_total_value(value: str) -> bool:
+    folded = fold_text(value)
+    return any(marker in folded for marker in TOTAL_MARKERS)
+
+
+def prune_schema_json(
+    schema: Dict[str, Any], question: str
+) -> Optional[Dict[str, Any]]:
+    """Build a compact schema keeping all columns and only question-relevant values.
+
+    Args:
+        schema: Parsed JSON-stat schema of one selection
+        question: Rewritten user question
+
+    Returns:
+        Dict with a "dimensions" mapping of column name to kept values, or None if
+        the schema does not have the expected JSON-stat layout.
+    """
+    dimensions = schema.get("dimension")
+    if not isinstance(dimensions, dict):
+        return None
+
+    terms = extract_question_terms(question)
+    time_dimension_ids = set((schema.get("role") or {}).get("time", []))
+    pruned_dimensions = {}
+
+    for dimension_id, dimension in dimensions.items():
+        column_name = dimension.get("label", dimension_id)
+        values = list(((dimension.get("category") or {}).get("label") or {}).values())
+
+        if len(values) <= SCHEMA_PRUNE_KEEP_ALL_MAX:
+            kept = values
+        elif dimension_id in time_dimension_ids:
+            # Keep the periods the question names (e.g. a year); otherwise all of them
+            matched = [value for value in values if value_matches_question(value, terms)]
+            kept = matched or values
+        else:
+            kept = [
+                value
+                for value in values
+                if is_total_value(value) or value_matches_question(value, terms)
+            ]
+            if not any(not is_total_value(value) for value in kept):
+                # Nothing matched - keep a sample so the model still sees the value format
+                sample = [v for v in values[:SCHEMA_PRUNE_FALLBACK_VALUES] if v not in kept]
+                kept = kept + sample
+
+        entry = {"values": kept}
+        omitted = len(values) - len(kept)
+        if omitted > 0:
+            entry["omitted_values_count"] = omitted
+        pruned_dimensions[column_name] = entry
+
+    return {"dimensions": pruned_dimensions, "value_column": "value"}
+
+
+def build_pruned_schema_text(
+    selection_code: str,
+    schema_json: Optional[str],
+    question: str,
+    short_description: Optional[str] = None,
+) -> Optional[str]:
+    """Render the pruned schema of one selection for the query prompt.
+
+    Returns None when the schema JSON is missing or malformed so the caller can
+    fall back to the full extended description.
+    """
+    if not schema_json:
+        return None
+    try:
+        pruned = prune_schema_json(json.loads(schema_json), question)
+    except (TypeError, ValueError):
+        return None
+    if pruned is None:
+        return None
+
+    parts = [f"Dataset: {selection_code}."]
+    if short_description:
+        parts.append(short_description)
+    if any("omitted_values_count" in d for d in pruned["dimensions"].values()):
+        parts.append(
+            "Note: dimension values unrelated to the question were omitted "
+            "(see omitted_values_count); use LIKE filters or PRAGMA/SELECT DISTINCT if you need others."
+        )
+    parts.append(json.dumps(pruned, ensure_ascii=False))
+    return "\n".join(parts)
@@ -0,0 +1,167 @@
+"""Speculative parallel SQL candidates and per-dataset fan-out for query_node.
+
+The query -> reflect -> query loop is serial: every "improve" decision costs
+another query generation and reflection round-trip. With
+SPECULATIVE_SQL_CANDIDATES > 1, query_node generates that many candidate
+queries concurrently, each steered by a different strategy hint, executes the
+distinct ones in parallel through the sqlite_query tool and hands all results
+to a single reflection pass. Candidate 0 always uses the unmodified prompt, so
+it is identical to (and shares the LLM cache with) the serial query.
+
+With QUERY_FANOUT_ENABLED=1 and several relevant selections, query_node runs
+one branch per selection instead, each prompted with only that dataset's
+schema and value matches (combined with speculative candidates when both are
+on). Branch results are merged into queries_and_results before reflection.
+
+One iteration never produces more queries than queries_and_results keeps
+(MAX_QUERIES_LIMIT_FOR_REFLECT): candidates are capped at that limit and
+fan-out queries only the most relevant selections that fit next to them.
+
+Run telemetry (reflection iterations and graph wall-clock per question) is kept per mode so the serial, speculative and fan-out loops can be compared
+on /health/agent-caches.
+
+Configuration (environment variables):
+    - SPECULATIVE_SQL_CANDIDATES: Candidate queries per iteration (default 1 = serial loop)
+    - QUERY_FANOUT_ENABLED: One query branch per relevant selection (default "0")
+    - MAX_QUERIES_LIMIT_FOR_REFLECT: Queries kept in state, caps one batch (default 10)
+    - SPECULATIVE_SQL_TELEMETRY_WINDOW: Runs kept per mode for telemetry (default 500)
+"""
+
+import os
+import statistics
+import threading
+from collections import defaultdict, deque
+from typing import Any, Dict, List
+
+from .sql_result_cache import normalize_sql
+
+MAX_QUERIES_LIMIT_FOR_REFLECT = int(
+    os.environ.get("MAX_QUERIES_LIMIT_FOR_REFLECT", "10")
+)
+SPECULATIVE_SQL_CANDIDATES = max(
+    1,
+    min(
+        int(os.environ.get("SPECULATIVE_SQL_CANDIDATES", "1")),
+        MAX_QUERIES_LIMIT_FOR_REFLECT,
+    ),
+)
+# Fan-out branches that fit into queries_and_results next to their candidates
+MAX_FANOUT_BRANCHES = max(
+    1, MAX_QUERIES_LIMIT_FOR_REFLECT // SPECULATIVE_SQL_CANDIDATES
+)
+QUERY_FANOUT_ENABLED = os.environ.get("QUERY_FANOUT_ENABLED", "0") == "1"
+SPECULATIVE_SQL_TELEMETRY_WINDOW = int(
+    os.environ.get("SPECULATIVE_SQL_TELEMETRY_WINDOW", "500")
+)
+
+MODE_SERIAL = "serial"
+MODE_SPECULATIVE = "speculative"
+MODE_FANOUT = "fanout"
+
+# Strategy hints for candidates 1..N-1 (candidate 0 is the plain prompt)
+CANDIDATE_STRATEGIES = [
+    "Approach the question differently from the most direct query: match dimension values "
+    "with LIKE instead of exact equality, or use other relevant columns or tables from the schema.",
+    "Return a broader result that answers the question from several angles: group by the main "
+    "dimension(s) instead of filtering to a single value, keeping the result small with aggregation.",
+    "Make the result easy to verify: include the values of the key dimension columns used for "
+    "filtering next to the aggregated value, and include totals where the data provides them.",
+]
+
+_TELEMETRY_LOCK = threading.Lock()
+_RUNS = defaultdict(lambda: deque(maxlen=SPECULATIVE_SQL_TELEMETRY_WINDOW))
+_GENERATION_STATS = {
+    "query_generations": 0,
+    "candidates_generated": 0,
+    "duplicate_candidates": 0,
+    "candidates_executed": 0,
+}
+
+
+def get_sql_mode(fanout: bool = False) -> str:
+    """Telemetry label of the SQL loop, e.g. "serial", "speculative" or "fanout+speculative"."""
+    modes = []
+    if fanout:
+        modes.append(MODE_FANOUT)
+    if SPECULATIVE_SQL_CANDIDATES > 1:
+        modes.append(MODE_SPECULATIVE)
+    return "+".join(modes) or MODE_SERIAL
+
+
+def is_fanout_run(top_selection_codes) -> bool:
+    """Fan-out applies only when several selections are relevant and fit into one batch."""
+    return bool(
+        QUERY_FANOUT_ENABLED
+        and MAX_FANOUT_BRANCHES > 1
+        and top_selection_codes
+        and len(top_selection_codes) > 1
+    )
+
+
+def get_fanout_codes(top_selection_codes) -> List[str]:
+    """Selections that get their own branch: the most relevant MAX_FANOUT_BRANCHES."""
+    if not is_fanout_run(top_selection_codes):
+        return []
+    return list(top_selection_codes)[:MAX_FANOUT_BRANCHES]
+
+
+def get_candidate_strategy(index: int) -> str:
+    """Instruction appended to the query prompt for candidate ``index`` ("" for candidate 0)."""
+    if index == 0:
+        return ""
+    strategy = CANDIDATE_STRATEGIES[(index - 1) % len(CANDIDATE_STRATEGIES)]
+    return (
+        f"This is alternative candidate {index + 1} of {SPECULATIVE_SQL_CANDIDATES} "
+        f"executed in parallel with other candidate queries. {strategy}"
+    )
+
+
+def dedupe_candidates(queries: List[str]) -> List[str]:
+    """Drop empty candidates and candidates that normalize to an earlier query."""
+    unique = []
+    seen = set()
+    for query in queries:
+        key = normalize_sql(query, fold_case=True)
+        if key and key not in seen:
+            seen.add(key)
+            unique.append(query)
+    with _TELEMETRY_LOCK:
+        _GENERATION_STATS["query_generations"] += 1
+        _GENERATION_STATS["candidates_generated"] += len(queries)
+        _GENERATION_STATS["duplicate_candidates"] += len(queries) - len(unique)
+        _GENERATION_STATS["candidates_executed"] += len(unique)
+    return unique
+
+
+def record_run(iterations: int, elapsed_ms: float, fanout: bool = False) -> None:
+    """Record one completed graph run that went through the SQL loop, under its mode."""
+    with _TELEMETRY_LOCK:
+        _RUNS[get_sql_mode(fanout)].append(
+            {"iterations": iterations, "elapsed_ms": elapsed_ms}
+        )
+
+
+def _summarize(runs) -> Dict[str, Any]:
+    if not runs:
+        return {"runs": 0}
+    latencies = sorted(run["elapsed_ms"] for run in runs)
+    return {
+        "runs": len(runs),
+        "avg_iterations": round(statistics.mean(run["iterations"] for run in runs), 3),
+        "avg_latency_ms": round(statistics.mean(latencies), 1),
+        "p50_latency_ms": round(latencies[len(latencies) // 2], 1),
+        "p95_latency_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 1),
+    }
+
+
+def get_speculative_sql_stats() -> Dict[str, Any]:
+    with _TELEMETRY_LOCK:
+        return {
+            "candidates": SPECULATIVE_SQL_CANDIDATES,
+            "fanout_enabled": QUERY_FANOUT_ENABLED,
+            "max_fanout_branches": MAX_FANOUT_BRANCHES,
+            **_GENERATION_STATS,
+            "runs_by_mode": {
+                mode: _summarize(list(runs)) for mode, runs in _RUNS.items()
+            },
+        }
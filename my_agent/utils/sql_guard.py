@@ -0,0 +1,206 @@
+"""Cost guard for LLM-generated SQL against czsu_data.db.
+
+Generated SQL can accidentally cross-join large CZSU tables or return
+thousands of rows that would then be pasted back into the LLM prompts. Every
+query executed by ``SQLiteQueryTool`` goes through ``execute_guarded_query``:
+
+1. ``EXPLAIN QUERY PLAN`` is inspected first; queries whose unindexed full
+   scans multiply to more than SQL_GUARD_MAX_SCAN_ROWS estimated rows are
+   rejected before they start.
+2. A progress handler enforces a wall-clock and a VM-step budget and interrupts
+   the statement when either is exceeded.
+3. Rows are streamed with ``fetchmany`` and capped at SQL_GUARD_MAX_ROWS.
+
+The result is a structured dict with a status of "ok", "truncated" or
+"aborted" so the reflection node can react (add aggregation, LIMIT, filters).
+
+Configuration (environment variables):
+    - SQL_GUARD_TIMEOUT_SECONDS: Wall-clock budget per query (default 10)
+    - SQL_GUARD_MAX_VM_STEPS: SQLite VM instruction budget per query (default 500000000)
+    - SQL_GUARD_MAX_ROWS: Maximum rows returned to the agent (default 200)
+    - SQL_GUARD_MAX_SCAN_ROWS: Maximum estimated rows produced by nested full scans (default 100000000)
+"""
+
+import os
+import re
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from my_agent.utils.sqlite_pool import get_db_identity
+
+SQL_GUARD_TIMEOUT_SECONDS = float(os.environ.get("SQL_GUARD_TIMEOUT_SECONDS", "10"))
+SQL_GUARD_MAX_VM_STEPS = int(os.environ.get("SQL_GUARD_MAX_VM_STEPS", "500000000"))
+SQL_GUARD_MAX_ROWS = int(os.environ.get("SQL_GUARD_MAX_ROWS", "200"))
+SQL_GUARD_MAX_SCAN_ROWS = int(os.environ.get("SQL_GUARD_MAX_SCAN_ROWS", "100000000"))
+
+# The progress handler is invoked every N virtual machine instructions
+PROGRESS_HANDLER_INTERVAL = 10000
+FETCH_BATCH_SIZE = 100
+
+STATUS_OK = "ok"
+STATUS_TRUNCATED = "truncated"
+STATUS_ABORTED = "aborted"
+
+# Row counts keyed by (DB file identity, table); the data DB is static
+_TABLE_ROW_COUNTS: Dict[Tuple[Tuple[int, float, int], str], int] = {}
+
+
+def _table_row_count(conn: sqlite3.Connection, table_name: str) -> int:
+    key = (get_db_identity(), table_name)
+    if key not in _TABLE_ROW_COUNTS:
+        quoted = '"' + table_name.replace('"', '""') + '"'
+        _TABLE_ROW_COUNTS[key] = conn.execute(
+            f"SELECT COUNT(*) FROM {quoted}"
+        ).fetchone()[0]
+    return _TABLE_ROW_COUNTS[key]
+
+
+# "SCAN t", "SCAN t AS x" and the pre-3.36 "SCAN TABLE t"; index scans and
+# "SCAN (subquery-N)" / "SCAN CONSTANT ROW" do not match
+_FULL_SCAN_PATTERN = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$")
+
+
+def _table_names(conn: sqlite3.Connection) -> Dict[str, str]:
+    return {
+        row[0].lower(): row[0]
+        for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+        ).fetchall()
+    }
+
+
+def estimate_scan_rows(conn: sqlite3.Connection, query: str) -> Dict[str, Any]:
+    """Estimate the rows produced by nested unindexed full scans in the query plan.
+
+    Only full scans that are siblings under the same plan node form one nested
+    loop. Scans below CO-ROUTINE, MATERIALIZE, COMPOUND or (SCALAR) SUBQUERY
+    nodes hang off those nodes and run as separate loops, so they are never
+    multiplied with the outer query. Scans of subquery results have no known
+    row count and are left to the VM-step budget.
+    """
+    plan_rows = conn.execute(f"EXPLAIN QUERY PLAN {query}").fetchall()
+    plan = [row[3] for row in plan_rows]
+    tables = _table_names(conn)
+
+    # parent plan node -> row counts of the tables fully scanned in that loop
+    loops: Dict[int, List[int]] = {}
+    for _, parent, _, detail in plan_rows:
+        match = _FULL_SCAN_PATTERN.match(detail)
+        if match and match.group(1).lower() in tables:
+            table_name = tables[match.group(1).lower()]
+            loops.setdefault(parent, []).append(_table_row_count(conn, table_name))
+
+    full_scans = 0
+    estimated = None
+    for counts in loops.values():
+        if len(counts) < 2:
+            continue
+        loop_rows = 1
+        for count in counts:
+            loop_rows *= max(count, 1)
+        if estimated is None or loop_rows > estimated:
+            full_scans, estimated = len(counts), loop_rows
+    return {"plan": plan, "full_scans": full_scans, "estimated_rows": estimated}
+
+
+def execute_guarded_query(
+    conn: sqlite3.Connection, query: str, max_rows: Optional[int] = None
+) -> Dict[str, Any]:
+    """Execute a query under plan, time, VM-step and row budgets.
+
+    Args:
+        conn: Read-only connection to the data database
+        query: SQL to execute
+        max_rows: Row cap (default SQL_GUARD_MAX_ROWS)
+
+    Returns:
+        Dict with keys status, reason, columns, rows, row_count, elapsed_ms
+    """
+    start = time.perf_counter()
+    max_rows = max_rows or SQL_GUARD_MAX_ROWS
+    result = {
+        "status": STATUS_OK,
+        "reason": None,
+        "columns": [],
+        "rows": [],
+        "row_count": 0,
+        "elapsed_ms": 0.0,
+    }
+
+    def _finish(status=None, reason=None):
+        if status:
+            result["status"] = status
+            result["reason"] = reason
+        result["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        return result
+
+    # 1. Plan check - reject cross joins of big tables before they start
+    try:
+        estimate = estimate_scan_rows(conn, query)
+    except sqlite3.Error:
+        # Let the real execution below report syntax errors to the agent
+        estimate = {"estimated_rows": None}
+    if (
+        estimate["estimated_rows"] is not None
+        and estimate["estimated_rows"] > SQL_GUARD_MAX_SCAN_ROWS
+    ):
+        return _finish(
+            STATUS_ABORTED,
+            f"query plan has {estimate['full_scans']} nested full table scans "
+            f"(~{estimate['estimated_rows']} row combinations); add join conditions, "
+            "WHERE filters or aggregation",
+        )
+
+    # 2. Wall-clock and VM-step budget enforced by the progress handler
+    deadline = time.monotonic() + SQL_GUARD_TIMEOUT_SECONDS
+    budget = {"steps": 0, "exceeded": None}
+
+    def _progress_handler():
+        budget["steps"] += PROGRESS_HANDLER_INTERVAL
+        if budget["steps"] > SQL_GUARD_MAX_VM_STEPS:
+            budget["exceeded"] = f"exceeded the VM step budget of {SQL_GUARD_MAX_VM_STEPS}"
+            return 1
+        if time.monotonic() > deadline:
+            budget["exceeded"] = f"exceeded the time budget of {SQL_GUARD_TIMEOUT_SECONDS}s"
+            return 1
+        return 0
+
+    conn.set_progress_handler(_progress_handler, PROGRESS_HANDLER_INTERVAL)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(query)
+        result["columns"] = [column[0] for column in cursor.description or []]
+
+        # 3. Stream rows with a hard cap
+        rows = []
+        truncated = False
+        while True:
+            batch = cursor.fetchmany(FETCH_BATCH_SIZE)
+            if not batch:
+                break
+            remaining = max_rows - len(rows)
+            if len(batch) > remaining:
+                rows.extend(batch[:remaining])
+                truncated = True
+                break
+            rows.extend(batch)
+        result["rows"] = rows
+        result["row_count"] = len(rows)
+        if truncated:
+            return _finish(
+                STATUS_TRUNCATED,
+                f"only the first {max_rows} rows were returned; "
+                "aggregate, filter or add LIMIT",
+            )
+        return _finish()
+    except sqlite3.OperationalError:
+        if budget["exceeded"]:
+            return _finish(
+                STATUS_ABORTED,
+                f"query {budget['exceeded']}; simplify it, filter earlier or aggregate",
+            )
+        raise
+    finally:
+        cursor.close()
+        conn.set_progress_handler(None, 0)
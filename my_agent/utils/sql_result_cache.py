@@ -0,0 +1,121 @@
+"""In-process LRU cache for SQL results against the static czsu_data.db.
+
+The agent frequently re-runs identical SQL across reflection iterations,
+threads and users (``PRAGMA table_info``, the same aggregation for a popular
+question). Results are cached by normalized SQL text plus the identity of the
+database file (size, mtime, inode), so a replaced data file never serves stale
+rows. Entries are evicted least-recently-used once the byte budget is exceeded.
+
+Configuration (environment variables):
+    - SQL_RESULT_CACHE_ENABLED: Master switch (default "1")
+    - SQL_RESULT_CACHE_MAX_MB: Byte budget for cached results (default 64)
+"""
+
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+SQL_RESULT_CACHE_ENABLED = os.environ.get("SQL_RESULT_CACHE_ENABLED", "1") == "1"
+SQL_RESULT_CACHE_MAX_BYTES = int(
+    float(os.environ.get("SQL_RESULT_CACHE_MAX_MB", "64")) * 1024 * 1024
+)
+
+# String literals and quoted identifiers must be kept verbatim while normalizing
+_QUOTED_PATTERN = re.compile(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|`[^`]*`|\[[^\]]*\])")
+
+
+def normalize_sql(query: str, fold_case: bool = False) -> str:
+    """Collapse whitespace and drop trailing semicolons outside quotes.
+
+    Case is kept by default: SQLite names result columns after the aliases and
+    expressions as written, so ``AS Total`` and ``as total`` must not share a
+    cached result. ``fold_case`` also lowercases unquoted text, for callers that
+    only compare queries and use each query's own result.
+    """
+    parts = _QUOTED_PATTERN.split(query.strip().rstrip(";").strip())
+    normalized = []
+    for index, part in enumerate(parts):
+        if index % 2 == 1:
+            normalized.append(part)  # quoted literal or identifier
+        else:
+            part = re.sub(r"\s+", " ", part)
+            normalized.append(part.lower() if fold_case else part)
+    return "".join(normalized).strip()
+
+
+def _estimate_size(value: Tuple[str, Dict[str, Any]]) -> int:
+    text, structured = value
+    return len(text.encode("utf-8")) + len(
+        json.dumps(structured, ensure_ascii=False, default=str).encode("utf-8")
+    )
+
+
+class SQLResultCache:
+    """Thread-safe LRU of (text, structured result) bounded by total size in bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[tuple, Tuple[Tuple[str, Dict[str, Any]], int]]" = (
+            OrderedDict()
+        )
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "oversized": 0}
+
+    def get(self, key: tuple) -> Optional[Tuple[str, Dict[str, Any]]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry[0]
+
+    def put(self, key: tuple, value: Tuple[str, Dict[str, Any]]) -> None:
+        size = _estimate_size(value)
+        with self._lock:
+            if size > self.max_bytes:
+                self._stats["oversized"] += 1
+                return
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            self._stats["stores"] += 1
+            while self._bytes > self.max_bytes and self._entries:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._stats["evictions"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "enabled": SQL_RESULT_CACHE_ENABLED,
+                "entries": len(self._entries),
+                "size_bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+            }
+
+
+_SQL_RESULT_CACHE = SQLResultCache(SQL_RESULT_CACHE_MAX_BYTES)
+
+
+def get_sql_result_cache() -> SQLResultCache:
+    return _SQL_RESULT_CACHE
+
+
+def get_sql_result_cache_stats() -> Dict[str, Any]:
+    return _SQL_RESULT_CACHE.get_stats()
@@ -0,0 +1,218 @@
+"""Read-only SQLite connection pool for the CZSU data database.
+
+SQL generated by the agent runs against the static ``czsu_data.db``. Opening a
+fresh connection per query throws away SQLite's page cache, and running the
+query on the event-loop thread blocks every other request on the worker. This
+module keeps a small pool of read-only connections (URI ``mode=ro`` and, by
+default, ``immutable=1``, with a large ``mmap_size`` and ``cache_size``) and a
+dedicated thread pool that executes the queries off the loop.
+
+Connections are recycled automatically when the database file is replaced
+(different size, mtime or inode).
+
+Configuration (environment variables):
+    - SQLITE_POOL_SIZE: Connections and executor threads (default 4)
+    - SQLITE_IMMUTABLE: Open with immutable=1, skipping file locking (default "1")
+    - SQLITE_MMAP_SIZE_MB: Memory-mapped I/O size per connection (default 256)
+    - SQLITE_CACHE_SIZE_MB: Page cache size per connection (default 64)
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Get base directory
+try:
+    BASE_DIR = Path(__file__).resolve().parents[2]
+except NameError:
+    BASE_DIR = Path(os.getcwd()).parents[0]
+
+# Import debug functions from utils
+from api.utils.debug import print__tools_debug
+
+DB_PATH = BASE_DIR / "data" / "czsu_data.db"
+
+SQLITE_POOL_SIZE = int(os.environ.get("SQLITE_POOL_SIZE", "4"))
+SQLITE_IMMUTABLE = os.environ.get("SQLITE_IMMUTABLE", "1") == "1"
+SQLITE_MMAP_SIZE = int(os.environ.get("SQLITE_MMAP_SIZE_MB", "256")) * 1024 * 1024
+SQLITE_CACHE_SIZE_KB = int(os.environ.get("SQLITE_CACHE_SIZE_MB", "64")) * 1024
+SQLITE_POOL_ID = 23  # Static ID for SQLite pool debug messages
+
+
+def get_db_identity(db_path: Path = DB_PATH) -> Tuple[int, float, int]:
+    """Return (size, mtime, inode) identifying the current version of the DB file."""
+    stat = db_path.stat()
+    return (stat.st_size, stat.st_mtime, stat.st_ino)
+
+
+class ReadOnlySQLitePool:
+    """Fixed-size pool of read-only SQLite connections shared across threads."""
+
+    def __init__(self, db_path: Path, size: int):
+        self.db_path = db_path
+        self.size = size
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle = []  # (generation, connection) ready for reuse
+        self._lock = threading.Lock()
+        self._identity = None
+        self._generation = 0
+        self._stats = {
+            "acquisitions": 0,
+            "in_use": 0,
+            "max_in_use": 0,
+            "wait_time_total_ms": 0.0,
+            "max_wait_ms": 0.0,
+            "connections_opened": 0,
+            "recycled_connections": 0,
+        }
+
+    def _connect(self) -> sqlite3.Connection:
+        uri = f"file:{self.db_path.as_posix()}?mode=ro"
+        if SQLITE_IMMUTABLE:
+            uri += "&immutable=1"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        conn.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+        conn.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+        conn.execute("PRAGMA query_only=1")
+        return conn
+
+    def _check_identity(self) -> None:
+        """Drop idle connections if the database file was replaced."""
+        identity = get_db_identity(self.db_path)
+        if identity == self._identity:
+            return
+        with self._lock:
+            if identity == self._identity:
+                return
+            if self._identity is not None:
+                print__tools_debug(
+                    f"{SQLITE_POOL_ID}: Database file changed, recycling connections"
+                )
+            self._identity = identity
+            self._generation += 1
+            for _, conn in self._idle:
+                conn.close()
+                self._stats["recycled_connections"] += 1
+            self._idle.clear()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; blocks while all pool slots are checked out."""
+        self._check_identity()
+        start = time.perf_counter()
+        self._slots.acquire()
+        wait_ms = (time.perf_counter() - start) * 1000
+
+        try:
+            with self._lock:
+                entry = self._idle.pop() if self._idle else None
+                self._stats["acquisitions"] += 1
+                self._stats["in_use"] += 1
+                self._stats["max_in_use"] = max(
+                    self._stats["max_in_use"], self._stats["in_use"]
+                )
+                self._stats["wait_time_total_ms"] += wait_ms
+                self._stats["max_wait_ms"] = max(self._stats["max_wait_ms"], wait_ms)
+                generation = self._generation
+            if entry is None:
+                entry = (generation, self._connect())
+                with self._lock:
+                    self._stats["connections_opened"] += 1
+        except Exception:
+            with self._lock:
+                self._stats["in_use"] -= 1
+            self._slots.release()
+            raise
+
+        try:
+            yield entry[1]
+        finally:
+            with self._lock:
+                self._stats["in_use"] -= 1
+                stale = entry[0] != self._generation
+                if stale:
+                    self._stats["recycled_connections"] += 1
+                else:
+                    self._idle.append(entry)
+            if stale:
+                entry[1].close()
+            self._slots.release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["pool_size"] = self.size
+            stats["idle_connections"] = len(self._idle)
+            stats["utilization"] = round(stats["in_use"] / self.size, 4)
+            stats["avg_wait_ms"] = (
+                round(stats["wait_time_total_ms"] / stats["acquisitions"], 3)
+                if stats["acquisitions"]
+                else 0.0
+            )
+            stats["wait_time_total_ms"] = round(stats["wait_time_total_ms"], 3)
+            stats["max_wait_ms"] = round(stats["max_wait_ms"], 3)
+        return stats
+
+
+_POOL: Optional[ReadOnlySQLitePool] = None
+_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_POOL_INIT_LOCK = threading.Lock()
+_EXECUTOR_STATS = {"submitted": 0, "completed": 0, "queued": 0, "exec_time_total_ms": 0.0}
+
+
+def get_sqlite_pool() -> ReadOnlySQLitePool:
+    """Return the process-wide read-only pool for czsu_data.db."""
+    global _POOL
+    if _POOL is None:
+        with _POOL_INIT_LOCK:
+            if _POOL is None:
+                _POOL = ReadOnlySQLitePool(DB_PATH, SQLITE_POOL_SIZE)
+    return _POOL
+
+
+def get_sqlite_executor() -> ThreadPoolExecutor:
+    """Return the dedicated thread pool used for SQLite query execution."""
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        with _POOL_INIT_LOCK:
+            if _EXECUTOR is None:
+                _EXECUTOR = ThreadPoolExecutor(
+                    max_workers=SQLITE_POOL_SIZE, thread_name_prefix="sqlite-ro"
+                )
+    return _EXECUTOR
+
+
+async def run_in_sqlite_executor(func: Callable, *args) -> Any:
+    """Run a blocking SQLite function on the dedicated executor and await it."""
+    loop = asyncio.get_running_loop()
+    _EXECUTOR_STATS["submitted"] += 1
+    _EXECUTOR_STATS["queued"] += 1
+
+    def _timed_call():
+        _EXECUTOR_STATS["queued"] -= 1
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            _EXECUTOR_STATS["completed"] += 1
+            _EXECUTOR_STATS["exec_time_total_ms"] += (time.perf_counter() - start) * 1000
+
+    return await loop.run_in_executor(get_sqlite_executor(), _timed_call)
+
+
+def get_sqlite_pool_stats() -> Dict[str, Any]:
+    """Return pool utilization and executor metrics for health endpoints."""
+    executor_stats = dict(_EXECUTOR_STATS)
+    executor_stats["exec_time_total_ms"] = round(executor_stats["exec_time_total_ms"], 3)
+    executor_stats["workers"] = SQLITE_POOL_SIZE
+    return {
+        "pool": get_sqlite_pool().get_stats(),
+        "executor": executor_stats,
+        "immutable": SQLITE_IMMUTABLE,
+    }
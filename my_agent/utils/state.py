@@ -9,7 +9,7 @@ from operator import add
 # ==============================================================================
 # IMPORTS
 # ==============================================================================
-from typing import Annotated, List, Tuple, TypedDict
+from typing import Annotated, Any, Dict, List, Tuple, TypedDict
 
 from langchain_core.documents import Document
 from langchain_core.messages import BaseMessage
@@ -75,26 +75,34 @@ class DataAnalysisState(TypedDict):
     queries_and_results: Annotated[
         List[Tuple[str, str]], limited_queries_reducer
     ]  # Collection of executed queries and their results with limited reducer
+    structured_query_results: Annotated[
+        List[Dict[str, Any]], limited_queries_reducer
+    ]  # Structured form (columns, rows, status) of each entry in queries_and_results
     reflection_decision: (
         str  # Last decision from the reflection node: "improve" or "answer"
     )
+    side_store_id: str  # ID of the run-scoped side-store holding retrieved Documents (run_store)
     hybrid_search_results: List[
-        Document
-    ]  # Intermediate hybrid search results before reranking (uses default replacement behavior)
+        str
+    ]  # Run-store keys of hybrid search results before reranking (uses default replacement behavior)
     most_similar_selections: List[
         Tuple[str, float]
     ]  # List of (selection_code, cohere_rerank_score) after reranking
     top_selection_codes: List[str]  # List of top N selection codes (e.g., top 3)
+    schema: str  # Schema text for top_selection_codes, loaded once per run by get_schema_node
     chromadb_missing: (
         bool  # True if ChromaDB directory is missing, else False or not present
     )
     hybrid_search_chunks: List[
-        Document
-    ]  # Intermediate hybrid search results for PDF chunks before reranking
+        str
+    ]  # Run-store keys of PDF chunk hybrid search results before reranking
     most_similar_chunks: List[
-        Tuple[Document, float]
-    ]  # List of (document, cohere_rerank_score) after reranking PDF chunks
+        Tuple[str, float]
+    ]  # List of (run-store key, cohere_rerank_score) after reranking PDF chunks
+    top_chunk_refs: List[
+        str
+    ]  # Run-store keys of the PDF chunks that passed the relevance threshold
     top_chunks: List[
         Document
-    ]  # List of top N PDF chunks that passed relevance threshold
+    ]  # Kept empty in state; main() materializes the chunks from top_chunk_refs
     final_answer: str  # Explicitly tracked final formatted answer string
@@ -0,0 +1,164 @@
+"""Per-user cache of thread and run ownership.
+
+Most chat routes authorize a request by checking that the user owns the thread
+(or run) in users_threads_runs. Instead of one COUNT query per request, the
+thread_id/run_id pairs of a user are loaded in a single query and kept in
+process for THREAD_OWNERSHIP_TTL_SECONDS:
+
+- create_thread_run_entry records new runs in the cached entry of the user,
+  so a freshly created thread is authorized without a reload.
+- Deleting a thread removes it from the cached entry.
+- A thread or run not found in a fresh entry triggers one reload, so runs
+  created by another worker are never denied; only a deletion on another
+  worker can stay authorized until the entry expires.
+
+Configuration (environment variables):
+    - THREAD_OWNERSHIP_TTL_SECONDS: Lifetime of a cached user entry (default 60)
+    - THREAD_OWNERSHIP_MAX_USERS: Users kept in the cache, least recently used
+      evicted first (default 5000)
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set
+
+# Import debug functions from utils
+from api.utils.debug import print__checkpointers_debug
+
+THREAD_OWNERSHIP_TTL_SECONDS = int(os.environ.get("THREAD_OWNERSHIP_TTL_SECONDS", "60"))
+THREAD_OWNERSHIP_MAX_USERS = int(os.environ.get("THREAD_OWNERSHIP_MAX_USERS", "5000"))
+THREAD_OWNERSHIP_ID = 34  # Static ID for thread ownership debug messages
+
+_LOCK = threading.Lock()
+# email -> {"threads": {thread_id: {run_id, ...}}, "runs": {run_id: thread_id}, "loaded_at": float}
+_ENTRIES: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_STATS = {
+    "hits": 0,
+    "misses": 0,
+    "loads": 0,
+    "load_errors": 0,
+    "recorded_runs": 0,
+    "invalidations": 0,
+    "evictions": 0,
+}
+
+
+def _get_fresh_entry(email: str) -> Optional[Dict[str, Any]]:
+    entry = _ENTRIES.get(email)
+    if entry is None:
+        return None
+    if time.monotonic() - entry["loaded_at"] > THREAD_OWNERSHIP_TTL_SECONDS:
+        del _ENTRIES[email]
+        return None
+    _ENTRIES.move_to_end(email)
+    return entry
+
+
+def _store_entry(email: str, entry: Dict[str, Any]) -> None:
+    _ENTRIES[email] = entry
+    _ENTRIES.move_to_end(email)
+    while len(_ENTRIES) > THREAD_OWNERSHIP_MAX_USERS:
+        _ENTRIES.popitem(last=False)
+        _STATS["evictions"] += 1
+
+
+async def _load_user_entry(email: str) -> Dict[str, Any]:
+    """Load every thread_id/run_id pair of the user in one query."""
+    # Imported here: postgres_checkpointer imports this module
+    from my_agent.utils.postgres_checkpointer import get_direct_connection
+
+    async with get_direct_connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                """
+                SELECT thread_id, run_id FROM users_threads_runs
+                WHERE email = %s
+            """,
+                (email,),
+            )
+            rows = await cur.fetchall()
+
+    threads: Dict[str, Set[str]] = {}
+    runs: Dict[str, str] = {}
+    for thread_id, run_id in rows:
+        threads.setdefault(thread_id, set()).add(str(run_id))
+        runs[str(run_id)] = thread_id
+    entry = {"threads": threads, "runs": runs, "loaded_at": time.monotonic()}
+    with _LOCK:
+        _store_entry(email, entry)
+        _STATS["loads"] += 1
+    print__checkpointers_debug(
+        f"{THREAD_OWNERSHIP_ID}: Loaded ownership of {len(threads)} threads / {len(runs)} runs for {email}"
+    )
+    return entry
+
+
+async def _owns(email: str, field: str, key: str) -> bool:
+    if not email or not key:
+        return False
+    with _LOCK:
+        entry = _get_fresh_entry(email)
+        if entry is not None and key in entry[field]:
+            _STATS["hits"] += 1
+            return True
+        _STATS["misses"] += 1
+
+    # Not cached (or created by another worker since the load): reload once
+    try:
+        entry = await _load_user_entry(email)
+    except Exception as e:
+        with _LOCK:
+            _STATS["load_errors"] += 1
+        print__checkpointers_debug(
+            f"❌ {THREAD_OWNERSHIP_ID}: Could not load thread ownership for {email}: {e}"
+        )
+        raise
+    return key in entry[field]
+
+
+async def user_owns_thread(email: str, thread_id: str) -> bool:
+    """Return True if the user has at least one run in the thread."""
+    return await _owns(email, "threads", thread_id)
+
+
+async def user_owns_run(email: str, run_id: str) -> bool:
+    """Return True if the run belongs to one of the user's threads."""
+    return await _owns(email, "runs", str(run_id))
+
+
+def record_thread_run(email: str, thread_id: str, run_id: str) -> None:
+    """Add a newly created run to the user's cached entry (if one is cached)."""
+    with _LOCK:
+        entry = _get_fresh_entry(email)
+        if entry is None:
+            return
+        previous_thread = entry["runs"].get(str(run_id))
+        if previous_thread is not None and previous_thread != thread_id:
+            entry["threads"].get(previous_thread, set()).discard(str(run_id))
+        entry["threads"].setdefault(thread_id, set()).add(str(run_id))
+        entry["runs"][str(run_id)] = thread_id
+        _STATS["recorded_runs"] += 1
+
+
+def invalidate_thread(email: str, thread_id: str) -> None:
+    """Forget a deleted thread (and its runs) in the user's cached entry."""
+    with _LOCK:
+        entry = _ENTRIES.get(email)
+        if entry is None:
+            return
+        for run_id in entry["threads"].pop(thread_id, set()):
+            entry["runs"].pop(run_id, None)
+        _STATS["invalidations"] += 1
+
+
+def get_thread_ownership_stats() -> Dict[str, Any]:
+    with _LOCK:
+        lookups = _STATS["hits"] + _STATS["misses"]
+        return {
+            **_STATS,
+            "hit_rate": round(_STATS["hits"] / lookups, 3) if lookups else 0.0,
+            "cached_users": len(_ENTRIES),
+            "ttl_seconds": THREAD_OWNERSHIP_TTL_SECONDS,
+        }
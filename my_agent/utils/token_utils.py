@@ -0,0 +1,20 @@
+"""Token counting helpers shared by the agent nodes."""
+
+from functools import lru_cache
+
+import tiktoken
+
+DEFAULT_ENCODING = "cl100k_base"
+
+
+@lru_cache(maxsize=4)
+def get_encoder(encoding_name: str = DEFAULT_ENCODING):
+    """Return a cached tiktoken encoder (building one costs several milliseconds)."""
+    return tiktoken.get_encoding(encoding_name)
+
+
+def count_tokens(text: str, encoding_name: str = DEFAULT_ENCODING) -> int:
+    """Count the number of tokens in a string using a cached tiktoken encoder."""
+    if not text:
+        return 0
+    return len(get_encoder(encoding_name).encode(text, disallowed_special=()))
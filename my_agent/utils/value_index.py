@@ -0,0 +1,317 @@
+"""Dimension-value lookup index over czsu_data.db.
+
+Builds an FTS5 index of (table, column, value) triples from the actual data so
+the query agent can resolve user terms ("Praha", "ženy", "byty") into the exact
+filter values stored in the tables, instead of reading every distinct value of
+every candidate table from the schema.
+
+The index lives in its own SQLite file next to the data so the data database
+can stay read-only. Each indexed table is stored with a signature (DDL, row
+count, max rowid); when the data file changes only tables whose signature
+differs are re-indexed.
+
+The index is (re)built in a background thread, started with the API
+(start_value_index_refresh) or by the first lookup. The builder writes through
+its own connection and commits once, so lookups keep reading the previous
+index meanwhile (WAL); until the first build has finished, lookups report that
+the index is not ready instead of waiting for it.
+
+Matching is accent- and case-insensitive. Words longer than
+PREFIX_STEM_LENGTH are matched by their first PREFIX_STEM_LENGTH letters, which
+covers suffix inflection ("Jihomoravského" finds "Jihomoravský kraj") but not
+stem changes such as "Praze" for "Praha".
+
+Configuration (environment variables):
+    - VALUE_INDEX_PATH: Index file (default data/czsu_value_index.db)
+    - VALUE_INDEX_MAX_DISTINCT: Skip columns with more distinct values than this (default 5000)
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .schema_pruning import extract_question_terms, fold_text
+
+# Get base directory
+try:
+    BASE_DIR = Path(__file__).resolve().parents[2]
+except NameError:
+    BASE_DIR = Path(os.getcwd()).parents[0]
+
+# Import debug functions from utils
+from api.utils.debug import print__tools_debug
+
+DATA_DB_PATH = BASE_DIR / "data" / "czsu_data.db"
+VALUE_INDEX_PATH = Path(
+    os.environ.get("VALUE_INDEX_PATH", str(BASE_DIR / "data" / "czsu_value_index.db"))
+)
+VALUE_INDEX_MAX_DISTINCT = int(os.environ.get("VALUE_INDEX_MAX_DISTINCT", "5000"))
+VALUE_INDEX_ID = 22  # Static ID for value index debug messages
+
+# Columns that hold measures, not dimension values
+SKIPPED_COLUMNS = {"value"}
+
+# Words longer than this are matched by prefix to cover Czech suffix inflection
+PREFIX_STEM_LENGTH = 5
+
+# Bumped when the index layout changes; older index files are rebuilt
+VALUE_INDEX_SCHEMA_VERSION = 2
+
+_INDEX_LOCK = threading.Lock()  # Guards the shared read connection
+_REFRESH_LOCK = threading.Lock()  # One builder at a time
+_INDEX_CONN = None
+_INDEXED_DATA_MTIME = None
+_REFRESH_THREAD: Optional[threading.Thread] = None
+
+
+def _quote_identifier(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _connect_index() -> sqlite3.Connection:
+    VALUE_INDEX_PATH.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(VALUE_INDEX_PATH), check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    if conn.execute("PRAGMA user_version").fetchone()[0] != VALUE_INDEX_SCHEMA_VERSION:
+        # table_name used to be UNINDEXED; rebuild files of older layouts
+        conn.execute("DROP TABLE IF EXISTS dimension_values")
+        conn.execute("DROP TABLE IF EXISTS indexed_tables")
+        conn.execute(f"PRAGMA user_version = {VALUE_INDEX_SCHEMA_VERSION}")
+    # table_name is indexed so table filters narrow the MATCH instead of post-filtering
+    conn.execute(
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS dimension_values USING fts5(
+            table_name,
+            column_name UNINDEXED,
+            value UNINDEXED,
+            folded_value,
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3 4 5'
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS indexed_tables (
+            table_name TEXT PRIMARY KEY,
+            signature TEXT NOT NULL,
+            indexed_at REAL NOT NULL
+        )
+        """
+    )
+    conn.commit()
+    return conn
+
+
+def _get_index_conn() -> sqlite3.Connection:
+    global _INDEX_CONN
+    if _INDEX_CONN is None:
+        _INDEX_CONN = _connect_index()
+    return _INDEX_CONN
+
+
+def _table_filter(table_names: List[str]) -> str:
+    """FTS5 column filter selecting the rows of the given tables."""
+    phrases = " OR ".join('"' + name.replace('"', '""') + '"' for name in table_names)
+    return f"table_name : ({phrases})"
+
+
+def _table_signature(data_conn: sqlite3.Connection, table_name: str, ddl: str) -> str:
+    count, max_rowid = data_conn.execute(
+        f"SELECT COUNT(*), MAX(rowid) FROM {_quote_identifier(table_name)}"
+    ).fetchone()
+    ddl_hash = hashlib.md5(ddl.encode("utf-8")).hexdigest()
+    return f"{ddl_hash}:{count}:{max_rowid}"
+
+
+def _delete_table_values(index_conn: sqlite3.Connection, table_name: str) -> None:
+    index_conn.execute(
+        "DELETE FROM dimension_values WHERE rowid IN ("
+        "SELECT rowid FROM dimension_values WHERE dimension_values MATCH ? "
+        "AND table_name = ?)",
+        (_table_filter([table_name]), table_name),
+    )
+
+
+def _index_table(
+    index_conn: sqlite3.Connection, data_conn: sqlite3.Connection, table_name: str
+) -> int:
+    """Replace the indexed values of one table and return the number of values."""
+    _delete_table_values(index_conn, table_name)
+    rows = []
+    quoted_table = _quote_identifier(table_name)
+    for column in data_conn.execute(f"PRAGMA table_info({quoted_table})").fetchall():
+        column_name = column[1]
+        if column_name.lower() in SKIPPED_COLUMNS:
+            continue
+        quoted_column = _quote_identifier(column_name)
+        values = data_conn.execute(
+            f"SELECT DISTINCT {quoted_column} FROM {quoted_table} "
+            f"WHERE {quoted_column} IS NOT NULL LIMIT ?",
+            (VALUE_INDEX_MAX_DISTINCT + 1,),
+        ).fetchall()
+        if len(values) > VALUE_INDEX_MAX_DISTINCT:
+            continue
+        for (value,) in values:
+            if isinstance(value, str) and value.strip():
+                rows.append((table_name, column_name, value, fold_text(value)))
+    index_conn.executemany(
+        "INSERT INTO dimension_values (table_name, column_name, value, folded_value) "
+        "VALUES (?, ?, ?, ?)",
+        rows,
+    )
+    return len(rows)
+
+
+def ensure_value_index(force: bool = False) -> Dict[str, int]:
+    """Bring the index up to date with czsu_data.db, re-indexing only changed tables.
+
+    Runs in the caller's thread (the background refresh or the CLI); lookups
+    are not blocked while it runs.
+
+    Returns:
+        Dict with counts of reindexed, removed and unchanged tables
+    """
+    global _INDEXED_DATA_MTIME
+    stats = {"reindexed": 0, "removed": 0, "unchanged": 0}
+    data_mtime = DATA_DB_PATH.stat().st_mtime
+    if not force and _INDEXED_DATA_MTIME == data_mtime:
+        return stats
+
+    with _REFRESH_LOCK:
+        if not force and _INDEXED_DATA_MTIME == data_mtime:
+            return stats
+        start = time.time()
+        index_conn = _connect_index()
+        data_conn = sqlite3.connect(f"file:{DATA_DB_PATH.as_posix()}?mode=ro", uri=True)
+        try:
+            known = dict(
+                index_conn.execute(
+                    "SELECT table_name, signature FROM indexed_tables"
+                ).fetchall()
+            )
+            tables = data_conn.execute(
+                "SELECT name, sql FROM sqlite_master WHERE type = 'table' "
+                "AND name NOT LIKE 'sqlite_%'"
+            ).fetchall()
+            current_names = set()
+            for table_name, ddl in tables:
+                current_names.add(table_name)
+                signature = _table_signature(data_conn, table_name, ddl or "")
+                if not force and known.get(table_name) == signature:
+                    stats["unchanged"] += 1
+                    continue
+                _index_table(index_conn, data_conn, table_name)
+                index_conn.execute(
+                    "INSERT OR REPLACE INTO indexed_tables (table_name, signature, indexed_at) "
+                    "VALUES (?, ?, ?)",
+                    (table_name, signature, time.time()),
+                )
+                stats["reindexed"] += 1
+            for table_name in set(known) - current_names:
+                _delete_table_values(index_conn, table_name)
+                index_conn.execute(
+                    "DELETE FROM indexed_tables WHERE table_name = ?", (table_name,)
+                )
+                stats["removed"] += 1
+            # Single commit: readers switch from the old to the new index at once
+            index_conn.commit()
+        finally:
+            data_conn.close()
+            index_conn.close()
+        _INDEXED_DATA_MTIME = data_mtime
+        print__tools_debug(
+            f"{VALUE_INDEX_ID}: Value index refreshed in {time.time() - start:.2f}s: {stats}"
+        )
+    return stats
+
+
+def _refresh_in_background() -> None:
+    try:
+        ensure_value_index()
+    except Exception as e:
+        print__tools_debug(f"❌ {VALUE_INDEX_ID}: Value index refresh failed: {e}")
+
+
+def start_value_index_refresh() -> None:
+    """Refresh the index in a daemon thread unless a refresh is already running."""
+    global _REFRESH_THREAD
+    with _INDEX_LOCK:
+        if _REFRESH_THREAD is not None and _REFRESH_THREAD.is_alive():
+            return
+        try:
+            if _INDEXED_DATA_MTIME == DATA_DB_PATH.stat().st_mtime:
+                return
+        except OSError:
+            return
+        _REFRESH_THREAD = threading.Thread(
+            target=_refresh_in_background, name="value-index-refresh", daemon=True
+        )
+        _REFRESH_THREAD.start()
+
+
+def is_value_index_ready() -> bool:
+    """Whether a build has finished in this process (it may be refreshing again)."""
+    return _INDEXED_DATA_MTIME is not None
+
+
+def _build_match_expression(text: str) -> Optional[str]:
+    terms = extract_question_terms(text)
+    if not terms:
+        return None
+    parts = []
+    for term in sorted(terms):
+        if len(term) > PREFIX_STEM_LENGTH and not term.isdigit():
+            term = term[:PREFIX_STEM_LENGTH]
+        parts.append(f'"{term}"*')
+    return " OR ".join(parts)
+
+
+def search_dimension_values(
+    text: str, tables: Optional[List[str]] = None, limit: int = 20
+) -> Optional[List[Tuple[str, str, str]]]:
+    """Find exact dimension values matching the words of a user term or question.
+
+    Args:
+        text: User term(s) in Czech or English, accents optional
+        tables: Restrict the search to these table names (selection codes)
+        limit: Maximum number of (table, column, value) results
+
+    Returns:
+        List of (table_name, column_name, value) ordered by relevance, or None
+        while the index is still being built
+    """
+    # Picks up a replaced data file; never waits for the build
+    start_value_index_refresh()
+    if not is_value_index_ready():
+        return None
+    match_expression = _build_match_expression(text)
+    if match_expression is None:
+        return []
+
+    query = f"folded_value : ({match_expression})"
+    sql = (
+        "SELECT table_name, column_name, value FROM dimension_values "
+        "WHERE dimension_values MATCH ?"
+    )
+    params: list = []
+    if tables:
+        # The MATCH narrows the index to the tables, IN keeps the names exact
+        query = f"({query}) AND {_table_filter(tables)}"
+        sql += f" AND table_name IN ({','.join('?' for _ in tables)})"
+        params.extend(tables)
+    # Rank by the values only, not by the table name
+    sql += " ORDER BY bm25(dimension_values, 0.0, 0.0, 0.0, 1.0) LIMIT ?"
+    params = [query, *params, limit]
+
+    with _INDEX_LOCK:
+        return _get_index_conn().execute(sql, params).fetchall()
+
+
+if __name__ == "__main__":
+    # Prebuild the index: python -m my_agent.utils.value_index
+    print(ensure_value_index(force=os.environ.get("VALUE_INDEX_FORCE", "0") == "1"))
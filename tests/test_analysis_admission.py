@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Test for cluster-wide analysis admission (api.utils.analysis_admission).
+Runs concurrent ticket holders against the configured PostgreSQL database and
+checks the global cap, FIFO admission order and expiry of abandoned leases.
+No API server is needed.
+"""
+
+import os
+
+# CRITICAL: Set Windows event loop policy FIRST, before other imports
+import sys
+
+if sys.platform == "win32":
+    import asyncio
+
+    asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+# Load environment variables early
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Constants
+try:
+    from pathlib import Path
+
+    BASE_DIR = Path(__file__).resolve().parents[1]
+except NameError:
+    BASE_DIR = Path(os.getcwd()).parents[0]
+
+# Standard imports
+import asyncio
+import time
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, str(BASE_DIR))
+
+from api.config.settings import ANALYSIS_LEASE_TTL_SECONDS
+from api.utils.analysis_admission import (
+    release_ticket,
+    setup_analysis_admission_table,
+    take_ticket,
+    try_admit,
+)
+from my_agent.utils.postgres_checkpointer import (
+    check_postgres_env_vars,
+    close_app_pool,
+    get_direct_connection,
+)
+
+# Test configuration
+TEST_THREAD_PREFIX = "admission_test_"
+GLOBAL_CAP = 2
+HOLDERS = 6
+HOLD_SECONDS = 0.5
+POLL_SECONDS = 0.05
+
+
+async def hold_slot(index: int, state: dict) -> None:
+    """Wait for a slot like acquire_global_slot does, hold it briefly, release it."""
+    ticket = await take_ticket(f"{TEST_THREAD_PREFIX}{index}")
+    while not await try_admit(ticket, GLOBAL_CAP):
+        await asyncio.sleep(POLL_SECONDS)
+    state["running"] += 1
+    state["peak"] = max(state["peak"], state["running"])
+    state["admission_order"].append(ticket)
+    await asyncio.sleep(HOLD_SECONDS)
+    state["running"] -= 1
+    await release_ticket(ticket)
+
+
+async def check_cap_and_fifo() -> bool:
+    print(f"🔍 Running {HOLDERS} holders with a global cap of {GLOBAL_CAP}...")
+    state = {"running": 0, "peak": 0, "admission_order": []}
+    started = time.monotonic()
+    await asyncio.gather(*(hold_slot(index, state) for index in range(HOLDERS)))
+    elapsed = time.monotonic() - started
+
+    order = state["admission_order"]
+    print(f"   Peak concurrency: {state['peak']}, admission order: {order}")
+    print(f"   Elapsed: {elapsed:.2f}s")
+    if state["peak"] > GLOBAL_CAP:
+        print(f"❌ Cap exceeded: {state['peak']} > {GLOBAL_CAP}")
+        return False
+    if order != sorted(order):
+        print("❌ Tickets were not admitted in FIFO order")
+        return False
+    # Holders run in waves of GLOBAL_CAP, each wave taking one hold period
+    if elapsed < HOLD_SECONDS * HOLDERS / GLOBAL_CAP * 0.9:
+        print("❌ Holders finished too quickly for the cap to have been enforced")
+        return False
+    print("✅ Cap and FIFO order respected")
+    return True
+
+
+async def check_expired_lease() -> bool:
+    print("🔍 Checking that a lease without heartbeat expires...")
+    async with get_direct_connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                """
+                INSERT INTO analysis_admission
+                    (holder, thread_id, admitted_at, heartbeat_at)
+                VALUES (%s, %s, CURRENT_TIMESTAMP,
+                        CURRENT_TIMESTAMP - make_interval(secs => %s))
+                RETURNING ticket
+            """,
+                (
+                    "crashed-worker",
+                    f"{TEST_THREAD_PREFIX}crashed",
+                    ANALYSIS_LEASE_TTL_SECONDS + 5,
+                ),
+            )
+            stale_ticket = (await cur.fetchone())[0]
+
+    ticket = await take_ticket(f"{TEST_THREAD_PREFIX}after_crash")
+    try:
+        # With a cap of one the stale lease would block the new ticket forever
+        admitted = await try_admit(ticket, 1)
+    finally:
+        await release_ticket(ticket)
+
+    async with get_direct_connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                "SELECT COUNT(*) FROM analysis_admission WHERE ticket = %s",
+                (stale_ticket,),
+            )
+            stale_left = (await cur.fetchone())[0]
+
+    if not admitted or stale_left:
+        print(f"❌ Stale lease not expired (admitted={admitted}, left={stale_left})")
+        return False
+    print("✅ Stale lease expired and the next ticket was admitted")
+    return True
+
+
+async def cleanup_test_tickets() -> None:
+    async with get_direct_connection() as conn:
+        await conn.execute(
+            "DELETE FROM analysis_admission WHERE thread_id LIKE %s",
+            (f"{TEST_THREAD_PREFIX}%",),
+        )
+
+
+async def main() -> bool:
+    """Main test execution function."""
+    print("🚀 Analysis Admission Test Starting...")
+    print("=" * 60)
+
+    if not check_postgres_env_vars():
+        print("❌ PostgreSQL environment variables are not properly configured!")
+        return False
+
+    try:
+        await setup_analysis_admission_table()
+        await cleanup_test_tickets()
+        results = [await check_cap_and_fifo(), await check_expired_lease()]
+        test_passed = all(results)
+        print(f"\n🏁 OVERALL RESULT: {'✅ PASSED' if test_passed else '❌ FAILED'}")
+        return test_passed
+    except Exception as e:
+        print(f"❌ Test execution failed: {type(e).__name__}: {str(e)}")
+        return False
+    finally:
+        try:
+            await cleanup_test_tickets()
+        finally:
+            await close_app_pool()
+
+
+# Test runner for pytest
+@pytest.mark.asyncio
+async def test_analysis_admission():
+    """Pytest-compatible test function."""
+    if not check_postgres_env_vars():
+        pytest.skip("PostgreSQL environment variables are not configured")
+    result = await main()
+    assert result, "Analysis admission test failed"
+
+
+if __name__ == "__main__":
+    try:
+        test_result = asyncio.run(main())
+        sys.exit(0 if test_result else 1)
+    except KeyboardInterrupt:
+        print("\n⛔ Test interrupted by user")
+        sys.exit(1)
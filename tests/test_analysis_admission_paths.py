@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Test for the failure paths of cluster-wide analysis admission
+(api.utils.analysis_admission) against an in-memory stand-in for the
+analysis_admission table: failing open, re-queueing a lost ticket and the
+bounded admission wait.
+No API server or database is needed.
+"""
+
+import os
+
+# CRITICAL: Set Windows event loop policy FIRST, before other imports
+import sys
+
+if sys.platform == "win32":
+    import asyncio
+
+    asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+# Load environment variables early
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Constants
+try:
+    from pathlib import Path
+
+    BASE_DIR = Path(__file__).resolve().parents[1]
+except NameError:
+    BASE_DIR = Path(os.getcwd()).parents[0]
+
+# Standard imports
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+import pytest
+from fastapi import HTTPException
+
+# Add project root to path
+sys.path.insert(0, str(BASE_DIR))
+
+from api.utils import analysis_admission
+from api.utils.analysis_admission import acquire_global_slot, analysis_slot
+
+
+class FakeAdmissionTable:
+    """Just enough of analysis_admission for the statements of the module."""
+
+    def __init__(self, failing_connection=None):
+        self.tickets = {}  # ticket -> admitted
+        self.next_ticket = 1
+        self.expire_on_sweep = set()  # tickets the next expiry sweep deletes
+        self.failing_connection = failing_connection  # 1-based, None = never
+        self.connections = 0
+
+    def add_ticket(self, admitted=False):
+        ticket = self.next_ticket
+        self.next_ticket += 1
+        self.tickets[ticket] = admitted
+        return ticket
+
+    def run(self, sql, params):
+        """Execute one statement; returns (rowcount, row)."""
+        sql = " ".join(sql.split())
+        if "pg_advisory_xact_lock" in sql:
+            return 0, None
+        if sql.startswith("INSERT INTO analysis_admission"):
+            return 1, (self.add_ticket(),)
+        if sql.startswith("DELETE FROM analysis_admission WHERE heartbeat_at"):
+            expired = [t for t in self.expire_on_sweep if t in self.tickets]
+            for ticket in expired:
+                del self.tickets[ticket]
+            self.expire_on_sweep.clear()
+            return len(expired), None
+        if sql.startswith("DELETE FROM analysis_admission WHERE ticket"):
+            return int(self.tickets.pop(params[0], None) is not None), None
+        if "SET heartbeat_at" in sql:
+            return int(params[0] in self.tickets), None
+        if sql.startswith("SELECT COUNT(*)"):
+            return 1, (sum(1 for ticket in self.tickets if ticket < params[0]),)
+        if "SET admitted_at" in sql:
+            self.tickets[params[0]] = True
+            return 1, None
+        raise AssertionError(f"Unexpected statement: {sql}")
+
+
+class FakeCursor:
+    def __init__(self, table):
+        self.table = table
+        self.rowcount = 0
+        self.row = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def execute(self, sql, params=None):
+        self.rowcount, self.row = self.table.run(sql, params)
+
+    async def fetchone(self):
+        return self.row
+
+
+class FakeConnection:
+    def __init__(self, table):
+        self.table = table
+
+    def cursor(self):
+        return FakeCursor(self.table)
+
+    async def execute(self, sql, params=None):
+        self.table.run(sql, params)
+
+
+@pytest.fixture
+def table(monkeypatch):
+    fake_table = FakeAdmissionTable()
+
+    @asynccontextmanager
+    async def fake_get_direct_connection():
+        fake_table.connections += 1
+        if fake_table.connections == fake_table.failing_connection:
+            raise ConnectionError("database unreachable")
+        yield FakeConnection(fake_table)
+
+    monkeypatch.setattr(
+        analysis_admission, "get_direct_connection", fake_get_direct_connection
+    )
+    # Admission is only enforced while the heartbeat runs
+    monkeypatch.setattr(analysis_admission, "_HEARTBEAT_TASK", object())
+    monkeypatch.setattr(analysis_admission, "ANALYSIS_ADMISSION_POLL_SECONDS", 0.01)
+    monkeypatch.setattr(analysis_admission, "_TICKETS", {})
+    monkeypatch.setattr(
+        analysis_admission, "_STATS", dict.fromkeys(analysis_admission._STATS, 0)
+    )
+    return fake_table
+
+
+def test_fails_open_when_the_table_is_unreachable(table):
+    table.failing_connection = 1
+    assert asyncio.run(acquire_global_slot("thread", max_concurrent=1)) is None
+    assert analysis_admission._STATS["fail_open"] == 1
+    assert table.tickets == {}
+
+
+def test_fails_open_and_releases_the_ticket_after_an_error(table):
+    # take_ticket succeeds, the first try_admit cannot connect
+    table.failing_connection = 2
+    assert asyncio.run(acquire_global_slot("thread", max_concurrent=1)) is None
+    assert analysis_admission._STATS["fail_open"] == 1
+    assert table.tickets == {}
+    assert analysis_admission._TICKETS == {}
+
+
+def test_lost_ticket_is_queued_again(table):
+    table.expire_on_sweep.add(1)
+    ticket = asyncio.run(acquire_global_slot("thread", max_concurrent=1))
+    assert ticket == 2
+    assert table.tickets == {2: True}
+    assert analysis_admission._TICKETS == {2: True}
+    assert analysis_admission._STATS["lost_tickets"] == 1
+    assert analysis_admission._STATS["fail_open"] == 0
+
+
+def test_wait_for_a_slot_is_bounded(table):
+    other = table.add_ticket(admitted=True)
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(
+            acquire_global_slot(
+                "thread", max_concurrent=1, deadline=time.monotonic() + 0.05
+            )
+        )
+    assert exc_info.value.status_code == 503
+    assert int(exc_info.value.headers["Retry-After"]) >= 1
+    assert table.tickets == {other: True}
+    assert analysis_admission._STATS["wait_timeouts"] == 1
+
+
+def test_wait_for_the_process_semaphore_is_bounded(table, monkeypatch):
+    monkeypatch.setattr(analysis_admission, "analysis_semaphore", asyncio.Semaphore(0))
+    monkeypatch.setattr(analysis_admission, "ANALYSIS_ADMISSION_MAX_WAIT_SECONDS", 0.05)
+
+    async def run_analysis():
+        async with analysis_slot("thread"):
+            pytest.fail("The analysis must not start without a slot")
+
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(run_analysis())
+    assert exc_info.value.status_code == 503
+    assert "Retry-After" in exc_info.value.headers
+    assert table.tickets == {}
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Test for the token-budgeted answer context (my_agent.utils.answer_context).
+Checks that failed and duplicate queries are dropped, that results are fitted
+newest first and cut at row boundaries, and that the PDF extracts keep the
+sentences relevant to the question in their original order.
+No API server or database is needed.
+"""
+
+import os
+
+# CRITICAL: Set Windows event loop policy FIRST, before other imports
+import sys
+
+if sys.platform == "win32":
+    import asyncio
+
+    asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+# Load environment variables early
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Constants
+try:
+    from pathlib import Path
+
+    BASE_DIR = Path(__file__).resolve().parents[1]
+except NameError:
+    BASE_DIR = Path(os.getcwd()).parents[0]
+
+# Standard imports
+from types import SimpleNamespace
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, str(BASE_DIR))
+
+from my_agent.utils import answer_context
+from my_agent.utils.answer_context import (
+    build_answer_context,
+    select_pdf_sentences,
+    select_query_results,
+)
+
+# Test configuration
+QUESTION = "Kolik obyvatel měla Praha v roce 2020?"
+
+
+@pytest.fixture(autouse=True)
+def word_tokens(monkeypatch):
+    """Count one token per word so budgets are exact and no encoder is needed."""
+    monkeypatch.setattr(answer_context, "count_tokens", lambda text: len(text.split()))
+    monkeypatch.setattr(answer_context, "get_encoder", lambda: None)
+
+
+def make_chunk(text, source):
+    return SimpleNamespace(page_content=text, metadata={"source": source})
+
+
+def tsv(rows):
+    return "\n".join(["rok\thodnota"] + [f"{year}\t{value}" for year, value in rows])
+
+
+def test_failed_and_duplicate_queries_are_dropped():
+    queries = [
+        ("SELECT 1", "Error: no such table"),
+        ("SELECT  value FROM t", tsv([(2019, 1)])),
+        ("SELECT x FROM big", "QUERY ABORTED: 2 nested full table scans"),
+        ("select value from t", tsv([(2020, 2)])),
+    ]
+    kept, stats = select_query_results(queries, budget=1000)
+    # The later of two identical queries is kept
+    assert kept == [("select value from t", tsv([(2020, 2)]))]
+    assert stats["failed"] == 2 and stats["duplicate"] == 1 and stats["kept"] == 1
+
+
+def test_newest_results_win_and_keep_execution_order():
+    queries = [(f"SELECT {i}", tsv([(2020, i)])) for i in range(4)]
+    entry_tokens = len(f"Query:\n{queries[0][0]}\nResult:\n{queries[0][1]}".split())
+    kept, stats = select_query_results(queries, budget=entry_tokens * 2)
+    assert [query for query, _ in kept] == ["SELECT 2", "SELECT 3"]
+    assert stats["over_budget"] == 2
+    assert stats["tokens"] == entry_tokens * 2
+
+
+def test_result_is_cut_at_a_row_boundary():
+    result = tsv((2000 + i, i) for i in range(20))
+    kept, stats = select_query_results([("SELECT all", result)], budget=15)
+    trimmed = kept[0][1]
+    lines = trimmed.split("\n")
+    assert lines[0] == "rok\thodnota"
+    assert all(line in result.split("\n") for line in lines[:-1])
+    assert lines[-1].startswith("[... ") and lines[-1].endswith(" more lines omitted]")
+    assert stats["trimmed"] == 1
+
+
+def test_pdf_sentences_relevant_to_the_question_are_selected():
+    chunks = [
+        make_chunk(
+            "Úvod publikace. Praha měla v roce 2020 celkem 1 335 084 obyvatel. "
+            "Metodika je popsána jinde. Počet obyvatel Prahy rostl.",
+            "demografie.pdf",
+        ),
+        make_chunk("Brno je druhé největší město.", "brno.pdf"),
+    ]
+    extracts, stats = select_pdf_sentences(QUESTION, chunks, budget=1000)
+    assert extracts == [
+        (
+            "demografie.pdf",
+            "Praha měla v roce 2020 celkem 1 335 084 obyvatel. ... "
+            "Počet obyvatel Prahy rostl.",
+        )
+    ]
+    assert stats["chunks_used"] == 1 and stats["sentences_kept"] == 2
+
+
+def test_pdf_without_matches_uses_the_leading_sentences():
+    chunks = [make_chunk("První věta. Druhá věta. Třetí věta.", "a.pdf")]
+    # Two words plus one separator token per sentence: two of three fit
+    extracts, _ = select_pdf_sentences(QUESTION, chunks, budget=6)
+    assert extracts == [("a.pdf", "První věta. Druhá věta.")]
+
+
+def test_context_stays_within_the_budget():
+    queries = [(f"SELECT {i}", tsv((2000 + j, j) for j in range(30))) for i in range(5)]
+    chunks = [make_chunk("Praha měla v roce 2020 mnoho obyvatel. " * 50, "p.pdf")]
+    context = build_answer_context(QUESTION, queries, chunks, budget=300)
+    stats = context["stats"]
+    assert stats["sql"]["tokens"] + stats["pdf"]["tokens"] <= 300
+    assert context["sql_context"].startswith("Query 1:\n")
+    assert context["pdf_context"].startswith("PDF Source 1 (p.pdf):\n")
+
+
+def test_context_without_chunks_uses_the_whole_budget_for_sql():
+    queries = [("SELECT 1", tsv([(2020, 1)]))]
+    context = build_answer_context(QUESTION, queries, [], budget=100)
+    assert context["pdf_context"] == ""
+    assert context["stats"]["pdf"] == {}
+    assert context["stats"]["sql"]["kept"] == 1
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
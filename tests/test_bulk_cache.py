@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Test for the byte-bounded bulk payload cache (api.config.bulk_cache).
+Checks ETag-keyed lookups, LRU eviction by payload size, oversized payloads,
+expiry, explicit invalidation and that per-user locks serialize loads and are
+dropped once unused.
+No API server or database is needed.
+"""
+
+import os
+
+# CRITICAL: Set Windows event loop policy FIRST, before other imports
+import sys
+
+if sys.platform == "win32":
+    import asyncio
+
+    asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+# Load environment variables early
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Constants
+try:
+    from pathlib import Path
+
+    BASE_DIR = Path(__file__).resolve().parents[1]
+except NameError:
+    BASE_DIR = Path(os.getcwd()).parents[0]
+
+# Standard imports
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, str(BASE_DIR))
+
+from api.config import bulk_cache
+from api.config.bulk_cache import BulkLoadingCache
+
+# Test configuration
+TTL_SECONDS = 30
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replace the cache's clock with one the test advances explicitly."""
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(bulk_cache, "time", SimpleNamespace(time=lambda: now.value))
+    return now
+
+
+def test_lookup_requires_the_same_etag(clock):
+    cache = BulkLoadingCache(max_bytes=100, ttl_seconds=TTL_SECONDS)
+    assert cache.put("a@example.com", "etag-1", b"payload")
+    clock.value += 5
+    assert cache.get("a@example.com", "etag-1") == (b"payload", 5.0)
+    assert cache.get("a@example.com", "etag-2") is None
+    assert cache.get("b@example.com", "etag-1") is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 2
+    assert stats["hit_rate"] == pytest.approx(0.333)
+
+
+def test_least_recently_used_entries_are_evicted_by_size(clock):
+    cache = BulkLoadingCache(max_bytes=10, ttl_seconds=TTL_SECONDS)
+    cache.put("a", "e", b"aaaa")
+    cache.put("b", "e", b"bbbb")
+    # Reading "a" makes "b" the least recently used entry
+    assert cache.get("a", "e") is not None
+    cache.put("c", "e", b"cccc")
+
+    assert cache.get("b", "e") is None
+    assert cache.get("a", "e") is not None and cache.get("c", "e") is not None
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["size_bytes"] == 8 and stats["entries"] == 2
+
+
+def test_replacing_and_oversized_payloads_keep_the_byte_count(clock):
+    cache = BulkLoadingCache(max_bytes=10, ttl_seconds=TTL_SECONDS)
+    cache.put("a", "e1", b"123456")
+    cache.put("a", "e2", b"1234")
+    assert cache.stats()["size_bytes"] == 4
+    assert cache.get("a", "e1") is None
+
+    # A payload over the budget is not cached and drops the stale entry
+    assert not cache.put("a", "e3", b"x" * 11)
+    assert len(cache) == 0
+    stats = cache.stats()
+    assert stats["oversized"] == 1 and stats["size_bytes"] == 0
+
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = BulkLoadingCache(max_bytes=100, ttl_seconds=TTL_SECONDS)
+    cache.put("a", "e", b"payload")
+    cache.put("b", "e", b"payload")
+    clock.value += TTL_SECONDS + 1
+    assert cache.get("a", "e") is None
+    assert cache.cleanup_expired() == 1
+    stats = cache.stats()
+    assert stats["expirations"] == 2
+    assert stats["entries"] == 0 and stats["size_bytes"] == 0
+
+
+def test_invalidation_and_clear(clock):
+    cache = BulkLoadingCache(max_bytes=100, ttl_seconds=TTL_SECONDS)
+    cache.put("a", "e", b"payload")
+    cache.put("b", "e", b"payload")
+    assert cache.invalidate_user("a")
+    assert not cache.invalidate_user("a")
+    assert cache.get("a", "e") is None
+    assert cache.clear() == 1
+    stats = cache.stats()
+    assert stats["invalidations"] == 1 and stats["size_bytes"] == 0
+
+
+def test_user_lock_serializes_loads_and_is_dropped():
+    cache = BulkLoadingCache(max_bytes=100, ttl_seconds=TTL_SECONDS)
+    events = []
+
+    async def load(user_email, name):
+        async with cache.user_lock(user_email):
+            events.append(f"{name} start")
+            await asyncio.sleep(0.01)
+            events.append(f"{name} end")
+
+    async def run():
+        await asyncio.gather(
+            load("a", "first"), load("a", "second"), load("b", "other")
+        )
+
+    asyncio.run(run())
+    assert events.index("first end") < events.index("second start")
+    # The other user was not blocked by user "a"
+    assert events.index("other start") < events.index("second start")
+    assert cache.locks == {}
+    assert cache.stats()["active_locks"] == 0
+
+
+def test_user_lock_is_dropped_after_an_error():
+    cache = BulkLoadingCache(max_bytes=100, ttl_seconds=TTL_SECONDS)
+
+    async def run():
+        async with cache.user_lock("a"):
+            raise RuntimeError("load failed")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(run())
+    assert cache.locks == {}
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Test for configurable checkpoint durability (my_agent.utils.checkpoint_durability).
+Runs a small LangGraph graph on an in-memory checkpointer wrapped in "boundary"
+and "exit" mode and checks which checkpoints are persisted, that the chat
+history writes survive, that the flushed checkpoint holds the final state and
+that "full" mode leaves the checkpointer untouched.
+No API server or database is needed.
+"""
+
+import os
+
+# CRITICAL: Set Windows event loop policy FIRST, before other imports
+import sys
+
+if sys.platform == "win32":
+    import asyncio
+
+    asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+# Load environment variables early
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Constants
+try:
+    from pathlib import Path
+
+    BASE_DIR = Path(__file__).resolve().parents[1]
+except NameError:
+    BASE_DIR = Path(os.getcwd()).parents[0]
+
+# Standard imports
+import asyncio
+import operator
+from typing import Annotated, TypedDict
+
+import pytest
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.graph import END, START, StateGraph
+
+# Add project root to path
+sys.path.insert(0, str(BASE_DIR))
+
+from my_agent.utils import checkpoint_durability
+from my_agent.utils.checkpoint_durability import (
+    apply_checkpoint_durability,
+    flush_deferred_checkpoint,
+)
+
+# Test configuration
+NODES = ["rewrite_query", "retrieve", "generate_query", "submit_final_answer", "save"]
+PROMPT = "Kolik obyvatel má Praha?"
+
+
+class GraphState(TypedDict):
+    prompt: str
+    visited: Annotated[list, operator.add]
+    final_answer: str
+
+
+def make_node(name: str):
+    def node(state: GraphState) -> dict:
+        update = {"visited": [name]}
+        if name == "submit_final_answer":
+            update["final_answer"] = f"Answer to: {state['prompt']}"
+        return update
+
+    return node
+
+
+def build_graph(checkpointer):
+    graph = StateGraph(GraphState)
+    for name in NODES:
+        graph.add_node(name, make_node(name))
+    graph.add_edge(START, NODES[0])
+    for current, following in zip(NODES, NODES[1:]):
+        graph.add_edge(current, following)
+    graph.add_edge(NODES[-1], END)
+    return graph.compile(checkpointer=checkpointer)
+
+
+@pytest.fixture(autouse=True)
+def clean_durability_state():
+    checkpoint_durability._PENDING.clear()
+    checkpoint_durability._PERSISTED_IDS.clear()
+    for name in checkpoint_durability._STATS:
+        checkpoint_durability._STATS[name] = 0
+    yield
+    checkpoint_durability._PENDING.clear()
+    checkpoint_durability._PERSISTED_IDS.clear()
+
+
+def run_graph(mode: str, thread_id: str = "durability-thread"):
+    saver = apply_checkpoint_durability(InMemorySaver(), mode)
+    config = {"configurable": {"thread_id": thread_id}}
+
+    async def run():
+        graph = build_graph(saver)
+        result = await graph.ainvoke({"prompt": PROMPT, "visited": []}, config)
+        await flush_deferred_checkpoint(saver, thread_id)
+        checkpoints = [item async for item in saver.alist(config)]
+        latest = await saver.aget_tuple(config)
+        return result, list(reversed(checkpoints)), latest
+
+    result, checkpoints, latest = asyncio.run(run())
+    return saver, result, checkpoints, latest
+
+
+def written_nodes(checkpoint_tuple) -> set:
+    return set(checkpoint_tuple.metadata.get("writes") or {})
+
+
+def assert_consistent(saver, result, checkpoints, latest):
+    # The flushed checkpoint is complete: the thread resumes from the final state
+    assert latest.checkpoint["channel_values"]["final_answer"] == result["final_answer"]
+    assert latest.checkpoint["channel_values"]["visited"] == NODES
+    assert latest.metadata["step"] == len(NODES)
+
+    # Each persisted checkpoint points at the previous persisted one
+    persisted_ids = [
+        item.config["configurable"]["checkpoint_id"] for item in checkpoints
+    ]
+    for previous_id, item in zip(persisted_ids, checkpoints[1:]):
+        assert item.parent_config["configurable"]["checkpoint_id"] == previous_id
+
+    # The chat history reads the prompt and the answer from these writes
+    all_writes = {}
+    for item in checkpoints:
+        all_writes.update(item.metadata.get("writes") or {})
+    assert all_writes["__start__"]["prompt"] == PROMPT
+    assert all_writes["submit_final_answer"]["final_answer"] == result["final_answer"]
+
+    # Pending writes are only stored against persisted checkpoints
+    stored_ids = {checkpoint_id for _, _, checkpoint_id in saver.writes}
+    assert stored_ids <= set(persisted_ids)
+
+
+def test_boundary_mode_persists_boundary_checkpoints():
+    saver, result, checkpoints, latest = run_graph("boundary")
+    assert [item.metadata["step"] for item in checkpoints] == [-1, 1, 4, 5]
+    assert written_nodes(checkpoints[0]) == {"__start__"}
+    assert written_nodes(checkpoints[1]) == {"rewrite_query"}
+    # The skipped steps are merged into the next boundary checkpoint
+    assert written_nodes(checkpoints[2]) == {
+        "retrieve",
+        "generate_query",
+        "submit_final_answer",
+    }
+    assert written_nodes(checkpoints[3]) == {"save"}
+    assert_consistent(saver, result, checkpoints, latest)
+
+    stats = checkpoint_durability._STATS
+    assert stats["checkpoints_persisted"] == 3
+    assert stats["checkpoints_flushed"] == 1
+    assert stats["writes_skipped"] > 0
+    assert not checkpoint_durability._PENDING
+    assert not checkpoint_durability._PERSISTED_IDS
+
+
+def test_exit_mode_persists_input_and_flushed_checkpoint():
+    saver, result, checkpoints, latest = run_graph("exit")
+    assert [item.metadata["step"] for item in checkpoints] == [-1, len(NODES)]
+    assert written_nodes(checkpoints[1]) == set(NODES)
+    assert_consistent(saver, result, checkpoints, latest)
+    assert checkpoint_durability._STATS["checkpoints_persisted"] == 1
+
+
+def test_second_run_of_a_thread_continues_from_the_flushed_checkpoint():
+    saver = apply_checkpoint_durability(InMemorySaver(), "exit")
+    config = {"configurable": {"thread_id": "durability-resume"}}
+
+    async def run():
+        graph = build_graph(saver)
+        for _ in range(2):
+            await graph.ainvoke({"prompt": PROMPT, "visited": []}, config)
+            await flush_deferred_checkpoint(saver, "durability-resume")
+        return [item async for item in saver.alist(config)]
+
+    checkpoints = list(reversed(asyncio.run(run())))
+    assert [item.metadata["source"] for item in checkpoints] == [
+        "input",
+        "loop",
+        "input",
+        "loop",
+    ]
+    # The second input checkpoint builds on the first run's final state
+    second_input = checkpoints[2]
+    assert (
+        second_input.parent_config["configurable"]["checkpoint_id"]
+        == checkpoints[1].config["configurable"]["checkpoint_id"]
+    )
+    assert checkpoints[3].checkpoint["channel_values"]["visited"] == NODES * 2
+
+
+def test_full_mode_leaves_the_checkpointer_untouched():
+    saver = InMemorySaver()
+    assert apply_checkpoint_durability(saver, "full") is saver
+    assert not hasattr(saver, "aflush_deferred")
+
+    _, _, checkpoints, _ = run_graph("full")
+    # Input checkpoint, the empty step 0 and one per node
+    assert len(checkpoints) == len(NODES) + 2
+    assert not checkpoint_durability._PENDING
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
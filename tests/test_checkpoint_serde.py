@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Test for the compressed checkpoint serializer (my_agent.utils.checkpoint_serde).
+Round-trips LangGraph values through the zstd layer, checks that blobs written
+without compression stay readable, that dictionaries are selected by the ID in
+each frame and that bytes are attributed to checkpoint puts.
+No API server or database is needed; skipped without zstandard.
+"""
+
+import os
+
+# CRITICAL: Set Windows event loop policy FIRST, before other imports
+import sys
+
+if sys.platform == "win32":
+    import asyncio
+
+    asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+# Load environment variables early
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Constants
+try:
+    from pathlib import Path
+
+    BASE_DIR = Path(__file__).resolve().parents[1]
+except NameError:
+    BASE_DIR = Path(os.getcwd()).parents[0]
+
+# Standard imports
+import asyncio
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, str(BASE_DIR))
+
+pytest.importorskip("zstandard")
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from my_agent.utils import checkpoint_serde
+from my_agent.utils.checkpoint_serde import (
+    COMPRESSED_SUFFIX,
+    CompressedCheckpointSerializer,
+    instrument_checkpointer,
+    train_dictionary,
+)
+
+# Test configuration
+DICT_SIZE = 4096
+
+
+def make_state(index: int) -> dict:
+    return {
+        "prompt": f"Kolik obyvatel měl Jihomoravský kraj v roce {2000 + index}?",
+        "messages": [
+            HumanMessage(content=f"Otázka číslo {index}"),
+            AIMessage(content=f"Query:\nSELECT value FROM OBY01 WHERE rok = {index}"),
+        ],
+        # Lists, not tuples: msgpack does not keep tuples apart from lists
+        "queries_and_results": [
+            [f"SELECT {index}", "rok\thodnota\n" + f"{2000 + index}\t{index * 997}"]
+        ],
+        "iteration": index % 3,
+    }
+
+
+@pytest.fixture
+def dict_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(checkpoint_serde, "CHECKPOINT_ZSTD_DICT_DIR", tmp_path)
+    return tmp_path
+
+
+def train(dict_dir, offset=0):
+    inner = JsonPlusSerializer()
+    samples = [inner.dumps_typed(make_state(offset + i))[1] for i in range(300)]
+    return train_dictionary(samples, dict_size=DICT_SIZE)
+
+
+def test_round_trip_compresses_large_values():
+    serializer = CompressedCheckpointSerializer(compress=True, min_bytes=64)
+    state = make_state(1)
+    state["messages"] *= 20
+    type_, blob = serializer.dumps_typed(state)
+    assert type_.endswith(COMPRESSED_SUFFIX)
+    assert serializer.loads_typed((type_, blob)) == state
+    stats = serializer.get_stats()
+    assert stats["blobs_compressed"] == 1
+    assert stats["bytes_written"] < stats["bytes_raw"]
+
+
+def test_small_values_and_disabled_compression_stay_plain():
+    serializer = CompressedCheckpointSerializer(compress=True, min_bytes=1024)
+    type_, blob = serializer.dumps_typed({"iteration": 1})
+    assert not type_.endswith(COMPRESSED_SUFFIX)
+
+    serializer = CompressedCheckpointSerializer(compress=False)
+    type_, blob = serializer.dumps_typed(make_state(2))
+    assert not type_.endswith(COMPRESSED_SUFFIX)
+
+
+def test_blobs_written_before_compression_stay_readable():
+    legacy = JsonPlusSerializer().dumps_typed(make_state(3))
+    serializer = CompressedCheckpointSerializer(compress=True)
+    assert serializer.loads_typed(legacy) == make_state(3)
+    assert serializer.get_stats()["legacy_blobs_read"] == 1
+
+
+def test_dictionaries_are_selected_by_frame_id(dict_dir):
+    first_path = train(dict_dir)
+    old_writer = CompressedCheckpointSerializer(compress=True, dict_dir=dict_dir)
+    old_blob = old_writer.dumps_typed(make_state(4))
+    assert old_blob[0].endswith(COMPRESSED_SUFFIX)
+
+    # Retraining adds a newer dictionary; old blobs still decompress
+    second_path = train(dict_dir, offset=1000)
+    os.utime(second_path, (first_path.stat().st_mtime + 10,) * 2)
+    reader = CompressedCheckpointSerializer(compress=True, dict_dir=dict_dir)
+    assert len(reader.dictionaries) == 2
+    assert reader.dictionary.dict_id() != old_writer.dictionary.dict_id()
+    assert reader.loads_typed(old_blob) == make_state(4)
+
+    # A missing dictionary is reported instead of returning garbage
+    first_path.unlink()
+    without_first = CompressedCheckpointSerializer(compress=True, dict_dir=dict_dir)
+    with pytest.raises(ValueError, match="zstd dictionary"):
+        without_first.loads_typed(old_blob)
+
+
+def test_bytes_are_attributed_to_checkpoint_puts():
+    serializer = CompressedCheckpointSerializer(compress=True, min_bytes=64)
+
+    class FakeCheckpointer:
+        async def aput(self, config, checkpoint, metadata, new_versions):
+            serializer.dumps_typed(checkpoint)
+            serializer.dumps_typed(metadata)
+            return config
+
+        async def aput_writes(self, config, writes, task_id):
+            for _, value in writes:
+                serializer.dumps_typed(value)
+
+    checkpointer = instrument_checkpointer(FakeCheckpointer(), serializer)
+
+    async def run():
+        await checkpointer.aput({}, make_state(5), {"step": 1}, {})
+        await checkpointer.aput_writes({}, [("messages", make_state(6))], "task")
+
+    asyncio.run(run())
+    stats = serializer.get_stats()
+    assert stats["checkpoints"] == 1 and stats["write_batches"] == 1
+    assert stats["checkpoint_bytes_raw"] > 0
+    assert (
+        stats["checkpoint_bytes_written"] + stats["write_batch_bytes_written"]
+        == stats["bytes_written"]
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Test for the optional DuckDB engine (my_agent.utils.duckdb_engine).
+Runs the same SQLite-dialect queries through the SQLite guard and through
+DuckDB on a small temporary database and compares the complete results,
+including the dialect differences the engine compensates for.
+No API server or data database is needed; skipped without duckdb.
+"""
+
+import os
+
+# CRITICAL: Set Windows event loop policy FIRST, before other imports
+import sys
+
+if sys.platform == "win32":
+    import asyncio
+
+    asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+# Load environment variables early
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Constants
+try:
+    from pathlib import Path
+
+    BASE_DIR = Path(__file__).resolve().parents[1]
+except NameError:
+    BASE_DIR = Path(os.getcwd()).parents[0]
+
+# Standard imports
+import sqlite3
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, str(BASE_DIR))
+
+pytest.importorskip("duckdb")
+
+from my_agent.utils import duckdb_engine, sql_guard
+from my_agent.utils.duckdb_engine import (
+    DuckDBFallback,
+    build_columnar_copy,
+    execute_duckdb_query,
+    is_columnar_copy_current,
+)
+from my_agent.utils.sql_guard import STATUS_OK, execute_guarded_query
+from my_agent.utils.sqlite_pool import get_db_identity
+
+# Test configuration
+REGIONS = [
+    ("Praha", 1300000, 2),
+    ("Středočeský kraj", 1400000, 3),
+    ("Jihočeský kraj", 640000, None),
+    ("Plzeňský kraj", 590000, 5),
+]
+
+COMPARED_QUERIES = [
+    "SELECT 5/2, 7.0/2, SUM(population) / COUNT(*) FROM regions",
+    "SELECT region FROM regions WHERE region LIKE 'praha%'",
+    "SELECT region FROM regions WHERE region NOT LIKE '%KRAJ'",
+    "SELECT region, districts FROM regions ORDER BY districts",
+    "SELECT region, districts FROM regions ORDER BY districts DESC",
+    "SELECT `region`, population * 1.0 / 1000 FROM `regions` WHERE population > 600000",
+    "SELECT COUNT(*), AVG(population), MAX(region) FROM regions WHERE region LIKE '%kraj'",
+]
+
+
+@pytest.fixture
+def data_db(tmp_path, monkeypatch):
+    db_path = tmp_path / "czsu_data.db"
+    conn = sqlite3.connect(str(db_path))
+    conn.execute(
+        "CREATE TABLE regions (region TEXT, population INTEGER, districts INTEGER)"
+    )
+    conn.executemany("INSERT INTO regions VALUES (?, ?, ?)", REGIONS)
+    conn.commit()
+
+    monkeypatch.setattr(duckdb_engine, "DB_PATH", db_path)
+    monkeypatch.setattr(
+        duckdb_engine, "DUCKDB_DATABASE_PATH", tmp_path / "czsu_data.duckdb"
+    )
+    monkeypatch.setattr(
+        duckdb_engine, "get_db_identity", lambda: get_db_identity(db_path)
+    )
+    monkeypatch.setattr(sql_guard, "get_db_identity", lambda: get_db_identity(db_path))
+    monkeypatch.setattr(duckdb_engine, "_CONN", None)
+    monkeypatch.setattr(duckdb_engine, "_CONN_IDENTITY", None)
+    monkeypatch.setattr(duckdb_engine, "_UNAVAILABLE_REASON", None)
+    build_columnar_copy()
+    yield conn
+    conn.close()
+
+
+def _normalize(rows):
+    return [
+        tuple(round(float(v), 6) if isinstance(v, (int, float)) else v for v in row)
+        for row in rows
+    ]
+
+
+@pytest.mark.parametrize("query", COMPARED_QUERIES)
+def test_duckdb_matches_sqlite(data_db, query):
+    sqlite_result = execute_guarded_query(data_db, query)
+    duck_result = execute_duckdb_query(query)
+    assert sqlite_result["status"] == duck_result["status"] == STATUS_OK
+    # ORDER BY queries must match row for row, the others as sets
+    if "ORDER BY" in query:
+        assert _normalize(duck_result["rows"]) == _normalize(sqlite_result["rows"])
+    else:
+        assert sorted(_normalize(duck_result["rows"]), key=repr) == sorted(
+            _normalize(sqlite_result["rows"]), key=repr
+        )
+
+
+def test_double_quoted_string_falls_back(data_db):
+    # SQLite reads "Praha" as a string literal, DuckDB as a missing column
+    query = 'SELECT population FROM regions WHERE region = "Praha"'
+    assert execute_guarded_query(data_db, query)["rows"] == [(1300000,)]
+    with pytest.raises(DuckDBFallback):
+        execute_duckdb_query(query)
+
+
+def test_stale_columnar_copy_is_not_used(data_db):
+    assert is_columnar_copy_current()
+    data_db.execute("INSERT INTO regions VALUES ('Liberecký kraj', 440000, 4)")
+    data_db.commit()
+    os.utime(duckdb_engine.DB_PATH, (0, 0))
+    assert not is_columnar_copy_current()
+
+    build_columnar_copy()
+    assert is_columnar_copy_current()
+    assert execute_duckdb_query("SELECT COUNT(*) FROM regions")["rows"] == [(5,)]
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
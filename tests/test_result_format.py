@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Test for the compact SQL result encoding (my_agent.utils.result_format).
+Checks number formatting, the header + TSV layout, trimming to the token
+budget and the JSON-serializable structured form.
+No API server or database is needed.
+"""
+
+import os
+
+# CRITICAL: Set Windows event loop policy FIRST, before other imports
+import sys
+
+if sys.platform == "win32":
+    import asyncio
+
+    asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+# Load environment variables early
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Constants
+try:
+    from pathlib import Path
+
+    BASE_DIR = Path(__file__).resolve().parents[1]
+except NameError:
+    BASE_DIR = Path(os.getcwd()).parents[0]
+
+# Standard imports
+import json
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, str(BASE_DIR))
+
+from my_agent.utils import result_format
+from my_agent.utils.result_format import (
+    NO_RESULTS_TEXT,
+    build_structured_result,
+    encode_result_tsv,
+    format_cell,
+)
+
+# Test configuration
+COLUMNS = ["kraj", "hodnota"]
+
+
+@pytest.fixture
+def line_tokens(monkeypatch):
+    """Count one token per line so budgets are exact and no encoder is needed."""
+    monkeypatch.setattr(
+        result_format, "count_tokens", lambda text: text.count("\n") + 1
+    )
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        (None, "NULL"),
+        (True, "1"),
+        (1234567, "1234567"),
+        (1234567.0, "1234567"),
+        (1e20, "100000000000000000000"),
+        (0.1 + 0.2, "0.3"),
+        (2.50, "2.5"),
+        (-0.00001, "0"),
+        (b"\x00\x01", "<2 bytes>"),
+        ("Praha\thlavní\nměsto", "Praha hlavní město"),
+    ],
+)
+def test_format_cell(value, expected):
+    assert format_cell(value) == expected
+
+
+def test_header_and_rows_are_tab_separated(line_tokens):
+    text = encode_result_tsv(COLUMNS, [("Praha", 1300000), ("Brno", 2.5)])
+    assert text == "kraj\thodnota\nPraha\t1300000\nBrno\t2.5"
+
+
+def test_empty_result_keeps_the_note():
+    assert encode_result_tsv(COLUMNS, []) == NO_RESULTS_TEXT
+    assert encode_result_tsv(COLUMNS, [], note="QUERY ABORTED") == (
+        f"{NO_RESULTS_TEXT}\nQUERY ABORTED"
+    )
+
+
+def test_rows_are_trimmed_to_the_token_budget(line_tokens):
+    rows = [(f"region {index}", index) for index in range(10)]
+    text = encode_result_tsv(COLUMNS, rows, token_budget=4, note="guard note")
+    lines = text.split("\n")
+    # Header and three rows fit the budget of four lines
+    assert lines[:4] == ["kraj\thodnota", "region 0\t0", "region 1\t1", "region 2\t2"]
+    assert lines[4] == "RESULT TRUNCATED: showing 3 of 10 rows (token budget)"
+    assert lines[5] == "guard note"
+
+
+def test_result_within_budget_is_not_trimmed(line_tokens):
+    rows = [(f"region {index}", index) for index in range(3)]
+    assert "TRUNCATED" not in encode_result_tsv(COLUMNS, rows, token_budget=4)
+
+
+def test_structured_result_is_json_serializable():
+    result = build_structured_result(
+        "SELECT 1",
+        COLUMNS,
+        [("Praha", Decimal("1.50")), (date(2024, 1, 1), None)],
+        "ok",
+        elapsed_ms=1.5,
+    )
+    assert result["rows"] == [["Praha", "1.50"], ["2024-01-01", None]]
+    assert result["row_count"] == 2
+    assert result["columns"] == COLUMNS
+    json.dumps(result)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Test for question-aware schema pruning (my_agent.utils.schema_pruning).
+Builds a small JSON-stat schema and checks which dimension values are kept
+for a question: accent-insensitive prefix matches, total markers, small and
+time dimensions, the fallback sample and malformed input.
+No API server or database is needed.
+"""
+
+import os
+
+# CRITICAL: Set Windows event loop policy FIRST, before other imports
+import sys
+
+if sys.platform == "win32":
+    import asyncio
+
+    asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+# Load environment variables early
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Constants
+try:
+    from pathlib import Path
+
+    BASE_DIR = Path(__file__).resolve().parents[1]
+except NameError:
+    BASE_DIR = Path(os.getcwd()).parents[0]
+
+# Standard imports
+import json
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, str(BASE_DIR))
+
+from my_agent.utils import schema_pruning
+from my_agent.utils.schema_pruning import (
+    build_pruned_schema_text,
+    extract_question_terms,
+    prune_schema_json,
+    value_matches_question,
+)
+
+# Test configuration
+REGIONS = [
+    "Česká republika celkem",
+    "Hlavní město Praha",
+    "Středočeský kraj",
+    "Jihočeský kraj",
+    "Plzeňský kraj",
+    "Karlovarský kraj",
+    "Ústecký kraj",
+    "Liberecký kraj",
+    "Královéhradecký kraj",
+    "Pardubický kraj",
+    "Kraj Vysočina",
+    "Jihomoravský kraj",
+    "Olomoucký kraj",
+    "Zlínský kraj",
+    "Moravskoslezský kraj",
+]
+YEARS = [str(year) for year in range(2010, 2025)]
+KEEP_ALL_MAX = 5
+
+
+def category(values):
+    return {"category": {"label": {str(i): value for i, value in enumerate(values)}}}
+
+
+def make_schema():
+    return {
+        "dimension": {
+            "uzemi": {"label": "Území", **category(REGIONS)},
+            "rok": {"label": "Rok", **category(YEARS)},
+            "pohlavi": {"label": "Pohlaví", **category(["muži", "ženy"])},
+        },
+        "role": {"time": ["rok"]},
+    }
+
+
+@pytest.fixture(autouse=True)
+def small_dimensions(monkeypatch):
+    monkeypatch.setattr(schema_pruning, "SCHEMA_PRUNE_KEEP_ALL_MAX", KEEP_ALL_MAX)
+    monkeypatch.setattr(schema_pruning, "SCHEMA_PRUNE_FALLBACK_VALUES", 3)
+
+
+def test_question_terms_are_folded_without_stopwords():
+    terms = extract_question_terms("Kolik obyvatel má Jihomoravský kraj v roce 2020?")
+    assert terms == {"obyvatel", "jihomoravsky", "kraj", "2020"}
+
+
+def test_prefix_match_covers_inflection_but_not_numbers():
+    assert value_matches_question("Jihomoravský kraj", {"jihomoravskem"})
+    assert not value_matches_question("Jihočeský kraj", {"jihomoravskem"})
+    assert not value_matches_question("2021", {"2020"})
+
+
+def test_matching_values_and_totals_are_kept():
+    pruned = prune_schema_json(make_schema(), "Počet obyvatel Praha a Plzeňský")
+    regions = pruned["dimensions"]["Území"]
+    assert regions["values"] == [
+        "Česká republika celkem",
+        "Hlavní město Praha",
+        "Plzeňský kraj",
+    ]
+    assert regions["omitted_values_count"] == len(REGIONS) - 3
+
+    # "kraji" shares its prefix with every "... kraj" value, only Praha is dropped
+    pruned = prune_schema_json(make_schema(), "Obyvatelé v Jihomoravském kraji")
+    regions = pruned["dimensions"]["Území"]
+    assert "Hlavní město Praha" not in regions["values"]
+    assert regions["omitted_values_count"] == 1
+
+
+def test_small_dimensions_are_kept_whole():
+    pruned = prune_schema_json(make_schema(), "Počet žen v Praze")
+    assert pruned["dimensions"]["Pohlaví"] == {"values": ["muži", "ženy"]}
+    assert pruned["value_column"] == "value"
+
+
+def test_time_dimension_is_pruned_only_to_named_periods():
+    years = prune_schema_json(make_schema(), "Vývoj počtu obyvatel")["dimensions"]
+    assert years["Rok"] == {"values": YEARS}
+
+    years = prune_schema_json(make_schema(), "Obyvatelé v roce 2020 a 2021")
+    assert years["dimensions"]["Rok"]["values"] == ["2020", "2021"]
+
+
+def test_unmatched_dimension_keeps_a_sample():
+    pruned = prune_schema_json(make_schema(), "Průměrná mzda")
+    regions = pruned["dimensions"]["Území"]
+    # The total marker plus the first values of the fallback sample
+    assert regions["values"] == ["Česká republika celkem"] + REGIONS[1:3]
+
+
+def test_schema_text_falls_back_on_malformed_input():
+    question = "Obyvatelé Prahy"
+    assert build_pruned_schema_text("OBY01", None, question) is None
+    assert build_pruned_schema_text("OBY01", "{not json", question) is None
+    assert build_pruned_schema_text("OBY01", json.dumps({"a": 1}), question) is None
+
+
+def test_schema_text_notes_omitted_values():
+    text = build_pruned_schema_text(
+        "OBY01", json.dumps(make_schema()), "Obyvatelé Prahy", "Obyvatelstvo"
+    )
+    lines = text.split("\n")
+    assert lines[:2] == ["Dataset: OBY01.", "Obyvatelstvo"]
+    assert "omitted_values_count" in lines[2]
+    assert json.loads(lines[3])["dimensions"]["Území"]["omitted_values_count"] > 0
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
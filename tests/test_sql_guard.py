@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Test for the SQL cost guard (my_agent.utils.sql_guard).
+Builds two 20k-row tables in a temporary SQLite database and checks that only
+real nested full scans are rejected by the query plan check.
+No API server or data database is needed.
+"""
+
+import os
+
+# CRITICAL: Set Windows event loop policy FIRST, before other imports
+import sys
+
+if sys.platform == "win32":
+    import asyncio
+
+    asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+# Load environment variables early
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Constants
+try:
+    from pathlib import Path
+
+    BASE_DIR = Path(__file__).resolve().parents[1]
+except NameError:
+    BASE_DIR = Path(os.getcwd()).parents[0]
+
+# Standard imports
+import sqlite3
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, str(BASE_DIR))
+
+from my_agent.utils import sql_guard
+from my_agent.utils.sql_guard import (
+    STATUS_ABORTED,
+    estimate_scan_rows,
+    execute_guarded_query,
+)
+
+# Test configuration
+TABLE_ROWS = 20000
+
+
+@pytest.fixture
+def conn(tmp_path, monkeypatch):
+    db_path = tmp_path / "guard.db"
+    connection = sqlite3.connect(str(db_path))
+    for table in ("t", "u"):
+        connection.execute(f"CREATE TABLE {table} (a INTEGER, value REAL)")
+        connection.executemany(
+            f"INSERT INTO {table} VALUES (?, ?)",
+            ((index % 50, float(index)) for index in range(TABLE_ROWS)),
+        )
+    connection.commit()
+    # Row counts are cached per data DB identity; key them to this file instead
+    monkeypatch.setattr(
+        sql_guard, "get_db_identity", lambda: (0, 0.0, db_path.stat().st_ino)
+    )
+    sql_guard._TABLE_ROW_COUNTS.clear()
+    yield connection
+    connection.close()
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "SELECT * FROM (SELECT a, SUM(value) AS total FROM t GROUP BY a) "
+        "ORDER BY total DESC LIMIT 5",
+        "SELECT a, SUM(value) FROM t GROUP BY a "
+        "UNION ALL SELECT a, SUM(value) FROM u GROUP BY a",
+        "SELECT * FROM t WHERE value > (SELECT AVG(value) FROM t)",
+    ],
+)
+def test_separate_loops_are_not_multiplied(conn, query):
+    estimate = estimate_scan_rows(conn, query)
+    assert estimate["estimated_rows"] is None, estimate["plan"]
+    assert execute_guarded_query(conn, query)["status"] != STATUS_ABORTED
+
+
+def test_cross_join_is_aborted(conn):
+    query = "SELECT * FROM t, u"
+    estimate = estimate_scan_rows(conn, query)
+    assert estimate["full_scans"] == 2
+    assert estimate["estimated_rows"] == TABLE_ROWS * TABLE_ROWS
+
+    result = execute_guarded_query(conn, query)
+    assert result["status"] == STATUS_ABORTED
+    assert "2 nested full table scans" in result["reason"]
+
+
+def test_cross_join_inside_subquery_is_aborted(conn):
+    query = "SELECT COUNT(*) FROM (SELECT t.a FROM t, u GROUP BY t.a)"
+    assert execute_guarded_query(conn, query)["status"] == STATUS_ABORTED
+
+
+def test_indexed_join_is_not_multiplied(conn):
+    conn.execute("CREATE INDEX idx_u_a ON u (a)")
+    estimate = estimate_scan_rows(conn, "SELECT * FROM t JOIN u ON t.a = u.a")
+    assert estimate["estimated_rows"] is None, estimate["plan"]
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
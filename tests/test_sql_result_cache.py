@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Test for the SQL result cache (my_agent.utils.sql_result_cache).
+Checks that cache keys keep the case of aliases and expressions (SQLite names
+result columns after them), that only whitespace and trailing semicolons
+outside quotes are normalized, and that the LRU stays within its byte budget.
+No API server or database is needed.
+"""
+
+import os
+
+# CRITICAL: Set Windows event loop policy FIRST, before other imports
+import sys
+
+if sys.platform == "win32":
+    import asyncio
+
+    asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+# Load environment variables early
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Constants
+try:
+    from pathlib import Path
+
+    BASE_DIR = Path(__file__).resolve().parents[1]
+except NameError:
+    BASE_DIR = Path(os.getcwd()).parents[0]
+
+# Standard imports
+import sqlite3
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, str(BASE_DIR))
+
+from my_agent.utils.sql_result_cache import SQLResultCache, normalize_sql
+
+# Test configuration
+UPPER_ALIAS = "SELECT SUM(value) AS Total FROM t"
+LOWER_ALIAS = "select sum(value) as total from t"
+
+
+def run_query(query: str):
+    conn = sqlite3.connect(":memory:")
+    try:
+        conn.execute("CREATE TABLE t (value INTEGER)")
+        conn.execute("INSERT INTO t VALUES (1), (2)")
+        cursor = conn.execute(query)
+        return [column[0] for column in cursor.description], cursor.fetchall()
+    finally:
+        conn.close()
+
+
+def test_alias_case_gives_distinct_cache_keys():
+    # Same rows, different column headers
+    assert run_query(UPPER_ALIAS) == (["Total"], [(3,)])
+    assert run_query(LOWER_ALIAS) == (["total"], [(3,)])
+    assert normalize_sql(UPPER_ALIAS) != normalize_sql(LOWER_ALIAS)
+
+    cache = SQLResultCache(max_bytes=1024)
+    for query in (UPPER_ALIAS, LOWER_ALIAS):
+        columns, rows = run_query(query)
+        cache.put((normalize_sql(query),), (columns[0], {"columns": columns}))
+    assert cache.get((normalize_sql(LOWER_ALIAS),))[1]["columns"] == ["total"]
+    assert cache.get((normalize_sql(UPPER_ALIAS),))[1]["columns"] == ["Total"]
+
+
+def test_whitespace_and_semicolons_are_normalized():
+    assert normalize_sql("  SELECT\n  value\tFROM t ;\n") == "SELECT value FROM t"
+    # Quoted literals keep their whitespace and case
+    assert normalize_sql("SELECT * FROM t WHERE x = 'Praha  Východ';") == (
+        "SELECT * FROM t WHERE x = 'Praha  Východ'"
+    )
+
+
+def test_fold_case_compares_queries_but_keeps_literals():
+    assert normalize_sql(UPPER_ALIAS, fold_case=True) == normalize_sql(
+        LOWER_ALIAS, fold_case=True
+    )
+    assert normalize_sql("SELECT 'Praha'", fold_case=True) != normalize_sql(
+        "SELECT 'praha'", fold_case=True
+    )
+
+
+def test_cache_evicts_least_recently_used_entries():
+    value = ("x" * 40, {})
+    cache = SQLResultCache(max_bytes=100)
+    cache.put(("a",), value)
+    cache.put(("b",), value)
+    assert cache.get(("a",)) == value
+    cache.put(("c",), value)
+    assert cache.get(("b",)) is None
+    assert cache.get(("a",)) == value
+
+    cache.put(("big",), ("x" * 200, {}))
+    stats = cache.get_stats()
+    assert stats["oversized"] == 1 and stats["evictions"] == 1
+    assert stats["size_bytes"] <= 100
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
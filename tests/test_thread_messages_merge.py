@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Test for the thread_messages rows of finished runs (api.routes.chat and
+api.utils.analysis_jobs).
+Checks that every settled run gets a row (its answer from the checkpoints, or
+an error), that runs still in flight are neither stored nor scanned for, that
+stored errors reach the frontend and that failed jobs store their error.
+No API server or database is needed.
+"""
+
+import os
+
+# CRITICAL: Set Windows event loop policy FIRST, before other imports
+import sys
+
+if sys.platform == "win32":
+    import asyncio
+
+    asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+# Load environment variables early
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Constants
+try:
+    from pathlib import Path
+
+    BASE_DIR = Path(__file__).resolve().parents[1]
+except NameError:
+    BASE_DIR = Path(os.getcwd()).parents[0]
+
+# Standard imports
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, str(BASE_DIR))
+
+from api.routes import chat
+from api.routes.chat import (
+    UNFINISHED_RUN_ERROR,
+    add_missing_interactions,
+    get_thread_messages_with_metadata,
+)
+from api.utils import analysis_jobs
+
+# Test configuration
+TEST_EMAIL = "merge_test@example.com"
+THREAD_ID = "merge-thread"
+NOW = datetime(2026, 10, 19, 12, 0, 0)
+
+
+def make_run(index: int, settled: bool = True) -> tuple:
+    return (f"run-{index}", f"Prompt {index}", NOW + timedelta(minutes=index), settled)
+
+
+def make_row(index: int, error=None) -> dict:
+    return {
+        "run_id": f"run-{index}",
+        "prompt": f"Prompt {index}",
+        "final_answer": None if error else f"Answer {index}",
+        "queries_and_results": [],
+        "structured_query_results": [],
+        "datasets_used": [],
+        "top_chunks": [],
+        "error": error,
+        "created_at": NOW + timedelta(minutes=index),
+    }
+
+
+@pytest.fixture
+def store(monkeypatch):
+    """Record thread_messages writes and checkpoint scans instead of using the database."""
+    calls = {"saved": [], "scans": 0, "interactions": [], "rows": [], "runs": []}
+
+    async def fake_save(email, thread_id, run_id, **kwargs):
+        calls["saved"].append({"run_id": run_id, **kwargs})
+        return True
+
+    async def fake_load(checkpointer, thread_id):
+        calls["scans"] += 1
+        return calls["interactions"]
+
+    async def fake_rows(email, thread_id):
+        return calls["rows"]
+
+    async def fake_runs(email, thread_id, settled_after_seconds=0):
+        assert settled_after_seconds == chat.RUN_SETTLE_SECONDS
+        return calls["runs"]
+
+    monkeypatch.setattr(chat, "save_thread_message", fake_save)
+    monkeypatch.setattr(chat, "load_checkpoint_interactions", fake_load)
+    monkeypatch.setattr(chat, "get_thread_messages", fake_rows)
+    monkeypatch.setattr(chat, "get_thread_runs", fake_runs)
+    return calls
+
+
+def test_every_settled_run_gets_a_row(store):
+    store["interactions"] = [
+        {"step": 1, "prompt": "Prompt 1"},
+        {"step": 5, "final_answer": "Answer 1", "datasets_used": ["OBY01"]},
+        # Run 2 failed after its input checkpoint: a prompt without an answer
+        {"step": 7, "prompt": "Prompt 2"},
+    ]
+    runs = [make_run(0), make_run(1), make_run(2), make_run(3, settled=False)]
+
+    rows = asyncio.run(
+        add_missing_interactions(None, TEST_EMAIL, THREAD_ID, [make_row(0)], runs)
+    )
+
+    saved = {call["run_id"]: call for call in store["saved"]}
+    assert set(saved) == {"run-1", "run-2"}
+    assert saved["run-1"]["final_answer"] == "Answer 1"
+    assert saved["run-1"]["datasets_used"] == ["OBY01"]
+    assert saved["run-1"]["error"] is None
+    assert saved["run-2"]["final_answer"] is None
+    assert saved["run-2"]["error"] == UNFINISHED_RUN_ERROR
+    assert saved["run-2"]["prompt"] == "Prompt 2"
+    # Stored rows are never replaced
+    assert all(call["overwrite"] is False for call in store["saved"])
+    assert [row["run_id"] for row in rows] == ["run-0", "run-1", "run-2"]
+
+
+def test_run_without_checkpoints_keeps_its_prompt(store):
+    rows = asyncio.run(
+        add_missing_interactions(None, TEST_EMAIL, THREAD_ID, [], [make_run(4)])
+    )
+    assert rows[0]["prompt"] == "Prompt 4"
+    assert rows[0]["error"] == UNFINISHED_RUN_ERROR
+
+
+def test_runs_in_flight_are_not_scanned_for(store):
+    store["rows"] = [
+        make_row(0),
+        make_row(1, error="Analysis timed out after 8 minutes"),
+    ]
+    store["runs"] = [make_run(0), make_run(1), make_run(2, settled=False)]
+
+    messages = asyncio.run(
+        get_thread_messages_with_metadata(None, THREAD_ID, TEST_EMAIL)
+    )
+
+    assert store["scans"] == 0 and store["saved"] == []
+    assert [message.prompt for message in messages] == ["Prompt 0", "Prompt 1"]
+    assert not messages[0].isError and messages[0].error is None
+    assert messages[1].isError
+    assert messages[1].error == "Analysis timed out after 8 minutes"
+
+
+def test_settled_run_without_a_row_is_stored_once(store):
+    store["rows"] = [make_row(0)]
+    store["runs"] = [make_run(0), make_run(1)]
+
+    messages = asyncio.run(
+        get_thread_messages_with_metadata(None, THREAD_ID, TEST_EMAIL)
+    )
+
+    assert store["scans"] == 1
+    assert [call["run_id"] for call in store["saved"]] == ["run-1"]
+    assert messages[1].isError and messages[1].error == UNFINISHED_RUN_ERROR
+
+
+@pytest.fixture
+def job_queue(monkeypatch):
+    """Run _run_job without a database, admission table or real workers."""
+    calls = {"saved": [], "updates": []}
+
+    @asynccontextmanager
+    async def free_slot(thread_id):
+        yield
+
+    async def fake_update(run_id, status, result=None, error=None):
+        calls["updates"].append((run_id, status, error))
+
+    async def fake_save(email, thread_id, run_id, **kwargs):
+        calls["saved"].append({"run_id": run_id, **kwargs})
+        return True
+
+    monkeypatch.setattr(analysis_jobs, "analysis_slot", free_slot)
+    monkeypatch.setattr(analysis_jobs, "_update_job", fake_update)
+    monkeypatch.setattr(analysis_jobs, "save_thread_message", fake_save)
+    monkeypatch.setattr(analysis_jobs, "_QUEUE", asyncio.Queue())
+    monkeypatch.setattr(analysis_jobs, "ANALYSIS_TIMEOUT_SECONDS", 0.05)
+    return calls
+
+
+def make_job(index: int) -> dict:
+    return {
+        "run_id": f"job-{index}",
+        "email": TEST_EMAIL,
+        "thread_id": THREAD_ID,
+        "prompt": f"Prompt {index}",
+        "enqueued_at": 0.0,
+    }
+
+
+def test_failed_and_timed_out_jobs_store_their_error(job_queue):
+    async def failing(job):
+        raise RuntimeError("boom")
+
+    async def slow(job):
+        await asyncio.sleep(1)
+
+    async def succeeding(job):
+        return {"result": "ok"}
+
+    asyncio.run(analysis_jobs._run_job(make_job(1), failing))
+    asyncio.run(analysis_jobs._run_job(make_job(2), slow))
+    asyncio.run(analysis_jobs._run_job(make_job(3), succeeding))
+
+    saved = {call["run_id"]: call for call in job_queue["saved"]}
+    # The successful job's row is written by the runner itself
+    assert set(saved) == {"job-1", "job-2"}
+    assert saved["job-1"]["error"].startswith("Sorry, there was an error")
+    assert saved["job-2"]["error"].startswith("Analysis timed out")
+    assert saved["job-2"]["prompt"] == "Prompt 2"
+    assert all(call["overwrite"] is False for call in job_queue["saved"])
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
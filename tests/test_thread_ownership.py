@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Test for the per-user thread ownership cache (my_agent.utils.thread_ownership).
+Replaces the database connection with an in-memory users_threads_runs table
+and checks cache hits, the reload for runs created elsewhere, recorded and
+deleted threads, expiry, LRU eviction and load errors.
+No API server or database is needed.
+"""
+
+import os
+
+# CRITICAL: Set Windows event loop policy FIRST, before other imports
+import sys
+
+if sys.platform == "win32":
+    import asyncio
+
+    asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+# Load environment variables early
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Constants
+try:
+    from pathlib import Path
+
+    BASE_DIR = Path(__file__).resolve().parents[1]
+except NameError:
+    BASE_DIR = Path(os.getcwd()).parents[0]
+
+# Standard imports
+import asyncio
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, str(BASE_DIR))
+
+from my_agent.utils import postgres_checkpointer, thread_ownership
+from my_agent.utils.thread_ownership import (
+    get_thread_ownership_stats,
+    invalidate_thread,
+    record_thread_run,
+    user_owns_run,
+    user_owns_thread,
+)
+
+# Test configuration
+TEST_EMAIL = "ownership_test@example.com"
+OTHER_EMAIL = "other_user@example.com"
+TTL_SECONDS = 60
+
+
+class FakeCursor:
+    def __init__(self, table):
+        self.table = table
+        self.rows = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def execute(self, query, params):
+        if self.table.fail:
+            raise RuntimeError("connection refused")
+        self.table.queries += 1
+        self.rows = [
+            (thread_id, run_id)
+            for email, thread_id, run_id in self.table.rows
+            if email == params[0]
+        ]
+
+    async def fetchall(self):
+        return self.rows
+
+
+class FakeConnection:
+    def __init__(self, table):
+        self.table = table
+
+    def cursor(self):
+        return FakeCursor(self.table)
+
+
+@pytest.fixture
+def table(monkeypatch):
+    """An in-memory users_threads_runs table behind get_direct_connection."""
+    table = SimpleNamespace(
+        rows=[(TEST_EMAIL, "thread-1", "run-1"), (OTHER_EMAIL, "thread-2", "run-2")],
+        queries=0,
+        fail=False,
+    )
+
+    @asynccontextmanager
+    async def fake_connection():
+        yield FakeConnection(table)
+
+    monkeypatch.setattr(postgres_checkpointer, "get_direct_connection", fake_connection)
+    monkeypatch.setattr(thread_ownership, "THREAD_OWNERSHIP_TTL_SECONDS", TTL_SECONDS)
+    thread_ownership._ENTRIES.clear()
+    for name in thread_ownership._STATS:
+        monkeypatch.setitem(thread_ownership._STATS, name, 0)
+    yield table
+    thread_ownership._ENTRIES.clear()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replace the cache's clock with one the test advances explicitly."""
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(
+        thread_ownership, "time", SimpleNamespace(monotonic=lambda: now.value)
+    )
+    return now
+
+
+def test_ownership_is_loaded_once_per_user(table):
+    assert asyncio.run(user_owns_thread(TEST_EMAIL, "thread-1"))
+    assert asyncio.run(user_owns_run(TEST_EMAIL, "run-1"))
+    assert asyncio.run(user_owns_thread(TEST_EMAIL, "thread-1"))
+    assert table.queries == 1
+
+    stats = get_thread_ownership_stats()
+    assert stats["loads"] == 1 and stats["hits"] == 2 and stats["misses"] == 1
+    assert stats["cached_users"] == 1
+
+
+def test_foreign_and_unknown_threads_are_denied(table):
+    assert not asyncio.run(user_owns_thread(TEST_EMAIL, "thread-2"))
+    assert not asyncio.run(user_owns_run(TEST_EMAIL, "run-2"))
+    assert not asyncio.run(user_owns_thread(TEST_EMAIL, "missing"))
+    # Empty identifiers never reach the database
+    assert not asyncio.run(user_owns_thread("", "thread-1"))
+    assert not asyncio.run(user_owns_thread(TEST_EMAIL, ""))
+    assert table.queries == 3
+
+
+def test_run_created_by_another_worker_triggers_a_reload(table):
+    assert asyncio.run(user_owns_thread(TEST_EMAIL, "thread-1"))
+    table.rows.append((TEST_EMAIL, "thread-3", "run-3"))
+    assert asyncio.run(user_owns_thread(TEST_EMAIL, "thread-3"))
+    assert table.queries == 2
+
+
+def test_recorded_runs_are_authorized_without_a_reload(table):
+    assert asyncio.run(user_owns_thread(TEST_EMAIL, "thread-1"))
+    record_thread_run(TEST_EMAIL, "thread-3", "run-3")
+    assert asyncio.run(user_owns_thread(TEST_EMAIL, "thread-3"))
+    assert asyncio.run(user_owns_run(TEST_EMAIL, "run-3"))
+    assert table.queries == 1
+
+    # Without a cached entry there is nothing to update
+    record_thread_run(OTHER_EMAIL, "thread-4", "run-4")
+    assert OTHER_EMAIL not in thread_ownership._ENTRIES
+
+
+def test_deleted_threads_are_forgotten(table):
+    assert asyncio.run(user_owns_run(TEST_EMAIL, "run-1"))
+    table.rows = [row for row in table.rows if row[1] != "thread-1"]
+    invalidate_thread(TEST_EMAIL, "thread-1")
+    assert not asyncio.run(user_owns_thread(TEST_EMAIL, "thread-1"))
+    assert not asyncio.run(user_owns_run(TEST_EMAIL, "run-1"))
+    assert get_thread_ownership_stats()["invalidations"] == 1
+
+
+def test_entries_expire_after_the_ttl(table, clock):
+    assert asyncio.run(user_owns_thread(TEST_EMAIL, "thread-1"))
+    clock.value += TTL_SECONDS - 1
+    assert asyncio.run(user_owns_thread(TEST_EMAIL, "thread-1"))
+    assert table.queries == 1
+
+    clock.value += 2
+    assert asyncio.run(user_owns_thread(TEST_EMAIL, "thread-1"))
+    assert table.queries == 2
+
+
+def test_least_recently_used_users_are_evicted(table, monkeypatch):
+    monkeypatch.setattr(thread_ownership, "THREAD_OWNERSHIP_MAX_USERS", 1)
+    asyncio.run(user_owns_thread(TEST_EMAIL, "thread-1"))
+    asyncio.run(user_owns_thread(OTHER_EMAIL, "thread-2"))
+    assert list(thread_ownership._ENTRIES) == [OTHER_EMAIL]
+    assert get_thread_ownership_stats()["evictions"] == 1
+
+
+def test_load_errors_are_raised_and_counted(table):
+    table.fail = True
+    with pytest.raises(RuntimeError, match="connection refused"):
+        asyncio.run(user_owns_thread(TEST_EMAIL, "thread-1"))
+    assert get_thread_ownership_stats()["load_errors"] == 1
+    assert TEST_EMAIL not in thread_ownership._ENTRIES
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Test for keyset pagination of GET /chat-threads (api.routes.chat).
+Checks that cursors round-trip, that malformed cursors are rejected and that
+cursor pages skip the per-user thread count.
+No API server or database is needed.
+"""
+
+import os
+
+# CRITICAL: Set Windows event loop policy FIRST, before other imports
+import sys
+
+if sys.platform == "win32":
+    import asyncio
+
+    asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+# Load environment variables early
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Constants
+try:
+    from pathlib import Path
+
+    BASE_DIR = Path(__file__).resolve().parents[1]
+except NameError:
+    BASE_DIR = Path(os.getcwd()).parents[0]
+
+# Standard imports
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+# Add project root to path
+sys.path.insert(0, str(BASE_DIR))
+
+from api.routes import chat
+from api.routes.chat import (
+    decode_threads_cursor,
+    encode_threads_cursor,
+    get_chat_threads,
+)
+
+# Test configuration
+TEST_USER = {"email": "cursor_test@example.com"}
+NOW = datetime(2026, 10, 19, 12, 30, 45, 123456)
+
+
+def make_thread(index: int) -> dict:
+    return {
+        "thread_id": f"thread|{index}",
+        "latest_timestamp": NOW - timedelta(minutes=index),
+        "run_count": 1,
+        "title": f"Thread {index}",
+        "full_prompt": f"Prompt {index}",
+    }
+
+
+@pytest.fixture
+def thread_store(monkeypatch):
+    calls = {"count": 0, "before": []}
+    threads = [make_thread(index) for index in range(5)]
+
+    async def fake_count(email):
+        calls["count"] += 1
+        return len(threads)
+
+    async def fake_threads(email, limit=None, offset=0, before=None):
+        calls["before"].append(before)
+        remaining = [
+            thread
+            for thread in threads
+            if before is None
+            or (thread["latest_timestamp"], thread["thread_id"]) < before
+        ]
+        return remaining[offset : offset + limit]
+
+    monkeypatch.setattr(chat, "get_user_chat_threads_count", fake_count)
+    monkeypatch.setattr(chat, "get_user_chat_threads", fake_threads)
+    return calls
+
+
+def test_cursor_round_trip():
+    thread = make_thread(0)
+    cursor = encode_threads_cursor(thread)
+    # Thread IDs may contain the separator; only the first one splits
+    assert decode_threads_cursor(cursor) == (NOW, "thread|0")
+    # URL-safe alphabet: usable as ?cursor= without escaping
+    assert "/" not in cursor and "+" not in cursor
+
+
+@pytest.mark.parametrize("cursor", ["not base64!", "bm8tc2VwYXJhdG9y", "eHx5"])
+def test_invalid_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as exc_info:
+        decode_threads_cursor(cursor)
+    assert exc_info.value.status_code == 400
+
+
+def test_cursor_pages_skip_the_count(thread_store):
+    first = asyncio.run(get_chat_threads(page=1, limit=2, cursor=None, user=TEST_USER))
+    assert first.total_count == 5
+    assert first.has_more
+    assert thread_store["count"] == 1
+
+    second = asyncio.run(
+        get_chat_threads(page=1, limit=2, cursor=first.next_cursor, user=TEST_USER)
+    )
+    assert second.total_count is None
+    assert thread_store["count"] == 1
+    assert thread_store["before"][-1] == (NOW - timedelta(minutes=1), "thread|1")
+    assert [thread.thread_id for thread in second.threads] == ["thread|2", "thread|3"]
+
+    last = asyncio.run(
+        get_chat_threads(page=1, limit=2, cursor=second.next_cursor, user=TEST_USER)
+    )
+    assert [thread.thread_id for thread in last.threads] == ["thread|4"]
+    assert not last.has_more and last.next_cursor is None
+    assert thread_store["count"] == 1
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))